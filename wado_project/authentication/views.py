@@ -9,6 +9,8 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from django.contrib.auth.views import LogoutView
 
+from core.utils import user_in_group
+
 class CustomLogoutView(LogoutView):
     next_page = reverse_lazy('home')  # или другая страница после выхода
 
@@ -20,11 +22,11 @@ class CustomLoginView(LoginView):
         user = self.request.user
         if user.is_superuser:
             return reverse_lazy('admin:index')
-        elif user.groups.filter(name='Комендант').exists():
+        elif user_in_group(user, 'Комендант'):
             return reverse_lazy('commandant:profile')
-        elif user.groups.filter(name='Факультет').exists():
+        elif user_in_group(user, 'Факультет'):
             return reverse_lazy('faculty:profile')
-        elif user.groups.filter(name='Кафедра').exists():
+        elif user_in_group(user, 'Кафедра'):
             return reverse_lazy('department:profile')
         else:
             messages.warning(self.request, 'Вам не назначены права доступа')
@@ -43,11 +45,11 @@ class ProfileRedirectView(TemplateView):
         user = request.user
         if user.is_superuser:
             return redirect('admin:index')
-        elif user.groups.filter(name='Комендант').exists():
+        elif user_in_group(user, 'Комендант'):
             return redirect('commandant:profile')
-        elif user.groups.filter(name='Факультет').exists():
+        elif user_in_group(user, 'Факультет'):
             return redirect('faculty:profile')
-        elif user.groups.filter(name='Кафедра').exists():
+        elif user_in_group(user, 'Кафедра'):
             return redirect('department:profile')
         else:
             messages.warning(request, 'Вам не назначены права доступа')
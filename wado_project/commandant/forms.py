@@ -0,0 +1,38 @@
+# commandant/forms.py
+from django import forms
+
+from core.importing import IMPORTERS
+
+
+class ImportForm(forms.Form):
+    KIND_CHOICES = [
+        ('people', 'Личный состав'),
+        ('permissions', 'Допуски к нарядам'),
+        ('absences', 'Освобождения'),
+    ]
+
+    kind = forms.ChoiceField(label='Что импортировать', choices=KIND_CHOICES)
+    file = forms.FileField(
+        label='Файл CSV или XLSX',
+        help_text='Первая строка - заголовки колонок',
+        widget=forms.ClearableFileInput(attrs={'accept': '.csv,.xlsx'}),
+    )
+    dry_run = forms.BooleanField(label='Только проверить, не записывать', required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            if name != 'dry_run':
+                field.widget.attrs['class'] = 'form-control'
+
+    def clean_kind(self):
+        kind = self.cleaned_data['kind']
+        if kind not in IMPORTERS:
+            raise forms.ValidationError('Неизвестный вид импорта')
+        return kind
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Поддерживаются файлы .csv и .xlsx')
+        return upload
@@ -1,3 +1,405 @@
-from django.test import TestCase
+import csv
+import io
+import zipfile
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+
+from core.models import Job
+from core.testing import SMALL_ACADEMY, ViewPerformanceTestCase
+from duty.calendar_grid import CalendarBuilder
+from duty.models import DutySchedule, MonthlyDutyPlan
+from record.models import DutyRecord
+from record.services import RosterService
+from duty.unit_stats import UnitStatsBuilder
+from duty.versions import get_month_version
+from missing.models import FacultyMissing
+from people.models import People
+
+
+class CommandantViewsPerformanceTest(ViewPerformanceTestCase):
+    """Границы числа запросов для страниц коменданта"""
+
+    def setUp(self):
+        super().setUp()
+        self.login('commandant')
+
+    def test_profile(self):
+        self.assertViewBudget(reverse('commandant:profile'), 6)
+
+    def test_staff_list(self):
+        self.assertViewBudget(reverse('commandant:staff'), 12)
+
+    def test_staff_list_filtered(self):
+        faculty = self.academy.faculties[0]
+        duty = self.academy.commandant_duties[0]
+        self.assertViewBudget(reverse('commandant:staff'), 12, data={'unit': f'id_f_{faculty.pk}', 'duty': duty.pk})
+
+    def test_staff_list_last_page(self):
+        last_page = -(-len(self.academy.people) // settings.STAFF_PAGE_SIZE)
+        self.assertViewBudget(reverse('commandant:staff'), 12, data={'page': last_page})
+
+    def test_staff_detail(self):
+        person = self.academy.department_people[0]
+        self.assertViewBudget(reverse('commandant:staff_detail', args=[person.pk]), 7)
+
+    def test_duty_plan(self):
+        month = self.academy.month
+        # +1 запрос: правила расписания нарядов плана (DutyScheduleRule) одним запросом
+        self.assertViewBudget(reverse('commandant:duty_plan'), 21, data={'year': month.year, 'month': month.month})
+
+    def test_plan_list(self):
+        self.assertViewBudget(reverse('commandant:plan_list'), 10)
+
+    def test_plan_list_constant_queries(self):
+        month = self.academy.month
+        for offset in range(1, 10):
+            year, index = divmod(month.month - 1 - offset, 12)
+            MonthlyDutyPlan.objects.create(month=month.replace(year=month.year + year, month=index + 1),
+                                           is_generated=True)
+        DutySchedule.objects.filter(pk=self.academy.schedules[0].pk).update(is_manually_assigned=True)
+
+        response = self.assertViewBudget(reverse('commandant:plan_list'), 10)
+        plans = {plan.month: plan for plan in response.context['plans']}
+        self.assertEqual(len(plans), 10)
+        self.assertEqual(plans[month].schedule_count, len(self.academy.schedules))
+        self.assertEqual(plans[month].manual_count, 1)
+        self.assertEqual(plans[month].schedule_load, sum(
+            schedule.duty.duty_weight * schedule.duty.people_count for schedule in self.academy.schedules
+        ))
+        self.assertTrue(all(plan.schedule_count == 0 for key, plan in plans.items() if key != month))
+
+    def test_plan_detail(self):
+        self.assertViewBudget(reverse('commandant:plan_detail', args=[self.academy.plan.pk]), 12)
+
+    def test_duty_list(self):
+        self.assertViewBudget(reverse('commandant:duty:list'), 7)
+
+    def test_save_duty_schedule_settings(self):
+        month = self.academy.month
+        duty = self.academy.commandant_duties[0]
+        url = reverse('commandant:duty_plan') + f'?year={month.year}&month={month.month}'
+        data = self.client.post(url, {
+            'duty_id': duty.pk,
+            'specific_dates[]': [f'05.{month:%m.%Y}', 'завтра'],
+            'weekdays[]': ['Понедельник'],
+        }, HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+        self.assertEqual(data['errors'], ["Некорректная дата: 'завтра'"])
+        self.assertEqual(data['settings']['specific_dates'], [f'05.{month:%m.%Y}'])
+
+        settings = self.assertViewBudget(url + f'&ajax=1&duty_id={duty.pk}', 7).json()['settings']
+        self.assertEqual(settings, {'ranges': [], 'specific_dates': [f'05.{month:%m.%Y}'], 'weekdays': ['Понедельник']})
+
+    def test_generate_roster(self):
+        month = self.academy.month
+        response = self.assertViewBudget(
+            reverse('commandant:generate_roster'), 20,
+            method='post', data={'year': month.year, 'month': month.month},
+        )
+        self.assertTrue(response.json()['success'])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_generate_duty_plan(self):
+        month = self.academy.month
+        data = {
+            'year': month.year,
+            'month': month.month,
+            'duties': ','.join(str(duty.pk) for duty in self.academy.commandant_duties),
+            'selected_units': self.academy.plan.selected_units,
+        }
+        # Генерация целиком в запросе (JOBS_EAGER): справочники и запись графика пакетами
+        url = reverse('commandant:generate_duty_plan')
+        response = self.assertViewBudget(url, 32, method='post', data={**data, 'mode': 'full'})
+        self.assertEqual(response.json()['job']['status'], Job.SUCCEEDED)
+        response = self.assertViewBudget(url, 25, method='post', data={**data, 'mode': 'incremental'})
+        self.assertEqual(response.json()['job']['status'], Job.SUCCEEDED)
+
+    def test_reset_duty_plan(self):
+        month = self.academy.month
+        self.assertViewBudget(
+            reverse('commandant:reset_duty_plan'), 9, method='post',
+            data={'year': month.year, 'month': month.month}, status=302,
+        )
+        self.assertFalse(DutySchedule.objects.for_month(month).exists())
+
+    def test_update_schedule(self):
+        schedule = self.academy.schedules[0]
+        faculty = self.academy.faculties[1]
+        response = self.assertViewBudget(
+            reverse('commandant:update_schedule', args=[schedule.pk]), 6, method='post',
+            data={'unit_type': 'faculty', 'unit_id': faculty.pk},
+        )
+        self.assertTrue(response.json()['is_manually_assigned'])
+
+
+class StaffListScaleTest(ViewPerformanceTestCase):
+    """Списки личного состава на 3000 человек: постраничный вывод и то же число запросов"""
+
+    factory_options = {'people_per_department': 240, 'management_per_faculty': 40}
+
+    def test_commandant_staff_list(self):
+        self.assertEqual(len(self.academy.people), 3000)
+        self.login('commandant')
+        response = self.assertViewBudget(reverse('commandant:staff'), 12)
+        self.assertEqual(response.context['total_people'], 3000)
+        self.assertEqual(len(response.context['table_items']), settings.STAFF_PAGE_SIZE)
+        self.assertViewBudget(reverse('commandant:staff'), 12, data={'page': 30})
+
+    def test_commandant_list_shows_department_absences_only(self):
+        self.login('commandant')
+        faculty = self.academy.faculties[0]
+        absent = FacultyMissing.objects.select_related('person').filter(person__faculty=faculty).first()
+        response = self.client.get(reverse('commandant:staff'), {'unit': f'id_f_{faculty.pk}', 'page': 10})
+        rows = {item['fields'][1]['value']: item['fields'][-1]['value'] for item in response.context['table_items']}
+        self.assertEqual(rows[absent.person.full_name], '-')
+
+    def test_faculty_staff_list(self):
+        self.login('faculty')
+        response = self.assertViewBudget(reverse('faculty:staff'), 12)
+        self.assertEqual(response.context['total_people'], 4 * 240 + 40)
+        self.assertViewBudget(reverse('faculty:staff'), 12, data={'page': 10})
+
+
+class CalendarGridTest(ViewPerformanceTestCase):
+    """Календарная сетка месяца строится один раз и перестраивается после изменения графика"""
+
+    factory_options = SMALL_ACADEMY
+
+    def test_grid_groups_schedules_by_date(self):
+        grid = CalendarBuilder(self.academy.month).build()
+        self.assertEqual(len(grid), len(self.academy.schedules))
+        for week in grid.weeks:
+            self.assertEqual(len(week), 7)
+            for cell in week:
+                if cell['date'] is not None:
+                    self.assertTrue(all(schedule.date == cell['date'] for schedule in cell['schedules']))
+        self.assertEqual(sum(len(cell['schedules']) for week in grid.weeks for cell in week), len(grid))
+
+    def test_grid_cache_follows_schedule_version(self):
+        builder = CalendarBuilder(self.academy.month)
+        with self.assertNumQueries(1):
+            grid = builder.get()
+        # Версия и сетка берутся из кэша
+        with self.assertNumQueries(0):
+            self.assertEqual(builder.get().version, grid.version)
+
+        schedule = DutySchedule.objects.get(pk=self.academy.schedules[0].pk)
+        schedule.assigned_faculty = None
+        schedule.assigned_department = self.academy.departments[-1]
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule.save()
+        with self.assertNumQueries(1):
+            regrid = builder.get()
+        self.assertNotEqual(regrid.version, grid.version)
+        changed = next(s for s in regrid.by_date[schedule.date] if s.pk == schedule.pk)
+        self.assertEqual(changed.assigned_department_id, self.academy.departments[-1].pk)
+
+    def test_duty_and_unit_changes_bump_version(self):
+        month = self.academy.month
+        duty = self.academy.commandant_duties[0]
+        version = CalendarBuilder(month).get().version
+
+        duty.duty_name = 'Переименованный наряд'
+        with self.captureOnCommitCallbacks(execute=True):
+            duty.save()
+        self.assertNotEqual(get_month_version(month), version)
+        grid = CalendarBuilder(month).get()
+        self.assertIn('Переименованный наряд', {schedule.duty.duty_name for schedule in grid.schedules})
+
+        faculty = self.academy.faculties[0]
+        faculty.name = 'Новое имя'
+        with self.captureOnCommitCallbacks(execute=True):
+            faculty.save()
+        self.assertNotEqual(get_month_version(month), grid.version)
+        grid = CalendarBuilder(month).get()
+
+        # Удаление наряда удаляет его записи каскадом, без DutySchedule.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            duty.delete()
+        self.assertNotEqual(get_month_version(month), grid.version)
+        self.assertFalse(any(schedule.duty_id == duty.pk for schedule in CalendarBuilder(month).get().schedules))
+
+    def test_reset_bumps_month_version(self):
+        month = self.academy.month
+        grid = CalendarBuilder(month).get()
+        self.login('commandant')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('commandant:reset_duty_plan'), {'year': month.year, 'month': month.month})
+        self.assertNotEqual(get_month_version(month), grid.version)
+        self.assertEqual(len(CalendarBuilder(month).get()), 0)
+
+
+class UnitStatsTest(ViewPerformanceTestCase):
+    """Статистика по подразделениям считается в SQL и совпадает с подсчётом по нарядам"""
+
+    factory_options = SMALL_ACADEMY
+
+    def expected_stats(self):
+        expected = {}
+        for schedule in self.academy.schedules:
+            if schedule.assigned_faculty_id:
+                key = f'faculty_{schedule.assigned_faculty_id}'
+            else:
+                key = f'department_{schedule.assigned_department_id}'
+            stat = expected.setdefault(key, {'count': 0, 'people': 0, 'load': 0, 'duties': set()})
+            stat['count'] += 1
+            stat['people'] += schedule.duty.people_count
+            stat['load'] += schedule.duty.duty_weight * schedule.duty.people_count
+            stat['duties'].add(schedule.duty.duty_name)
+        return expected
+
+    def test_stats_match_schedules(self):
+        with self.assertNumQueries(2):
+            stats = UnitStatsBuilder(self.academy.month, version='test').build()
+
+        expected = self.expected_stats()
+        self.assertEqual(set(stats), set(expected))
+        for key, stat in stats.items():
+            self.assertEqual(stat['count'], expected[key]['count'], key)
+            self.assertEqual(stat['people'], expected[key]['people'], key)
+            self.assertAlmostEqual(stat['load'], expected[key]['load'], msg=key)
+            self.assertEqual(stat['duties'], sorted(expected[key]['duties']), key)
+
+    def test_stats_cache_follows_schedule_version(self):
+        builder = UnitStatsBuilder(self.academy.month)
+        with self.assertNumQueries(2):
+            stats = builder.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(UnitStatsBuilder(self.academy.month).get(), stats)
+
+        department = self.academy.departments[-1]
+        schedule = DutySchedule.objects.get(pk=self.academy.schedules[0].pk)
+        schedule.assigned_faculty = None
+        schedule.assigned_department = department
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule.save()
+        restats = UnitStatsBuilder(self.academy.month).get()
+        self.assertEqual(restats[f'department_{department.pk}']['count'],
+                         stats.get(f'department_{department.pk}', {'count': 0})['count'] + 1)
+
+
+class AssignmentStatusTest(ViewPerformanceTestCase):
+    """Статус назначения вычисляется один раз на экземпляр и сбрасывается при сохранении"""
+
+    factory_options = SMALL_ACADEMY
+
+    def test_status_memoized_and_reset_on_save(self):
+        schedule = DutySchedule.objects.select_related('duty').get(pk=self.academy.schedules[0].pk)
+        self.assertEqual(schedule.assignment_status, 'rotating')
+        self.assertEqual(schedule.get_assignment_status_display(), 'Ротация')
+        self.assertEqual(schedule.get_assignment_badge_class(), 'badge-rotating')
+
+        schedule.is_manually_assigned = True
+        self.assertEqual(schedule.assignment_status, 'rotating')  # закэширован до save()
+        schedule.save()
+        self.assertEqual(schedule.assignment_status, 'changed')
+
+    def test_manual_reassignment(self):
+        self.login('commandant')
+        schedule = self.academy.schedules[0]
+        department = self.academy.departments[1]
+        url = reverse('commandant:update_schedule', args=[schedule.pk])
+
+        data = self.client.post(url, {'unit_type': 'department', 'unit_id': department.pk}).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['unit_name'], f'Кафедра {department.name}')
+        self.assertEqual(data['status'], 'changed')
+        schedule.refresh_from_db()
+        self.assertEqual((schedule.assigned_department_id, schedule.assigned_faculty_id), (department.pk, None))
+
+        self.assertFalse(self.client.post(url, {'unit_type': 'unit', 'unit_id': department.pk}).json()['success'])
+
+
+class ExportTest(ViewPerformanceTestCase):
+    """Выгрузка графика и поимённого распределения потоком, XLSX - по листу на факультет"""
+
+    factory_options = SMALL_ACADEMY
+
+    SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+    def setUp(self):
+        super().setUp()
+        self.login('commandant')
+
+    def export(self, kind, export_format, queries):
+        month = self.academy.month
+        response = self.client.get(
+            reverse('commandant:export', args=[kind]),
+            {'year': month.year, 'month': month.month, 'format': export_format},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        # Строки читаются при отдаче ответа, а не в представлении
+        with self.assertNumQueries(queries):
+            return b''.join(response.streaming_content)
+
+    def test_schedule_csv(self):
+        content = self.export('schedule', 'csv', 1).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content), delimiter=';'))
+        self.assertEqual(rows[0][0], 'Дата')
+        self.assertEqual(len(rows) - 1, len(self.academy.schedules))
+
+    def test_schedule_xlsx_sheet_per_faculty(self):
+        archive = zipfile.ZipFile(io.BytesIO(self.export('schedule', 'xlsx', 1)))
+        self.assertIsNone(archive.testzip())
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        names = [sheet.get('name') for sheet in workbook.iter(f'{self.SHEET_NS}sheet')]
+        self.assertEqual(set(names), {faculty.name for faculty in self.academy.faculties})
+
+        total = 0
+        for index in range(1, len(names) + 1):
+            sheet = ElementTree.fromstring(archive.read(f'xl/worksheets/sheet{index}.xml'))
+            total += len(list(sheet.iter(f'{self.SHEET_NS}row'))) - 1
+        self.assertEqual(total, len(self.academy.schedules))
+
+    def test_roster_export(self):
+        RosterService(self.academy.month).generate()
+        content = self.export('roster', 'csv', 1).decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content), delimiter=';'))
+        self.assertEqual(len(rows) - 1, DutyRecord.objects.count())
+
+    def test_invalid_request(self):
+        url = reverse('commandant:export', args=['schedule'])
+        self.assertEqual(self.client.get(url, {'year': 2025, 'month': 13}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'year': 2025, 'month': 1, 'format': 'pdf'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('commandant:export', args=['other'])).status_code, 404)
+
+
+class ImportViewTest(ViewPerformanceTestCase):
+    """Страница импорта: проверка без записи и импорт с отчётом по строкам"""
+
+    factory_options = SMALL_ACADEMY
+
+    def setUp(self):
+        super().setUp()
+        self.login('commandant')
+
+    def upload(self, dry_run, encoding='utf-8'):
+        rank = self.academy.ranks[0].rank
+        content = f'Личный номер;ФИО;Звание\nК-1;Курсант Первый;{rank}\nК-2;Курсант Второй;Маршал\n'
+        data = {'kind': 'people', 'file': SimpleUploadedFile('people.csv', content.encode(encoding))}
+        if dry_run:
+            data['dry_run'] = 'on'
+        return self.client.post(reverse('commandant:staff_import'), data)
+
+    def test_page(self):
+        self.assertViewBudget(reverse('commandant:staff_import'), 6)
+
+    def test_import(self):
+        response = self.upload(dry_run=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertEqual(response.context['result'].errors, [(3, 'Неизвестное звание «Маршал»')])
+        self.assertFalse(People.objects.filter(personal_number='К-1').exists())
+
+        response = self.upload(dry_run=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(People.objects.filter(personal_number='К-1', full_name='Курсант Первый').exists())
+
+    def test_windows_1251_file(self):
+        response = self.upload(dry_run=True, encoding='cp1251')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 1)
@@ -8,11 +8,14 @@ urlpatterns = [
     path('duty/', include(('duty.urls_commandant', 'commandant_duty'), namespace='duty')),
     path('staff/', views.CommandantStaffListView.as_view(), name='staff'),
     path('staff/<int:pk>/', views.CommandantStaffDetailView.as_view(), name='staff_detail'),
+    path('staff/import/', views.ImportView.as_view(), name='staff_import'),
     path('duty-plan/', views.DutyPlanView.as_view(), name='duty_plan'),
     path('generate-duty-plan/', views.GenerateDutyPlanView.as_view(), name='generate_duty_plan'),
+    path('generate-roster/', views.GenerateRosterView.as_view(), name='generate_roster'),
     path('reset-duty-plan/', views.ResetDutyPlanView.as_view(), name='reset_duty_plan'),
     path('plans/', views.PlanListView.as_view(), name='plan_list'),  # НОВЫЙ URL
     path('plans/<int:pk>/', views.PlanDetailView.as_view(), name='plan_detail'),  # Детальный просмотр
     path('schedules/<int:pk>/update/', views.UpdateScheduleView.as_view(), name='update_schedule'),
+    path('export/<str:kind>/', views.ExportView.as_view(), name='export'),
     
 ]
\ No newline at end of file
@@ -5,25 +5,39 @@ from django.urls import reverse, reverse_lazy
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib import messages
 from django.db.models import Count
-from django.http import JsonResponse
-import calendar
-from collections import defaultdict
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+import logging
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 
-from core.mixins import IsCommandantMixin
+from core.export import FORMATS, export_response
+from core.importing import get_importer, read_table
+from core.jobs import submit_job
+from core.mixins import IsCommandantMixin, ReplicaReadMixin
+from core.utils import object_url_builder, page_querystring, paginate
 from people.models import People
 from unit.models import Faculty, Department
+from unit.references import UnitRef
 from duty.models import Duty, DutySchedule, MonthlyDutyPlan
 from duty.forms import MonthlyPlanForm, DutyScheduleSettingsForm
-from duty.services import DutyDistributionService
-from missing.models import DepartmentMissing
+from duty.horizon import HorizonPlanner
+from .forms import ImportForm
+from duty.calendar_grid import CalendarBuilder
+from duty.export import schedule_sheets
+from duty.unit_stats import get_month_summaries, get_unit_stats
+from duty.utils import add_months, month_bounds
+from duty.versions import bump_month_version
+from missing.services import AbsenceIndex, get_permitted_people, get_unit_people
+from record.export import roster_sheets
+from record.services import RosterService
 from permission.models import DepartmentDutyPermission
-from duty.utils import normalize_weekday_setting
 
 
-class CommandantDashboardView(IsCommandantMixin, TemplateView):
+logger = logging.getLogger(__name__)
+
+
+class CommandantDashboardView(IsCommandantMixin, ReplicaReadMixin, TemplateView):
     template_name = 'profiles/commandant/dashboard.html'
 
     def get_context_data(self, **kwargs):
@@ -80,34 +94,30 @@ class CommandantStaffListView(IsCommandantMixin, TemplateView):
             units.append(unit_entry)
 
         # Базовая выборка
-        staff = People.objects.select_related('department', 'rank')
+        staff = People.objects.select_related('department', 'faculty', 'rank')
 
         # Определяем, что выбрано: факультет или кафедра без факультета
         if unit_id:
             if unit_id.startswith('id_f_'):
-                faculty_id = int(unit_id.replace('id_f_', ''))
-                staff = staff.filter(department__faculty_id=faculty_id) | staff.filter(
-                    faculty_id=faculty_id, department__isnull=True
-                )
+                staff = get_unit_people(f"faculty_{int(unit_id.replace('id_f_', ''))}", staff)
 
             elif unit_id.startswith('id_d_'):
-                department_id = int(unit_id.replace('id_d_', ''))
-                staff = staff.filter(department_id=department_id)
+                staff = get_unit_people(f"department_{int(unit_id.replace('id_d_', ''))}", staff)
 
-        # Фильтр по допуску к наряду
+        # Фильтр по допуску к наряду (в списке коменданта - кафедральному)
         if duty_id:
-            staff = staff.filter(department_duty_permissions__duty_id=duty_id).distinct()
+            staff = get_permitted_people(staff, duty_id, sources=('department',))
 
-        # Формируем данные для таблицы
+        # Формируем данные для таблицы: одна страница, освобождения на сегодня одним запросом
+        page_obj = paginate(self.request, staff)
         today = timezone.now().date()
+        # Как и раньше, список коменданта показывает только кафедральные освобождения
+        absences = AbsenceIndex.load(today, person_ids=[person.pk for person in page_obj], sources=['department'])
+        detail_url = object_url_builder('commandant:staff_detail')
         table_items = []
 
-        for idx, person in enumerate(staff, start=1):
-            missing = DepartmentMissing.objects.filter(
-                person=person,
-                start_date__lte=today,
-                end_date__gte=today
-            ).first()
+        for idx, person in enumerate(page_obj, start=page_obj.start_index()):
+            missing = absences.get_absence(person.pk, today)
 
             missing_info = '-'
             if missing:
@@ -118,7 +128,7 @@ class CommandantStaffListView(IsCommandantMixin, TemplateView):
             )
 
             table_items.append({
-                'url': reverse('commandant:staff_detail', args=[person.pk]),
+                'url': detail_url(person.pk),
                 'fields': [
                     {'value': idx},
                     {'value': person.full_name},
@@ -143,7 +153,9 @@ class CommandantStaffListView(IsCommandantMixin, TemplateView):
             'duties': Duty.objects.filter(is_commandant=True),
             'selected_unit': unit_id,
             'selected_duty': duty_id,
-            'total_people': len(table_items),
+            'total_people': page_obj.paginator.count,
+            'page_obj': page_obj,
+            'querystring': page_querystring(self.request),
         })
 
         return context
@@ -167,6 +179,26 @@ class CommandantStaffDetailView(IsCommandantMixin, TemplateView):
 class DutyPlanView(IsCommandantMixin, TemplateView):
     template_name = 'profiles/commandant/duty_plan.html'
     
+    def get(self, request, *args, **kwargs):
+        # Настройки одного наряда для формы (duty_plan.js: loadDutySettingsFromServer)
+        if request.GET.get('ajax') and request.GET.get('duty_id'):
+            return self.get_duty_settings(request)
+        return super().get(request, *args, **kwargs)
+    
+    def get_duty_settings(self, request):
+        try:
+            current_date = datetime(int(request.GET.get('year')), int(request.GET.get('month')), 1).date()
+            duty_id = int(request.GET.get('duty_id'))
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'error': 'Некорректные параметры'}, status=400)
+        
+        duty = get_object_or_404(Duty, id=duty_id)
+        monthly_plan = MonthlyDutyPlan.objects.filter(month=current_date).first()
+        settings = monthly_plan.get_duty_schedule(duty) if monthly_plan else {
+            'ranges': [], 'specific_dates': [], 'weekdays': [],
+        }
+        return JsonResponse({'success': True, 'duty_id': duty.id, 'settings': settings})
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
@@ -187,49 +219,18 @@ class DutyPlanView(IsCommandantMixin, TemplateView):
         # Получаем все наряды коменданта
         duties = Duty.objects.filter(is_commandant=True)
         
-        # Получаем расписание для отображения
-        schedules = DutySchedule.objects.filter(
-            date__year=year,
-            date__month=month
-        ).select_related('duty', 'assigned_faculty', 'assigned_department')
-        
-        # Создаем календарь с реальными данными
-        cal = calendar.Calendar(firstweekday=0)
-        month_days = cal.monthdayscalendar(year, month)
-        
-        # Форматируем дни для шаблона с реальными нарядами
-        calendar_weeks = []
-        for week in month_days:
-            calendar_week = []
-            for day in week:
-                if day == 0:
-                    calendar_week.append({'day': None, 'date': None, 'schedules': []})
-                else:
-                    day_date = datetime(year, month, day).date()
-                    day_schedules = [s for s in schedules if s.date == day_date]
-                    calendar_week.append({
-                        'day': day,
-                        'date': day_date,
-                        'schedules': day_schedules,
-                        'is_today': day_date == timezone.now().date()
-                    })
-            calendar_weeks.append(calendar_week)
-        
-        # Получаем настройки расписания для каждого наряда с корректной структурой
+        # Календарная сетка с нарядами месяца (наряды группируются по датам один раз)
+        grid = CalendarBuilder(current_date).get()
+        schedules = grid.schedules
+        
+        # Настройки расписания нарядов для тегов формы (правила плана читаются одним запросом)
         duty_schedules = {}
         if monthly_plan:
             for duty in duties:
-                schedule_data = monthly_plan.get_duty_schedule(duty)
-                # УБРАН ФИЛЬТР, КОТОРЫЙ ИСКЛЮЧАЛ ДНИ НЕДЕЛИ
-                filtered_schedule = {
-                    'ranges': [r for r in schedule_data.get('ranges', []) if r and r.strip()],
-                    'specific_dates': [d for d in schedule_data.get('specific_dates', []) if d and d.strip()],
-                    'weekdays': [w for w in schedule_data.get('weekdays', []) if w and w.strip()],  # УБРАН ФИЛЬТР
-                }
-                duty_schedules[duty.id] = filtered_schedule
-        
-        # Статистика по подразделениям
-        unit_stats = self.get_unit_stats(schedules)
+                duty_schedules[duty.id] = monthly_plan.get_duty_schedule(duty)
+        
+        # Статистика по подразделениям (SQL-агрегация, версия общая с сеткой)
+        unit_stats = get_unit_stats(current_date, version=grid.version)
         
         # Получаем факультеты и кафедры для выбора с аннотацией количества сотрудников
         faculties = Faculty.objects.annotate(
@@ -251,7 +252,7 @@ class DutyPlanView(IsCommandantMixin, TemplateView):
             'next_month': self.get_adjacent_month(current_date, 1),
             'duties': duties,
             'monthly_plan': monthly_plan,
-            'calendar_weeks': calendar_weeks,
+            'calendar_weeks': grid.weeks,
             'schedules': schedules,
             'duty_schedules': duty_schedules,
             'unit_stats': unit_stats,
@@ -263,24 +264,6 @@ class DutyPlanView(IsCommandantMixin, TemplateView):
         
         return context
     
-    def get_unit_stats(self, schedules):
-        """Статистика по подразделениям"""
-        stats = defaultdict(lambda: {'count': 0, 'duties': set(), 'name': ''})
-        
-        for schedule in schedules:
-            if schedule.assigned_faculty:
-                key = f"faculty_{schedule.assigned_faculty.id}"
-                stats[key]['name'] = schedule.assigned_faculty.name
-                stats[key]['count'] += 1
-                stats[key]['duties'].add(schedule.duty.duty_name)
-            elif schedule.assigned_department:
-                key = f"department_{schedule.assigned_department.id}"
-                stats[key]['name'] = schedule.assigned_department.name
-                stats[key]['count'] += 1
-                stats[key]['duties'].add(schedule.duty.duty_name)
-
-        return dict(stats)
-    
     def post(self, request, *args, **kwargs):
         """Обработка сохранения комбинированных настроек расписания"""
         duty_id = request.POST.get('duty_id')
@@ -305,57 +288,30 @@ class DutyPlanView(IsCommandantMixin, TemplateView):
             'weekdays': request.POST.getlist('weekdays[]'),
         }
         
-        print(f"💾 Получены данные для наряда {duty_id}:")
-        print(f"   - Диапазоны: {schedule_data['ranges']}")
-        print(f"   - Конкретные даты: {schedule_data['specific_dates']}")
-        print(f"   - Дни недели: {schedule_data['weekdays']} (типы: {[type(w).__name__ for w in schedule_data['weekdays']]})")
-        
-        # Фильтруем пустые значения и нормализуем дни недели
-        schedule_data['ranges'] = [r.strip() for r in schedule_data['ranges'] if r and r.strip()]
-        schedule_data['specific_dates'] = [d.strip() for d in schedule_data['specific_dates'] if d and d.strip()]
-        
-        # ВАЖНО: Нормализуем дни недели к числам
-        normalized_weekdays = []
-        for day_setting in schedule_data['weekdays']:
-            if day_setting and day_setting.strip():
-                normalized = normalize_weekday_setting(day_setting.strip())
-                if normalized is not None:
-                    normalized_weekdays.append(str(normalized))  # Сохраняем как строку для JSON
-                else:
-                    print(f"⚠️ Не удалось нормализовать день недели: '{day_setting}'")
+        # Фильтруем пустые значения
+        for key in schedule_data:
+            schedule_data[key] = [value.strip() for value in schedule_data[key] if value and value.strip()]
         
-        schedule_data['weekdays'] = normalized_weekdays
-        
-        print(f"💾 Очищенные и нормализованные данные для наряда {duty_id}:")
-        print(f"   - Диапазоны: {schedule_data['ranges']}")
-        print(f"   - Конкретные даты: {schedule_data['specific_dates']}")
-        print(f"   - Дни недели (нормализованные): {schedule_data['weekdays']}")
-        
-        # Получаем текущие настройки
-        current_settings = monthly_plan.duty_schedule_settings.copy()
-        
-        # Если все поля пустые - полностью удаляем настройки для этого наряда
+        # Строки разбираются один раз при сохранении: в правила наряда попадают типизированные
+        # даты и маска дней недели, ошибки сообщаются сразу, а не при генерации
         if not any(schedule_data.values()):
-            if str(duty.id) in current_settings:
-                del current_settings[str(duty.id)]
-                monthly_plan.duty_schedule_settings = current_settings
-                monthly_plan.save()
+            if monthly_plan.clear_duty_schedule(duty):
                 messages.success(request, f'Настройки расписания для "{duty.duty_name}" полностью очищены')
-                print(f"🗑️ Удалены настройки для наряда {duty_id}")
+            rule_errors = []
         else:
-            # Сохраняем настройки (включая дни недели)
-            current_settings[str(duty.id)] = schedule_data
-            monthly_plan.duty_schedule_settings = current_settings
-            monthly_plan.save()
+            rule_errors = monthly_plan.set_duty_schedule(duty, schedule_data)
+            for error in rule_errors:
+                messages.warning(request, f'{duty.duty_name}: {error}')
             messages.success(request, f'Настройки расписания для "{duty.duty_name}" сохранены')
-            print(f"💾 Сохранены настройки для наряда {duty_id}: {schedule_data}")
+            logger.debug('Сохранены настройки для наряда %s: %s', duty_id, schedule_data)
         
         # ВАЖНО: Возвращаем JSON ответ для AJAX запросов
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
                 'success': True, 
                 'duty_id': duty_id,
-                'settings': schedule_data
+                'settings': monthly_plan.get_duty_schedule(duty),
+                'errors': rule_errors,
             })
         
         # Редирект на ту же страницу с сохранением месяца
@@ -380,89 +336,124 @@ class DutyPlanView(IsCommandantMixin, TemplateView):
 # В GenerateDutyPlanView добавьте валидацию:
 class GenerateDutyPlanView(IsCommandantMixin, View):
     def post(self, request, *args, **kwargs):
-        print("🚀 НАЧАЛО ГЕНЕРАЦИИ ПЛАНА")
-        
         year = request.POST.get('year')
         month = request.POST.get('month')
         duty_ids = request.POST.get('duties', '').split(',')
         selected_units = request.POST.getlist('selected_units', [])
         
-        print(f"📥 Полученные данные:")
-        print(f"   - year: {year}")
-        print(f"   - month: {month}") 
-        print(f"   - duty_ids: {duty_ids}")
-        print(f"   - selected_units: {selected_units}")
-        
         # Убираем пустые значения
         duty_ids = [duty_id for duty_id in duty_ids if duty_id]
         selected_units = [unit for unit in selected_units if unit]
         
-        print(f"📋 Очищенные данные:")
-        print(f"   - duty_ids: {duty_ids}")
-        print(f"   - selected_units: {selected_units}")
-        
         # Валидация
         if not duty_ids:
-            print("❌ Ошибка: не выбраны наряды")
             return JsonResponse({'success': False, 'error': 'Выберите хотя бы один наряд'})
         
         if not selected_units:
-            print("❌ Ошибка: не выбраны подразделения")
             return JsonResponse({'success': False, 'error': 'Выберите хотя бы одно подразделение'})
         
+        try:
+            months = int(request.POST.get('months') or 1)
+        except ValueError:
+            months = 0
+        if not 1 <= months <= HorizonPlanner.MAX_MONTHS:
+            return JsonResponse({
+                'success': False,
+                'error': f'Горизонт планирования - от 1 до {HorizonPlanner.MAX_MONTHS} месяцев',
+            })
+        
         try:
             year = int(year)
             month = int(month)
             current_date = datetime(year, month, 1).date()
             
-            print(f"📅 Дата плана: {current_date}")
+            if months > 1:
+                return self.generate_horizon(request, current_date, months, duty_ids, selected_units)
             
             # Создаем или обновляем месячный план
             monthly_plan, created = MonthlyDutyPlan.objects.get_or_create(
                 month=current_date
             )
             
-            print(f"📊 План: ID={monthly_plan.id}, создан={created}")
-            
             # Добавляем выбранные наряды
             duties = Duty.objects.filter(id__in=duty_ids)
             monthly_plan.set_duties(duties)
             
-            print(f"✅ Добавлены наряды: {[d.duty_name for d in duties]}")
-            
             # Сохраняем выбранные подразделения
             monthly_plan.selected_units = selected_units
             monthly_plan.save()
             
-            print(f"✅ Сохранены подразделения: {selected_units}")
+            # Уже сгенерированный план по умолчанию перегенерируется инкрементально
+            # (с сохранением ручных назначений); mode=full пересоздаёт весь месяц
+            mode = request.POST.get('mode') or ('incremental' if monthly_plan.is_generated else 'full')
             
-            # Генерируем расписание
-            distribution_service = DutyDistributionService(current_date)
-            schedule_count = distribution_service.generate_schedule(monthly_plan)
-            
-            print(f"✅ Сгенерировано расписаний: {schedule_count}")
-            
-            # ОБНОВЛЯЕМ план после генерации
-            monthly_plan.refresh_from_db()
-            print(f"🔄 План после генерации: is_generated={monthly_plan.is_generated}")
-            
-            messages.success(
-                request, 
-                f'График нарядов успешно сгенерирован! Создано {schedule_count} записей.'
-            )
+            # Генерация выполняется фоновой задачей (duty.jobs) - отвечаем сразу,
+            # интерфейс опрашивает status_url (трассировка - в результате задачи)
+            job = submit_job('duty.generate_plan', {'plan_id': monthly_plan.pk, 'mode': mode}, user=request.user)
             
             return JsonResponse({
-                'success': True, 
-                'count': schedule_count,
-                'units_count': len(selected_units)
+                'success': True,
+                'mode': mode,
+                'units_count': len(selected_units),
+                'job_id': job.pk,
+                'status_url': reverse('core:job_status', args=[job.pk]),
+                'cancel_url': reverse('core:job_cancel', args=[job.pk]),
+                'job': job.as_dict(),
             })
             
         except Exception as e:
-            print(f"❌ Ошибка при генерации: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception('Ошибка при генерации плана')
             return JsonResponse({'success': False, 'error': str(e)})
-        
+
+    def generate_horizon(self, request, current_date, months, duty_ids, selected_units):
+        """
+        Несколько месяцев подряд (квартал и т.п.): наряды и подразделения задаются
+        планам всех месяцев, графики строит одна фоновая задача duty.generate_horizon
+        с переносом нагрузки подразделений между месяцами (полная генерация)
+        """
+        duties = list(Duty.objects.filter(id__in=duty_ids))
+        HorizonPlanner.prepare_plans(current_date, months, duties, selected_units)
+        carry_load = request.POST.get('carry_load', '1') != '0'
+        job = submit_job(
+            'duty.generate_horizon',
+            {'start': current_date.isoformat(), 'months': months, 'carry_load': carry_load},
+            user=request.user,
+        )
+        return JsonResponse({
+            'success': True,
+            'mode': 'full',
+            'months': months,
+            'units_count': len(selected_units),
+            'job_id': job.pk,
+            'status_url': reverse('core:job_status', args=[job.pk]),
+            'cancel_url': reverse('core:job_cancel', args=[job.pk]),
+            'job': job.as_dict(),
+        })
+
+
+class GenerateRosterView(IsCommandantMixin, View):
+    """Поимённое распределение сгенерированного графика месяца по людям (DutyRecord)"""
+
+    def post(self, request, *args, **kwargs):
+        try:
+            current_date = datetime(int(request.POST.get('year')), int(request.POST.get('month')), 1).date()
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'error': 'Некорректный месяц'})
+
+        try:
+            result = RosterService(current_date).generate()
+        except Exception as e:
+            logger.exception('Ошибка поимённого распределения на %s', current_date)
+            return JsonResponse({'success': False, 'error': str(e)})
+
+        return JsonResponse({
+            'success': True,
+            'count': result['records'],
+            'people_count': result['people'],
+            'shortages': result['shortages'],
+        })
+
+
 class ResetDutyPlanView(IsCommandantMixin, View):
     def post(self, request, *args, **kwargs):
         year = request.POST.get('year')
@@ -478,22 +469,19 @@ class ResetDutyPlanView(IsCommandantMixin, View):
             
             if monthly_plan:
                 # Удаляем все расписания для этого месяца
-                schedule_count = DutySchedule.objects.filter(
-                    date__year=year,
-                    date__month=month
-                ).count()
+                month_schedules = DutySchedule.objects.for_month(year, month)
+                schedule_count = month_schedules.count()
                 
-                DutySchedule.objects.filter(
-                    date__year=year,
-                    date__month=month
-                ).delete()
+                month_schedules.delete()
+                bump_month_version(current_date)
                 
                 # ✅ ПОЛНЫЙ СБРОС ВСЕХ НАСТРОЕК
-                monthly_plan.duty_schedule_settings = {}  # Очищаем параметры расписания
+                monthly_plan.clear_schedule_rules()  # Очищаем параметры расписания
                 monthly_plan.selected_units = []  # Очищаем выбранные подразделения
                 monthly_plan.duties.clear()  # Очищаем выбранные наряды
                 monthly_plan.is_generated = False
                 monthly_plan.last_generated_at = None
+                monthly_plan.generation_snapshot = {}
                 monthly_plan.save()
                 
                 messages.success(
@@ -512,7 +500,7 @@ class ResetDutyPlanView(IsCommandantMixin, View):
         return redirect(redirect_url)
     
 
-class PlanListView(IsCommandantMixin, ListView):
+class PlanListView(IsCommandantMixin, ReplicaReadMixin, ListView):
     """Список всех созданных планов"""
     model = MonthlyDutyPlan
     template_name = 'profiles/commandant/plans/list.html'
@@ -524,22 +512,24 @@ class PlanListView(IsCommandantMixin, ListView):
         # ФИЛЬТРУЕМ ТОЛЬКО СГЕНЕРИРОВАННЫЕ ПЛАНЫ
         return MonthlyDutyPlan.objects.filter(
             is_generated=True
-        ).select_related().prefetch_related('duties').all()
+        ).prefetch_related('duties').order_by(*self.ordering)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Добавляем количество расписаний для каждого плана
-        for plan in context['plans']:
-            plan.schedule_count = DutySchedule.objects.filter(
-                date__year=plan.month.year,
-                date__month=plan.month.month
-            ).count()
+        # Сводка графика для планов страницы одним запросом
+        plans = context['plans']
+        summaries = get_month_summaries(plan.month for plan in plans)
+        for plan in plans:
+            summary = summaries[plan.month.replace(day=1)]
+            plan.schedule_count = summary['count']
+            plan.schedule_load = summary['load']
+            plan.manual_count = summary['manual']
         
         return context
 
 
-class PlanDetailView(IsCommandantMixin, DetailView):
+class PlanDetailView(IsCommandantMixin, ReplicaReadMixin, DetailView):
     """Детальный просмотр плана"""
     model = MonthlyDutyPlan
     template_name = 'profiles/commandant/plans/detail.html'
@@ -552,53 +542,12 @@ class PlanDetailView(IsCommandantMixin, DetailView):
         context = super().get_context_data(**kwargs)
         plan = self.object
         
-        # Получаем все расписания для этого плана
-        schedules = DutySchedule.objects.filter(
-            date__year=plan.month.year,
-            date__month=plan.month.month
-        ).select_related('duty', 'assigned_faculty', 'assigned_department')
-        
-        # Группируем по датам для удобного отображения
-        schedules_by_date = defaultdict(list)
-        for schedule in schedules:
-            schedules_by_date[schedule.date].append(schedule)
-        
-        # Создаем календарь для отображения
-        year = plan.month.year
-        month = plan.month.month
-        cal = calendar.Calendar(firstweekday=0)
-        month_days = cal.monthdayscalendar(year, month)
-        
-        calendar_weeks = []
-        for week in month_days:
-            calendar_week = []
-            for day in week:
-                if day == 0:
-                    calendar_week.append({'day': None, 'date': None, 'schedules': []})
-                else:
-                    day_date = datetime(year, month, day).date()
-                    day_schedules = schedules_by_date.get(day_date, [])
-                    calendar_week.append({
-                        'day': day,
-                        'date': day_date,
-                        'schedules': day_schedules,
-                        'is_today': day_date == timezone.now().date()
-                    })
-            calendar_weeks.append(calendar_week)
+        # Календарная сетка с нарядами месяца плана
+        grid = CalendarBuilder(plan.month).get()
+        schedules = grid.schedules
         
         # Статистика
-        unit_stats = defaultdict(lambda: {'count': 0, 'duties': set()})
-        for schedule in schedules:
-            if schedule.assigned_faculty:
-                key = f"faculty_{schedule.assigned_faculty.id}"
-                unit_stats[key]['name'] = f"Факультет {schedule.assigned_faculty.name}"
-                unit_stats[key]['count'] += 1
-                unit_stats[key]['duties'].add(schedule.duty.duty_name)
-            elif schedule.assigned_department:
-                key = f"department_{schedule.assigned_department.id}"
-                unit_stats[key]['name'] = f"Кафедра {schedule.assigned_department.name}"
-                unit_stats[key]['count'] += 1
-                unit_stats[key]['duties'].add(schedule.duty.duty_name)
+        unit_stats = get_unit_stats(plan.month, version=grid.version)
         
         # ДОБАВЛЯЕМ ДОСТУПНЫЕ ПОДРАЗДЕЛЕНИЯ ДЛЯ МОДАЛЬНОГО ОКНА
         faculties = Faculty.objects.all()
@@ -606,9 +555,9 @@ class PlanDetailView(IsCommandantMixin, DetailView):
         
         context.update({
             'schedules': schedules,
-            'calendar_weeks': calendar_weeks,
-            'unit_stats': dict(unit_stats),
-            'total_schedules': schedules.count(),
+            'calendar_weeks': grid.weeks,
+            'unit_stats': unit_stats,
+            'total_schedules': len(grid),
             'faculties': faculties,
             'independent_departments': independent_departments,
         })
@@ -623,8 +572,6 @@ class UpdateScheduleView(IsCommandantMixin, View):
             unit_type = request.POST.get('unit_type')
             unit_id = request.POST.get('unit_id')
             
-            print(f"🔄 Обновление расписания {schedule_id}: {unit_type}_{unit_id}")
-            
             schedule = get_object_or_404(DutySchedule, id=schedule_id)
             
             # Сбрасываем предыдущие назначения
@@ -633,28 +580,23 @@ class UpdateScheduleView(IsCommandantMixin, View):
             schedule.assigned_unit_type = None
             
             # Устанавливаем новое назначение
-            if unit_type == 'faculty':
-                faculty = get_object_or_404(Faculty, id=unit_id)
-                schedule.assigned_faculty = faculty
-                schedule.assigned_unit_type = 'faculty'
-                unit_name = f"Факультет {faculty.name}"
-            elif unit_type == 'department':
-                department = get_object_or_404(Department, id=unit_id)
-                schedule.assigned_department = department
-                schedule.assigned_unit_type = 'department'
-                unit_name = f"Кафедра {department.name}"
-            else:
+            ref = UnitRef.from_parts(unit_type, unit_id)
+            if ref is None:
                 return JsonResponse({
                     'success': False, 
                     'error': 'Неверный тип подразделения'
                 })
+            unit = get_object_or_404(ref.model, id=ref.id)
+            setattr(schedule, f'assigned_{ref.type}', unit)
+            schedule.assigned_unit_type = ref.type
+            unit_name = ref.title(unit)
             
             # Помечаем как измененное вручную
             schedule.is_manually_assigned = True
             schedule.save()
             
             # Получаем обновленный статус
-            status = schedule.get_assignment_status()
+            status = schedule.assignment_status
             
             return JsonResponse({
                 'success': True,
@@ -665,8 +607,63 @@ class UpdateScheduleView(IsCommandantMixin, View):
             })
             
         except Exception as e:
-            print(f"❌ Ошибка при обновлении расписания: {e}")
+            logger.exception('Ошибка при обновлении расписания %s', kwargs.get('pk'))
             return JsonResponse({
                 'success': False,
                 'error': str(e)
-            })
\ No newline at end of file
+            })
+
+
+class ExportView(IsCommandantMixin, View):
+    """
+    Потоковая выгрузка графика нарядов ('schedule') или поимённого распределения ('roster')
+    за months месяцев, начиная с year/month (не больше MAX_MONTHS); format - csv или xlsx.
+    В XLSX каждый факультет - отдельный лист.
+    """
+    SOURCES = {
+        'schedule': schedule_sheets,
+        'roster': roster_sheets,
+    }
+    MAX_MONTHS = 12
+
+    def get(self, request, kind):
+        sheets = self.SOURCES.get(kind)
+        if sheets is None:
+            raise Http404
+
+        export_format = request.GET.get('format', 'xlsx')
+        if export_format not in FORMATS:
+            return HttpResponseBadRequest('Неизвестный формат выгрузки')
+        try:
+            start, _ = month_bounds(request.GET['year'], request.GET['month'])
+            months = int(request.GET.get('months', 1))
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest('Некорректный месяц выгрузки')
+
+        months = max(1, min(months, self.MAX_MONTHS))
+        end = add_months(start, months)
+        filename = f'{kind}-{start:%Y-%m}'
+        if months > 1:
+            filename += f'-{add_months(end, -1):%Y-%m}'
+        return export_response(export_format, filename, sheets(start, end))
+
+
+class ImportView(IsCommandantMixin, FormView):
+    """Пакетный импорт личного состава, допусков и освобождений из CSV/XLSX (core.importing)"""
+    template_name = 'profiles/commandant/staff/import.html'
+    form_class = ImportForm
+
+    def form_valid(self, form):
+        kind = form.cleaned_data['kind']
+        dry_run = form.cleaned_data['dry_run']
+        upload = form.cleaned_data['file']
+        importer = get_importer(kind)(dry_run=dry_run)
+        result = importer.run(read_table(upload, upload.name))
+
+        if result.imported and not dry_run:
+            messages.success(self.request, f'Импортировано строк: {result.imported}')
+        return self.render_to_response(self.get_context_data(
+            form=form,
+            result=result,
+            dry_run=dry_run,
+        ))
@@ -1,57 +1,69 @@
-from django.urls import reverse
+from functools import lru_cache
+
+from django.urls import NoReverseMatch, reverse
+
+from notifications.utils import get_unread_count
 from .utils import get_user_type
 
+
+MENU_ITEMS = {
+    'commandant': [
+        {'name': 'Профиль коменданта', 'url_name': 'commandant:profile'},
+        {'name': 'Наряды', 'url_name': 'commandant:duty:list'},
+        {'name': 'Личный состав', 'url_name': 'commandant:staff'},
+        {'name': 'План нарядов', 'url_name': 'commandant:duty_plan'},
+        {'name': 'Созданные планы', 'url_name': 'commandant:plan_list'},
+        {'name': 'Уведомления', 'url_name': 'notifications:list'},
+    ],
+    'faculty': [
+        {'name': 'Профиль факультета', 'url_name': 'faculty:profile'},
+        {'name': 'Л/с факультета', 'url_name': 'faculty:staff'},
+        {'name': 'Л/с управления факультета', 'url_name': 'faculty:people:staff'},
+        {'name': 'Допуски к нарядам', 'url_name': 'faculty:permission:faculty_list'},
+        {'name': 'Освобождения', 'url_name': 'faculty:missing:faculty_list'},
+        {'name': 'Наряды', 'url_name': 'faculty:duty:list'},
+        {'name': 'Академические наряды', 'url_name': 'faculty:academic_duties'},
+        {'name': 'Уведомления', 'url_name': 'notifications:list'},
+    ],
+    'department': [
+        {'name': 'Профиль кафедры', 'url_name': 'department:profile'},
+        {'name': 'Личный состав', 'url_name': 'department:people:staff'},
+        {'name': 'Освобождения', 'url_name': 'department:missing:department_list'},
+        {'name': 'Допуски', 'url_name': 'department:permission:department_list'},
+        {'name': 'Наряды', 'url_name': 'department:duty:list'},
+        {'name': 'Уведомления', 'url_name': 'notifications:list'},
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def get_role_menu(user_type):
+    """Меню роли с уже вычисленными URL (reverse выполняется один раз на роль)"""
+    menu = []
+    for item in MENU_ITEMS.get(user_type, []):
+        try:
+            url = reverse(item['url_name'])
+        except NoReverseMatch:
+            url = '#'
+        menu.append({**item, 'url': url, 'path': url.rstrip('/')})
+    return tuple(menu)
+
+
 def sidebar_menu(request):
     if not request.user.is_authenticated:
         return {'menu_items': []}
 
-    menu_items = []
-    current_path = request.path
+    current_path = request.path.rstrip('/')
     user_type = get_user_type(request.user)
 
-    if user_type == 'commandant':
-        menu_items = [
-            {'name': 'Профиль коменданта', 'url_name': 'commandant:profile'},
-            {'name': 'Наряды', 'url_name': 'commandant:duty:list'},
-            {'name': 'Личный состав', 'url_name': 'commandant:staff'},
-            {'name': 'План нарядов', 'url_name': 'commandant:duty_plan'},
-            {'name': 'Созданные планы', 'url_name': 'commandant:plan_list'},
-            {'name': 'Уведомления', 'url_name': 'notifications:list'},
-        ]
-    elif user_type == 'faculty':
-        menu_items = [
-            {'name': 'Профиль факультета', 'url_name': 'faculty:profile'},
-            {'name': 'Л/с факультета', 'url_name': 'faculty:staff'},
-            {'name': 'Л/с управления факультета', 'url_name': 'faculty:people:staff'},
-            {'name': 'Допуски к нарядам', 'url_name': 'faculty:permission:faculty_list'},
-            {'name': 'Освобождения', 'url_name': 'faculty:missing:faculty_list'},
-            {'name': 'Наряды', 'url_name': 'faculty:duty:list'},
-            {'name': 'Академические наряды', 'url_name': 'faculty:academic_duties'},
-            {'name': 'Уведомления', 'url_name': 'notifications:list'},
-        ]
-    elif user_type == 'department':
-        menu_items = [
-            {'name': 'Профиль кафедры', 'url_name': 'department:profile'},
-            {'name': 'Личный состав', 'url_name': 'department:people:staff'},
-            {'name': 'Освобождения', 'url_name': 'department:missing:department_list'},
-            {'name': 'Допуски', 'url_name': 'department:permission:department_list'},
-            {'name': 'Наряды', 'url_name': 'department:duty:list'},
-            {'name': 'Уведомления', 'url_name': 'notifications:list'},
-        ]
-
-    # Добавляем URL и проверку активности
-    for item in menu_items:
-        try:
-            item['url'] = reverse(item['url_name'])
-            item['active'] = item['url'].rstrip('/') == current_path.rstrip('/')
-        except Exception as e:
-            item['url'] = '#'
-            item['active'] = False
-
-    unread_count = request.user.received_notifications.filter(is_read=False).count()
+    # Добавляем проверку активности
+    menu_items = [
+        {**item, 'active': item['url'] != '#' and item['path'] == current_path}
+        for item in get_role_menu(user_type)
+    ]
 
     return {
         'user_type': user_type,
         'menu_items': menu_items,
-        'unread_notifications': unread_count
-    }
\ No newline at end of file
+        'unread_notifications': get_unread_count(request.user)
+    }
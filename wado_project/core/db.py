@@ -0,0 +1,70 @@
+# core/db.py
+"""
+Маршрутизация чтения на реплику.
+
+Чтение уходит на реплику (settings.DATABASE_REPLICA) только внутри use_replica():
+тяжёлые страницы только для чтения (панели, календари, списки планов) оборачивают
+в него GET-запрос через core.mixins.ReplicaReadMixin. Всё остальное, включая запись
+и чтение сразу после неё, идёт в default - задержка репликации не видна пользователю.
+Если реплика не настроена, use_replica() ничего не меняет.
+
+Значения, которые кладутся в кэш под версией или сбрасываются сигналами записи
+(календарь, статистика подразделений, счётчики), считаются внутри use_primary():
+иначе отстающая реплика закэшировала бы старые данные под уже новой версией,
+и они жили бы до истечения кэша.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_alias():
+    """Псевдоним реплики или None, если она не описана в DATABASES"""
+    alias = getattr(settings, 'DATABASE_REPLICA', None)
+    return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def use_replica():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def use_primary():
+    """Чтение из default даже внутри use_replica()"""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика содержит те же данные, что и default
+        databases = {'default', replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплики приходит с основной БД через репликацию
+        if db == replica_alias():
+            return False
+        return None
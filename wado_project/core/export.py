@@ -0,0 +1,229 @@
+# core/export.py
+"""
+Потоковая выгрузка таблиц в CSV и XLSX с постоянным расходом памяти.
+
+Строки - любые итерируемые последовательности значений (обычно
+values_list(...).iterator(chunk_size=...)), ответ формируется по мере чтения:
+
+    sheets = [('Факультет 1', header, rows_1), ('Факультет 2', header, rows_2)]
+    return export_response('xlsx', 'plan-2025-01', sheets)
+
+XLSX пишется без сторонних библиотек: zip-архив собирается в поток
+(zipfile умеет писать в файл без seek), строки листов - inline-строки без
+общей таблицы строк, поэтому в памяти держится только текущий фрагмент.
+CSV - один лист; для нескольких листов строки идут подряд под одним заголовком.
+"""
+import csv
+import datetime
+import itertools
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Разделитель CSV для русской локали Excel
+CSV_DELIMITER = ';'
+
+
+class _Echo:
+    """Псевдобуфер csv.writer: write() возвращает строку, а не пишет её"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(sheets):
+    """Строки CSV листов sheets [(название, заголовок, строки)]; BOM - для Excel"""
+    writer = csv.writer(_Echo(), delimiter=CSV_DELIMITER)
+    yield '\ufeff'
+    header_written = False
+    for _, header, rows in sheets:
+        if not header_written:
+            yield writer.writerow(header)
+            header_written = True
+        for row in rows:
+            yield writer.writerow(['' if value is None else value for value in row])
+
+
+# --- XLSX ---
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+# Стили ячеек: 0 - обычный, 1 - дата (формат 14), 2 - жирный заголовок
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '</styleSheet>'
+)
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+_EXCEL_EPOCH = datetime.date(1899, 12, 30)
+# Символы, недопустимые в XML 1.0
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_INVALID_TITLE = re.compile(r'[\[\]:*?/\\]')
+
+
+class _Sink:
+    """Файл без seek для zipfile: накопленные байты забираются генератором через drain()"""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _cell(value, style=0):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return f'<c s="1"><v>{(value - _EXCEL_EPOCH).days}</v></c>'
+    text = escape(_INVALID_XML.sub('', str(value)))
+    style_attr = f' s="{style}"' if style else ''
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(values, style=0):
+    return '<row>' + ''.join(_cell(value, style) for value in values) + '</row>'
+
+
+def _sheet_titles(titles):
+    """Допустимые и уникальные названия листов Excel (до 31 символа)"""
+    seen = set()
+    for title in titles:
+        base = _INVALID_TITLE.sub(' ', str(title or 'Лист')).strip()[:31] or 'Лист'
+        name, number = base, 2
+        while name.lower() in seen:
+            suffix = f' ({number})'
+            name = base[:31 - len(suffix)] + suffix
+            number += 1
+        seen.add(name.lower())
+        yield name
+
+
+def stream_xlsx(sheets, rows_per_chunk=500):
+    """Байты XLSX-книги с листами sheets [(название, заголовок, строки)]"""
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED)
+    archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+    archive.writestr('_rels/.rels', _ROOT_RELS)
+    archive.writestr('xl/styles.xml', _STYLES)
+    yield sink.drain()
+
+    titles = []
+    sheets = iter(sheets)
+    for index, (title, header, rows) in enumerate(sheets, start=1):
+        titles.append(title)
+        with archive.open(f'xl/worksheets/sheet{index}.xml', 'w', force_zip64=True) as entry:
+            entry.write((_SHEET_START + _row(header, style=2)).encode())
+            rows = iter(rows)
+            while True:
+                chunk = list(itertools.islice(rows, rows_per_chunk))
+                if not chunk:
+                    break
+                entry.write(''.join(_row(row) for row in chunk).encode())
+                yield sink.drain()
+            entry.write(_SHEET_END.encode())
+        yield sink.drain()
+
+    if not titles:
+        # Книга без листов не открывается - пустой лист
+        titles.append('Лист')
+        archive.writestr('xl/worksheets/sheet1.xml', _SHEET_START + _SHEET_END)
+
+    names = list(_sheet_titles(titles))
+    archive.writestr('xl/workbook.xml', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+        + ''.join(
+            f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{index}" r:id="rId{index}"/>'
+            for index, name in enumerate(names, start=1)
+        )
+        + '</sheets></workbook>'
+    ))
+    archive.writestr('xl/_rels/workbook.xml.rels', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + ''.join(
+            f'<Relationship Id="rId{index}" '
+            f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{index}.xml"/>'
+            for index in range(1, len(names) + 1)
+        )
+        + f'<Relationship Id="rId{len(names) + 1}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    ))
+    archive.close()
+    yield sink.drain()
+
+
+def export_response(export_format, filename, sheets):
+    """StreamingHttpResponse с выгрузкой sheets в формате 'csv' или 'xlsx'"""
+    if export_format == 'xlsx':
+        content = stream_xlsx(sheets)
+    else:
+        content = stream_csv(sheets)
+    response = StreamingHttpResponse(content, content_type=FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -0,0 +1,320 @@
+# core/importing.py
+"""
+Пакетный импорт табличных данных (CSV/XLSX).
+
+    importer = get_importer('people')(dry_run=False)
+    result = importer.run(read_table(upload, upload.name))
+    result.created, result.updated, result.skipped, result.errors  # errors: [(строка, сообщение)]
+
+Импортёр сначала загружает справочники словарями (несколько запросов на весь файл),
+затем проверяет все строки и только после этого пишет корректные строки пакетами
+bulk_create в одной транзакции. Строки с ошибками пропускаются и попадают в отчёт
+с номером строки файла. dry_run - только проверка и подсчёт, без записи.
+
+XLSX читается без сторонних библиотек (zipfile + iterparse), берётся первый лист.
+CSV - в UTF-8 (с BOM или без) или Windows-1251, как его сохраняет Excel в русской Windows.
+"""
+import csv
+import datetime
+import io
+import zipfile
+from xml.etree import ElementTree
+
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+IMPORTERS = {
+    'people': 'people.importers.PeopleImporter',
+    'permissions': 'permission.importers.PermissionImporter',
+    'absences': 'missing.importers.AbsenceImporter',
+}
+
+DATE_FORMATS = ('%d.%m.%Y', '%Y-%m-%d', '%d.%m.%y')
+CSV_ENCODINGS = ('utf-8-sig', 'cp1251')
+_EXCEL_EPOCH = datetime.date(1899, 12, 30)
+
+
+def get_importer(kind):
+    try:
+        return import_string(IMPORTERS[kind])
+    except KeyError:
+        raise ValueError(f'Неизвестный вид импорта: {kind}')
+
+
+class RowError(Exception):
+    """Ошибка в строке файла - строка пропускается"""
+
+
+class TableRow(dict):
+    """Строка файла {заголовок: значение} с номером строки файла line (для отчёта об ошибках)"""
+
+    def __init__(self, values, line):
+        super().__init__(values)
+        self.line = line
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.total = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors = []
+
+    @property
+    def imported(self):
+        return self.created + self.updated
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'created': self.created,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'errors': [{'row': row, 'message': message} for row, message in self.errors],
+        }
+
+
+# --- Значения ячеек ---
+
+def normalize(value):
+    """Текст ячейки без пробелов по краям; целые числа из XLSX - без '.0'"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def name_key(value):
+    """Ключ поиска по названию: без повторных пробелов и регистра"""
+    return ' '.join(normalize(value).split()).casefold()
+
+
+def parse_date(value, label='Дата'):
+    """Дата из ячейки: дата, число Excel или строка дд.мм.гггг / гггг-мм-дд; None для пустой"""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return _EXCEL_EPOCH + datetime.timedelta(days=int(value))
+    text = normalize(value)
+    if not text:
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise RowError(f'{label}: некорректная дата «{text}»')
+
+
+# --- Чтение файлов ---
+
+def read_table(file, filename):
+    """
+    Строки файла TableRow {заголовок: значение} с номером строки файла;
+    формат - по расширению имени. Пустые строки пропускаются.
+    """
+    if str(filename).lower().endswith('.xlsx'):
+        rows = _read_xlsx(file)
+    else:
+        rows = _read_csv(file)
+
+    header = None
+    for line, values in rows:
+        if header is None:
+            header = [normalize(value) for value in values]
+            continue
+        if not any(normalize(value) for value in values):
+            continue
+        yield TableRow(zip(header, values), line)
+
+
+def _decode(data):
+    for encoding in CSV_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise RowError('Не удалось прочитать файл: ожидается кодировка UTF-8 или Windows-1251')
+
+
+def _read_csv(file):
+    data = file.read()
+    text = _decode(data) if isinstance(data, bytes) else data
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=';,\t')
+    except csv.Error:
+        dialect = _SemicolonDialect
+    reader = csv.reader(io.StringIO(text), dialect)
+    # line_num - последняя прочитанная строка файла (запись в кавычках может занимать несколько)
+    start = 1
+    for values in reader:
+        yield start, values
+        start = reader.line_num + 1
+
+
+class _SemicolonDialect(csv.excel):
+    # Как в выгрузке core.export
+    delimiter = ';'
+
+
+_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _column_index(reference):
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord('A') + 1
+    return index - 1
+
+
+def _first_sheet_path(archive):
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{_NS}sheets/{_NS}sheet')
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.iter(f'{_PKG_REL_NS}Relationship'):
+        if rel.get('Id') == sheet.get(f'{_REL_NS}id'):
+            target = rel.get('Target').lstrip('/')
+            return target if target.startswith('xl/') else f'xl/{target}'
+    raise RowError('В файле XLSX нет листов')
+
+
+def _cell_value(cell, shared):
+    cell_type = cell.get('t')
+    if cell_type == 'inlineStr':
+        return ''.join(text.text or '' for text in cell.iter(f'{_NS}t'))
+    value = cell.find(f'{_NS}v')
+    if value is None or value.text is None:
+        return None
+    if cell_type == 's':
+        return shared[int(value.text)]
+    if cell_type == 'b':
+        return value.text == '1'
+    if cell_type in ('str', 'e'):
+        return value.text
+    number = float(value.text)
+    return int(number) if number.is_integer() else number
+
+
+def _read_xlsx(file):
+    try:
+        archive = zipfile.ZipFile(file)
+        path = _first_sheet_path(archive)
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        raise RowError('Файл не является книгой XLSX')
+
+    shared = []
+    if 'xl/sharedStrings.xml' in archive.namelist():
+        for _, element in ElementTree.iterparse(archive.open('xl/sharedStrings.xml')):
+            if element.tag == f'{_NS}si':
+                shared.append(''.join(text.text or '' for text in element.iter(f'{_NS}t')))
+                element.clear()
+
+    line = 0
+    for _, element in ElementTree.iterparse(archive.open(path)):
+        if element.tag != f'{_NS}row':
+            continue
+        line = int(element.get('r') or line + 1)
+        values = []
+        for cell in element.iter(f'{_NS}c'):
+            reference = cell.get('r')
+            if reference:
+                values.extend([None] * (_column_index(reference) - len(values)))
+            values.append(_cell_value(cell, shared))
+        element.clear()
+        yield line, values
+
+
+# --- Импортёр ---
+
+class BaseImporter:
+    """
+    Основа импортёров. Подкласс задаёт:
+        columns  - {ключ: заголовок колонки} (заголовки сравниваются без учёта регистра);
+        required - ключи обязательных колонок;
+        prepare(rows) - загрузка справочников для всех строк;
+        clean_row(row) - (объект, is_new) или (None, None) для пропуска; ошибки - RowError;
+        save(objects) - пакетная запись.
+    """
+
+    columns = {}
+    required = ()
+    batch_size = 500
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.present = set()
+
+    def map_rows(self, rows):
+        """
+        Строки с заголовками -> (номер строки файла, словарь по ключам columns).
+        Номер берётся из TableRow.line; у простых словарей строка 1 - заголовок.
+        """
+        headers = {name_key(header): key for key, header in self.columns.items()}
+        mapped = []
+        for number, row in enumerate(rows, start=2):
+            item = {}
+            for header, value in row.items():
+                key = headers.get(name_key(header))
+                if key is not None:
+                    item[key] = value
+                    self.present.add(key)
+            mapped.append((getattr(row, 'line', number), item))
+        return mapped
+
+    def run(self, rows):
+        result = ImportResult()
+        try:
+            rows = self.map_rows(rows)
+        except RowError as e:
+            result.errors.append((1, str(e)))
+            return result
+
+        missing = [self.columns[key] for key in self.required if key not in self.present]
+        if rows and missing:
+            result.errors.append((1, f'Нет обязательных колонок: {", ".join(missing)}'))
+            return result
+
+        self.prepare([row for _, row in rows])
+        objects = []
+        for number, row in rows:
+            result.total += 1
+            try:
+                for key in self.required:
+                    if not normalize(row.get(key)):
+                        raise RowError(f'Не заполнено поле «{self.columns[key]}»')
+                obj, is_new = self.clean_row(row)
+            except RowError as e:
+                result.errors.append((number, str(e)))
+                continue
+            if obj is None:
+                result.skipped += 1
+                continue
+            objects.append(obj)
+            if is_new:
+                result.created += 1
+            else:
+                result.updated += 1
+
+        if objects and not self.dry_run:
+            with transaction.atomic():
+                self.save(objects)
+        return result
+
+    def prepare(self, rows):
+        pass
+
+    def clean_row(self, row):
+        raise NotImplementedError
+
+    def save(self, objects):
+        raise NotImplementedError
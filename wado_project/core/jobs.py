@@ -0,0 +1,198 @@
+# core/jobs.py
+"""
+Фоновые задачи без внешнего брокера.
+
+Очередь - таблица core.Job, выполняет её пул потоков текущего процесса
+(JOB_WORKERS потоков). Задачу забирает тот, кто первым перевёл её из
+'queued' в 'running', поэтому несколько процессов веб-сервера и команда
+run_jobs не выполнят одну задачу дважды.
+
+Обработчики регистрируются в модулях jobs.py приложений:
+
+    @register_job('duty.generate_plan')
+    def generate_plan(job, plan_id, mode):
+        job.progress(50, 'Распределение')
+        return {'count': ...}
+
+Параметры задачи (payload) передаются обработчику именованными аргументами,
+возвращаемое значение (JSON) сохраняется в Job.result. job.progress() проверяет
+запрос отмены и прерывает обработчик исключением JobCancelled.
+
+JOBS_EAGER = True выполняет задачи сразу в вызывающем потоке (тесты, отладка).
+
+Задача, чей процесс завершился во время выполнения, осталась бы в 'running'
+навсегда: claim_next() (команда run_jobs) сначала завершает со статусом 'failed'
+выполняющиеся задачи, начатые раньше JOB_STALE_TIMEOUT секунд назад.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """Задача отменена пользователем"""
+
+
+def register_job(kind):
+    """Декоратор обработчика задач вида kind"""
+    def decorator(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return decorator
+
+
+class JobContext:
+    """Передаётся обработчику: отчёт о прогрессе и проверка отмены"""
+
+    def __init__(self, job):
+        self.job_id = job.pk
+        self.kind = job.kind
+        self._state = (job.progress, job.message)
+
+    def progress(self, percent, message=None):
+        """
+        Сохранить прогресс (0-100) и этап; запись пропускается, если ничего не изменилось.
+        Обновление выполняется только для неотменённой задачи - если строк не обновлено,
+        отмена запрошена и обработчик прерывается.
+        """
+        percent = max(0, min(100, int(percent)))
+        message = self._state[1] if message is None else message[:255]
+        if (percent, message) == self._state:
+            return
+        updated = Job.objects.filter(pk=self.job_id, cancel_requested=False).update(
+            progress=percent, message=message,
+        )
+        if not updated:
+            raise JobCancelled
+        self._state = (percent, message)
+
+    def check_cancelled(self):
+        if Job.objects.filter(pk=self.job_id, cancel_requested=True).exists():
+            raise JobCancelled
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'JOB_WORKERS', 2),
+                thread_name_prefix='job',
+            )
+        return _executor
+
+
+def submit_job(kind, payload=None, user=None):
+    """
+    Поставить задачу в очередь и вернуть Job. Выполнение начинается после
+    фиксации текущей транзакции (или сразу при JOBS_EAGER).
+    """
+    if kind not in JOB_HANDLERS:
+        raise ImproperlyConfigured(f'Неизвестный вид фоновой задачи: {kind}')
+
+    job = Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    if getattr(settings, 'JOBS_EAGER', False):
+        run_job(job.pk)
+        job.refresh_from_db()
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def cancel_job(job):
+    """
+    Отменить задачу: ожидающая снимается сразу, выполняющаяся получает запрос отмены
+    и останавливается на следующем job.progress(). Возвращает False для завершённой задачи.
+    """
+    now = timezone.now()
+    if Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(status=Job.CANCELLED, finished_at=now):
+        return True
+    return bool(Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(cancel_requested=True))
+
+
+def fail_stale_jobs():
+    """
+    Завершить ошибкой выполняющиеся задачи старше JOB_STALE_TIMEOUT - их исполнитель
+    остановлен (перезапуск сервера). Повторно не запускаются: задача могла частично
+    выполниться. Возвращает число таких задач.
+    """
+    timeout = getattr(settings, 'JOB_STALE_TIMEOUT', 3600)
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, started_at__lt=now - timedelta(seconds=timeout))
+    count = stale.update(
+        status=Job.FAILED,
+        error='Задача прервана: исполнитель остановлен до её завершения',
+        finished_at=now,
+    )
+    if count:
+        logger.warning('Прерванных фоновых задач: %s', count)
+    return count
+
+
+def claim_next():
+    """Забрать самую старую задачу из очереди; None, если очередь пуста"""
+    fail_stale_jobs()
+    while True:
+        job_id = Job.objects.filter(status=Job.QUEUED).order_by('created_at', 'pk').values_list('pk', flat=True).first()
+        if job_id is None:
+            return None
+        if _claim(job_id):
+            return job_id
+
+
+def _claim(job_id):
+    return bool(Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+        status=Job.RUNNING, started_at=timezone.now(),
+    ))
+
+
+def run_job(job_id, claimed=False):
+    """Выполнить задачу, если её ещё никто не забрал (или claimed=True - уже забрана вызывающим)"""
+    if not claimed and not _claim(job_id):
+        return
+    job = Job.objects.get(pk=job_id)
+    handler = JOB_HANDLERS.get(job.kind)
+
+    fields = {'finished_at': None}
+    try:
+        if handler is None:
+            raise ImproperlyConfigured(f'Неизвестный вид фоновой задачи: {job.kind}')
+        result = handler(JobContext(job), **job.payload)
+        fields.update(status=Job.SUCCEEDED, progress=100, result=result)
+    except JobCancelled:
+        logger.info('Задача %s #%s отменена', job.kind, job_id)
+        fields.update(status=Job.CANCELLED)
+    except Exception as e:
+        logger.exception('Ошибка фоновой задачи %s #%s', job.kind, job_id)
+        fields.update(status=Job.FAILED, error=str(e) or e.__class__.__name__)
+
+    fields['finished_at'] = timezone.now()
+    Job.objects.filter(pk=job_id).update(**fields)
+
+
+def _run_in_thread(job_id):
+    # Поток пула держит собственное соединение с БД - закрываем его после задачи
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        connection.close()
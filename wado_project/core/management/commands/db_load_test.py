@@ -0,0 +1,174 @@
+# core/management/commands/db_load_test.py
+import statistics
+import threading
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Count, F
+from django.test.utils import override_settings
+
+from core.db import replica_alias, use_replica
+from duty.calendar_grid import CalendarBuilder
+from duty.models import DutySchedule
+from duty.utils import month_bounds
+
+
+JOURNAL_MODES = ('wal', 'delete')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест БД: читатели строят календарь месяца, пока писатель '
+        'переписывает наряды месяца (как генерация графика). Показывает пропускную '
+        'способность чтения, задержки и ошибки блокировки. Данные не меняются: '
+        'писатель присваивает полям их же значения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Число потоков-читателей')
+        parser.add_argument('--duration', type=float, default=5.0, help='Длительность прогона (секунды)')
+        parser.add_argument('--month', help='Месяц ГГГГ-ММ (по умолчанию - месяц с наибольшим числом нарядов)')
+        parser.add_argument('--write-passes', type=int, default=20,
+                            help='Сколько раз писатель переписывает наряды месяца в одной транзакции')
+        parser.add_argument('--journal-mode', choices=JOURNAL_MODES + ('compare',),
+                            help='SQLite: режим журнала на время теста; compare - прогон в delete и в wal')
+
+    def handle(self, *args, **options):
+        month = self.get_month(options['month'])
+        if not DutySchedule.objects.filter(date__gte=month[0], date__lt=month[1]).exists():
+            raise CommandError(f'Нет нарядов за {month[0]:%Y-%m}: сгенерируйте график или укажите --month')
+
+        journal_mode = options['journal_mode']
+        if journal_mode and connection.vendor != 'sqlite':
+            raise CommandError('--journal-mode применим только к SQLite')
+
+        self.stdout.write(
+            f'БД: {connection.vendor}, реплика: {replica_alias() or "нет"}, месяц: {month[0]:%Y-%m}, '
+            f'читателей: {options["readers"]}, {options["duration"]} с'
+        )
+        modes = JOURNAL_MODES[::-1] if journal_mode == 'compare' else [journal_mode]
+        # Режим журнала хранится в файле БД: после теста возвращается тот, что был до него
+        original = self.set_journal_mode(None) if journal_mode else None
+        try:
+            for mode in modes:
+                if mode is None:
+                    result = self.run(month, options)
+                else:
+                    result = self.run_sqlite(mode, month, options)
+                self.report(mode or connection.vendor, result)
+        finally:
+            if original is not None and self.set_journal_mode(original) != original:
+                self.stderr.write(f'Не удалось вернуть journal_mode={original}')
+
+    def get_month(self, value):
+        if value:
+            try:
+                year, month_num = value.split('-')
+                return month_bounds(year, month_num)
+            except ValueError:
+                raise CommandError('--month ожидается в формате ГГГГ-ММ')
+        busiest = (
+            DutySchedule.objects.order_by().values('date__year', 'date__month')
+            .annotate(count=Count('id')).order_by('-count').first()
+        )
+        if busiest is None:
+            raise CommandError('В БД нет нарядов')
+        return month_bounds(date(busiest['date__year'], busiest['date__month'], 1))
+
+    def set_journal_mode(self, mode):
+        """
+        Установить режим журнала файла SQLite (None - только прочитать, без PRAGMA из настроек).
+        Возвращает действующий режим.
+        """
+        # Режим журнала меняется только без других открытых соединений с файлом
+        connections.close_all()
+        with override_settings(SQLITE_PRAGMAS={'journal_mode': mode} if mode else {}):
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                actual = cursor.fetchone()[0]
+            connection.close()
+        return actual
+
+    def run_sqlite(self, mode, month, options):
+        """Прогон с режимом журнала mode: PRAGMA новых соединений подменяются на время теста"""
+        actual = self.set_journal_mode(mode)
+        if actual != mode:
+            raise CommandError(f'Не удалось включить journal_mode={mode} (текущий: {actual})')
+        with override_settings(SQLITE_PRAGMAS={'journal_mode': mode, 'synchronous': 'NORMAL' if mode == 'wal' else 'FULL'}):
+            return self.run(month, options)
+
+    def run(self, month, options):
+        stop = threading.Event()
+        latencies, errors, writes = [], [], []
+        lock = threading.Lock()
+
+        def reader():
+            own_latencies, own_errors = [], 0
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    try:
+                        # Запросы календаря месяца без сборки объектов - нагрузка на БД, а не на Python
+                        with use_replica():
+                            builder = CalendarBuilder(month[0])
+                            builder.get_version()
+                            list(builder.get_queryset().values_list('id', 'date', 'duty__duty_name'))
+                    except OperationalError:
+                        own_errors += 1
+                        continue
+                    own_latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+                with lock:
+                    latencies.extend(own_latencies)
+                    errors.append(own_errors)
+
+        def writer():
+            schedules = DutySchedule.objects.filter(date__gte=month[0], date__lt=month[1])
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            for _ in range(options['write_passes']):
+                                schedules.update(time_start=F('time_start'), time_end=F('time_end'))
+                    except OperationalError:
+                        continue
+                    writes.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        return {
+            'duration': options['duration'],
+            'latencies': latencies,
+            'errors': sum(errors),
+            'writes': writes,
+        }
+
+    def report(self, title, result):
+        latencies = sorted(result['latencies'])
+        reads = len(latencies)
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(f'  чтений: {reads} ({reads / result["duration"]:.1f}/с), ошибок блокировки: {result["errors"]}')
+        if latencies:
+            p95 = latencies[min(reads - 1, int(reads * 0.95))]
+            self.stdout.write(
+                f'  задержка чтения, мс: медиана {statistics.median(latencies) * 1000:.1f}, '
+                f'p95 {p95 * 1000:.1f}, макс {latencies[-1] * 1000:.1f}'
+            )
+        if result['writes']:
+            self.stdout.write(
+                f'  транзакций записи: {len(result["writes"])}, '
+                f'средняя {statistics.mean(result["writes"]) * 1000:.1f} мс'
+            )
@@ -0,0 +1,32 @@
+# core/management/commands/import_data.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importing import IMPORTERS, get_importer, read_table
+
+
+class Command(BaseCommand):
+    help = (
+        'Пакетный импорт из CSV/XLSX: people - личный состав (по личному номеру), '
+        'permissions - допуски к нарядам, absences - освобождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS), help='Что импортировать')
+        parser.add_argument('path', help='Файл .csv или .xlsx; первая строка - заголовки колонок')
+        parser.add_argument('--dry-run', action='store_true', help='Только проверить строки, ничего не записывать')
+
+    def handle(self, *args, **options):
+        importer = get_importer(options['kind'])(dry_run=options['dry_run'])
+        try:
+            with open(options['path'], 'rb') as file:
+                result = importer.run(read_table(file, options['path']))
+        except OSError as e:
+            raise CommandError(f'Не удалось прочитать файл: {e}')
+
+        for row, message in result.errors:
+            self.stderr.write(f'Строка {row}: {message}')
+        prefix = 'Проверка (без записи)' if options['dry_run'] else 'Импорт'
+        self.stdout.write(
+            f'{prefix}: строк {result.total}, создано {result.created}, обновлено {result.updated}, '
+            f'пропущено {result.skipped}, ошибок {len(result.errors)}'
+        )
@@ -0,0 +1,31 @@
+# core/management/commands/run_jobs.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import claim_next, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполнить фоновые задачи из очереди (core.Job) в этом процессе: '
+        'задачи, оставшиеся в очереди после перезапуска веб-сервера, или отдельный процесс-исполнитель. '
+        'Задачи, прерванные остановкой процесса (выполняются дольше JOB_STALE_TIMEOUT), завершаются ошибкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Не завершаться, а ждать новые задачи')
+        parser.add_argument('--interval', type=float, default=2.0, help='Пауза опроса очереди в режиме --loop (секунды)')
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            job_id = claim_next()
+            if job_id is None:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+                continue
+            run_job(job_id, claimed=True)
+            processed += 1
+        self.stdout.write(f'Выполнено задач: {processed}')
@@ -8,6 +8,9 @@ from django.views.generic.base import ContextMixin, View
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 
+from .db import use_replica
+from .utils import user_in_group
+
 
 
 class IsCommandantMixin:
@@ -25,7 +28,7 @@ class IsCommandantMixin:
             messages.warning(request, _("Для доступа необходимо авторизоваться"))
             return redirect(self.login_url)
 
-        if not request.user.groups.filter(name='Комендант').exists():
+        if not user_in_group(request.user, 'Комендант'):
             messages.warning(request, self.permission_denied_message)
             return redirect('home')
 
@@ -40,7 +43,7 @@ class HasDepartmentMixin(DjangoLoginRequiredMixin):
             messages.warning(request, _("Для доступа необходимо войти"))
             return redirect(self.login_url)
         
-        if not request.user.groups.filter(name='Кафедра').exists():
+        if not user_in_group(request.user, 'Кафедра'):
             messages.error(request, _("Вы не состоите в группе Кафедра"))
             return redirect('home')
 
@@ -92,16 +95,31 @@ class GroupRequiredMixin:
         if self.group_required is None:
             raise NotImplementedError("Необходимо указать группы в group_required")
 
-        user_groups = set(request.user.groups.values_list('name', flat=True))
-        required_groups = set(self.group_required)
-
-        if not (user_groups & required_groups):
+        if not user_in_group(request.user, *self.group_required):
             messages.warning(request, "Недостаточно прав для доступа")
             return redirect('home')
 
         return super().dispatch(request, *args, **kwargs)
 
 
+# Миксин: Чтение страницы с реплики БД
+class ReplicaReadMixin:
+    """
+    GET/HEAD-запросы страницы читают данные с реплики (core.db.use_replica).
+    Ставится после миксинов проверки доступа; шаблон рендерится внутри,
+    чтобы ленивые запросы шаблона тоже ушли на реплику.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with use_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        return response
+
+
 # Миксин: Добавляет сообщения об успехе/ошибке
 class SuccessMessageMixin:
     success_message = ""
@@ -1,3 +1,76 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class Job(models.Model):
+    """
+    Фоновая задача (генерация графика, анализ эффективности).
+    Очередь хранится в БД, выполняет её пул потоков core.jobs; прогресс
+    и отмена передаются через эту же запись.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    STATUS_CHOICES = [
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (SUCCEEDED, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+        (CANCELLED, 'Отменена'),
+    ]
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+    kind = models.CharField("Вид задачи", max_length=100)
+    status = models.CharField("Статус", max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField("Прогресс, %", default=0)
+    message = models.CharField("Текущий этап", max_length=255, blank=True)
+    payload = models.JSONField("Параметры", default=dict, blank=True)
+    result = models.JSONField("Результат", null=True, blank=True)
+    error = models.TextField("Ошибка", blank=True)
+    cancel_requested = models.BooleanField("Запрошена отмена", default=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        verbose_name="Автор",
+    )
+    created_at = models.DateTimeField("Создана", auto_now_add=True)
+    started_at = models.DateTimeField("Начата", null=True, blank=True)
+    finished_at = models.DateTimeField("Завершена", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        ordering = ['-created_at']
+        indexes = [
+            # Выбор следующей задачи из очереди
+            models.Index(fields=['status', 'created_at'], name='core_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED
+
+    def as_dict(self):
+        """Состояние задачи для JSON-ответа опроса статуса"""
+        return {
+            'id': self.pk,
+            'kind': self.kind,
+            'status': self.status,
+            'status_display': self.get_status_display(),
+            'progress': self.progress,
+            'message': self.message,
+            'finished': self.is_finished,
+            'cancel_requested': self.cancel_requested,
+            'result': self.result,
+            'error': self.error,
+        }
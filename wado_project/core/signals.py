@@ -0,0 +1,45 @@
+# core/signals.py
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from .utils import reset_user_groups
+
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Сброс кэша групп при добавлении/удалении групп пользователя (с любой стороны связи)"""
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+
+    if not reverse:
+        reset_user_groups(instance.pk)
+    elif pk_set:
+        reset_user_groups(*pk_set)
+    else:
+        reset_user_groups(*User.objects.filter(groups=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """Переименование или удаление группы меняет роли всех её участников"""
+    if instance.pk:
+        reset_user_groups(*User.objects.filter(groups=instance).values_list('pk', flat=True))
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """PRAGMA из settings.SQLITE_PRAGMAS для каждого нового соединения SQLite"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None) or {}
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,237 @@
+# core/testing.py
+"""
+Общие средства тестов производительности представлений.
+
+AcademyFactory строит реалистичную академию (факультеты, кафедры, тысячи
+людей, допуски, освобождения, месяц графика нарядов, уведомления) пакетными
+запросами; ViewPerformanceTestCase проверяет верхние границы числа SQL-запросов.
+Тестам, которым не нужна полная академия (сервисы, импорт, экспорт, кэши),
+достаточно factory_options = SMALL_ACADEMY.
+"""
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from duty.models import Duty, DutySchedule, MonthlyDutyPlan
+from missing.models import DepartmentMissing, FacultyMissing, MissingReason
+from notifications.models import Notification
+from people.models import People
+from permission.models import DepartmentDutyPermission, FacultyDutyPermission
+from rank.models import Rank
+from unit.models import Department, Faculty
+
+
+# Малая академия (3 факультета, 12 кафедр, около 30 человек) для тестов без бюджетов запросов
+SMALL_ACADEMY = {'people_per_department': 2, 'management_per_faculty': 1}
+
+
+class AcademyFactory:
+    """
+    Фабрика тестовой академии.
+
+    Все объекты создаются через bulk_create, поэтому даже тысячи людей
+    строятся за доли секунды. Ссылки на созданные объекты доступны как атрибуты:
+    faculties, departments, people, duties, plan, users (по ролям).
+    """
+
+    RANKS = ('Лейтенант', 'Капитан', 'Майор', 'Подполковник', 'Полковник')
+    REASONS = [choice for choice, _ in MissingReason.choices]
+
+    def __init__(self, faculties=3, departments_per_faculty=4, people_per_department=150,
+                 management_per_faculty=20, duties=8, month=None):
+        self.faculties_count = faculties
+        self.departments_per_faculty = departments_per_faculty
+        self.people_per_department = people_per_department
+        self.management_per_faculty = management_per_faculty
+        self.duties_count = duties
+        self.month = month or date.today().replace(day=1)
+
+    def build(self):
+        self.ranks = [Rank.objects.create(rank=rank) for rank in self.RANKS]
+        self.build_units()
+        self.build_people()
+        self.build_duties()
+        self.build_permissions()
+        self.build_absences()
+        self.build_schedule()
+        self.build_users()
+        self.build_notifications()
+        return self
+
+    def build_units(self):
+        self.faculties = Faculty.objects.bulk_create([
+            Faculty(name=f'Ф{i}') for i in range(1, self.faculties_count + 1)
+        ])
+        self.departments = Department.objects.bulk_create([
+            Department(name=f'К{faculty.pk}-{j}', faculty=faculty)
+            for faculty in self.faculties
+            for j in range(1, self.departments_per_faculty + 1)
+        ])
+
+    def build_people(self):
+        people = []
+        for department in self.departments:
+            for i in range(self.people_per_department):
+                people.append(People(
+                    full_name=f'Сотрудник {department.name} {i:04d}',
+                    department=department,
+                    faculty=department.faculty,
+                    rank=self.ranks[i % len(self.ranks)],
+                    workload=float(i % 7),
+                ))
+        for faculty in self.faculties:
+            for i in range(self.management_per_faculty):
+                people.append(People(
+                    full_name=f'Управление {faculty.name} {i:04d}',
+                    faculty=faculty,
+                    rank=self.ranks[i % len(self.ranks)],
+                ))
+        self.people = People.objects.bulk_create(people)
+        self.department_people = [person for person in self.people if person.department_id]
+        self.management_people = [person for person in self.people if not person.department_id]
+
+    def build_duties(self):
+        duties = [
+            Duty(duty_name=f'Наряд {i}', duty_weight=1 + i % 3, people_count=1 + i % 2, is_commandant=True)
+            for i in range(1, self.duties_count + 1)
+        ]
+        duties += [
+            Duty(duty_name=f'Факультетский {faculty.name}', duty_weight=1, faculty=faculty)
+            for faculty in self.faculties
+        ]
+        duties += [
+            Duty(duty_name=f'Кафедральный {department.name}', duty_weight=1,
+                 faculty=department.faculty, department=department)
+            for department in self.departments
+        ]
+        self.duties = Duty.objects.bulk_create(duties)
+        self.commandant_duties = [duty for duty in self.duties if duty.is_commandant]
+
+    def build_permissions(self):
+        DepartmentDutyPermission.objects.bulk_create([
+            DepartmentDutyPermission(person=person, duty=duty)
+            for index, person in enumerate(self.department_people)
+            for offset, duty in enumerate(self.commandant_duties)
+            if (index + offset) % 2 == 0
+        ], batch_size=1000)
+        FacultyDutyPermission.objects.bulk_create([
+            FacultyDutyPermission(person=person, duty=duty)
+            for person in self.management_people
+            for duty in self.commandant_duties[:3]
+        ], batch_size=1000)
+
+    def build_absences(self):
+        today = date.today()
+        DepartmentMissing.objects.bulk_create([
+            DepartmentMissing(
+                person=person,
+                start_date=today - timedelta(days=index % 10),
+                end_date=today + timedelta(days=index % 5),
+                reason=self.REASONS[index % len(self.REASONS)],
+            )
+            for index, person in enumerate(self.department_people[::10])
+        ], batch_size=1000)
+        FacultyMissing.objects.bulk_create([
+            FacultyMissing(person=person, start_date=today, end_date=today + timedelta(days=3))
+            for person in self.management_people[::5]
+        ], batch_size=1000)
+
+    def build_schedule(self):
+        self.plan = MonthlyDutyPlan.objects.create(month=self.month, is_generated=True)
+        self.plan.set_duties(self.commandant_duties)
+        self.plan.selected_units = [f'faculty_{faculty.pk}' for faculty in self.faculties]
+        self.plan.save()
+
+        next_month = (self.month + timedelta(days=32)).replace(day=1)
+        days = [self.month + timedelta(days=i) for i in range((next_month - self.month).days)]
+        schedules = []
+        for index, duty in enumerate(self.commandant_duties):
+            for day_index, day in enumerate(days):
+                if (index + day_index) % 3 == 0:
+                    schedules.append(DutySchedule(
+                        duty=duty,
+                        date=day,
+                        assigned_department=self.departments[(index + day_index) % len(self.departments)],
+                    ))
+                else:
+                    schedules.append(DutySchedule(
+                        duty=duty,
+                        date=day,
+                        assigned_faculty=self.faculties[(index + day_index) % len(self.faculties)],
+                    ))
+        self.schedules = DutySchedule.objects.bulk_create(schedules)
+
+    def build_users(self):
+        User = get_user_model()
+        groups = {name: Group.objects.get_or_create(name=name)[0] for name in ('Комендант', 'Факультет', 'Кафедра')}
+        faculty = self.faculties[0]
+        department = self.departments[0]
+
+        self.users = {
+            'commandant': User.objects.create_user('commandant', password='test'),
+            'faculty': User.objects.create_user('faculty', password='test', faculty=faculty),
+            'department': User.objects.create_user(
+                'department', password='test', faculty=department.faculty, department=department
+            ),
+        }
+        self.users['commandant'].groups.add(groups['Комендант'])
+        self.users['faculty'].groups.add(groups['Факультет'])
+        self.users['department'].groups.add(groups['Кафедра'])
+
+    def build_notifications(self, per_user=200):
+        users = list(self.users.values())
+        Notification.objects.bulk_create([
+            Notification(
+                sender=users[(index + 1) % len(users)],
+                recipient=recipient,
+                message=f'Сообщение {index}',
+                is_read=index % 3 == 0,
+            )
+            for recipient in users
+            for index in range(per_user)
+        ], batch_size=1000)
+
+
+class ViewPerformanceTestCase(TestCase):
+    """
+    Базовый класс тестов производительности представлений.
+    Академия строится один раз на класс; тест логинится нужной ролью
+    и проверяет границы через assertViewBudget.
+    """
+
+    factory_options = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.academy = AcademyFactory(**cls.factory_options).build()
+
+    def setUp(self):
+        super().setUp()
+        # Кэш не откатывается вместе с транзакцией теста
+        cache.clear()
+
+    def login(self, role):
+        self.client.force_login(self.academy.users[role])
+
+    def assertViewBudget(self, url, max_queries, method='get', data=None, status=200):
+        """
+        Выполнить запрос и проверить статус и число SQL-запросов.
+        Возвращает ответ для дополнительных проверок.
+        """
+        request = getattr(self.client, method)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = request(url, data or {})
+
+        self.assertEqual(response.status_code, status, f'{url}: неожиданный статус {response.status_code}')
+        self.assertLessEqual(
+            len(queries), max_queries,
+            f'{url}: {len(queries)} SQL-запросов при лимите {max_queries}\n' +
+            '\n'.join(query['sql'] for query in queries.captured_queries[:20])
+        )
+        return response
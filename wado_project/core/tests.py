@@ -1,3 +1,256 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.db import ReplicaRouter, use_primary, use_replica
+from core.jobs import JOB_HANDLERS, cancel_job, claim_next, fail_stale_jobs, register_job, run_job, submit_job
+from core.models import Job
+from core.testing import SMALL_ACADEMY, ViewPerformanceTestCase
+from core.utils import get_user_groups, get_user_type
+from duty.calendar_grid import CalendarBuilder, MonthCalendar
+from duty.models import DutySchedule, MonthlyDutyPlan
+from duty.services import DutyDistributionService
+from notifications.models import Notification
+
+
+class UserRoleCacheTest(ViewPerformanceTestCase):
+    """Роль и счётчик уведомлений кэшируются и сбрасываются при изменениях"""
+
+    factory_options = SMALL_ACADEMY
+
+    def test_repeated_requests_skip_role_queries(self):
+        self.login('commandant')
+        url = reverse('commandant:staff_detail', args=[self.academy.people[0].pk])
+        self.assertViewBudget(url, 6)
+        # session, пользователь, человек - группы и непрочитанные берутся из кэша
+        self.assertViewBudget(url, 3)
+
+    def test_group_change_resets_role(self):
+        user = self.academy.users['department']
+        self.assertEqual(get_user_type(user), 'department')
+
+        user.groups.add(Group.objects.get(name='Комендант'))
+        user = type(user).objects.get(pk=user.pk)
+        self.assertEqual(get_user_type(user), 'commandant')
+
+        Group.objects.get(name='Комендант').customuser_set.clear()
+        user = type(user).objects.get(pk=user.pk)
+        self.assertEqual(get_user_groups(user), frozenset({'Кафедра'}))
+
+    def test_notification_resets_unread_count(self):
+        self.login('faculty')
+        user = self.academy.users['faculty']
+        url = reverse('faculty:staff_detail', args=[self.academy.people[0].pk])
+        before = self.client.get(url).context['unread_notifications']
+
+        notification = Notification.objects.create(
+            sender=self.academy.users['commandant'], recipient=user, message='Новое',
+        )
+        self.assertEqual(self.client.get(url).context['unread_notifications'], before + 1)
+
+        notification.delete()
+        self.assertEqual(self.client.get(url).context['unread_notifications'], before)
+
+        self.client.get(reverse('notifications:mark_all_read'))
+        self.assertEqual(self.client.get(url).context['unread_notifications'], 0)
+
+
+@register_job('tests.steps')
+def steps_job(job, steps, fail_at=None):
+    for step in range(steps):
+        if step == fail_at:
+            raise ValueError('Сбой на шаге')
+        job.progress(100 * step / steps, f'Шаг {step}')
+    return {'steps': steps}
+
+
+@override_settings(JOBS_EAGER=True)
+class JobRunnerTest(ViewPerformanceTestCase):
+    """Фоновые задачи: статус, прогресс, ошибки, отмена и опрос статуса"""
+
+    factory_options = SMALL_ACADEMY
+
+    def test_job_succeeds(self):
+        job = submit_job('tests.steps', {'steps': 4}, user=self.academy.users['commandant'])
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.result, {'steps': 4})
+        self.assertEqual(job.message, 'Шаг 3')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_job_failure_is_recorded(self):
+        with self.assertLogs('core.jobs', 'ERROR'):
+            job = submit_job('tests.steps', {'steps': 4, 'fail_at': 2})
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.error, 'Сбой на шаге')
+
+    def test_queued_job_cancelled_without_running(self):
+        job = Job.objects.create(kind='tests.steps', payload={'steps': 2})
+        self.assertTrue(cancel_job(job))
+        run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.CANCELLED)
+        self.assertIsNone(job.started_at)
+        self.assertFalse(cancel_job(job))
+
+    def test_running_job_stops_on_cancel(self):
+        @register_job('tests.cancelled')
+        def cancelled_job(job):
+            job.progress(10)
+            cancel_job(Job.objects.get(pk=job.job_id))
+            job.progress(20)
+            raise AssertionError('Задача не остановлена')
+
+        try:
+            job = submit_job('tests.cancelled')
+        finally:
+            del JOB_HANDLERS['tests.cancelled']
+        self.assertEqual(job.status, Job.CANCELLED)
+        self.assertEqual(job.progress, 10)
+
+    def test_status_and_cancel_views(self):
+        job = Job.objects.create(kind='tests.steps', created_by=self.academy.users['commandant'])
+        self.login('faculty')
+        self.assertEqual(self.client.get(reverse('core:job_status', args=[job.pk])).status_code, 404)
+
+        self.login('commandant')
+        data = self.assertViewBudget(reverse('core:job_status', args=[job.pk]), 5).json()
+        self.assertEqual(data['job']['status'], Job.QUEUED)
+        data = self.client.post(reverse('core:job_cancel', args=[job.pk])).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['job']['status'], Job.CANCELLED)
+        self.assertFalse(self.client.post(reverse('core:job_cancel', args=[job.pk])).json()['success'])
+
+    def test_generate_plan_returns_job(self):
+        self.login('commandant')
+        month = self.academy.month
+        duties = ','.join(str(duty.pk) for duty in self.academy.commandant_duties)
+        data = self.client.post(reverse('commandant:generate_duty_plan'), {
+            'year': month.year,
+            'month': month.month,
+            'duties': duties,
+            'selected_units': self.academy.plan.selected_units,
+            'mode': 'full',
+        }).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['job']['status'], Job.SUCCEEDED)
+        self.assertEqual(data['job']['result']['count'], DutySchedule.objects.for_month(month).count())
+
+        status = self.client.get(data['status_url']).json()['job']
+        self.assertEqual(status['kind'], 'duty.generate_plan')
+        self.assertTrue(status['finished'])
+
+    def test_generation_error_fails_job(self):
+        self.login('commandant')
+        month = self.academy.month
+        error = RuntimeError('Сбой распределения')
+        with mock.patch.object(DutyDistributionService, 'distribute_duties_improved', side_effect=error), \
+                self.assertLogs('core.jobs', 'ERROR'):
+            data = self.client.post(reverse('commandant:generate_duty_plan'), {
+                'year': month.year,
+                'month': month.month,
+                'duties': ','.join(str(duty.pk) for duty in self.academy.commandant_duties),
+                'selected_units': self.academy.plan.selected_units,
+                'mode': 'full',
+            }).json()
+        job = Job.objects.get(pk=data['job']['id'])
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.error, 'Сбой распределения')
+
+    def test_stale_running_job_failed(self):
+        started = timezone.now() - timedelta(seconds=settings.JOB_STALE_TIMEOUT + 60)
+        stale = Job.objects.create(kind='tests.steps', status=Job.RUNNING, started_at=started)
+        recent = Job.objects.create(kind='tests.steps', status=Job.RUNNING, started_at=timezone.now())
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertIsNone(claim_next())
+        stale.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(stale.status, Job.FAILED)
+        self.assertIsNotNone(stale.finished_at)
+        self.assertEqual(recent.status, Job.RUNNING)
+        self.assertEqual(fail_stale_jobs(), 0)
+
+    def test_generate_horizon_returns_job(self):
+        self.login('commandant')
+        month = self.academy.month
+        url = reverse('commandant:generate_duty_plan')
+        data = {
+            'year': month.year,
+            'month': month.month,
+            'duties': ','.join(str(duty.pk) for duty in self.academy.commandant_duties),
+            'selected_units': self.academy.plan.selected_units,
+            'months': 3,
+        }
+        response = self.client.post(url, data).json()
+        self.assertTrue(response['success'])
+        self.assertEqual(response['months'], 3)
+        self.assertEqual(response['job']['kind'], 'duty.generate_horizon')
+        self.assertEqual(response['job']['status'], Job.SUCCEEDED)
+        result = response['job']['result']
+        self.assertEqual(len(result['months']), 3)
+        self.assertEqual(MonthlyDutyPlan.objects.filter(month__gte=month, is_generated=True).count(), 3)
+
+        self.assertFalse(self.client.post(url, {**data, 'months': 13}).json()['success'])
+
+
+class DatabaseRoutingTest(SimpleTestCase):
+    """Чтение уходит на реплику только внутри use_replica() и только если она настроена"""
+
+    def test_reads_go_to_replica_inside_block(self):
+        router = ReplicaRouter()
+        with override_settings(DATABASE_REPLICA='default'):
+            self.assertIsNone(router.db_for_read(Job))
+            with use_replica():
+                self.assertEqual(router.db_for_read(Job), 'default')
+            self.assertIsNone(router.db_for_read(Job))
+
+    def test_cached_values_built_on_primary(self):
+        router = ReplicaRouter()
+        routes = []
+
+        def build(builder, **kwargs):
+            routes.append(router.db_for_read(DutySchedule))
+            return MonthCalendar(builder.month, [], [], {}, kwargs.get('version'))
+
+        with override_settings(DATABASE_REPLICA='default'), use_replica():
+            with use_primary():
+                self.assertIsNone(router.db_for_read(Job))
+            self.assertEqual(router.db_for_read(Job), 'default')
+            # Сетка кэшируется под текущей версией - строится по основной БД
+            with mock.patch.object(CalendarBuilder, 'build', build):
+                CalendarBuilder(date(2025, 1, 1), scope='routing-test').get()
+        self.assertEqual(routes, [None])
+
+    def test_missing_replica_falls_back_to_default(self):
+        router = ReplicaRouter()
+        with override_settings(DATABASE_REPLICA='replica-not-configured'), use_replica():
+            self.assertIsNone(router.db_for_read(Job))
+        self.assertEqual(router.db_for_write(Job), 'default')
+
+
+class SQLitePragmaTest(TestCase):
+
+    def synchronous_of_new_connection(self):
+        other = connection.copy()
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous')
+                return cursor.fetchone()[0]
+        finally:
+            other.close()
+
+    def test_pragmas_applied_to_new_connection(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Только для SQLite')
+        # Без WADO_SQLITE_WAL PRAGMA не меняются: 2 - FULL, по умолчанию SQLite
+        self.assertEqual(self.synchronous_of_new_connection(), 1 if settings.SQLITE_WAL else 2)
+        with override_settings(SQLITE_PRAGMAS={'synchronous': 'NORMAL'}):
+            # 1 - NORMAL
+            self.assertEqual(self.synchronous_of_new_connection(), 1)
@@ -0,0 +1,11 @@
+# core/urls.py
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('jobs/<int:pk>/', views.JobStatusView.as_view(), name='job_status'),
+    path('jobs/<int:pk>/cancel/', views.JobCancelView.as_view(), name='job_cancel'),
+]
@@ -1,12 +1,57 @@
 # core/utils.py
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.urls import reverse
+
 from people.models import People
+from .db import use_primary
 from unit.models import Faculty, Department
 
+USER_GROUPS_CACHE_KEY = 'user_groups:{}'
+
+
+def user_groups_cache_key(user_id):
+    return USER_GROUPS_CACHE_KEY.format(user_id)
+
+
+def get_user_groups(user):
+    """
+    Названия групп пользователя.
+    Запоминаются на объекте пользователя (request.user живёт весь запрос)
+    и кэшируются на USER_ROLE_CACHE_TIMEOUT секунд; кэш сбрасывается
+    при изменении групп (core.signals).
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    groups = getattr(user, '_group_names', None)
+    if groups is None:
+        key = user_groups_cache_key(user.pk)
+        groups = cache.get(key)
+        if groups is None:
+            with use_primary():
+                groups = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, groups, getattr(settings, 'USER_ROLE_CACHE_TIMEOUT', 300))
+        user._group_names = groups
+    return groups
+
+
+def user_in_group(user, *names):
+    """Состоит ли пользователь хотя бы в одной из групп names"""
+    return not get_user_groups(user).isdisjoint(names)
+
+
+def reset_user_groups(*user_ids):
+    """Сбросить кэш групп пользователей"""
+    cache.delete_many([user_groups_cache_key(user_id) for user_id in user_ids])
+
+
 def get_user_type(user):
     if user.is_superuser:
         return 'admin'
 
-    groups = list(user.groups.values_list('name', flat=True))
+    groups = get_user_groups(user)
 
     if 'Комендант' in groups:
         return 'commandant'
@@ -15,4 +60,29 @@ def get_user_type(user):
     elif 'Кафедра' in groups:
         return 'department'
     
-    return None
\ No newline at end of file
+    return None
+
+
+def paginate(request, queryset, per_page=None):
+    """
+    Страница выборки по параметру ?page= (некорректный номер - ближайшая страница).
+    Размер страницы по умолчанию - настройка STAFF_PAGE_SIZE.
+    """
+    per_page = per_page or getattr(settings, 'STAFF_PAGE_SIZE', 100)
+    return Paginator(queryset, per_page).get_page(request.GET.get('page'))
+
+
+def page_querystring(request):
+    """GET-параметры запроса без page - для ссылок пагинации с сохранением фильтров"""
+    params = request.GET.copy()
+    params.pop('page', None)
+    return params.urlencode()
+
+
+def object_url_builder(url_name):
+    """
+    Построитель URL вида url_name(pk) с одним вызовом reverse():
+    для таблиц на сотни строк reverse() на каждую строку заметно дороже.
+    """
+    prefix, _, suffix = reverse(url_name, args=[0]).rpartition('0')
+    return lambda pk: f'{prefix}{pk}{suffix}'
@@ -1,3 +1,33 @@
-from django.shortcuts import render
+# core/views.py
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.generic import View
 
-# Create your views here.
+from .jobs import cancel_job
+from .mixins import LoginRequiredMixin
+from .models import Job
+
+
+class JobMixin(LoginRequiredMixin):
+    """Фоновая задача текущего пользователя (чужие задачи - 404)"""
+
+    def get_job(self):
+        return get_object_or_404(Job, pk=self.kwargs['pk'], created_by=self.request.user)
+
+
+class JobStatusView(JobMixin, View):
+    """Состояние фоновой задачи для опроса из интерфейса"""
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({'success': True, 'job': self.get_job().as_dict()})
+
+
+class JobCancelView(JobMixin, View):
+    """Отмена фоновой задачи"""
+
+    def post(self, request, *args, **kwargs):
+        job = self.get_job()
+        if not cancel_job(job):
+            return JsonResponse({'success': False, 'error': 'Задача уже завершена'})
+        job.refresh_from_db()
+        return JsonResponse({'success': True, 'job': job.as_dict()})
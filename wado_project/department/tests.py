@@ -1,3 +1,17 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import ViewPerformanceTestCase
+
+
+class DepartmentViewsPerformanceTest(ViewPerformanceTestCase):
+    """Границы числа запросов для страниц кафедры"""
+
+    def setUp(self):
+        super().setUp()
+        self.login('department')
+
+    def test_profile(self):
+        self.assertViewBudget(reverse('department:profile'), 10)
+
+    def test_duty_list(self):
+        self.assertViewBudget(reverse('department:duty:list'), 10)
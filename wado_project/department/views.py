@@ -6,10 +6,10 @@ from django.template.loader import render_to_string
 from django.utils.safestring import mark_safe
 
 from people.models import People
-from core.mixins import HasDepartmentMixin
+from core.mixins import HasDepartmentMixin, ReplicaReadMixin
 
 
-class DepartmentDashboardView(HasDepartmentMixin, TemplateView):
+class DepartmentDashboardView(HasDepartmentMixin, ReplicaReadMixin, TemplateView):
     template_name = 'profiles/department/dashboard.html'
 
     def get_context_data(self, **kwargs):
@@ -5,3 +5,6 @@ class DutyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'duty'
     verbose_name = "Наряды"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,312 @@
+# duty/assignment.py
+"""
+Движки распределения ротационных нарядов между подразделениями.
+
+Каждый движок получает список (наряд, даты), список подразделений и их текущую
+взвешенную нагрузку и возвращает назначения (наряд, дата, подразделение).
+Нагрузка наряда на один день = duty_weight × people_count, а нагрузка
+подразделения сравнивается с учётом его численности (capacity).
+"""
+import heapq
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+logger = logging.getLogger(__name__)
+
+
+def duty_load(duty):
+    """Взвешенная нагрузка одного дня наряда"""
+    return (duty.duty_weight or 0) * (duty.people_count or 1)
+
+
+def unit_capacity(unit):
+    """Численность подразделения (не меньше 1, чтобы не делить на ноль)"""
+    return max(unit.get('capacity') or 1, 1)
+
+
+def spread_dates(dates, counts):
+    """
+    Разложить отсортированные даты по подразделениям с заданными количествами,
+    чередуя подразделения равномерно (smooth weighted round-robin).
+    counts: список (unit, count), сумма count равна len(dates).
+    """
+    total = sum(count for _, count in counts)
+    current = [0] * len(counts)
+    result = []
+    for date in dates:
+        best = None
+        for index, (_, count) in enumerate(counts):
+            if not count:
+                continue
+            current[index] += count
+            if best is None or current[index] > current[best]:
+                best = index
+        current[best] -= total
+        result.append((date, counts[best][0]))
+    return result
+
+
+class BaseAssigner:
+    """Базовый класс движка распределения"""
+
+    name = None
+
+    def assign(self, duty_dates, units, unit_load):
+        """
+        duty_dates: список (duty, [date, ...]) ротационных нарядов;
+        units: список подразделений (dict с ключами 'id', 'type', 'object', 'capacity');
+        unit_load: dict id подразделения -> текущая взвешенная нагрузка (обновляется).
+        Возвращает список (duty, date, unit).
+        """
+        raise NotImplementedError
+
+
+class GreedyAssigner(BaseAssigner):
+    """
+    Прежний жадный алгоритм: каждый день наряда уходит подразделению
+    с минимальным числом нарядов, веса и численность не учитываются.
+    """
+
+    name = 'greedy'
+
+    def assign(self, duty_dates, units, unit_load):
+        counts = {unit['id']: 0 for unit in units}
+        assignments = []
+
+        for duty, dates in duty_dates:
+            weight = duty_load(duty)
+            for i, date in enumerate(dates):
+                min_count = min(counts.values())
+                available_units = [u for u in units if counts[u['id']] == min_count]
+                selected_unit = available_units[i % len(available_units)]
+
+                assignments.append((duty, date, selected_unit))
+                counts[selected_unit['id']] += 1
+                unit_load[selected_unit['id']] += weight
+
+        return assignments
+
+
+class WeightedFairAssigner(BaseAssigner):
+    """
+    Взвешенно-справедливое распределение на куче.
+
+    Наряды обрабатываются от самого тяжёлого к лёгкому; каждый день наряда
+    получает подразделение с минимальной нагрузкой на человека после
+    назначения. O(U + D·log U) на наряд вместо O(D·U).
+    """
+
+    name = 'fair'
+
+    def assign(self, duty_dates, units, unit_load):
+        assignments = []
+        capacities = [unit_capacity(unit) for unit in units]
+
+        for duty, dates in sorted(duty_dates, key=lambda item: duty_load(item[0]), reverse=True):
+            weight = duty_load(duty)
+            heap = [
+                ((unit_load[unit['id']] + weight) / capacities[index], index)
+                for index, unit in enumerate(units)
+            ]
+            heapq.heapify(heap)
+
+            for date in dates:
+                _, index = heapq.heappop(heap)
+                unit = units[index]
+                unit_load[unit['id']] += weight
+                assignments.append((duty, date, unit))
+                heapq.heappush(heap, ((unit_load[unit['id']] + weight) / capacities[index], index))
+
+        return assignments
+
+
+class MinMaxAssigner(BaseAssigner):
+    """
+    Минимизация максимальной нагрузки на человека по подразделениям.
+
+    Задача решается в количествах: n[d, u] - сколько дней наряда d получает
+    подразделение u; затем даты раскладываются по подразделениям равномерно.
+
+    backend='python' - без зависимостей: старт с WeightedFairAssigner и локальный
+    поиск переносами дней из самого загруженного подразделения (не гарантирует оптимум);
+    backend='scipy' - сначала python, затем попытка улучшить результат через
+    scipy.optimize.milp. Это ограниченная эвристика, а не точный метод: milp
+    останавливается по time_limit секунд или по относительному разрыву mip_rel_gap,
+    и его решение берётся, только если оно не хуже локального поиска. Если локальный
+    поиск уже в пределах mip_rel_gap от нижней оценки максимума, milp не запускается;
+    backend='auto' - scipy, если установлен, иначе python.
+    """
+
+    name = 'minmax'
+
+    def __init__(self, backend='auto', time_limit=2.0, mip_rel_gap=0.01, max_iterations=10000):
+        if backend not in ('auto', 'scipy', 'python'):
+            raise ImproperlyConfigured(f'Неизвестный backend распределения: {backend}')
+        self.backend = backend
+        self.time_limit = time_limit
+        self.mip_rel_gap = mip_rel_gap
+        self.max_iterations = max_iterations
+
+    def resolve_backend(self):
+        if self.backend != 'python':
+            try:
+                from scipy.optimize import milp  # noqa: F401
+                return 'scipy'
+            except ImportError:
+                if self.backend == 'scipy':
+                    raise ImproperlyConfigured('Для backend="scipy" требуется установить SciPy')
+        return 'python'
+
+    def assign(self, duty_dates, units, unit_load):
+        duty_dates = [(duty, dates) for duty, dates in duty_dates if dates]
+        if not duty_dates or not units:
+            return []
+
+        weights = [duty_load(duty) for duty, _ in duty_dates]
+        demands = [len(dates) for _, dates in duty_dates]
+        capacities = [unit_capacity(unit) for unit in units]
+        base = [unit_load[unit['id']] for unit in units]
+
+        counts = self._solve_python(weights, demands, capacities, base)
+        if self.resolve_backend() == 'scipy':
+            heuristic_max = self._max_load(counts, weights, capacities, base)
+            bound = self._lower_bound(weights, demands, capacities, base)
+            if heuristic_max > bound * (1 + self.mip_rel_gap) + 1e-12:
+                # Решение milp берём, только если оно не хуже эвристики (например, при обрыве по time_limit)
+                milp_counts = self._solve_scipy(weights, demands, capacities, base)
+                if milp_counts is not None and (
+                    self._max_load(milp_counts, weights, capacities, base) <= heuristic_max
+                ):
+                    counts = milp_counts
+
+        assignments = []
+        for d, (duty, dates) in enumerate(duty_dates):
+            unit_counts = [(units[u], counts[d][u]) for u in range(len(units)) if counts[d][u]]
+            for date, unit in spread_dates(dates, unit_counts):
+                assignments.append((duty, date, unit))
+                unit_load[unit['id']] += weights[d]
+        return assignments
+
+    @staticmethod
+    def _max_load(counts, weights, capacities, base):
+        loads = list(base)
+        for d, row in enumerate(counts):
+            for u, count in enumerate(row):
+                loads[u] += weights[d] * count
+        return max(loads[u] / capacities[u] for u in range(len(capacities)))
+
+    @staticmethod
+    def _lower_bound(weights, demands, capacities, base):
+        """Нижняя оценка максимума: текущий максимум и равномерное деление всей нагрузки"""
+        total = sum(base) + sum(weight * demand for weight, demand in zip(weights, demands))
+        return max(max(base[u] / capacities[u] for u in range(len(capacities))), total / sum(capacities))
+
+    def _solve_scipy(self, weights, demands, capacities, base):
+        import numpy as np
+        from scipy.optimize import Bounds, LinearConstraint, milp
+
+        n_duties, n_units = len(weights), len(capacities)
+        n_vars = n_duties * n_units + 1  # n[d, u] по строкам + z
+
+        objective = np.zeros(n_vars)
+        objective[-1] = 1.0
+
+        # Каждый день наряда назначен ровно одному подразделению
+        demand_rows = np.zeros((n_duties, n_vars))
+        for d in range(n_duties):
+            demand_rows[d, d * n_units:(d + 1) * n_units] = 1.0
+
+        # (base_u + Σ w_d·n[d, u]) / cap_u <= z
+        load_rows = np.zeros((n_units, n_vars))
+        for u in range(n_units):
+            for d in range(n_duties):
+                load_rows[u, d * n_units + u] = weights[d] / capacities[u]
+            load_rows[u, -1] = -1.0
+        load_upper = np.array([-base[u] / capacities[u] for u in range(n_units)])
+
+        integrality = np.ones(n_vars)
+        integrality[-1] = 0
+        upper = np.array([demands[d] for d in range(n_duties) for _ in range(n_units)] + [np.inf])
+
+        result = milp(
+            objective,
+            constraints=[
+                LinearConstraint(demand_rows, np.array(demands, dtype=float), np.array(demands, dtype=float)),
+                LinearConstraint(load_rows, -np.inf, load_upper),
+            ],
+            integrality=integrality,
+            bounds=Bounds(np.zeros(n_vars), upper),
+            options={'time_limit': self.time_limit, 'mip_rel_gap': self.mip_rel_gap},
+        )
+        if result.x is None:
+            logger.warning('milp не нашёл решение (%s), используется python backend', result.message)
+            return None
+
+        values = np.rint(result.x[:-1]).astype(int).reshape(n_duties, n_units)
+        return [list(row) for row in values]
+
+    def _solve_python(self, weights, demands, capacities, base):
+        n_duties, n_units = len(weights), len(capacities)
+        counts = [[0] * n_units for _ in range(n_duties)]
+        loads = list(base)
+
+        # Начальное решение - взвешенно-справедливое на куче
+        for d in sorted(range(n_duties), key=lambda index: weights[index], reverse=True):
+            heap = [((loads[u] + weights[d]) / capacities[u], u) for u in range(n_units)]
+            heapq.heapify(heap)
+            for _ in range(demands[d]):
+                _, u = heapq.heappop(heap)
+                counts[d][u] += 1
+                loads[u] += weights[d]
+                heapq.heappush(heap, ((loads[u] + weights[d]) / capacities[u], u))
+
+        # Локальный поиск: переносим один день из самого загруженного подразделения,
+        # если это уменьшает максимум пары (источник, приёмник)
+        for _ in range(self.max_iterations):
+            normalized = [loads[u] / capacities[u] for u in range(n_units)]
+            source = max(range(n_units), key=normalized.__getitem__)
+            best_move, best_value = None, normalized[source]
+
+            for d in range(n_duties):
+                if not counts[d][source]:
+                    continue
+                source_after = (loads[source] - weights[d]) / capacities[source]
+                for target in range(n_units):
+                    if target == source:
+                        continue
+                    value = max(source_after, (loads[target] + weights[d]) / capacities[target])
+                    if value < best_value - 1e-12:
+                        best_move, best_value = (d, target), value
+
+            if best_move is None:
+                break
+            d, target = best_move
+            counts[d][source] -= 1
+            counts[d][target] += 1
+            loads[source] -= weights[d]
+            loads[target] += weights[d]
+
+        return counts
+
+
+ASSIGNERS = {
+    GreedyAssigner.name: GreedyAssigner,
+    WeightedFairAssigner.name: WeightedFairAssigner,
+    MinMaxAssigner.name: MinMaxAssigner,
+}
+
+
+def get_assigner(name=None, **options):
+    """
+    Получить движок распределения по имени ('greedy', 'fair', 'minmax').
+    По умолчанию берётся настройка DUTY_ASSIGNMENT_ENGINE.
+    """
+    name = name or getattr(settings, 'DUTY_ASSIGNMENT_ENGINE', WeightedFairAssigner.name)
+    try:
+        assigner_class = ASSIGNERS[name]
+    except KeyError:
+        raise ImproperlyConfigured(f'Неизвестный движок распределения нарядов: {name}')
+    return assigner_class(**options)
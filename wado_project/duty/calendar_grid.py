@@ -0,0 +1,121 @@
+# duty/calendar_grid.py
+import calendar
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.db import use_primary
+from .models import DutySchedule
+from .utils import month_bounds
+from .versions import get_month_version
+
+
+class MonthCalendar:
+    """
+    Календарная сетка месяца с нарядами.
+
+    weeks     - недели (пн-вс) из ячеек {'day', 'date', 'schedules', 'is_today'},
+                дни соседних месяцев - пустые ячейки;
+    schedules - все наряды месяца списком (queryset уже вычислен);
+    by_date   - дата -> наряды этой даты.
+    """
+
+    __slots__ = ('month', 'weeks', 'schedules', 'by_date', 'version')
+
+    def __init__(self, month, weeks, schedules, by_date, version=None):
+        self.month = month
+        self.weeks = weeks
+        self.schedules = schedules
+        self.by_date = by_date
+        self.version = version
+
+    def __len__(self):
+        return len(self.schedules)
+
+    def dates(self):
+        """Даты, на которые есть наряды, по возрастанию"""
+        return sorted(self.by_date)
+
+    def mark_today(self, today=None):
+        """Отметить сегодняшнюю ячейку (не кэшируется вместе с сеткой)"""
+        today = today or timezone.now().date()
+        for week in self.weeks:
+            for cell in week:
+                if cell['date'] is not None:
+                    cell['is_today'] = cell['date'] == today
+        return self
+
+
+class CalendarBuilder:
+    """
+    Построение календарной сетки месяца за один проход по нарядам.
+
+    Готовая сетка кэшируется по ключу (область, месяц, версия), где версия -
+    счётчик изменений графика месяца (duty.versions), поэтому любое изменение
+    графика даёт новый ключ, а повторный просмотр не обращается к БД.
+    Область - роль и подразделение смотрящего ('all', 'faculty_3').
+
+    Использование:
+        grid = CalendarBuilder(month).get()
+        grid = CalendarBuilder(month, queryset=..., scope=f'faculty_{faculty.pk}').get()
+    """
+
+    CACHE_KEY = 'duty_calendar:{scope}:{month}:{version}'
+
+    def __init__(self, month, queryset=None, scope='all'):
+        self.month, self.next_month = month_bounds(month)
+        self.queryset = queryset if queryset is not None else DutySchedule.objects.all()
+        self.scope = scope
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            date__gte=self.month,
+            date__lt=self.next_month,
+        ).select_related('duty', 'assigned_faculty', 'assigned_department')
+
+    def get_version(self):
+        return get_month_version(self.month)
+
+    def build(self, schedules=None, version=None):
+        """Собрать сетку без кэша (schedules - уже загруженные наряды месяца)"""
+        if schedules is None:
+            schedules = list(self.get_queryset())
+
+        by_date = defaultdict(list)
+        for schedule in schedules:
+            by_date[schedule.date].append(schedule)
+
+        year, month = self.month.year, self.month.month
+        weeks = []
+        for week in calendar.Calendar(firstweekday=0).monthdayscalendar(year, month):
+            cells = []
+            for day in week:
+                if day == 0:
+                    cells.append({'day': None, 'date': None, 'schedules': []})
+                else:
+                    day_date = date(year, month, day)
+                    cells.append({
+                        'day': day,
+                        'date': day_date,
+                        'schedules': by_date.get(day_date, []),
+                        'is_today': False,
+                    })
+            weeks.append(cells)
+
+        return MonthCalendar(self.month, weeks, schedules, dict(by_date), version)
+
+    def get(self):
+        """Сетка из кэша или построенная заново"""
+        version = self.get_version()
+        key = self.CACHE_KEY.format(scope=self.scope, month=self.month.strftime('%Y-%m'), version=version)
+
+        grid = cache.get(key)
+        if grid is None:
+            # Кэшируется под текущей версией - строится по основной БД, не по реплике
+            with use_primary():
+                grid = self.build(version=version)
+            cache.set(key, grid, getattr(settings, 'DUTY_CALENDAR_CACHE_TIMEOUT', 600))
+        return grid.mark_today()
@@ -0,0 +1,70 @@
+# duty/export.py
+"""
+Выгрузка графика нарядов (DutySchedule) и общие части выгрузок по факультетам.
+
+Строки читаются values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE) в порядке
+факультета, поэтому листы XLSX (по одному на факультет) формируются за один
+проход без загрузки всей выборки (см. core.export).
+"""
+from itertools import groupby
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from .models import DutySchedule
+
+
+NO_FACULTY = 'Без факультета'
+
+SCHEDULE_HEADER = [
+    'Дата', 'Начало', 'Окончание', 'Наряд', 'Вес', 'Людей',
+    'Вид подразделения', 'Подразделение', 'Назначено вручную',
+]
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def faculty_sheets(rows, header):
+    """
+    Листы (факультет, заголовок, строки) из строк, упорядоченных по факультету.
+    Первый элемент строки - название факультета листа, в выгрузку не попадает.
+    """
+    for faculty, group in groupby(rows, key=lambda row: row[0]):
+        yield faculty or NO_FACULTY, header, (row[1:] for row in group)
+
+
+def format_time(value):
+    return value.strftime('%H:%M') if value else ''
+
+
+def schedule_rows(start, end, queryset=None):
+    """Строки графика за [start, end): факультет листа, затем колонки SCHEDULE_HEADER"""
+    queryset = queryset if queryset is not None else DutySchedule.objects.all()
+    rows = queryset.filter(date__gte=start, date__lt=end).annotate(
+        sheet_faculty=Coalesce('assigned_faculty__name', 'assigned_department__faculty__name'),
+    ).order_by(
+        F('sheet_faculty').asc(nulls_last=True), 'date', 'time_start', 'duty__duty_name',
+    ).values_list(
+        'sheet_faculty', 'date', 'time_start', 'time_end', 'duty__duty_name', 'duty__duty_weight',
+        'duty__people_count', 'assigned_faculty__name', 'assigned_department__name', 'is_manually_assigned',
+    ).iterator(chunk_size=chunk_size())
+
+    for (faculty, day, time_start, time_end, duty_name, weight, people_count,
+         faculty_name, department_name, is_manual) in rows:
+        if faculty_name:
+            unit_type, unit_name = 'Факультет', faculty_name
+        elif department_name:
+            unit_type, unit_name = 'Кафедра', department_name
+        else:
+            unit_type, unit_name = '', ''
+        yield (
+            faculty, day, format_time(time_start), format_time(time_end), duty_name, weight,
+            people_count, unit_type, unit_name, 'Да' if is_manual else 'Нет',
+        )
+
+
+def schedule_sheets(start, end, queryset=None):
+    return faculty_sheets(schedule_rows(start, end, queryset), SCHEDULE_HEADER)
@@ -0,0 +1,214 @@
+# duty/horizon.py
+"""
+Планирование нарядов на несколько месяцев подряд (квартал, полугодие).
+
+    HorizonPlanner.prepare_plans(start, 3, duties, selected_units)
+    result = HorizonPlanner(start, 3, progress=job.progress).generate()
+
+Месяцы горизонта распределяются по порядку, и взвешенная нагрузка подразделений
+(duty_weight × people_count) переходит из месяца в месяц: подразделение, получившее
+больше в январе, в феврале получит меньше, и справедливость выдерживается по всему
+горизонту, а не внутри каждого месяца.
+
+Распределение месяца зависит от нагрузки предыдущих, поэтому считается в вызывающем
+потоке, а сохранение готового месяца уходит в пул из DUTY_HORIZON_WORKERS потоков и
+идёт параллельно с распределением следующего. При carry_load=False месяцы независимы
+и целиком (распределение и запись) считаются в пуле, у каждого потока свой экземпляр
+движка распределения. Каждый месяц сохраняется в своей транзакции
+(DutyDistributionService.save_schedule): при ошибке или отмене уже сохранённые месяцы
+остаются. Нагрузка месяца, который не удалось сохранить, снимается с переносимой
+нагрузки; при параллельной записи следующие месяцы к этому моменту уже могут быть
+распределены с её учётом.
+"""
+import copy
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from .assignment import get_assigner
+from .models import DutyScheduleRule, MonthlyDutyPlan
+from .services import DutyDistributionService
+from .tracing import NULL_TRACE
+from .utils import add_months
+
+logger = logging.getLogger(__name__)
+
+
+class HorizonPlanner:
+
+    # Не больше года за один запуск
+    MAX_MONTHS = 12
+
+    def __init__(self, start_month, months, carry_load=True, workers=None, trace=None, assigner=None, progress=None):
+        if not 1 <= months <= self.MAX_MONTHS:
+            raise ValueError(f'Горизонт планирования - от 1 до {self.MAX_MONTHS} месяцев')
+        self.months = [add_months(start_month.replace(day=1), index) for index in range(months)]
+        self.carry_load = carry_load
+        self.workers = self.get_workers() if workers is None else max(workers, 1)
+        self.trace = trace or NULL_TRACE
+        self.assigner = assigner or get_assigner()
+        self._local = threading.local()
+        # progress(percent, message) - отчёт фоновой задачи (core.jobs.JobContext.progress)
+        self.progress = progress or (lambda percent, message=None: None)
+
+    @staticmethod
+    def get_workers():
+        if connection.vendor == 'sqlite':
+            # SQLite допускает одного писателя: параллельные транзакции только ждали бы блокировку
+            return 1
+        return max(getattr(settings, 'DUTY_HORIZON_WORKERS', 2), 1)
+
+    @classmethod
+    def prepare_plans(cls, start_month, months, duties, selected_units):
+        """
+        Планы всех месяцев горизонта с нарядами duties и подразделениями selected_units.
+        Новые планы получают правила дней недели из плана первого месяца (диапазоны
+        и конкретные даты относятся к своему месяцу и не переносятся); правила
+        существующих планов не меняются. Возвращает планы по порядку месяцев.
+        """
+        month_list = [add_months(start_month.replace(day=1), index) for index in range(months)]
+        with transaction.atomic():
+            plans = {plan.month: plan for plan in MonthlyDutyPlan.objects.filter(month__in=month_list)}
+            first = plans.get(month_list[0])
+            created = [MonthlyDutyPlan(month=month) for month in month_list if month not in plans]
+            for plan in created:
+                plan.save()
+                plans[plan.month] = plan
+
+            for plan in plans.values():
+                plan.selected_units = selected_units
+                plan.set_duties(duties)
+
+            if first is not None and created:
+                weekday_rules = list(first.schedule_rules.filter(start_date__isnull=True))
+                DutyScheduleRule.objects.bulk_create([
+                    DutyScheduleRule(plan=plan, duty_id=rule.duty_id, weekdays=rule.weekdays)
+                    for plan in created
+                    for rule in weekday_rules
+                ])
+        return [plans[month] for month in month_list]
+
+    def get_plans(self):
+        plans = {plan.month: plan for plan in MonthlyDutyPlan.objects.filter(month__in=self.months)}
+        missing = [month for month in self.months if month not in plans]
+        if missing:
+            raise ValueError(f'Нет плана на {", ".join(f"{month:%m.%Y}" for month in missing)}')
+        return [plans[month] for month in self.months]
+
+    def month_progress(self, index, month):
+        """Прогресс распределения месяца index -> общий прогресс горизонта (5-85%)"""
+        total = len(self.months)
+
+        def progress(percent, message=None):
+            overall = 5 + (index * 100 + percent) * 80 // (total * 100)
+            self.progress(overall, f'{month:%m.%Y}: {message}' if message else None)
+        return progress
+
+    def distribute_month(self, service, plan, unit_load):
+        duties = list(plan.duties.all())
+        return duties, service.distribute_duties_improved(duties, plan, unit_load=unit_load)
+
+    def save_month(self, service, plan, duties, schedules):
+        # Трассировка не потокобезопасна - запись считается без неё, итоги добавляет generate()
+        _, created = service.save_schedule(plan, duties, schedules, trace=NULL_TRACE)
+        return created
+
+    def thread_assigner(self):
+        """Копия движка распределения для текущего потока пула"""
+        assigner = getattr(self._local, 'assigner', None)
+        if assigner is None:
+            assigner = self._local.assigner = copy.deepcopy(self.assigner)
+        return assigner
+
+    def generate_month(self, plan):
+        """Распределение и запись независимого месяца в потоке пула (carry_load=False)"""
+        # Трассировка и прогресс задачи в потоках пула не используются
+        service = DutyDistributionService(plan.month, assigner=self.thread_assigner())
+        duties, schedules = self.distribute_month(service, plan, None)
+        return self.save_month(service, plan, duties, schedules)
+
+    def generate(self):
+        """
+        Сгенерировать графики всех месяцев горизонта (полная генерация: записи месяцев
+        пересоздаются, как в DutyDistributionService.generate_schedule).
+        Возвращает dict: count, months [{'month', 'count'}], failed [месяцы с ошибкой записи]
+        и unit_load - итоговая нагрузка подразделений за горизонт (при carry_load).
+        """
+        plans = self.get_plans()
+        unit_load = {} if self.carry_load else None
+        counts = {}
+        failed = []
+        # Нагрузка, добавленная распределением месяца, - снимается, если месяц не сохранён
+        month_load = {}
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='horizon') if self.workers > 1 else None
+        futures = {}
+
+        def finish(month, call, *args):
+            try:
+                counts[month] = call(*args)
+            except Exception:
+                logger.exception('Ошибка генерации графика на %s', month)
+                failed.append(month)
+                for unit_id, load in month_load.pop(month, {}).items():
+                    unit_load[unit_id] -= load
+
+        try:
+            for index, plan in enumerate(plans):
+                if executor is not None and not self.carry_load:
+                    futures[executor.submit(_in_thread, self.generate_month, plan)] = plan.month
+                    continue
+
+                service = DutyDistributionService(
+                    plan.month, trace=self.trace, assigner=self.assigner,
+                    progress=self.month_progress(index, plan.month),
+                )
+
+                before = dict(unit_load) if unit_load is not None else None
+                with self.trace.phase('horizon_distribute'):
+                    duties, schedules = self.distribute_month(service, plan, unit_load)
+                if unit_load is not None:
+                    month_load[plan.month] = {
+                        unit_id: load - before.get(unit_id, 0) for unit_id, load in unit_load.items()
+                    }
+                if executor is not None:
+                    futures[executor.submit(_in_thread, self.save_month, service, plan, duties, schedules)] = plan.month
+                else:
+                    self.progress(5 + (index + 1) * 80 // len(plans), f'{plan.month:%m.%Y}: сохранение графика')
+                    with self.trace.phase('horizon_write'):
+                        finish(plan.month, self.save_month, service, plan, duties, schedules)
+
+            with self.trace.phase('horizon_write'):
+                for done, future in enumerate(as_completed(futures), start=1):
+                    finish(futures[future], future.result)
+                    self.progress(85 + done * 15 // len(futures), f'Сохранено месяцев: {done} из {len(futures)}')
+        finally:
+            if executor is not None:
+                # При отмене ждём уже начатые месяцы (каждый фиксируется целиком), остальные снимаем
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        self.trace.incr('months', len(counts))
+        self.trace.incr('created', sum(counts.values()))
+        result = {
+            'count': sum(counts.values()),
+            'months': [
+                {'month': f'{month:%Y-%m}', 'count': counts[month]}
+                for month in self.months if month in counts
+            ],
+            'failed': [f'{month:%Y-%m}' for month in sorted(failed)],
+        }
+        if unit_load is not None:
+            result['unit_load'] = unit_load
+        self.trace.log(f'Генерация графика на {len(self.months)} мес. с {self.months[0]:%m.%Y}')
+        return result
+
+
+def _in_thread(call, *args):
+    # Поток пула держит собственное соединение с БД - закрываем его после месяца
+    close_old_connections()
+    try:
+        return call(*args)
+    finally:
+        connection.close()
@@ -0,0 +1,59 @@
+# duty/jobs.py
+from datetime import date
+
+from core.jobs import register_job
+
+from .horizon import HorizonPlanner
+
+from .models import MonthlyDutyPlan
+from .services import DutyDistributionService
+from .tracing import GenerationTrace
+
+
+@register_job('duty.generate_plan')
+def generate_plan(job, plan_id, mode='full'):
+    """
+    Генерация графика месячного плана в фоне.
+    mode='incremental' сохраняет ручные назначения, 'full' пересоздаёт весь месяц.
+    """
+    monthly_plan = MonthlyDutyPlan.objects.get(pk=plan_id)
+    trace = GenerationTrace.create()
+    distribution_service = DutyDistributionService(monthly_plan.month, trace=trace, progress=job.progress)
+
+    result = {'mode': mode, 'units_count': len(monthly_plan.selected_units or [])}
+    if mode == 'incremental':
+        changes = distribution_service.regenerate_schedule(monthly_plan)
+        result.update(
+            count=changes['created'],
+            changes=changes,
+            message=(
+                f'График нарядов обновлён: добавлено {changes["created"]}, изменено {changes["updated"]}, '
+                f'удалено {changes["deleted"]} записей.'
+            ),
+        )
+    else:
+        count = distribution_service.generate_schedule(monthly_plan)
+        result.update(count=count, message=f'График нарядов успешно сгенерирован! Создано {count} записей.')
+
+    if trace.enabled:
+        result['trace'] = trace.summary()
+    return result
+
+
+@register_job('duty.generate_horizon')
+def generate_horizon(job, start, months, carry_load=True):
+    """
+    Генерация графиков нескольких месяцев подряд (duty.horizon) с переносом
+    нагрузки подразделений из месяца в месяц; start - первый месяц (ISO-дата).
+    """
+    trace = GenerationTrace.create()
+    planner = HorizonPlanner(date.fromisoformat(start), months, carry_load=carry_load, trace=trace, progress=job.progress)
+    result = planner.generate()
+
+    message = f'Графики нарядов на {months} мес. сгенерированы! Создано {result["count"]} записей.'
+    if result['failed']:
+        message += f' Не удалось сохранить: {", ".join(result["failed"])}.'
+    result['message'] = message
+    if trace.enabled:
+        result['trace'] = trace.summary()
+    return result
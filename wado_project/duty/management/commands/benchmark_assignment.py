@@ -0,0 +1,75 @@
+# duty/management/commands/benchmark_assignment.py
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from duty.assignment import ASSIGNERS, MinMaxAssigner, duty_load, unit_capacity
+from duty.models import Duty
+
+
+class Command(BaseCommand):
+    help = 'Сравнение движков распределения нарядов на синтетическом плане (без обращения к БД)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units', type=int, default=50)
+        parser.add_argument('--duties', type=int, default=40)
+        parser.add_argument('--days', type=int, default=31)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--repeat', type=int, default=3, help='Число повторов для замера времени')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        units = [
+            {'id': f'unit_{i}', 'type': 'faculty', 'object': None, 'capacity': rng.randint(5, 60)}
+            for i in range(options['units'])
+        ]
+        duty_dates = []
+        for i in range(options['duties']):
+            duty = Duty(
+                id=i + 1,
+                duty_name=f'Наряд {i + 1}',
+                duty_weight=round(rng.uniform(0.5, 3.0), 1),
+                people_count=rng.randint(1, 4),
+            )
+            # Часть нарядов - весь месяц, часть - отдельные дни
+            days = range(1, options['days'] + 1)
+            if rng.random() < 0.5:
+                days = sorted(rng.sample(days, rng.randint(4, options['days'])))
+            duty_dates.append((duty, [date(2025, 1, 1) + timedelta(days=day - 1) for day in days]))
+
+        total_load = sum(duty_load(duty) * len(dates) for duty, dates in duty_dates)
+        lower_bound = total_load / sum(unit_capacity(unit) for unit in units)
+        self.stdout.write(
+            f"План: {len(units)} подразделений × {len(duty_dates)} нарядов × {options['days']} дней, "
+            f"{sum(len(dates) for _, dates in duty_dates)} назначений; "
+            f"нижняя граница макс. нагрузки на человека: {lower_bound:.4f}"
+        )
+
+        engines = [(name, assigner_class()) for name, assigner_class in ASSIGNERS.items() if name != 'minmax']
+        engines.append(('minmax[python]', MinMaxAssigner(backend='python')))
+        try:
+            engines.append(('minmax[scipy]', MinMaxAssigner(backend='scipy')))
+            engines[-1][1].resolve_backend()
+        except Exception:
+            engines.pop()
+            self.stdout.write('SciPy не установлен: minmax[scipy] пропущен')
+
+        self.stdout.write(f"{'движок':<16}{'время, мс':>12}{'макс/чел':>12}{'разрыв, %':>12}{'CV':>10}")
+        for name, assigner in engines:
+            timings = []
+            for _ in range(options['repeat']):
+                unit_load = {unit['id']: 0 for unit in units}
+                started = time.perf_counter()
+                assigner.assign(duty_dates, units, unit_load)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            normalized = [unit_load[unit['id']] / unit_capacity(unit) for unit in units]
+            worst = max(normalized)
+            self.stdout.write(
+                f"{name:<16}{min(timings):>12.2f}{worst:>12.4f}"
+                f"{(worst / lower_bound - 1) * 100:>12.2f}"
+                f"{statistics.pstdev(normalized) / statistics.mean(normalized):>10.3f}"
+            )
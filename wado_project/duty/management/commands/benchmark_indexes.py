@@ -0,0 +1,128 @@
+# duty/management/commands/benchmark_indexes.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from duty.models import DutySchedule
+from missing.models import DepartmentMissing, FacultyMissing
+from notifications.models import Notification
+
+
+# Индексы, добавленные для горячих путей (модель, имя индекса)
+BENCHMARK_INDEXES = [
+    (DutySchedule, 'duty_sched_date_idx'),
+    (DutySchedule, 'duty_sched_faculty_date_idx'),
+    (DutySchedule, 'duty_sched_dept_date_idx'),
+    (DepartmentMissing, 'dep_missing_person_dates_idx'),
+    (FacultyMissing, 'fac_missing_person_dates_idx'),
+    (Notification, 'notif_recipient_read_idx'),
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Планы и время горячих запросов графика, освобождений и уведомлений '
+        'до (date__year/date__month, без составных индексов) и после (диапазоны дат, индексы). '
+        'Индексы удаляются внутри транзакции, которая затем откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Год (по умолчанию текущий)')
+        parser.add_argument('--month', type=int, help='Месяц (по умолчанию текущий)')
+        parser.add_argument('--repeat', type=int, default=20, help='Число повторов для замера времени')
+        parser.add_argument('--no-plans', action='store_true', help='Не выводить планы запросов')
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        year = options['year'] or today.year
+        month = options['month'] or today.month
+        cases = self.get_cases(year, month, today)
+        if not cases:
+            self.stdout.write('Нет данных для замера')
+            return
+
+        try:
+            with transaction.atomic():
+                self.drop_indexes()
+                before = self.measure(cases, 'before', options)
+                raise _Rollback
+        except _Rollback:
+            pass
+        # SQLite кэширует подготовленные EXPLAIN без проверки схемы - начинаем с нового соединения
+        connection.close()
+        after = self.measure(cases, 'after', options)
+
+        self.stdout.write(f"\n{'запрос':<28}{'до, мс':>10}{'после, мс':>12}{'ускорение':>12}")
+        for name in cases:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            self.stdout.write(f"{name:<28}{before[name]:>10.3f}{after[name]:>12.3f}{speedup:>11.1f}×")
+
+    def get_cases(self, year, month, today):
+        """Имя -> (запрос «до», запрос «после»)"""
+        cases = {}
+        schedules = DutySchedule.objects.order_by()
+        cases['график месяца'] = (
+            schedules.filter(date__year=year, date__month=month),
+            schedules.for_month(year, month),
+        )
+
+        sample = schedules.for_month(year, month).exclude(assigned_faculty=None).first()
+        if sample:
+            faculty = sample.assigned_faculty_id
+            cases['график факультета'] = (
+                schedules.filter(assigned_faculty_id=faculty, date__year=year, date__month=month),
+                schedules.filter(assigned_faculty_id=faculty).for_month(year, month),
+            )
+        sample = schedules.for_month(year, month).exclude(assigned_department=None).first()
+        if sample:
+            department = sample.assigned_department_id
+            cases['график кафедры'] = (
+                schedules.filter(assigned_department_id=department, date__year=year, date__month=month),
+                schedules.filter(assigned_department_id=department).for_month(year, month),
+            )
+
+        for label, model in (('кафедральные', DepartmentMissing), ('факультетские', FacultyMissing)):
+            person_id = model.objects.values_list('person_id', flat=True).order_by().first()
+            if person_id:
+                queryset = model.objects.filter(
+                    person_id=person_id, start_date__lte=today, end_date__gte=today
+                ).order_by()
+                cases[f'освобождения ({label})'] = (queryset, queryset)
+
+        recipient_id = Notification.objects.values_list('recipient_id', flat=True).order_by().first()
+        if recipient_id:
+            queryset = Notification.objects.filter(recipient_id=recipient_id, is_read=False).order_by('-created_at')
+            cases['непрочитанные уведомления'] = (queryset, queryset)
+        return cases
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            schema_editor = connection.schema_editor()
+            for model, name in BENCHMARK_INDEXES:
+                index = next(index for index in model._meta.indexes if index.name == name)
+                cursor.execute(str(index.remove_sql(model, schema_editor)))
+
+    def measure(self, cases, stage, options):
+        results = {}
+        if not options['no_plans']:
+            self.stdout.write(f"\n=== {'До' if stage == 'before' else 'После'} ===")
+        for name, queries in cases.items():
+            queryset = queries[0] if stage == 'before' else queries[1]
+            if not options['no_plans']:
+                self.stdout.write(f'-- {name}')
+                self.stdout.write(queryset.explain())
+
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+        return results
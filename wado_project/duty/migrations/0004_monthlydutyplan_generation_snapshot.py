@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('duty', '0003_monthlydutyplan_selected_units'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlydutyplan',
+            name='generation_snapshot',
+            field=models.JSONField(blank=True, default=dict, help_text='Подразделения и параметры нарядов на момент последней генерации (для инкрементальной перегенерации)', verbose_name='Снимок параметров генерации'),
+        ),
+    ]
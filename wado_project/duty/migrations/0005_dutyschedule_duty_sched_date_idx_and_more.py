@@ -0,0 +1,25 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('duty', '0004_monthlydutyplan_generation_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dutyschedule',
+            index=models.Index(fields=['date'], name='duty_sched_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dutyschedule',
+            index=models.Index(fields=['assigned_faculty', 'date'], name='duty_sched_faculty_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dutyschedule',
+            index=models.Index(fields=['assigned_department', 'date'], name='duty_sched_dept_date_idx'),
+        ),
+    ]
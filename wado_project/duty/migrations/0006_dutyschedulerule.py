@@ -0,0 +1,42 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('duty', '0005_dutyschedule_duty_sched_date_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DutyScheduleRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(blank=True, null=True, verbose_name='Дата / начало диапазона')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Конец диапазона')),
+                ('weekdays', models.PositiveSmallIntegerField(default=0, verbose_name='Дни недели (битовая маска)')),
+                ('duty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_rules', to='duty.duty', verbose_name='Наряд')),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_rules', to='duty.monthlydutyplan', verbose_name='План')),
+            ],
+            options={
+                'verbose_name': 'Правило расписания наряда',
+                'verbose_name_plural': 'Правила расписания нарядов',
+                'indexes': [models.Index(fields=['plan', 'duty'], name='duty_rule_plan_duty_idx'), models.Index(fields=['start_date', 'end_date'], name='duty_rule_dates_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dutyschedulerule',
+            constraint=models.CheckConstraint(check=models.Q(('start_date__isnull', False), ('weekdays__gt', 0), _connector='OR'), name='duty_rule_not_empty'),
+        ),
+        migrations.AddConstraint(
+            model_name='dutyschedulerule',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__isnull', True), ('start_date__lte', models.F('end_date')), _connector='OR'), name='duty_rule_range_order'),
+        ),
+        migrations.AddConstraint(
+            model_name='dutyschedulerule',
+            constraint=models.CheckConstraint(check=models.Q(('weekdays__lt', 128)), name='duty_rule_weekdays_mask'),
+        ),
+    ]
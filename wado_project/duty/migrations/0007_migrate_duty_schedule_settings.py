@@ -0,0 +1,193 @@
+# Перенос настроек расписания нарядов из JSON MonthlyDutyPlan.duty_schedule_settings
+# в строки DutyScheduleRule
+
+# Разбор настроек и сворачивание в маску скопированы из duty.rules и duty.utils на момент
+# миграции: миграция не должна зависеть от того, как эти модули изменятся позже.
+
+import calendar
+import re
+from datetime import date, datetime
+
+from django.db import migrations
+
+
+DATE_FORMATS = ('%d.%m.%Y', '%d.%m.%y')
+DISPLAY_DATE_FORMAT = '%d.%m.%Y'
+RANGE_SEPARATORS = (' по ', ' to ', ' — ', ' - ')
+NON_DATE_CHARS = re.compile(r'[^\d.]')
+WEEKDAYS = {
+    'понедельник': 0, 'вторник': 1, 'среда': 2, 'четверг': 3,
+    'пятница': 4, 'суббота': 5, 'воскресенье': 6,
+    'пн': 0, 'вт': 1, 'ср': 2, 'чт': 3, 'пт': 4, 'сб': 5, 'вс': 6,
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6,
+    'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6,
+}
+
+
+def parse_weekday(day_setting):
+    if isinstance(day_setting, int):
+        return day_setting if 0 <= day_setting <= 6 else None
+    if not isinstance(day_setting, str) or not day_setting.strip():
+        return None
+    clean = day_setting.strip()
+    if clean.isdigit():
+        return int(clean) if 0 <= int(clean) <= 6 else None
+    return WEEKDAYS.get(clean.lower())
+
+
+def parse_date(date_str):
+    if not date_str or not isinstance(date_str, str):
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_range(range_str):
+    if not range_str or not isinstance(range_str, str):
+        return None, None
+    for sep in RANGE_SEPARATORS:
+        parts = range_str.split(sep)
+        if len(parts) != 2:
+            continue
+        start_clean = NON_DATE_CHARS.sub('', parts[0])
+        end_clean = NON_DATE_CHARS.sub('', parts[1])
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(start_clean, fmt).date(), datetime.strptime(end_clean, fmt).date()
+            except ValueError:
+                continue
+    return None, None
+
+
+def parse_settings(settings):
+    """Строковые настройки наряда -> элементы (start_date, end_date, weekdays); некорректные пропускаются"""
+    settings = settings or {}
+    items = []
+    for range_str in settings.get('ranges') or []:
+        start_date, end_date = parse_range(range_str)
+        if start_date is not None and start_date <= end_date:
+            items.append((start_date, end_date, 0))
+    for date_str in settings.get('specific_dates') or []:
+        specific_date = parse_date(date_str)
+        if specific_date is not None:
+            items.append((specific_date, None, 0))
+    weekdays = 0
+    for day_setting in settings.get('weekdays') or []:
+        weekday = parse_weekday(day_setting)
+        if weekday is not None:
+            weekdays |= 1 << weekday
+    if weekdays:
+        items.append((None, None, weekdays))
+    return items
+
+
+def format_items(items):
+    """Элементы правила -> строковые настройки наряда (обратное parse_settings)"""
+    settings = {'ranges': [], 'specific_dates': [], 'weekdays': []}
+    for start_date, end_date, weekdays in items:
+        if end_date is not None:
+            settings['ranges'].append(
+                f'{start_date.strftime(DISPLAY_DATE_FORMAT)} по {end_date.strftime(DISPLAY_DATE_FORMAT)}'
+            )
+        elif start_date is not None:
+            settings['specific_dates'].append(start_date.strftime(DISPLAY_DATE_FORMAT))
+        settings['weekdays'].extend(str(day) for day in range(7) if weekdays >> day & 1)
+    return settings
+
+
+def month_mask(year, month, items):
+    """Маска дней месяца по элементам правила (бит day - 1 - число day); без элементов - весь месяц"""
+    first_weekday, days_in_month = calendar.monthrange(year, month)
+    if not items:
+        return (1 << days_in_month) - 1
+
+    month_start = date(year, month, 1)
+    month_end = date(year, month, days_in_month)
+    mask = 0
+    for start_date, end_date, weekdays in items:
+        if start_date is not None:
+            start_date = max(start_date, month_start)
+            end_date = min(end_date or start_date, month_end)
+            if start_date <= end_date:
+                mask |= ((1 << end_date.day) - 1) & ~((1 << (start_date.day - 1)) - 1)
+        for day in range(1, days_in_month + 1):
+            if weekdays >> ((first_weekday + day - 1) % 7) & 1:
+                mask |= 1 << (day - 1)
+    return mask
+
+
+def settings_to_rules(apps, schema_editor):
+    MonthlyDutyPlan = apps.get_model('duty', 'MonthlyDutyPlan')
+    Duty = apps.get_model('duty', 'Duty')
+    DutyScheduleRule = apps.get_model('duty', 'DutyScheduleRule')
+
+    duty_ids = set(Duty.objects.values_list('id', flat=True))
+    rules = []
+    for plan in MonthlyDutyPlan.objects.all():
+        for duty_id, settings in (plan.duty_schedule_settings or {}).items():
+            # Некорректные строки и так не попадали в расписание - не переносим их
+            if str(duty_id).isdigit() and int(duty_id) in duty_ids:
+                rules.extend(
+                    DutyScheduleRule(
+                        plan_id=plan.id, duty_id=int(duty_id),
+                        start_date=start_date, end_date=end_date, weekdays=weekdays,
+                    )
+                    for start_date, end_date, weekdays in parse_settings(settings)
+                )
+
+        # Снимок генерации хранит правило наряда маской дней месяца вместо JSON настроек
+        snapshot = plan.generation_snapshot or {}
+        for duty_snapshot in snapshot.get('duties', {}).values():
+            if isinstance(duty_snapshot.get('rule'), dict):
+                duty_snapshot['rule'] = month_mask(
+                    plan.month.year, plan.month.month, parse_settings(duty_snapshot['rule'])
+                )
+        if snapshot:
+            plan.generation_snapshot = snapshot
+            plan.save(update_fields=['generation_snapshot'])
+
+    DutyScheduleRule.objects.bulk_create(rules, batch_size=500)
+
+
+def rules_to_settings(apps, schema_editor):
+    MonthlyDutyPlan = apps.get_model('duty', 'MonthlyDutyPlan')
+    DutyScheduleRule = apps.get_model('duty', 'DutyScheduleRule')
+
+    items = {}
+    for rule in DutyScheduleRule.objects.order_by('plan_id', 'duty_id', 'start_date', 'id'):
+        items.setdefault(rule.plan_id, {}).setdefault(str(rule.duty_id), []).append(
+            (rule.start_date, rule.end_date, rule.weekdays)
+        )
+    for plan in MonthlyDutyPlan.objects.all():
+        settings = {
+            duty_id: format_items(duty_items) for duty_id, duty_items in items.get(plan.id, {}).items()
+        }
+        plan.duty_schedule_settings = settings
+
+        # Прежний снимок хранил правило JSON настроек наряда (пустой dict, если настроек нет):
+        # маски заменяются теми же настройками, иначе перегенерация сочла бы изменёнными все наряды
+        snapshot = plan.generation_snapshot or {}
+        for duty_id, duty_snapshot in snapshot.get('duties', {}).items():
+            if isinstance(duty_snapshot.get('rule'), int):
+                duty_snapshot['rule'] = settings.get(duty_id, {})
+        plan.generation_snapshot = snapshot
+        plan.save(update_fields=['duty_schedule_settings', 'generation_snapshot'])
+
+    # Правила снова хранятся в JSON: повторный прямой перенос не должен их удваивать
+    DutyScheduleRule.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('duty', '0006_dutyschedulerule'),
+    ]
+
+    operations = [
+        migrations.RunPython(settings_to_rules, rules_to_settings),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('duty', '0007_migrate_duty_schedule_settings'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='monthlydutyplan',
+            name='duty_schedule_settings',
+        ),
+    ]
@@ -1,10 +1,16 @@
-from django.db import models
+import datetime
+
+from django.db import models, transaction
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.urls import reverse
-from django.db.models import Q
+from django.db.models import F, Q
 from django.core.exceptions import ValidationError
 from unit.models import Faculty, Department
-from .utils import normalize_weekday_setting
+from unit.references import UnitSelection
+from .rules import WEEKDAY_NAMES, DISPLAY_DATE_FORMAT, format_schedule_items, parse_schedule_settings
+from .utils import month_bounds, normalize_weekday_setting
+from .versions import bump_month_version
 
 
 class Duty(models.Model):
@@ -117,6 +123,29 @@ class Duty(models.Model):
             raise ValidationError('Количество людей должно быть положительным числом')
 
 
+ASSIGNMENT_STATUS_DISPLAY = {
+    'fixed': 'Закреплен',
+    'rotating': 'Ротация',
+    'changed': 'Изменен',
+}
+
+ASSIGNMENT_BADGE_CLASSES = {
+    'fixed': 'badge-fixed',
+    'rotating': 'badge-rotating',
+    'changed': 'badge-changed',
+}
+
+
+class DutyScheduleQuerySet(models.QuerySet):
+    def for_month(self, year, month=None):
+        """
+        Наряды месяца диапазоном date__gte / date__lt (обслуживается индексом по дате).
+        Принимает дату внутри месяца или год и номер месяца.
+        """
+        start, end = month_bounds(year, month)
+        return self.filter(date__gte=start, date__lt=end)
+
+
 class DutySchedule(models.Model):
     duty = models.ForeignKey(
         'Duty',
@@ -171,11 +200,19 @@ class DutySchedule(models.Model):
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
     updated_at = models.DateTimeField('Дата обновления', auto_now=True)
 
+    objects = DutyScheduleQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'План наряда'
         verbose_name_plural = 'Планы нарядов'
         unique_together = ['duty', 'date', 'time_start', 'time_end']
         ordering = ['date', 'time_start']
+        indexes = [
+            # Месяц графика - диапазон по дате; в пределах подразделения - по (подразделение, дата)
+            models.Index(fields=['date'], name='duty_sched_date_idx'),
+            models.Index(fields=['assigned_faculty', 'date'], name='duty_sched_faculty_date_idx'),
+            models.Index(fields=['assigned_department', 'date'], name='duty_sched_dept_date_idx'),
+        ]
 
     def __str__(self):
         if self.time_start and self.time_end:
@@ -197,79 +234,36 @@ class DutySchedule(models.Model):
             return f"Кафедра: {self.assigned_department.name}"
         return "Не назначено"
 
+    @cached_property
+    def assignment_status(self):
+        """
+        Статус назначения (вычисляется один раз на экземпляр, сбрасывается в save()):
+        - 'changed'  - назначено вручную;
+        - 'fixed'    - закреплённый наряд назначен на своё подразделение;
+        - 'rotating' - ротационный наряд или закреплённый, ушедший в ротацию.
+        """
+        if self.is_manually_assigned:
+            return 'changed'
+
+        # Сравниваем с исходным закреплением наряда по id, не загружая подразделения
+        duty = self.duty
+        if duty.assigned_faculty_id:
+            return 'fixed' if self.assigned_faculty_id == duty.assigned_faculty_id else 'rotating'
+        if duty.assigned_department_id:
+            return 'fixed' if self.assigned_department_id == duty.assigned_department_id else 'rotating'
+        return 'rotating'
+
     def get_assignment_status(self):
-        """Получить статус назначения с правильной логикой"""
-        # Получаем исходное закрепленное подразделение наряда
-        original_unit_type, original_unit = self.duty.get_original_assignment()
-        
-        print(f"🔍 Анализ статуса для расписания {self.id}:")
-        print(f"   - Наряд: {self.duty.duty_name}")
-        print(f"   - Исходное закрепление: {original_unit_type} - {original_unit}")
-        print(f"   - Назначено: faculty={self.assigned_faculty}, department={self.assigned_department}")
-        print(f"   - Ручное назначение: {self.is_manually_assigned}")
-        
-        # Если наряд закреплен за подразделением
-        if original_unit_type and original_unit:
-            print("   - Наряд ЗАКРЕПЛЕН за подразделением")
-            
-            # Проверяем, назначено ли на закрепленное подразделение
-            if original_unit_type == 'faculty' and self.assigned_faculty == original_unit:
-                print("   - Назначено на ЗАКРЕПЛЕННЫЙ факультет")
-                if self.is_manually_assigned:
-                    print("   - СТАТУС: Изменен (ручное назначение на правильное подразделение)")
-                    return 'changed'
-                else:
-                    print("   - СТАТУС: Закреплен (автоматическое распределение)")
-                    return 'fixed'
-                    
-            elif original_unit_type == 'department' and self.assigned_department == original_unit:
-                print("   - Назначено на ЗАКРЕПЛЕННУЮ кафедру")
-                if self.is_manually_assigned:
-                    print("   - СТАТУС: Изменен (ручное назначение на правильное подразделение)")
-                    return 'changed'
-                else:
-                    print("   - СТАТУС: Закреплен (автоматическое распределение)")
-                    return 'fixed'
-            else:
-                # Назначено на другое подразделение
-                print("   - Назначено на ДРУГОЕ подразделение")
-                if self.is_manually_assigned:
-                    print("   - СТАТУС: Изменен (ручное назначение на другое подразделение)")
-                    return 'changed'
-                else:
-                    print("   - СТАТУС: Ротация (автоматическое распределение на другое подразделение)")
-                    return 'rotating'
-                
-        else:
-            # Для ротационных нарядов (нет закрепленного подразделения)
-            print("   - Наряд РОТАЦИОННЫЙ (нет закрепления)")
-            if self.is_manually_assigned:
-                print("   - СТАТУС: Изменен (ручное назначение)")
-                return 'changed'
-            else:
-                print("   - СТАТУС: Ротация (автоматическое распределение)")
-                return 'rotating'
-    
+        """Получить статус назначения (см. assignment_status)"""
+        return self.assignment_status
 
     def get_assignment_status_display(self):
         """Текстовое отображение статуса"""
-        status = self.get_assignment_status()
-        status_map = {
-            'fixed': 'Закреплен',
-            'rotating': 'Ротация', 
-            'changed': 'Изменен'
-        }
-        return status_map.get(status, 'Неизвестно')
+        return ASSIGNMENT_STATUS_DISPLAY.get(self.assignment_status, 'Неизвестно')
 
     def get_assignment_badge_class(self):
         """Класс для badge в зависимости от статуса"""
-        status = self.get_assignment_status()
-        badge_map = {
-            'fixed': 'badge-fixed',
-            'rotating': 'badge-rotating',
-            'changed': 'badge-changed'
-        }
-        return badge_map.get(status, '')
+        return ASSIGNMENT_BADGE_CLASSES.get(self.assignment_status, '')
 
     def check_manual_assignment(self):
         """Проверить и установить флаг ручного назначения"""
@@ -303,6 +297,14 @@ class DutySchedule(models.Model):
             self.assigned_unit_type = None
         
         super().save(*args, **kwargs)
+        # Назначение могло измениться - статус пересчитается при следующем обращении
+        self.__dict__.pop('assignment_status', None)
+        bump_month_version(self.date)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        bump_month_version(self.date)
+        return result
 
     @property
     def is_today(self):
@@ -322,7 +324,7 @@ class DutySchedule(models.Model):
     @property
     def assignment_type(self):
         """Тип назначения (для обратной совместимости)"""
-        return self.get_assignment_status()
+        return self.assignment_status
 
     def clean(self):
         """Валидация данных"""
@@ -344,10 +346,7 @@ class DutySchedule(models.Model):
     @classmethod
     def get_schedules_for_month(cls, year, month):
         """Получить все расписания для указанного месяца"""
-        return cls.objects.filter(
-            date__year=year,
-            date__month=month
-        ).select_related(
+        return cls.objects.for_month(year, month).select_related(
             'duty', 
             'assigned_faculty', 
             'assigned_department'
@@ -355,25 +354,10 @@ class DutySchedule(models.Model):
 
     @classmethod
     def get_unit_stats(cls, year, month):
-        """Статистика по подразделениям за месяц"""
-        from collections import defaultdict
-        
-        schedules = cls.get_schedules_for_month(year, month)
-        stats = defaultdict(lambda: {'count': 0, 'duties': set()})
-        
-        for schedule in schedules:
-            if schedule.assigned_faculty:
-                key = f"faculty_{schedule.assigned_faculty.id}"
-                stats[key]['name'] = f"Факультет {schedule.assigned_faculty.name}"
-                stats[key]['count'] += 1
-                stats[key]['duties'].add(schedule.duty.duty_name)
-            elif schedule.assigned_department:
-                key = f"department_{schedule.assigned_department.id}"
-                stats[key]['name'] = f"Кафедра {schedule.assigned_department.name}"
-                stats[key]['count'] += 1
-                stats[key]['duties'].add(schedule.duty.duty_name)
-        
-        return dict(stats)
+        """Статистика по подразделениям за месяц (SQL-агрегация, см. duty.unit_stats)"""
+        from .unit_stats import get_unit_stats
+
+        return get_unit_stats(datetime.date(year, month, 1))
 
 
 class MonthlyDutyPlan(models.Model):
@@ -395,13 +379,13 @@ class MonthlyDutyPlan(models.Model):
     )
     
     is_generated = models.BooleanField('График сгенерирован', default=False)
-    duty_schedule_settings = models.JSONField(
-        'Настройки расписания нарядов',
+    last_generated_at = models.DateTimeField('Дата последней генерации', null=True, blank=True)
+    generation_snapshot = models.JSONField(
+        'Снимок параметров генерации',
         default=dict,
         blank=True,
-        help_text='JSON с настройками дней для каждого наряда'
+        help_text='Подразделения и параметры нарядов на момент последней генерации (для инкрементальной перегенерации)'
     )
-    last_generated_at = models.DateTimeField('Дата последней генерации', null=True, blank=True)
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
 
     class Meta:
@@ -412,56 +396,55 @@ class MonthlyDutyPlan(models.Model):
     def __str__(self):
         return f"План на {self.month.strftime('%B %Y')}"
 
+    def get_schedule_rules(self):
+        """
+        Правила расписания всех нарядов плана одним запросом: {duty_id: [DutyScheduleRule]}.
+        Запоминаются на экземпляре плана, сбрасываются при изменении через set/clear_duty_schedule.
+        """
+        rules = self.__dict__.get('_schedule_rules')
+        if rules is None:
+            rules = {}
+            for rule in self.schedule_rules.order_by('duty_id', 'start_date', 'id'):
+                rules.setdefault(rule.duty_id, []).append(rule)
+            self._schedule_rules = rules
+        return rules
+
+    def get_duty_rule_items(self, duty):
+        """Типизированные элементы правила наряда (start_date, end_date, weekdays)"""
+        return [rule.item for rule in self.get_schedule_rules().get(duty.id, ())]
+
     def get_duty_schedule(self, duty):
-        """Получить настройки расписания для конкретного наряда с корректной обработкой дней недели."""
-        schedule_data = self.duty_schedule_settings.get(str(duty.id), {})
-
-        # Словарь для отображения дней недели
-        weekday_names = {
-            0: 'Понедельник',
-            1: 'Вторник',
-            2: 'Среда',
-            3: 'Четверг',
-            4: 'Пятница',
-            5: 'Суббота',
-            6: 'Воскресенье'
-        }
-
-        # Нормализуем и преобразуем дни недели
-        raw_weekdays = schedule_data.get('weekdays', [])
-        converted_weekdays = []
-        
-        for day in raw_weekdays:
-            # Если это уже число (в виде строки), преобразуем
-            if isinstance(day, str) and day.isdigit():
-                day_num = int(day)
-                if 0 <= day_num <= 6:
-                    converted_weekdays.append(weekday_names[day_num])
-            # Если это число
-            elif isinstance(day, int) and 0 <= day <= 6:
-                converted_weekdays.append(weekday_names[day])
-            # Если это строка с названием, оставляем как есть
-            elif isinstance(day, str):
-                converted_weekdays.append(day)
-
-        return {
-            'ranges': [r for r in schedule_data.get('ranges', []) if r and r.strip()],
-            'specific_dates': [d for d in schedule_data.get('specific_dates', []) if d and d.strip()],
-            'weekdays': converted_weekdays,
-        }
+        """Настройки расписания наряда для формы плана: строки диапазонов и дат, названия дней недели"""
+        schedule_data = format_schedule_items(self.get_duty_rule_items(duty))
+        schedule_data['weekdays'] = [WEEKDAY_NAMES[int(day)] for day in schedule_data['weekdays']]
+        return schedule_data
 
     def set_duty_schedule(self, duty, schedule_data):
-        """Установить настройки расписания для конкретного наряда"""
-        self.duty_schedule_settings[str(duty.id)] = schedule_data
-        self.save()
+        """
+        Установить настройки расписания наряда из строк формы ({'ranges', 'specific_dates', 'weekdays'}).
+        Меняются только строки правил этого наряда; возвращает список ошибок разбора
+        (некорректные значения не сохраняются).
+        """
+        items, errors = parse_schedule_settings(schedule_data)
+        with transaction.atomic():
+            self.schedule_rules.filter(duty=duty).delete()
+            DutyScheduleRule.objects.bulk_create([
+                DutyScheduleRule(plan=self, duty=duty, start_date=start_date, end_date=end_date, weekdays=weekdays)
+                for start_date, end_date, weekdays in items
+            ])
+        self.__dict__.pop('_schedule_rules', None)
+        return errors
 
     def clear_duty_schedule(self, duty):
         """Полностью очистить настройки расписания для наряда"""
-        if str(duty.id) in self.duty_schedule_settings:
-            del self.duty_schedule_settings[str(duty.id)]
-            self.save()
-            return True
-        return False
+        deleted, _ = self.schedule_rules.filter(duty=duty).delete()
+        self.__dict__.pop('_schedule_rules', None)
+        return bool(deleted)
+
+    def clear_schedule_rules(self):
+        """Очистить настройки расписания всех нарядов плана"""
+        self.schedule_rules.all().delete()
+        self.__dict__.pop('_schedule_rules', None)
 
     def set_duties(self, duties):
         """Установить наряды для плана"""
@@ -488,29 +471,21 @@ class MonthlyDutyPlan(models.Model):
         self.selected_units = units_data
         self.save()
 
+    @property
+    def unit_selection(self):
+        """
+        Выбранные подразделения (unit.references.UnitSelection): разбираются и загружаются
+        один раз на экземпляр плана, пересоздаются при изменении selected_units
+        """
+        values = tuple(self.selected_units or ())
+        selection = self.__dict__.get('_unit_selection')
+        if selection is None or selection.values != values:
+            selection = self._unit_selection = UnitSelection(values)
+        return selection
+
     def get_selected_units_display(self):
         """Получить отображение выбранных подразделений"""
-        if not self.selected_units:
-            return "Не выбраны"
-        
-        display_list = []
-        for unit in self.selected_units:
-            if unit.startswith('faculty_'):
-                faculty_id = unit.replace('faculty_', '')
-                try:
-                    faculty = Faculty.objects.get(id=faculty_id)
-                    display_list.append(f"Факультет {faculty.name}")
-                except Faculty.DoesNotExist:
-                    display_list.append(f"Факультет (ID: {faculty_id})")
-            elif unit.startswith('department_'):
-                dept_id = unit.replace('department_', '')
-                try:
-                    department = Department.objects.get(id=dept_id)
-                    display_list.append(f"Кафедра {department.name}")
-                except Department.DoesNotExist:
-                    display_list.append(f"Кафедра (ID: {dept_id})")
-        
-        return ", ".join(display_list)
+        return self.unit_selection.display()
 
     def clean(self):
         """Валидация данных"""
@@ -533,4 +508,76 @@ class MonthlyDutyPlanDuty(models.Model):
         verbose_name_plural = 'Наряды в планах'
 
     def __str__(self):
-        return f"{self.duty.duty_name} в плане {self.monthly_plan.month.strftime('%B %Y')}"
\ No newline at end of file
+        return f"{self.duty.duty_name} в плане {self.monthly_plan.month.strftime('%B %Y')}"
+
+
+class DutyScheduleRule(models.Model):
+    """
+    Элемент правила расписания наряда в месячном плане - одно из:
+        диапазон дат      - start_date и end_date;
+        конкретная дата   - только start_date;
+        дни недели        - битовая маска weekdays (бит 0 - понедельник, 6 - воскресенье).
+    Наряд плана без элементов назначается на весь месяц.
+    """
+    plan = models.ForeignKey(
+        MonthlyDutyPlan,
+        on_delete=models.CASCADE,
+        related_name='schedule_rules',
+        verbose_name='План'
+    )
+    duty = models.ForeignKey(
+        Duty,
+        on_delete=models.CASCADE,
+        related_name='schedule_rules',
+        verbose_name='Наряд'
+    )
+    start_date = models.DateField('Дата / начало диапазона', null=True, blank=True)
+    end_date = models.DateField('Конец диапазона', null=True, blank=True)
+    weekdays = models.PositiveSmallIntegerField('Дни недели (битовая маска)', default=0)
+
+    class Meta:
+        verbose_name = 'Правило расписания наряда'
+        verbose_name_plural = 'Правила расписания нарядов'
+        indexes = [
+            models.Index(fields=['plan', 'duty'], name='duty_rule_plan_duty_idx'),
+            # Поиск нарядов, назначенных на даты
+            models.Index(fields=['start_date', 'end_date'], name='duty_rule_dates_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(start_date__isnull=False) | Q(weekdays__gt=0),
+                name='duty_rule_not_empty',
+            ),
+            models.CheckConstraint(
+                check=Q(end_date__isnull=True) | Q(start_date__lte=F('end_date')),
+                name='duty_rule_range_order',
+            ),
+            models.CheckConstraint(check=Q(weekdays__lt=1 << 7), name='duty_rule_weekdays_mask'),
+        ]
+
+    def __str__(self):
+        return f"{self.duty} ({self.plan}): {self.get_display()}"
+
+    @property
+    def item(self):
+        """(start_date, end_date, weekdays) - элемент для duty.rules.ScheduleRule.from_items"""
+        return self.start_date, self.end_date, self.weekdays
+
+    @property
+    def kind(self):
+        if self.end_date is not None:
+            return 'range'
+        if self.start_date is not None:
+            return 'date'
+        return 'weekdays'
+
+    def get_weekdays(self):
+        """Номера дней недели маски (0 - понедельник)"""
+        return [day for day in range(7) if self.weekdays >> day & 1]
+
+    def get_display(self):
+        if self.kind == 'range':
+            return f"{self.start_date.strftime(DISPLAY_DATE_FORMAT)} по {self.end_date.strftime(DISPLAY_DATE_FORMAT)}"
+        if self.kind == 'date':
+            return self.start_date.strftime(DISPLAY_DATE_FORMAT)
+        return ', '.join(WEEKDAY_NAMES[day] for day in self.get_weekdays())
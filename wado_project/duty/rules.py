@@ -0,0 +1,201 @@
+# duty/rules.py
+import calendar
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+from .utils import normalize_weekday_setting
+
+
+DATE_FORMATS = ('%d.%m.%Y', '%d.%m.%y')
+DISPLAY_DATE_FORMAT = '%d.%m.%Y'
+WEEKDAY_NAMES = ('Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье')
+RANGE_SEPARATORS = (' по ', ' to ', ' — ', ' - ')
+_NON_DATE_CHARS = re.compile(r'[^\d.]')
+
+
+def parse_specific_date(date_str):
+    """Разобрать дату вида дд.мм.гггг (или дд.мм.гг). Возвращает date или None."""
+    if not date_str or not isinstance(date_str, str):
+        return None
+
+    clean_date = date_str.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(clean_date, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date_range(range_str):
+    """Разобрать диапазон вида 'дд.мм.гггг по дд.мм.гггг'. Возвращает (start, end) или (None, None)."""
+    if not range_str or not isinstance(range_str, str):
+        return None, None
+
+    for sep in RANGE_SEPARATORS:
+        if sep not in range_str:
+            continue
+        parts = range_str.split(sep)
+        if len(parts) != 2:
+            continue
+
+        start_clean = _NON_DATE_CHARS.sub('', parts[0])
+        end_clean = _NON_DATE_CHARS.sub('', parts[1])
+        for fmt in DATE_FORMATS:
+            try:
+                start_date = datetime.strptime(start_clean, fmt).date()
+                end_date = datetime.strptime(end_clean, fmt).date()
+                return start_date, end_date
+            except ValueError:
+                continue
+
+    return None, None
+
+
+def parse_schedule_settings(settings):
+    """
+    Разобрать строковые настройки наряда ({'ranges', 'specific_dates', 'weekdays'} -
+    поля формы плана) в типизированные элементы правила (start_date, end_date, weekdays):
+        диапазон          - (начало, конец, 0);
+        конкретная дата   - (дата, None, 0);
+        дни недели        - (None, None, маска), бит n - день n (0 - понедельник).
+    Возвращает (элементы, ошибки); некорректные значения в элементы не попадают.
+    """
+    settings = settings or {}
+    items = []
+    errors = []
+
+    for range_str in settings.get('ranges') or []:
+        start_date, end_date = parse_date_range(range_str)
+        if start_date is None:
+            errors.append(f'Некорректный диапазон: {range_str!r}')
+        elif start_date > end_date:
+            errors.append(f'Начало диапазона позже конца: {range_str!r}')
+        else:
+            items.append((start_date, end_date, 0))
+
+    for date_str in settings.get('specific_dates') or []:
+        specific_date = parse_specific_date(date_str)
+        if specific_date is None:
+            errors.append(f'Некорректная дата: {date_str!r}')
+        else:
+            items.append((specific_date, None, 0))
+
+    weekdays = 0
+    for day_setting in settings.get('weekdays') or []:
+        weekday = normalize_weekday_setting(day_setting)
+        if weekday is None:
+            errors.append(f'Некорректный день недели: {day_setting!r}')
+        else:
+            weekdays |= 1 << weekday
+    if weekdays:
+        items.append((None, None, weekdays))
+
+    return items, errors
+
+
+def format_schedule_items(items):
+    """Элементы правила в строковом виде полей формы (обратное parse_schedule_settings)"""
+    settings = {'ranges': [], 'specific_dates': [], 'weekdays': []}
+    for start_date, end_date, weekdays in items:
+        if end_date is not None:
+            settings['ranges'].append(
+                f'{start_date.strftime(DISPLAY_DATE_FORMAT)} по {end_date.strftime(DISPLAY_DATE_FORMAT)}'
+            )
+        elif start_date is not None:
+            settings['specific_dates'].append(start_date.strftime(DISPLAY_DATE_FORMAT))
+        settings['weekdays'].extend(str(day) for day in range(7) if weekdays >> day & 1)
+    return settings
+
+
+@lru_cache(maxsize=64)
+def month_masks(year, month):
+    """
+    Битовые маски месяца: (маска всех дней, маски по дням недели).
+    Бит (day - 1) соответствует числу месяца day.
+    """
+    first_weekday, days_in_month = calendar.monthrange(year, month)
+    weekday_masks = [0] * 7
+    for day in range(1, days_in_month + 1):
+        weekday_masks[(first_weekday + day - 1) % 7] |= 1 << (day - 1)
+    return (1 << days_in_month) - 1, tuple(weekday_masks)
+
+
+class ScheduleRule:
+    """
+    Скомпилированное правило расписания наряда на конкретный месяц.
+
+    Диапазоны, конкретные даты и дни недели наряда (DutyScheduleRule или
+    строки формы) сворачиваются в битовую маску дней месяца.
+    Некорректные строки не попадают в маску и перечисляются в errors.
+    """
+
+    __slots__ = ('year', 'month', 'mask', 'errors')
+
+    def __init__(self, year, month, mask, errors=()):
+        self.year = year
+        self.month = month
+        self.mask = mask
+        self.errors = tuple(errors)
+
+    @classmethod
+    def compile(cls, year, month, settings):
+        """Скомпилировать строковые настройки одного наряда ({'ranges', 'specific_dates', 'weekdays'})."""
+        items, errors = parse_schedule_settings(settings)
+        return cls.from_items(year, month, items, errors)
+
+    @classmethod
+    def from_items(cls, year, month, items, errors=()):
+        """Скомпилировать типизированные элементы правила (см. parse_schedule_settings)."""
+        full_mask, weekday_masks = month_masks(year, month)
+
+        # Если нет никаких настроек - наряд на весь месяц
+        if not items:
+            return cls(year, month, full_mask, errors)
+
+        days_in_month = full_mask.bit_length()
+        month_start = date(year, month, 1)
+        month_end = date(year, month, days_in_month)
+
+        mask = 0
+        for start_date, end_date, weekdays in items:
+            if start_date is not None:
+                # Обрезаем диапазон (или дату) границами месяца
+                start_date = max(start_date, month_start)
+                end_date = min(end_date or start_date, month_end)
+                if start_date <= end_date:
+                    mask |= ((1 << end_date.day) - 1) & ~((1 << (start_date.day - 1)) - 1)
+            for weekday in range(7):
+                if weekdays >> weekday & 1:
+                    mask |= weekday_masks[weekday]
+
+        return cls(year, month, mask, errors)
+
+    def __contains__(self, value):
+        if value.year != self.year or value.month != self.month:
+            return False
+        return bool(self.mask >> (value.day - 1) & 1)
+
+    def __len__(self):
+        return bin(self.mask).count('1')
+
+    def __bool__(self):
+        return bool(self.mask)
+
+    def days(self):
+        """Числа месяца, попадающие под правило, по возрастанию."""
+        mask = self.mask
+        day = 1
+        while mask:
+            if mask & 1:
+                yield day
+            mask >>= 1
+            day += 1
+
+    def dates(self):
+        """Даты месяца, попадающие под правило, по возрастанию."""
+        return [date(self.year, self.month, day) for day in self.days()]
+
+    def __repr__(self):
+        return f'<ScheduleRule {self.year}-{self.month:02d}: {len(self)} дн.>'
@@ -1,43 +1,96 @@
 from django.utils import timezone
-from datetime import datetime, timedelta
 from django.db import transaction
-from .models import Duty, DutySchedule, MonthlyDutyPlan
-from unit.models import Faculty, Department
+from .models import DutySchedule
+from unit.references import UnitSelection
 import calendar
 from collections import defaultdict
+from django.db.models import Count
+import logging
 import re
-from .utils import normalize_weekday_setting
+from .rules import ScheduleRule, parse_date_range, parse_specific_date
+from .tracing import NULL_TRACE
+from .assignment import duty_load, get_assigner
+from .versions import bump_month_version
+
+logger = logging.getLogger(__name__)
+
 
 class DutyDistributionService:
-    def __init__(self, month):
+    def __init__(self, month, trace=None, assigner=None, progress=None):
         self.month = month
+        self.trace = trace or NULL_TRACE
+        # progress(percent, message) - отчёт фоновой задачи (core.jobs.JobContext.progress)
+        self.progress = progress or (lambda percent, message=None: None)
+        self.assigner = assigner or get_assigner()
         self.year = month.year
         self.month_num = month.month
         self.days_in_month = calendar.monthrange(self.year, self.month_num)[1]
+        self._rules = {}
+        self._rules_source = None
+        # Подразделения последнего распределения - численность попадает в снимок генерации
+        self.rotation_units = None
         
     def get_available_units(self, selected_units):
-        """Получить выбранные подразделения для распределения"""
-        faculties = []
-        departments = []
-        
-        for unit in selected_units:
-            if unit.startswith('faculty_'):
-                faculty_id = int(unit.replace('faculty_', ''))
-                try:
-                    faculty = Faculty.objects.get(id=faculty_id)
-                    faculties.append(faculty)
-                except Faculty.DoesNotExist:
-                    continue
-            elif unit.startswith('department_'):
-                dept_id = int(unit.replace('department_', ''))
-                try:
-                    department = Department.objects.get(id=dept_id)
-                    departments.append(department)
-                except Department.DoesNotExist:
-                    continue
-        
-        return faculties, departments
+        """
+        Выбранные подразделения для распределения: (факультеты, кафедры).
+        selected_units - список строк 'faculty_3' или UnitSelection плана (уже загруженные
+        объекты переиспользуются); загрузка - два запроса id__in.
+        """
+        if not isinstance(selected_units, UnitSelection):
+            selected_units = UnitSelection(selected_units)
+        return selected_units.faculties, selected_units.departments
     
+    def get_unit_headcounts(self, faculties, departments):
+        """Численность выбранных подразделений: {'faculty_1': 40, 'department_2': 12, ...}"""
+        from people.models import People
+
+        faculty_ids = [faculty.id for faculty in faculties]
+        department_ids = [department.id for department in departments]
+        headcounts = defaultdict(int)
+
+        if faculty_ids:
+            # Кафедры факультета и управление факультета
+            for row in People.objects.filter(department__faculty_id__in=faculty_ids).values(
+                'department__faculty_id'
+            ).annotate(total=Count('id')):
+                headcounts[f"faculty_{row['department__faculty_id']}"] += row['total']
+            for row in People.objects.filter(faculty_id__in=faculty_ids, department__isnull=True).values(
+                'faculty_id'
+            ).annotate(total=Count('id')):
+                headcounts[f"faculty_{row['faculty_id']}"] += row['total']
+
+        if department_ids:
+            for row in People.objects.filter(department_id__in=department_ids).values(
+                'department_id'
+            ).annotate(total=Count('id')):
+                headcounts[f"department_{row['department_id']}"] += row['total']
+
+        return headcounts
+
+    def get_rotation_units(self, selected_units):
+        """Список выбранных подразделений для ротации с их численностью"""
+        faculties, departments = self.get_available_units(selected_units)
+        headcounts = self.get_unit_headcounts(faculties, departments)
+
+        rotation_units = []
+        for faculty in faculties:
+            rotation_units.append({
+                'type': 'faculty',
+                'object': faculty,
+                'id': f"faculty_{faculty.id}",
+                'name': f"Факультет {faculty.name}",
+                'capacity': headcounts[f"faculty_{faculty.id}"],
+            })
+        for department in departments:
+            rotation_units.append({
+                'type': 'department', 
+                'object': department,
+                'id': f"department_{department.id}",
+                'name': f"Кафедра {department.name}",
+                'capacity': headcounts[f"department_{department.id}"],
+            })
+        return rotation_units
+
     def get_fixed_duties(self, duties, selected_units):
         """Получить наряды с фиксированным закреплением"""
         fixed_duties = []
@@ -79,344 +132,371 @@ class DutyDistributionService:
     
     def parse_date_range(self, range_str):
         """Парсинг диапазона дат из строки"""
-        try:
-            print(f"🔍 Парсинг диапазона: '{range_str}'")
-            
-            # Основные разделители
-            separators = [' по ', ' to ', ' — ', ' - ']
-            
-            for sep in separators:
-                if sep in range_str:
-                    dates = range_str.split(sep)
-                    if len(dates) == 2:
-                        start_str = dates[0].strip()
-                        end_str = dates[1].strip()
-                        
-                        print(f"   Начало: '{start_str}', Конец: '{end_str}'")
-                        
-                        # Очищаем от лишних символов
-                        start_clean = re.sub(r'[^\d.]', '', start_str)
-                        end_clean = re.sub(r'[^\d.]', '', end_str)
-                        
-                        # Пробуем разные форматы
-                        for fmt in ['%d.%m.%Y', '%d.%m.%y']:
-                            try:
-                                start_date = datetime.strptime(start_clean, fmt).date()
-                                end_date = datetime.strptime(end_clean, fmt).date()
-                                print(f"   ✅ Успешно распарсено: {start_date} - {end_date}")
-                                return start_date, end_date
-                            except ValueError:
-                                continue
-                    
-            print(f"❌ Не удалось распарсить диапазон: '{range_str}'")
-            return None, None
-            
-        except Exception as e:
-            print(f"❌ Ошибка парсинга диапазона '{range_str}': {e}")
-            return None, None
+        return parse_date_range(range_str)
     
     def parse_specific_date(self, date_str):
-        """Парсинг конкретной даты с улучшенной обработкой"""
-        if not date_str or not isinstance(date_str, str):
-            return None
-        
-        # Очищаем строку от лишних пробелов
-        clean_date = date_str.strip()
-        
-        print(f"   🔍 Парсинг конкретной даты: '{clean_date}'")
-        
-        for fmt in ['%d.%m.%Y', '%d.%m.%y']:
-            try:
-                date = datetime.strptime(clean_date, fmt).date()
-                print(f"     ✅ Успешно распарсено: {date}")
-                return date
-            except ValueError as e:
-                print(f"     ❌ Ошибка формата {fmt}: {e}")
-                continue
-        
-        print(f"     ❌ Не удалось распарсить дату: '{clean_date}'")
-        return None
+        """Парсинг конкретной даты"""
+        return parse_specific_date(date_str)
     
     def validate_date_range_format(self, range_str):
         """Проверка формата диапазона дат"""
         pattern = r'(\d{1,2}\.\d{1,2}\.\d{4})\s+(?:по|to|—|-)\s+(\d{1,2}\.\d{1,2}\.\d{4})'
         return bool(re.match(pattern, range_str))
     
+    def get_schedule_rule(self, duty, monthly_plan):
+        """
+        Скомпилированное правило расписания наряда из DutyScheduleRule плана
+        (правила плана читаются одним запросом, каждое компилируется один раз)
+        """
+        if monthly_plan is not self._rules_source:
+            self._rules_source = monthly_plan
+            self._rules = {}
 
-    def should_schedule_duty(self, duty, date, weekday, duty_schedule_settings):
+        rule = self._rules.get(duty.id)
+        if rule is None:
+            rule = ScheduleRule.from_items(self.year, self.month_num, monthly_plan.get_duty_rule_items(duty))
+            self._rules[duty.id] = rule
+        return rule
+
+    def should_schedule_duty(self, duty, date, weekday, monthly_plan):
         """Определить, должен ли наряд быть в указанный день с учетом всех настроек"""
-        duty_settings = duty_schedule_settings.get(str(duty.id), {})
-        
-        ranges = duty_settings.get('ranges', [])
-        specific_dates = duty_settings.get('specific_dates', [])
-        weekdays = duty_settings.get('weekdays', [])
-        
-        # Если нет никаких настроек - наряд на весь месяц
-        if not ranges and not specific_dates and not weekdays:
-            return True
-        
-        # Проверяем конкретные даты (высший приоритет)
-        if specific_dates:
-            for date_str in specific_dates:
-                specific_date = self.parse_specific_date(date_str)
-                if specific_date and specific_date == date:
-                    return True
-        
-        # Проверяем диапазоны дат
-        date_in_range = False
-        for range_str in ranges:
-            # Пропускаем некорректные форматы
-            if not self.validate_date_range_format(range_str):
-                print(f"⚠️ Пропускаем некорректный диапазон: {range_str}")
-                continue
-                
-            start_date, end_date = self.parse_date_range(range_str)
-            if start_date and end_date:
-                if start_date <= date <= end_date:
-                    date_in_range = True
-                    break
-        
-        # Проверяем дни недели
-        weekday_match = False
-        if weekdays:
-            for day_setting in weekdays:
-                normalized_weekday = normalize_weekday_setting(day_setting)
-                if normalized_weekday is not None and normalized_weekday == weekday:
-                    weekday_match = True
-                    break
-        
-        # Комбинируем условия: если есть диапазон ИЛИ дни недели
-        return date_in_range or weekday_match
+        return date in self.get_schedule_rule(duty, monthly_plan)
     
-    def get_duty_schedule_dates(self, duty, duty_schedule_settings):
-        """Получить все даты, когда должен быть наряд - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
-        dates = []
-        duty_settings = duty_schedule_settings.get(str(duty.id), {})
-        
-        print(f"\n📅 Получение дат для наряда {duty.duty_name}:")
-        print(f"   Настройки: {duty_settings}")
-        
-        # Если нет никаких настроек - наряд на весь месяц
-        if not duty_settings.get('ranges') and not duty_settings.get('specific_dates') and not duty_settings.get('weekdays'):
-            print("   - Нет настроек, используем весь месяц")
-            for day in range(1, self.days_in_month + 1):
-                date = datetime(self.year, self.month_num, day).date()
-                dates.append(date)
-            return dates
-        
-        # Собираем ВСЕ возможные даты из всех условий
-        all_possible_dates = set()
-        
-        # 1. Обрабатываем конкретные даты
-        specific_dates = duty_settings.get('specific_dates', [])
-        if specific_dates:
-            print(f"   - Обработка {len(specific_dates)} конкретных дат: {specific_dates}")
-            for date_str in specific_dates:
-                specific_date = self.parse_specific_date(date_str)
-                if specific_date:
-                    all_possible_dates.add(specific_date)
-                    print(f"     ✅ Добавлена конкретная дата: {specific_date}")
-        
-        # 2. Обрабатываем диапазоны дат
-        ranges = duty_settings.get('ranges', [])
-        if ranges:
-            print(f"   - Обработка {len(ranges)} диапазонов")
-            for range_str in ranges:
-                start_date, end_date = self.parse_date_range(range_str)
-                if start_date and end_date:
-                    print(f"     📆 Диапазон: {start_date} - {end_date}")
-                    current_date = start_date
-                    while current_date <= end_date:
-                        all_possible_dates.add(current_date)
-                        current_date += timedelta(days=1)
-        
-        # 3. Обрабатываем дни недели - ВАЖНОЕ ИСПРАВЛЕНИЕ
-        weekdays = duty_settings.get('weekdays', [])
-        if weekdays:
-            print(f"   - Обработка {len(weekdays)} дней недели: {weekdays}")
-            
-            # Создаем множество для быстрой проверки
-            target_weekdays = set()
-            for day_setting in weekdays:
-                normalized_weekday = normalize_weekday_setting(day_setting)
-                if normalized_weekday is not None:
-                    target_weekdays.add(normalized_weekday)
-                    print(f"     📋 Целевой день недели: {normalized_weekday} ({day_setting})")
-                else:
-                    print(f"     ❌ Не удалось нормализовать день недели: {day_setting}")
-            
-            print(f"   - Целевые дни недели (числа): {target_weekdays}")
-            
-            # Проходим по всем дням месяца и добавляем те, что соответствуют дням недели
-            for day in range(1, self.days_in_month + 1):
-                date = datetime(self.year, self.month_num, day).date()
-                weekday = date.weekday()
-                
-                if weekday in target_weekdays:
-                    all_possible_dates.add(date)
-                    print(f"     ✅ Добавлен день недели: {date} (день недели {weekday})")
-        
-        # Преобразуем обратно в список и сортируем
-        dates = sorted(list(all_possible_dates))
-        print(f"   📊 Итого дат для наряда: {len(dates)}")
-        
-        return dates
+    def get_duty_schedule_dates(self, duty, monthly_plan):
+        """Получить все даты месяца, когда должен быть наряд"""
+        return self.get_schedule_rule(duty, monthly_plan).dates()
 
     
-    def distribute_duties_improved(self, duties, monthly_plan):
-        """Улучшенное распределение нарядов с учетом всех условий"""
-        selected_units = monthly_plan.selected_units or []
-        faculties, departments = self.get_available_units(selected_units)
-        fixed_duties = self.get_fixed_duties(duties, selected_units)
+    def distribute_duties_improved(self, duties, monthly_plan, unit_load=None):
+        """
+        Улучшенное распределение нарядов с учетом всех условий.
+        unit_load - накопленная взвешенная нагрузка подразделений с прошлых месяцев
+        (duty.horizon.HorizonPlanner): распределение её учитывает и дополняет на месте;
+        по умолчанию нагрузка месяца считается с нуля.
+        """
+        trace = self.trace
+        selected_units = monthly_plan.unit_selection
+
+        self.progress(10, 'Подбор подразделений')
+        with trace.phase('unit_lookup'):
+            rotation_units = self.rotation_units = self.get_rotation_units(selected_units)
+            fixed_duties = self.get_fixed_duties(duties, selected_units)
         
         schedules = []
         
-        # Получаем настройки расписания для каждого наряда
-        duty_schedule_settings = monthly_plan.duty_schedule_settings
-        
-        # Создаем список всех доступных подразделений для ротации
-        rotation_units = []
-        for faculty in faculties:
-            rotation_units.append({
-                'type': 'faculty',
-                'object': faculty,
-                'id': f"faculty_{faculty.id}",
-                'name': f"Факультет {faculty.name}"
-            })
-        for department in departments:
-            rotation_units.append({
-                'type': 'department', 
-                'object': department,
-                'id': f"department_{department.id}",
-                'name': f"Кафедра {department.name}"
-            })
-        
         if not rotation_units:
-            print("❌ Нет доступных подразделений для распределения")
+            logger.warning('Нет доступных подразделений для распределения')
             return schedules
         
-        print(f"✅ Доступно подразделений: {len(rotation_units)}")
+        trace.incr('units', len(rotation_units))
         
-        # Считаем текущую нагрузку на подразделения
-        unit_load = {unit['id']: 0 for unit in rotation_units}
+        # Разворачиваем правила всех нарядов в даты
+        self.progress(20, 'Расчёт дат нарядов')
+        with trace.phase('date_expansion'):
+            duty_dates_map = [
+                (duty_info, self.get_duty_schedule_dates(duty_info['duty'], monthly_plan))
+                for duty_info in fixed_duties
+            ]
         
-        # Распределяем все наряды
-        for duty_info in fixed_duties:
-            duty = duty_info['duty']
-            
-            # Получаем даты для этого наряда
-            duty_dates = self.get_duty_schedule_dates(duty, duty_schedule_settings)
-            
-            if not duty_dates:
-                print(f"⚠️ Для наряда {duty.duty_name} нет подходящих дат")
-                continue
-            
-            print(f"🎯 Наряд {duty.duty_name} на {len(duty_dates)} дней")
+        # Текущая взвешенная нагрузка подразделений (duty_weight × people_count)
+        if unit_load is None:
+            unit_load = {}
+        for unit in rotation_units:
+            unit_load.setdefault(unit['id'], 0)
+        
+        self.progress(40, 'Распределение нарядов')
+        with trace.phase('assignment'):
+            rotating_duties = []
             
-            if duty_info['is_fixed'] and duty_info['unit']:
-                # Фиксированный наряд для выбранного подразделения
-                unit = duty_info['unit']
-                unit_type = duty_info['unit_type']
-                unit_id = f"{unit_type}_{unit.id}"
-                
-                print(f"   📌 Фиксированно за: {unit.name}")
+            for duty_info, duty_dates in duty_dates_map:
+                duty = duty_info['duty']
                 
-                for date in duty_dates:
-                    schedule = DutySchedule(
-                        duty=duty,
-                        date=date,
-                        assigned_unit_type=unit_type,
-                        is_manually_assigned=False  # Автоматическое распределение
-                    )
-                    if unit_type == 'faculty':
-                        schedule.assigned_faculty = unit
-                    else:
-                        schedule.assigned_department = unit
-                    
-                    schedules.append(schedule)
-                    unit_load[unit_id] += 1
-                    
-            else:
-                # Ротационный наряд (включая фиксированные наряды с неподходящими подразделениями)
-                print(f"   🔄 Ротационный наряд")
+                if not duty_dates:
+                    trace.count(duty, 'skipped')
+                    continue
                 
-                for i, date in enumerate(duty_dates):
-                    # Выбираем подразделение с минимальной текущей нагрузкой
-                    min_load = min(unit_load.values())
-                    available_units = [u for u in rotation_units if unit_load[u['id']] == min_load]
+                if duty_info['is_fixed'] and duty_info['unit']:
+                    # Фиксированный наряд для выбранного подразделения
+                    unit = duty_info['unit']
+                    unit_type = duty_info['unit_type']
+                    unit_id = f"{unit_type}_{unit.id}"
                     
-                    if not available_units:
-                        available_units = rotation_units
-                    
-                    # Для равномерного распределения используем индекс дня
-                    day_index = i % len(available_units)
-                    selected_unit = available_units[day_index]
-                    
-                    schedule = DutySchedule(
-                        duty=duty,
-                        date=date,
-                        assigned_unit_type=selected_unit['type'],
-                        is_manually_assigned=False  # Автоматическое распределение
-                    )
-                    if selected_unit['type'] == 'faculty':
-                        schedule.assigned_faculty = selected_unit['object']
-                    else:
-                        schedule.assigned_department = selected_unit['object']
+                    for date in duty_dates:
+                        schedules.append(self.build_schedule(duty, date, unit_type, unit))
+                    unit_load[unit_id] += duty_load(duty) * len(duty_dates)
                     
-                    schedules.append(schedule)
-                    unit_load[selected_unit['id']] += 1
-        
-        # Выводим статистику распределения
-        print("\n=== СТАТИСТИКА РАСПРЕДЕЛЕНИЯ ===")
-        total_schedules = 0
-        for unit in rotation_units:
-            print(f"📊 {unit['name']}: {unit_load[unit['id']]} нарядов")
-            total_schedules += unit_load[unit['id']]
-        print(f"📈 Всего распределено: {len(schedules)} нарядов")
+                    trace.count(duty, 'fixed', len(duty_dates))
+                else:
+                    # Ротационный наряд (включая фиксированные наряды с неподходящими подразделениями)
+                    rotating_duties.append((duty, duty_dates))
+                    trace.count(duty, 'rotating', len(duty_dates))
+            
+            # Ротационные наряды распределяет выбранный движок с учётом уже закреплённой нагрузки
+            for duty, date, unit in self.assigner.assign(rotating_duties, rotation_units, unit_load):
+                schedules.append(self.build_schedule(duty, date, unit['type'], unit['object']))
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                'Распределено %s нарядов (%s): %s',
+                len(schedules),
+                self.assigner.name,
+                {unit['name']: unit_load[unit['id']] for unit in rotation_units}
+            )
         
         return schedules
     
+    def build_schedule(self, duty, date, unit_type, unit):
+        """Создать (не сохраняя) автоматическое назначение наряда на подразделение"""
+        schedule = DutySchedule(
+            duty=duty,
+            date=date,
+            assigned_unit_type=unit_type,
+            is_manually_assigned=False  # Автоматическое распределение
+        )
+        if unit_type == 'faculty':
+            schedule.assigned_faculty = unit
+        else:
+            schedule.assigned_department = unit
+        return schedule
+    
+    def build_generation_snapshot(self, duties, monthly_plan, rotation_units=None):
+        """
+        Снимок входных данных генерации: выбранные подразделения с их численностью
+        ('capacity' - распределение взвешивает нагрузку по ней) и для каждого наряда
+        его правило расписания ('rule' - маска дней месяца) и параметры распределения ('assign').
+        Сохраняется в плане и позволяет при повторной генерации найти изменившиеся наряды.
+        """
+        if rotation_units is None:
+            rotation_units = self.rotation_units
+        if rotation_units is None:
+            rotation_units = self.get_rotation_units(monthly_plan.unit_selection)
+        return {
+            'units': sorted(monthly_plan.selected_units or []),
+            'capacity': {unit['id']: unit['capacity'] for unit in rotation_units},
+            'duties': {
+                str(duty.id): {
+                    'rule': self.get_schedule_rule(duty, monthly_plan).mask,
+                    'assign': [
+                        duty.duty_weight,
+                        duty.people_count,
+                        duty.assigned_faculty_id,
+                        duty.assigned_department_id,
+                    ],
+                }
+                for duty in duties
+            },
+        }
+
     def generate_schedule(self, monthly_plan):
-        """Сгенерировать полное расписание"""
-        print(f"\n🎯 ГЕНЕРАЦИЯ РАСПИСАНИЯ НА {monthly_plan.month.strftime('%B %Y')} 🎯")
-        
-        try:
-            # Удаляем старое расписание для этого месяца
-            deleted_count, _ = DutySchedule.objects.filter(
-                date__year=self.year,
-                date__month=self.month_num
-            ).delete()
-            
-            print(f"🗑️ Удалено старых записей: {deleted_count}")
-            
-            # Генерируем новое расписание
-            duties = monthly_plan.duties.all()
-            print(f"📋 Нарядов для планирования: {len(duties)}")
-            print(f"🏢 Выбранные подразделения: {monthly_plan.selected_units}")
-            
-            schedules = self.distribute_duties_improved(duties, monthly_plan)
-            
-            print(f"✅ Создано новых записей: {len(schedules)}")
+        """
+        Сгенерировать полное расписание (все записи месяца, включая ручные, пересоздаются).
+        Ошибки не перехватываются: фоновая задача завершается со статусом «Ошибка».
+        """
+        # Распределение не зависит от прежних записей месяца и считается до транзакции:
+        # она держит блокировку записи только на время замены графика, а прогресс
+        # фоновой задачи виден опрашивающим запросам сразу
+        duties = list(monthly_plan.duties.all())
+        schedules = self.distribute_duties_improved(duties, monthly_plan)
+        
+        self.progress(85, 'Сохранение графика')
+        self.save_schedule(monthly_plan, duties, schedules)
+        
+        self.trace.log(f'Генерация графика на {monthly_plan.month:%m.%Y}')
+        return len(schedules)
+
+    def save_schedule(self, monthly_plan, duties, schedules, trace=None):
+        """
+        Заменить график месяца записями schedules в одной транзакции и пометить план
+        сгенерированным. Возвращает (удалено, создано).
+        """
+        trace = trace or self.trace
+        snapshot = self.build_generation_snapshot(duties, monthly_plan)
+        with transaction.atomic():
+            with trace.phase('delete'):
+                # Удаляем старое расписание для этого месяца
+                deleted_count, _ = DutySchedule.objects.for_month(self.year, self.month_num).delete()
+            trace.incr('deleted', deleted_count)
             
             # Сохраняем в базу
-            if schedules:
-                DutySchedule.objects.bulk_create(schedules)
-                print(f"💾 Успешно сохранено в базу данных")
-            else:
-                print("⚠️ Нет расписаний для сохранения")
+            with trace.phase('bulk_insert'):
+                if schedules:
+                    DutySchedule.objects.bulk_create(schedules)
+            trace.incr('created', len(schedules))
+            bump_month_version(monthly_plan.month)
             
             # ВАЖНО: Помечаем план как сгенерированный и СОХРАНЯЕМ
             monthly_plan.is_generated = True
             monthly_plan.last_generated_at = timezone.now()
-            monthly_plan.save(update_fields=['is_generated', 'last_generated_at'])
-            
-            print(f"✅ План помечен как сгенерированный: is_generated={monthly_plan.is_generated}")
-            print("🎉 Генерация завершена успешно!")
-            
-            return len(schedules)
-            
-        except Exception as e:
-            print(f"❌ Ошибка в generate_schedule: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return 0
\ No newline at end of file
+            monthly_plan.generation_snapshot = snapshot
+            monthly_plan.save(update_fields=['is_generated', 'last_generated_at', 'generation_snapshot'])
+        return deleted_count, len(schedules)
+
+    def regenerate_schedule(self, monthly_plan):
+        """
+        Инкрементальная перегенерация: пересчитываются только наряды, у которых с прошлой
+        генерации изменились настройки расписания, параметры распределения или состав плана
+        (при смене выбранных подразделений - все наряды). Ручные назначения сохраняются.
+        Изменения применяются минимальным набором INSERT/UPDATE/DELETE в одной транзакции.
+
+        Возвращает dict с количеством созданных, обновлённых, удалённых и оставленных записей.
+        """
+        trace = self.trace
+        result = {'created': 0, 'updated': 0, 'deleted': 0, 'kept': 0}
+
+        # Прогресс и отмена - до транзакции: записи внутри неё не видны опрашивающим запросам
+        self.progress(10, 'Поиск изменений')
+        with transaction.atomic():
+            duties = list(monthly_plan.duties.all())
+            selected_units = monthly_plan.unit_selection
+
+            with trace.phase('unit_lookup'):
+                rotation_units = self.rotation_units = self.get_rotation_units(selected_units)
+                fixed_duties = {info['duty'].id: info for info in self.get_fixed_duties(duties, selected_units)}
+
+            snapshot = self.build_generation_snapshot(duties, monthly_plan, rotation_units)
+            previous = monthly_plan.generation_snapshot or {}
+            previous_duties = previous.get('duties', {})
+            # Смена состава или численности подразделений меняет распределение всех нарядов
+            units_changed = (
+                previous.get('units') != snapshot['units']
+                or previous.get('capacity') != snapshot['capacity']
+            )
+
+            with trace.phase('diff'):
+                existing = list(DutySchedule.objects.for_month(
+                    self.year, self.month_num
+                ).select_related('duty'))
+
+                plan_duty_ids = {duty.id for duty in duties}
+                manual_dates = defaultdict(set)
+                auto_rows = defaultdict(dict)
+                # Повторные автоматические записи наряда на ту же дату (например, разные смены)
+                extra_rows = defaultdict(list)
+                to_delete = []
+                kept = []
+
+                for row in existing:
+                    if row.is_manually_assigned:
+                        manual_dates[row.duty_id].add(row.date)
+                        kept.append(row)
+                    elif row.duty_id not in plan_duty_ids:
+                        to_delete.append(row)
+                    elif row.date in auto_rows[row.duty_id]:
+                        extra_rows[row.duty_id].append(row)
+                    else:
+                        auto_rows[row.duty_id][row.date] = row
+
+                # Определяем, какие наряды нужно пересчитать и какие даты распределить заново
+                pending = []
+                for duty in duties:
+                    current = snapshot['duties'][str(duty.id)]
+                    before = previous_duties.get(str(duty.id))
+                    reassign = units_changed or before is None or before.get('assign') != current['assign']
+                    rule_changed = before is None or before.get('rule') != current['rule']
+                    rows = auto_rows.pop(duty.id, {})
+                    extra = extra_rows.pop(duty.id, [])
+
+                    if not reassign and not rule_changed:
+                        kept.extend(rows.values())
+                        kept.extend(extra)
+                        continue
+
+                    # Пересчитанный наряд получает одну запись на дату, как при полной генерации
+                    to_delete.extend(extra)
+
+                    dates = set(self.get_duty_schedule_dates(duty, monthly_plan))
+                    dates -= manual_dates[duty.id]
+                    for date, row in rows.items():
+                        if date not in dates:
+                            to_delete.append(row)
+                        elif not reassign:
+                            kept.append(row)
+                            dates.discard(date)
+                    pending.append((duty, sorted(dates), rows))
+                    trace.count(duty, 'recomputed', len(dates))
+
+                # Наряды, удалённые из плана
+                for rows in auto_rows.values():
+                    to_delete.extend(rows.values())
+
+            with trace.phase('assignment'):
+                # Нагрузка от сохраняемых записей учитывается при распределении новых дат
+                unit_load = {unit['id']: 0 for unit in rotation_units}
+                for row in kept:
+                    unit_id = self._row_unit_id(row)
+                    if unit_id in unit_load:
+                        unit_load[unit_id] += duty_load(row.duty)
+
+                assignments = []
+                rotating_duties = []
+                for duty, dates, _ in pending:
+                    info = fixed_duties[duty.id]
+                    if info['is_fixed'] and info['unit']:
+                        unit_id = f"{info['unit_type']}_{info['unit'].id}"
+                        unit = {'type': info['unit_type'], 'object': info['unit'], 'id': unit_id}
+                        assignments.extend((duty, date, unit) for date in dates)
+                        if unit_id in unit_load:
+                            unit_load[unit_id] += duty_load(duty) * len(dates)
+                    elif dates:
+                        rotating_duties.append((duty, dates))
+                if rotation_units:
+                    assignments.extend(self.assigner.assign(rotating_duties, rotation_units, unit_load))
+
+            with trace.phase('write'):
+                rows_by_duty = {duty.id: rows for duty, _, rows in pending}
+                handled = {row.id for row in kept} | {row.id for row in to_delete}
+                now = timezone.now()
+                to_create, to_update = [], []
+                for duty, date, unit in assignments:
+                    row = rows_by_duty[duty.id].get(date)
+                    if row is None:
+                        to_create.append(self.build_schedule(duty, date, unit['type'], unit['object']))
+                        continue
+                    handled.add(row.id)
+                    if self._row_unit_id(row) == unit['id']:
+                        kept.append(row)
+                    else:
+                        row.assigned_unit_type = unit['type']
+                        row.assigned_faculty = unit['object'] if unit['type'] == 'faculty' else None
+                        row.assigned_department = unit['object'] if unit['type'] == 'department' else None
+                        row.updated_at = now
+                        to_update.append(row)
+
+                # Записи пересчитанных нарядов, не получившие назначения (например, нет подразделений)
+                for rows in rows_by_duty.values():
+                    to_delete.extend(row for row in rows.values() if row.id not in handled)
+
+                if to_delete:
+                    DutySchedule.objects.filter(id__in=[row.id for row in to_delete]).delete()
+                if to_update:
+                    DutySchedule.objects.bulk_update(
+                        to_update,
+                        ['assigned_unit_type', 'assigned_faculty', 'assigned_department', 'updated_at']
+                    )
+                if to_create:
+                    DutySchedule.objects.bulk_create(to_create)
+                bump_month_version(monthly_plan.month)
+
+                monthly_plan.is_generated = True
+                monthly_plan.last_generated_at = timezone.now()
+                monthly_plan.generation_snapshot = snapshot
+                monthly_plan.save(update_fields=['is_generated', 'last_generated_at', 'generation_snapshot'])
+
+        result.update(
+            created=len(to_create),
+            updated=len(to_update),
+            deleted=len(to_delete),
+            kept=len(kept),
+        )
+        for name, value in result.items():
+            trace.incr(name, value)
+        trace.log(f'Инкрементальная генерация графика на {monthly_plan.month:%m.%Y}')
+        return result
+
+    @staticmethod
+    def _row_unit_id(row):
+        if row.assigned_faculty_id:
+            return f"faculty_{row.assigned_faculty_id}"
+        if row.assigned_department_id:
+            return f"department_{row.assigned_department_id}"
+        return None
@@ -0,0 +1,35 @@
+# duty/signals.py
+"""Сброс кэшированных календарей и статистики при изменении нарядов и подразделений (duty.versions)"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from unit.models import Department, Faculty
+from .models import Duty, DutySchedule
+from .versions import bump_all_versions, bump_month_version
+
+
+def _schedule_months(duty):
+    return list(DutySchedule.objects.filter(duty=duty).dates('date', 'month'))
+
+
+@receiver(post_save, sender=Duty)
+def duty_saved(sender, instance, created, **kwargs):
+    """Название, вес и численность наряда показываются в календаре и статистике"""
+    if not created:
+        bump_month_version(*_schedule_months(instance))
+
+
+@receiver(pre_delete, sender=Duty)
+def duty_deleted(sender, instance, **kwargs):
+    # Записи графика удаляются каскадом без DutySchedule.delete() - месяцы берём до удаления
+    bump_month_version(*_schedule_months(instance))
+
+
+@receiver(post_save, sender=Faculty)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Faculty)
+@receiver(post_delete, sender=Department)
+def unit_changed(sender, instance, created=False, **kwargs):
+    """Названия подразделений есть в графиках всех месяцев"""
+    if not created:
+        bump_all_versions()
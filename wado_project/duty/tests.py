@@ -1,3 +1,430 @@
-from django.test import TestCase
+import calendar
+import importlib.util
+import itertools
+import threading
+from datetime import date, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from core.jobs import submit_job
+from core.models import Job
+from core.testing import AcademyFactory
+from people.models import People
+from .assignment import ASSIGNERS, MinMaxAssigner, WeightedFairAssigner, duty_load, get_assigner
+from .horizon import HorizonPlanner
+from .models import Duty, DutySchedule, DutyScheduleRule, MonthlyDutyPlan
+from .rules import ScheduleRule, parse_schedule_settings
+from .services import DutyDistributionService
+from .utils import add_months, month_bounds
+
+
+class MonthRangeLookupTest(TestCase):
+    """Наряды месяца выбираются диапазоном дат по индексу"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.academy = AcademyFactory(people_per_department=5, management_per_faculty=2).build()
+
+    def test_month_bounds(self):
+        self.assertEqual(month_bounds(date(2024, 12, 17)), (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(month_bounds(2024, 2), (date(2024, 2, 1), date(2024, 3, 1)))
+
+    def test_for_month_matches_year_month_lookup(self):
+        month = self.academy.month
+        self.assertEqual(
+            set(DutySchedule.objects.for_month(month.year, month.month).values_list('pk', flat=True)),
+            set(DutySchedule.objects.filter(date__year=month.year, date__month=month.month).values_list('pk', flat=True)),
+        )
+        self.assertEqual(DutySchedule.objects.for_month(month).count(), len(self.academy.schedules))
+
+    def test_month_queries_use_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('План проверяется только для SQLite')
+        month = self.academy.month
+        faculty = self.academy.faculties[0]
+        self.assertIn('duty_sched_date_idx', DutySchedule.objects.for_month(month).order_by().explain())
+        self.assertIn(
+            'duty_sched_faculty_date_idx',
+            DutySchedule.objects.filter(assigned_faculty=faculty).for_month(month).order_by().explain(),
+        )
+
+
+class DutyScheduleRuleTest(TestCase):
+    """Настройки расписания нарядов хранятся типизированными строками DutyScheduleRule"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.academy = AcademyFactory(people_per_department=2, management_per_faculty=1).build()
+
+    def setUp(self):
+        self.plan = self.academy.plan
+        self.duty, self.other = self.academy.commandant_duties[:2]
+        self.month = self.plan.month
+
+    def settings(self, *days, weekdays=()):
+        month = self.month.strftime('%m.%Y')
+        return {
+            'ranges': [f'{days[0]:02d}.{month} по {days[1]:02d}.{month}', 'мусор'],
+            'specific_dates': [f'{day:02d}.{month}' for day in days[2:]],
+            'weekdays': list(weekdays),
+        }
+
+    def test_items_compile_like_strings(self):
+        settings = self.settings(3, 9, 20, 25, weekdays=['Суббота', '6', 'пт'])
+        items, errors = parse_schedule_settings(settings)
+        self.assertEqual(errors, ["Некорректный диапазон: 'мусор'"])
+        self.assertEqual(len(items), 4)
+        year, month = self.month.year, self.month.month
+        self.assertEqual(ScheduleRule.from_items(year, month, items).mask, ScheduleRule.compile(year, month, settings).mask)
+        self.assertEqual(len(ScheduleRule.from_items(year, month, [])), calendar.monthrange(year, month)[1])
+
+    def test_set_duty_schedule_touches_only_duty_rows(self):
+        self.plan.set_duty_schedule(self.other, {'weekdays': ['0']})
+        other_rows = list(DutyScheduleRule.objects.filter(duty=self.other).values_list('pk', flat=True))
+
+        errors = self.plan.set_duty_schedule(self.duty, self.settings(3, 9, 20, weekdays=['Суббота']))
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(
+            sorted(rule.kind for rule in DutyScheduleRule.objects.filter(plan=self.plan, duty=self.duty)),
+            ['date', 'range', 'weekdays'],
+        )
+        self.assertEqual(list(DutyScheduleRule.objects.filter(duty=self.other).values_list('pk', flat=True)), other_rows)
+
+        schedule = self.plan.get_duty_schedule(self.duty)
+        self.assertEqual(schedule['weekdays'], ['Суббота'])
+        self.assertEqual(schedule['specific_dates'], [f'20.{self.month:%m.%Y}'])
+
+        self.assertTrue(self.plan.clear_duty_schedule(self.duty))
+        self.assertFalse(self.plan.clear_duty_schedule(self.duty))
+        self.assertEqual(self.plan.get_duty_schedule(self.duty), {'ranges': [], 'specific_dates': [], 'weekdays': []})
+
+    def test_generation_reads_rules_in_one_query(self):
+        self.plan.set_duty_schedule(self.duty, self.settings(3, 9, 20))
+        self.plan.set_duty_schedule(self.other, {'weekdays': ['0']})
+        service = DutyDistributionService(self.month)
+        with self.assertNumQueries(1):
+            dates = service.get_duty_schedule_dates(self.duty, self.plan)
+            mondays = service.get_duty_schedule_dates(self.other, self.plan)
+        self.assertEqual([day.day for day in dates], [3, 4, 5, 6, 7, 8, 9, 20])
+        self.assertTrue(mondays and all(day.weekday() == 0 for day in mondays))
+
+
+class AssignerTest(SimpleTestCase):
+    """Движки распределения на малых планах без обращения к БД"""
+
+    START = date(2025, 1, 1)
+
+    def plan(self, weights, demands, capacities):
+        duty_dates = [
+            (Duty(id=index + 1, duty_name=f'Наряд {index + 1}', duty_weight=weight, people_count=1),
+             [self.START + timedelta(days=day) for day in range(demand)])
+            for index, (weight, demand) in enumerate(zip(weights, demands))
+        ]
+        units = [{'id': f'faculty_{index}', 'type': 'faculty', 'object': None, 'capacity': capacity}
+                 for index, capacity in enumerate(capacities)]
+        return duty_dates, units
+
+    def run_assigner(self, assigner, duty_dates, units):
+        unit_load = {unit['id']: 0 for unit in units}
+        assignments = assigner.assign(duty_dates, units, unit_load)
+        return [(duty.id, day, unit['id']) for duty, day, unit in assignments], unit_load
+
+    @staticmethod
+    def max_load(unit_load, units):
+        return max(unit_load[unit['id']] / unit['capacity'] for unit in units)
+
+    def test_deterministic(self):
+        duty_dates, units = self.plan([3, 2, 1], [20, 31, 9], [5, 12, 7, 1])
+        for name in ASSIGNERS:
+            with self.subTest(engine=name):
+                first, _ = self.run_assigner(get_assigner(name), duty_dates, units)
+                second, _ = self.run_assigner(get_assigner(name), duty_dates, units)
+                self.assertEqual(first, second)
+                self.assertEqual(len(first), 60)
+
+    def test_capacity_weighting(self):
+        duty_dates, units = self.plan([1], [8], [1, 3])
+        for assigner in (WeightedFairAssigner(), MinMaxAssigner(backend='python')):
+            with self.subTest(engine=assigner.name):
+                _, unit_load = self.run_assigner(assigner, duty_dates, units)
+                self.assertEqual(unit_load, {'faculty_0': 2, 'faculty_1': 6})
+
+    def optimum(self, weights, demands, capacities):
+        """Точный минимум максимальной нагрузки перебором (только для малых планов)"""
+        def splits(total, parts):
+            if parts == 1:
+                yield (total,)
+                return
+            for first in range(total + 1):
+                for rest in splits(total - first, parts - 1):
+                    yield (first,) + rest
+
+        return min(
+            max(sum(weights[d] * counts[d][u] for d in range(len(weights))) / capacity
+                for u, capacity in enumerate(capacities))
+            for counts in itertools.product(*(list(splits(demand, len(capacities))) for demand in demands))
+        )
+
+    def test_minmax_gap(self):
+        weights, demands, capacities = [3, 4], [5, 4], [1, 2, 4]
+        duty_dates, units = self.plan(weights, demands, capacities)
+        optimum = self.optimum(weights, demands, capacities)
+
+        _, fair_load = self.run_assigner(WeightedFairAssigner(), duty_dates, units)
+        _, python_load = self.run_assigner(MinMaxAssigner(backend='python'), duty_dates, units)
+        self.assertGreaterEqual(self.max_load(python_load, units), optimum)
+        self.assertLessEqual(self.max_load(python_load, units), self.max_load(fair_load, units))
+
+        if importlib.util.find_spec('scipy') is None:
+            self.skipTest('SciPy не установлен')
+        _, milp_load = self.run_assigner(MinMaxAssigner(backend='scipy', mip_rel_gap=0), duty_dates, units)
+        self.assertAlmostEqual(self.max_load(milp_load, units), optimum)
+        self.assertLess(optimum, self.max_load(python_load, units))
+
+
+class HorizonPlannerTest(TestCase):
+    """Несколько месяцев подряд: нагрузка подразделений переносится, каждый месяц сохраняется целиком"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.academy = AcademyFactory(people_per_department=3, management_per_faculty=2).build()
+
+    def setUp(self):
+        self.start = self.academy.plan.month
+        self.duties = self.academy.commandant_duties
+        self.units = self.academy.plan.selected_units
+        self.academy.plan.set_duty_schedule(self.duties[0], {'weekdays': ['Суббота']})
+        self.academy.plan.set_duty_schedule(self.duties[1], {'specific_dates': [f'05.{self.start:%m.%Y}']})
+
+    def horizon_spread(self, carry_load):
+        """Разброс нагрузки на человека по подразделениям за весь горизонт"""
+        HorizonPlanner.prepare_plans(self.start, 3, self.duties, self.units)
+        result = HorizonPlanner(self.start, 3, carry_load=carry_load).generate()
+        service = DutyDistributionService(self.start)
+        capacities = {unit['id']: max(unit['capacity'], 1) for unit in service.get_rotation_units(self.units)}
+        load = dict.fromkeys(capacities, 0)
+        for row in DutySchedule.objects.filter(
+            date__gte=self.start, date__lt=add_months(self.start, 3)
+        ).select_related('duty'):
+            load[DutyDistributionService._row_unit_id(row)] += duty_load(row.duty)
+        per_person = [load[unit_id] / capacities[unit_id] for unit_id in capacities]
+        return result, max(per_person) - min(per_person)
+
+    def test_prepare_plans_copies_weekday_rules(self):
+        plans = HorizonPlanner.prepare_plans(self.start, 3, self.duties, self.units)
+        self.assertEqual([plan.month for plan in plans], [add_months(self.start, index) for index in range(3)])
+        self.assertEqual(plans[0].pk, self.academy.plan.pk)
+        for plan in plans[1:]:
+            self.assertEqual(plan.selected_units, self.units)
+            self.assertEqual(set(plan.duties.all()), set(self.duties))
+            # Дни недели переносятся, конкретные даты первого месяца - нет
+            self.assertEqual([rule.kind for rule in plan.schedule_rules.all()], ['weekdays'])
+
+    def test_generate_carries_load_across_months(self):
+        result, carried_spread = self.horizon_spread(carry_load=True)
+        self.assertEqual([month['month'] for month in result['months']],
+                         [f'{add_months(self.start, index):%Y-%m}' for index in range(3)])
+        self.assertEqual(result['failed'], [])
+        self.assertEqual(result['count'], DutySchedule.objects.filter(
+            date__gte=self.start, date__lt=add_months(self.start, 3)
+        ).count())
+        for plan in MonthlyDutyPlan.objects.filter(month__gte=self.start):
+            self.assertTrue(plan.is_generated)
+
+        _, independent_spread = self.horizon_spread(carry_load=False)
+        self.assertLess(carried_spread, independent_spread)
+
+    def test_failed_month_load_not_carried(self):
+        HorizonPlanner.prepare_plans(self.start, 3, self.duties, self.units)
+        failing = add_months(self.start, 1)
+        save_month = HorizonPlanner.save_month
+
+        def save_or_fail(planner, service, plan, duties, schedules):
+            if plan.month == failing:
+                raise RuntimeError('Сбой записи')
+            return save_month(planner, service, plan, duties, schedules)
+
+        with mock.patch.object(HorizonPlanner, 'save_month', save_or_fail), \
+                self.assertLogs('duty.horizon', 'ERROR'):
+            result = HorizonPlanner(self.start, 3).generate()
+        self.assertEqual(result['failed'], [f'{failing:%Y-%m}'])
+        self.assertEqual(len(result['months']), 2)
+
+        # Переносимая нагрузка совпадает с нагрузкой сохранённых месяцев
+        saved = dict.fromkeys(result['unit_load'], 0)
+        for row in DutySchedule.objects.filter(
+            date__gte=self.start, date__lt=add_months(self.start, 3)
+        ).select_related('duty'):
+            unit_id = DutyDistributionService._row_unit_id(row)
+            if unit_id in saved:
+                saved[unit_id] += duty_load(row.duty)
+        self.assertEqual(result['unit_load'], saved)
+
+    def test_horizon_limits(self):
+        with self.assertRaises(ValueError):
+            HorizonPlanner(self.start, HorizonPlanner.MAX_MONTHS + 1)
+        with self.assertRaisesMessage(ValueError, 'Нет плана'):
+            HorizonPlanner(self.start, 2).generate()
+
+
+class ParallelHorizonTest(TransactionTestCase):
+    """
+    Горизонт в пуле из двух потоков (потоки держат свои соединения с БД).
+    Тестовая SQLite в памяти блокирует таблицы при одновременном чтении и записи,
+    поэтому обращения к БД распределения и записи месяца сериализуются замком.
+    """
+
+    def setUp(self):
+        self.academy = AcademyFactory(people_per_department=2, management_per_faculty=1, duties=4).build()
+        self.start = self.academy.plan.month
+        HorizonPlanner.prepare_plans(self.start, 3, self.academy.commandant_duties, self.academy.plan.selected_units)
+
+    def generate(self, carry_load):
+        lock = threading.Lock()
+        distribute_month, save_month = HorizonPlanner.distribute_month, HorizonPlanner.save_month
+
+        def serialized(call):
+            def wrapper(*args):
+                with lock:
+                    return call(*args)
+            return wrapper
+
+        with mock.patch.object(HorizonPlanner, 'distribute_month', serialized(distribute_month)), \
+                mock.patch.object(HorizonPlanner, 'save_month', serialized(save_month)):
+            result = HorizonPlanner(self.start, 3, carry_load=carry_load, workers=2).generate()
+        self.assertEqual(result['failed'], [])
+        self.assertEqual([month['month'] for month in result['months']],
+                         [f'{add_months(self.start, index):%Y-%m}' for index in range(3)])
+        self.assertEqual(result['count'], DutySchedule.objects.filter(
+            date__gte=self.start, date__lt=add_months(self.start, 3)
+        ).count())
+        return result
+
+    def test_carry_load(self):
+        self.assertIn('unit_load', self.generate(carry_load=True))
+
+    def test_independent_months(self):
+        planner = HorizonPlanner(self.start, 1)
+        self.assertIs(planner.thread_assigner(), planner.thread_assigner())
+        self.assertIsNot(planner.thread_assigner(), planner.assigner)
+        self.assertNotIn('unit_load', self.generate(carry_load=False))
+
+
+@override_settings(JOBS_EAGER=True)
+class GenerationTraceTest(TestCase):
+    """Сводка трассировки попадает в результат генерации только при DUTY_TRACING"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.academy = AcademyFactory(people_per_department=2, management_per_faculty=1, duties=4).build()
+
+    def generate(self):
+        job = submit_job('duty.generate_plan', {'plan_id': self.academy.plan.pk, 'mode': 'full'})
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        return job.result
+
+    @override_settings(DUTY_TRACING=False)
+    def test_disabled(self):
+        self.assertNotIn('trace', self.generate())
+
+    @override_settings(DUTY_TRACING=True)
+    def test_enabled(self):
+        trace = self.generate()['trace']
+        self.assertEqual(set(trace), {'total_ms', 'phases_ms', 'decisions', 'counters'})
+        self.assertEqual(set(trace['decisions']), {str(duty) for duty in self.academy.commandant_duties})
+
+
+class RegenerateScheduleTest(TestCase):
+    """Инкрементальная перегенерация: ручные записи и неизменённые наряды не трогаются"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.academy = AcademyFactory(people_per_department=2, management_per_faculty=1, duties=4).build()
+
+    def setUp(self):
+        self.plan = self.academy.plan
+        self.service = DutyDistributionService(self.plan.month)
+        self.service.generate_schedule(self.plan)
+        self.plan.refresh_from_db()
+
+    def rows(self, duty):
+        return {
+            (row['date'], row['assigned_faculty_id'], row['assigned_department_id'], row['pk'])
+            for row in DutySchedule.objects.filter(duty=duty).values(
+                'pk', 'date', 'assigned_faculty_id', 'assigned_department_id'
+            )
+        }
+
+    def regenerate(self):
+        result = DutyDistributionService(self.plan.month).regenerate_schedule(self.plan)
+        self.plan.refresh_from_db()
+        return result
+
+    def test_nothing_changed(self):
+        before = {duty.pk: self.rows(duty) for duty in self.academy.commandant_duties}
+        result = self.regenerate()
+        self.assertEqual((result['created'], result['updated'], result['deleted']), (0, 0, 0))
+        self.assertEqual({duty.pk: self.rows(duty) for duty in self.academy.commandant_duties}, before)
+
+    def test_manual_and_timed_rows_kept(self):
+        duty, other = self.academy.commandant_duties[:2]
+        manual = DutySchedule.objects.filter(duty=duty).order_by('date').first()
+        manual.assigned_faculty = None
+        manual.assigned_department = self.academy.departments[0]
+        manual.assigned_unit_type = 'department'
+        manual.is_manually_assigned = True
+        manual.save()
+        timed = DutySchedule.objects.filter(duty=other).order_by('date').first()
+        DutySchedule.objects.filter(pk=timed.pk).update(time_start=time(8), time_end=time(20))
+        other_rows = self.rows(other)
+
+        # Наряд duty пересчитывается (изменён вес), ручная запись остаётся как есть
+        Duty.objects.filter(pk=duty.pk).update(duty_weight=duty.duty_weight + 5)
+        self.regenerate()
+        manual_after = DutySchedule.objects.get(pk=manual.pk)
+        self.assertEqual(manual_after.assigned_department, self.academy.departments[0])
+        self.assertTrue(manual_after.is_manually_assigned)
+        self.assertEqual(DutySchedule.objects.filter(duty=duty, date=manual.date).count(), 1)
+        # Неизменённый наряд с временем смены не удаляется и не переназначается
+        self.assertEqual(self.rows(other), other_rows)
+
+    def test_changed_duty_recomputed(self):
+        duty, other = self.academy.commandant_duties[:2]
+        other_rows = self.rows(other)
+        self.plan.set_duty_schedule(duty, {'weekdays': ['Понедельник']})
+        result = self.regenerate()
+
+        dates = {row[0] for row in self.rows(duty)}
+        self.assertTrue(dates and all(day.weekday() == 0 for day in dates))
+        self.assertGreater(result['deleted'], 0)
+        self.assertEqual(self.rows(other), other_rows)
+        self.assertEqual(
+            self.plan.generation_snapshot['duties'][str(duty.pk)]['rule'],
+            DutyDistributionService(self.plan.month).get_schedule_rule(duty, self.plan).mask,
+        )
+
+    def test_removed_duty_deleted(self):
+        duty, other = self.academy.commandant_duties[:2]
+        other_rows = self.rows(other)
+        self.plan.remove_duty(duty)
+        self.regenerate()
+        self.assertFalse(DutySchedule.objects.filter(duty=duty).exists())
+        self.assertEqual(self.rows(other), other_rows)
+        self.assertNotIn(str(duty.pk), self.plan.generation_snapshot['duties'])
+
+    def test_headcount_change_recomputes(self):
+        snapshot = self.plan.generation_snapshot
+        self.assertEqual(set(snapshot['capacity']), set(self.plan.selected_units))
+        department = self.academy.departments[0]
+        before = DutySchedule.objects.filter(assigned_faculty=department.faculty).count()
+        People.objects.bulk_create([
+            People(full_name=f'Пополнение {i}', department=department, faculty=department.faculty, rank=self.academy.ranks[0])
+            for i in range(40)
+        ])
+        result = self.regenerate()
+        self.assertNotEqual(self.plan.generation_snapshot['capacity'], snapshot['capacity'])
+        # Наряды перераспределены с учётом новой численности: больше нагрузки - выросшему факультету
+        self.assertGreater(result['updated'], 0)
+        self.assertGreater(DutySchedule.objects.filter(assigned_faculty=department.faculty).count(), before)
@@ -0,0 +1,104 @@
+# duty/tracing.py
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationTrace:
+    """
+    Трассировка генерации графика: время по фазам и счётчики решений по нарядам.
+
+    Использование:
+        trace = GenerationTrace.create()
+        with trace.phase('assignment'):
+            ...
+        trace.count(duty, 'rotating')
+        trace.summary()
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.phases = defaultdict(float)
+        self.decisions = defaultdict(lambda: defaultdict(int))
+        self.counters = defaultdict(int)
+        self._started = time.perf_counter()
+
+    @classmethod
+    def create(cls, enabled=None):
+        """
+        Создать трассировку. Если enabled не указан, она включается настройкой
+        DUTY_TRACING или уровнем DEBUG у логгера duty.tracing.
+        """
+        if enabled is None:
+            enabled = getattr(settings, 'DUTY_TRACING', False) or logger.isEnabledFor(logging.DEBUG)
+        return cls() if enabled else NULL_TRACE
+
+    @contextmanager
+    def phase(self, name):
+        """Замерить время фазы (повторные вызовы одной фазы суммируются)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - started
+
+    def count(self, duty, decision, amount=1):
+        """Учесть решение по наряду (fixed / rotating / skipped и т.п.)"""
+        self.decisions[str(duty)][decision] += amount
+
+    def incr(self, name, amount=1):
+        """Увеличить произвольный счётчик"""
+        self.counters[name] += amount
+
+    def summary(self):
+        """Структурированная сводка, пригодная для JSON"""
+        return {
+            'total_ms': round((time.perf_counter() - self._started) * 1000, 3),
+            'phases_ms': {name: round(value * 1000, 3) for name, value in self.phases.items()},
+            'decisions': {duty: dict(counts) for duty, counts in self.decisions.items()},
+            'counters': dict(self.counters),
+        }
+
+    def log(self, message='Генерация графика'):
+        """Записать сводку в лог на уровне DEBUG"""
+        logger.debug('%s: %s', message, self.summary())
+
+
+class _NullPhase:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullTrace:
+    """Выключенная трассировка: все методы ничего не делают"""
+
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def count(self, duty, decision, amount=1):
+        pass
+
+    def incr(self, name, amount=1):
+        pass
+
+    def summary(self):
+        return None
+
+    def log(self, message=None):
+        pass
+
+
+NULL_TRACE = NullTrace()
@@ -0,0 +1,145 @@
+# duty/unit_stats.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from core.db import use_primary
+from .models import DutySchedule
+from .utils import month_bounds
+from .versions import get_month_version
+
+
+UNIT_FIELDS = {
+    'faculty': ('assigned_faculty_id', 'assigned_faculty__name', 'Факультет'),
+    'department': ('assigned_department_id', 'assigned_department__name', 'Кафедра'),
+}
+
+
+class UnitStatsBuilder:
+    """
+    Статистика распределения нарядов месяца по подразделениям, посчитанная в SQL.
+
+    Для каждого подразделения ('faculty_1' / 'department_2'):
+        type, id, name, title - вид, id, название и название с видом;
+        count  - число нарядов;
+        people - число людей (сумма duty.people_count);
+        load   - взвешенная нагрузка (сумма duty_weight × people_count);
+        duties - названия нарядов по алфавиту.
+
+    Считается двумя группирующими запросами независимо от числа нарядов.
+    Результат кэшируется по (область, месяц, версия), версия та же, что у
+    CalendarBuilder, поэтому любое изменение графика даёт новый ключ.
+
+    Использование:
+        stats = UnitStatsBuilder(month).get()
+        stats = UnitStatsBuilder(month, queryset=..., scope='faculty_1', version=grid.version).get()
+    """
+
+    CACHE_KEY = 'duty_unit_stats:{scope}:{month}:{version}'
+
+    def __init__(self, month, queryset=None, scope='all', version=None):
+        self.month, self.next_month = month_bounds(month)
+        self.queryset = queryset if queryset is not None else DutySchedule.objects.all()
+        self.scope = scope
+        self.version = version
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            date__gte=self.month,
+            date__lt=self.next_month,
+        ).order_by()
+
+    def get_version(self):
+        if self.version is None:
+            self.version = get_month_version(self.month)
+        return self.version
+
+    def build(self):
+        """Посчитать статистику без кэша"""
+        queryset = self.get_queryset().exclude(assigned_faculty__isnull=True, assigned_department__isnull=True)
+        id_fields = [id_field for id_field, _, _ in UNIT_FIELDS.values()]
+        name_fields = [name_field for _, name_field, _ in UNIT_FIELDS.values()]
+
+        stats = {}
+        rows = queryset.values(*id_fields, *name_fields).annotate(
+            count=Count('id'),
+            people=Sum('duty__people_count'),
+            load=Sum(F('duty__duty_weight') * F('duty__people_count'), output_field=FloatField()),
+        ).order_by(*id_fields)
+        for row in rows:
+            unit_type, unit_pk, name, label = self.unit_of(row)
+            stats[f'{unit_type}_{unit_pk}'] = {
+                'type': unit_type,
+                'id': unit_pk,
+                'name': name,
+                'title': f'{label} {name}',
+                'count': row['count'],
+                'people': row['people'] or 0,
+                'load': row['load'] or 0,
+                'duties': [],
+            }
+
+        duties = queryset.values(*id_fields, 'duty__duty_name').distinct().order_by('duty__duty_name')
+        for row in duties:
+            unit_type, unit_pk, _, _ = self.unit_of(row)
+            stats[f'{unit_type}_{unit_pk}']['duties'].append(row['duty__duty_name'])
+
+        return stats
+
+    @staticmethod
+    def unit_of(row):
+        """(вид, id, название, подпись) подразделения строки; факультет имеет приоритет, как в RosterService"""
+        for unit_type, (id_field, name_field, label) in UNIT_FIELDS.items():
+            if row[id_field]:
+                return unit_type, row[id_field], row.get(name_field), label
+
+    def get(self):
+        """Статистика из кэша или посчитанная заново"""
+        key = self.CACHE_KEY.format(
+            scope=self.scope,
+            month=self.month.strftime('%Y-%m'),
+            version=self.get_version(),
+        )
+        stats = cache.get(key)
+        if stats is None:
+            # Кэшируется под текущей версией - считается по основной БД, не по реплике
+            with use_primary():
+                stats = self.build()
+            cache.set(key, stats, getattr(settings, 'DUTY_CALENDAR_CACHE_TIMEOUT', 600))
+        return stats
+
+
+def get_unit_stats(month, queryset=None, scope='all', version=None):
+    """Статистика по подразделениям за месяц (см. UnitStatsBuilder)"""
+    return UnitStatsBuilder(month, queryset=queryset, scope=scope, version=version).get()
+
+
+def get_month_summaries(months):
+    """
+    Сводка графика по месяцам одним группирующим запросом:
+    месяц (первое число) -> {'count', 'load', 'manual'} - число нарядов,
+    взвешенная нагрузка и число ручных назначений. Месяцы без нарядов
+    получают нули.
+    """
+    months = sorted({month.replace(day=1) for month in months})
+    summaries = {month: {'count': 0, 'load': 0, 'manual': 0} for month in months}
+    if not months:
+        return summaries
+
+    rows = DutySchedule.objects.filter(
+        date__gte=months[0],
+        date__lt=month_bounds(months[-1])[1],
+    ).annotate(
+        schedule_month=TruncMonth('date'),
+    ).values('schedule_month').annotate(
+        count=Count('id'),
+        load=Sum(F('duty__duty_weight') * F('duty__people_count'), output_field=FloatField()),
+        manual=Count('id', filter=Q(is_manually_assigned=True)),
+    ).order_by()
+
+    for row in rows:
+        summary = summaries.get(row['schedule_month'])
+        if summary is not None:
+            summary.update(count=row['count'], load=row['load'] or 0, manual=row['manual'])
+    return summaries
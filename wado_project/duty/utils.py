@@ -1,4 +1,26 @@
 # duty/utils.py
+from datetime import date, timedelta
+
+
+def month_bounds(month, month_num=None):
+    """
+    Первый день месяца и первый день следующего - границы диапазонного фильтра
+    date__gte / date__lt, который, в отличие от date__year / date__month,
+    обслуживается индексом по дате.
+    Принимает дату внутри месяца или пару (год, номер месяца).
+    """
+    if month_num is not None:
+        month = date(int(month), int(month_num), 1)
+    month = month.replace(day=1)
+    return month, (month + timedelta(days=32)).replace(day=1)
+
+
+def add_months(month, count):
+    """Первое число месяца, отстоящего от month на count месяцев (count может быть отрицательным)"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
 def normalize_weekday_setting(day_setting):
     """
     Нормализует входное значение дня недели к числу от 0 (понедельник) до 6 (воскресенье).
@@ -41,6 +63,8 @@ def normalize_weekday_setting(day_setting):
         }
 
         key = clean.lower()
-        return ru_map.get(key) or en_map.get(key)
+        if key in ru_map:
+            return ru_map[key]
+        return en_map.get(key)
 
     return None
\ No newline at end of file
@@ -0,0 +1,66 @@
+# duty/versions.py
+"""
+Версия графика нарядов месяца - счётчик в кэше.
+
+Ключи кэша календарной сетки и статистики подразделений включают версию месяца,
+поэтому повторный просмотр стоит двух обращений к кэшу и ни одного запроса к БД.
+Версию увеличивают все пути изменения графика: DutySchedule.save()/delete(),
+генерация и пересчёт (DutyDistributionService), сброс плана, а также изменение
+и удаление нарядов (месяцы, где наряд есть в графике) и подразделений (общая
+версия всех месяцев) - см. duty.signals. QuerySet.update() сигналов не вызывает -
+после него версию увеличивает вызывающий код. Увеличение выполняется после
+фиксации транзакции, чтобы по новой версии не закэшировать ещё не
+зафиксированные данные.
+
+Начальное значение - текущее время в наносекундах: после вытеснения счётчика
+из кэша он не совпадёт ни с одной из прежних версий.
+
+Счётчик общий для процессов только при общем кэше (файловый или Redis, см. CACHES);
+с локальной памятью каждый процесс видит свои изменения сразу, чужие - по истечении
+DUTY_CALENDAR_CACHE_TIMEOUT.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+VERSION_KEY = 'duty_schedule_version:{month}'
+# Общая версия: меняет версии всех месяцев сразу (переименование подразделения и т.п.)
+GLOBAL_VERSION_KEY = 'duty_schedule_version:all'
+
+
+def _key(month):
+    return VERSION_KEY.format(month=month.strftime('%Y-%m'))
+
+
+def get_month_version(month):
+    """Текущая версия графика месяца (month - любая дата месяца): 'общая.месячная'"""
+    keys = (GLOBAL_VERSION_KEY, _key(month))
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key, 0)
+    return '{}.{}'.format(*(versions[key] for key in keys))
+
+
+def bump_month_version(*dates):
+    """Увеличить версии месяцев указанных дат после фиксации текущей транзакции"""
+    keys = {_key(day) for day in dates if day is not None}
+    if keys:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def bump_all_versions():
+    """Увеличить версии всех месяцев после фиксации текущей транзакции"""
+    transaction.on_commit(lambda: _bump([GLOBAL_VERSION_KEY]))
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Счётчика нет в кэше - следующее чтение начнёт новую версию
+            pass
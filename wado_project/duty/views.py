@@ -16,6 +16,7 @@ from core.mixins import (
     BaseDeleteView,
     SuccessMessageMixin,
 )
+from core.utils import user_in_group
 
 from django.views.generic import (
     ListView,
@@ -161,7 +162,7 @@ class DutyUpdateView(
         user = request.user
 
         # Проверяем права на редактирование
-        if duty.is_commandant and not user.groups.filter(name='Комендант').exists():
+        if duty.is_commandant and not user_in_group(user, 'Комендант'):
             messages.warning(request, "Вы не можете редактировать наряд коменданта")
             return redirect(f'{self.namespace}:duty:list')
 
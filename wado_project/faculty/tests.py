@@ -1,3 +1,32 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import ViewPerformanceTestCase
+
+
+class FacultyViewsPerformanceTest(ViewPerformanceTestCase):
+    """Границы числа запросов для страниц факультета"""
+
+    def setUp(self):
+        super().setUp()
+        self.login('faculty')
+
+    def test_profile(self):
+        self.assertViewBudget(reverse('faculty:profile'), 12)
+
+    def test_staff_list(self):
+        self.assertViewBudget(reverse('faculty:staff'), 12)
+
+    def test_staff_list_filtered(self):
+        duty = self.academy.commandant_duties[0]
+        self.assertViewBudget(reverse('faculty:staff'), 12, data={'department': 'management', 'duty': duty.pk})
+
+    def test_staff_detail(self):
+        person = self.academy.department_people[0]
+        self.assertViewBudget(reverse('faculty:staff_detail', args=[person.pk]), 10)
+
+    def test_academic_duties(self):
+        month = self.academy.month
+        self.assertViewBudget(reverse('faculty:academic_duties'), 9, data={'year': month.year, 'month': month.month})
+
+    def test_duty_list(self):
+        self.assertViewBudget(reverse('faculty:duty:list'), 9)
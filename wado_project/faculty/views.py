@@ -2,14 +2,14 @@ from django.views.generic import TemplateView
 from people.models import People
 from unit.models import Department
 from django.db.models import Count, Avg
-from core.mixins import HasFacultyMixin
+from core.mixins import HasFacultyMixin, ReplicaReadMixin
+from core.utils import object_url_builder, page_querystring, paginate
 
 
 # Добавим импорты в начало файла
 from django.utils import timezone
 from datetime import datetime, timedelta
 import calendar
-from collections import defaultdict
 from django.db.models import Count, Q
 from duty.models import DutySchedule, MonthlyDutyPlan, Duty
 from unit.models import Department
@@ -20,16 +20,17 @@ from core.mixins import HasFacultyMixin
 from django.utils import timezone
 from datetime import datetime
 import calendar
-from collections import defaultdict
 from django.db.models import Q
 from django.views.generic import TemplateView
 
 from core.mixins import HasFacultyMixin
 from duty.models import DutySchedule
+from duty.calendar_grid import CalendarBuilder
+from duty.unit_stats import get_unit_stats
 from unit.models import Department
 
 
-class FacultyAcademicDutiesView(HasFacultyMixin, TemplateView):
+class FacultyAcademicDutiesView(HasFacultyMixin, ReplicaReadMixin, TemplateView):
     """Просмотр распределенных на факультет нарядов"""
     template_name = 'profiles/faculty/academic_duties.html'
 
@@ -50,39 +51,39 @@ class FacultyAcademicDutiesView(HasFacultyMixin, TemplateView):
         except:
             current_date = timezone.now().date().replace(day=1)
         
-        # Получаем расписания
-        schedules = DutySchedule.objects.filter(
-            Q(assigned_faculty=faculty) | 
-            Q(assigned_department__faculty=faculty)
-        ).filter(
-            date__year=current_date.year,
-            date__month=current_date.month
-        ).select_related(
-            'duty', 
-            'assigned_faculty', 
-            'assigned_department'
-        ).order_by('date')
-        
-        # Группируем по датам для таблицы
-        schedules_by_date = defaultdict(list)
-        for schedule in schedules:
-            schedules_by_date[schedule.date].append(schedule)
+        # Наряды факультета за месяц, сгруппированные по датам
+        grid = CalendarBuilder(
+            current_date,
+            queryset=DutySchedule.objects.filter(
+                Q(assigned_faculty=faculty) |
+                Q(assigned_department__faculty=faculty)
+            ),
+            scope=f'faculty_{faculty.pk}',
+        ).get()
+        schedules = grid.schedules
+        schedules_by_date = grid.by_date
         
         # Сортируем даты
-        sorted_dates = sorted(schedules_by_date.keys())
+        sorted_dates = grid.dates()
         
-        # Подсчет статистики
-        total_duties = schedules.count()
-        total_people = sum(s.duty.people_count for s in schedules)
+        # Подсчет статистики (SQL-агрегация по подразделениям факультета)
+        unit_stats = get_unit_stats(
+            current_date,
+            queryset=DutySchedule.objects.filter(
+                Q(assigned_faculty=faculty) |
+                Q(assigned_department__faculty=faculty)
+            ),
+            scope=f'faculty_{faculty.pk}',
+            version=grid.version,
+        )
+        total_duties = len(grid)
+        total_people = sum(stat['people'] for stat in unit_stats.values())
         
         # Распределение по кафедрам
         dept_distribution = {}
-        for schedule in schedules:
-            if schedule.assigned_department:
-                dept_name = schedule.assigned_department.name
-                dept_distribution[dept_name] = dept_distribution.get(dept_name, 0) + 1
-            else:
-                dept_distribution['Управление факультета'] = dept_distribution.get('Управление факультета', 0) + 1
+        for stat in unit_stats.values():
+            dept_name = stat['name'] if stat['type'] == 'department' else 'Управление факультета'
+            dept_distribution[dept_name] = dept_distribution.get(dept_name, 0) + stat['count']
         
         # Соседние месяцы
         prev_month = self.get_adjacent_month(current_date, -1)
@@ -94,7 +95,7 @@ class FacultyAcademicDutiesView(HasFacultyMixin, TemplateView):
             'prev_month': prev_month,
             'next_month': next_month,
             'schedules': schedules,
-            'schedules_by_date': dict(schedules_by_date),
+            'schedules_by_date': schedules_by_date,
             'sorted_dates': sorted_dates,
             'total_duties': total_duties,
             'total_people': total_people,
@@ -117,7 +118,7 @@ class FacultyAcademicDutiesView(HasFacultyMixin, TemplateView):
             
         return datetime(year, month, 1).date()
 
-class FacultyDashboardView(HasFacultyMixin, TemplateView):
+class FacultyDashboardView(HasFacultyMixin, ReplicaReadMixin, TemplateView):
     template_name = 'profiles/faculty/dashboard.html'
 
     def get_context_data(self, **kwargs):
@@ -162,11 +163,10 @@ from django.views.generic import TemplateView
 from people.models import People
 from unit.models import Department
 from duty.models import Duty
-from missing.models import DepartmentMissing, FacultyMissing
+from missing.services import AbsenceIndex, get_permitted_people, get_unit_people
 from permission.models import DepartmentDutyPermission
 from core.mixins import HasFacultyMixin
 from django.utils import timezone
-from django.urls import reverse
 from django.db.models import Count, Q
 from django.db.models import Value, BooleanField
 
@@ -187,10 +187,7 @@ class FacultyStaffView(HasFacultyMixin, TemplateView):
         from django.db.models import Q, Case, When, Value, BooleanField
 
         # === Список всех сотрудников: кафедры + управление ===
-        staff = People.objects.filter(
-            Q(department__faculty=user.faculty) | 
-            Q(faculty=user.faculty, department__isnull=True)
-        ).annotate(
+        staff = get_unit_people(f'faculty_{user.faculty.pk}').annotate(
             is_management=Case(
                 When(department__isnull=True, then=Value(True)),
                 default=Value(False),
@@ -211,30 +208,20 @@ class FacultyStaffView(HasFacultyMixin, TemplateView):
         if department_id == 'management':
             staff = staff.filter(department__isnull=True)
         elif department_id:
-            staff = staff.filter(department_id=department_id)
+            staff = get_unit_people(f'department_{department_id}', staff)
 
         if duty_id:
-            staff = staff.filter(
-                Q(department_duty_permissions__duty_id=duty_id) |
-                Q(faculty_duty_permissions__duty_id=duty_id)
-            ).distinct()
+            staff = get_permitted_people(staff, duty_id)
 
+        # Одна страница; освобождения, действующие сегодня, - одним запросом
+        page_obj = paginate(self.request, staff)
         today = timezone.now().date()
+        absences = AbsenceIndex.load(today, person_ids=[person.pk for person in page_obj])
+        detail_url = object_url_builder('faculty:staff_detail')
         table_items = []
 
-        today = timezone.now().date()
-
-        for idx, person in enumerate(staff, start=1):
-            missing = None
-
-            if person.department:
-                missing = DepartmentMissing.objects.filter(
-                    person=person,
-                ).first()
-            else:
-                missing = FacultyMissing.objects.filter(
-                    person=person,
-                ).first()
+        for idx, person in enumerate(page_obj, start=page_obj.start_index()):
+            missing = absences.get_absence(person.pk, today)
 
             missing_info = '-'
             if missing:
@@ -243,7 +230,7 @@ class FacultyStaffView(HasFacultyMixin, TemplateView):
             dept_name = str(person.department) if person.department else 'Управление'
 
             table_items.append({
-                'url': reverse('faculty:staff_detail', args=[person.pk]),
+                'url': detail_url(person.pk),
                 'fields': [
                     {'value': idx},
                     {'value': person.full_name},
@@ -269,7 +256,9 @@ class FacultyStaffView(HasFacultyMixin, TemplateView):
             'duties': filtered_duties,
             'selected_department': department_id,
             'selected_duty': duty_id,
-            'total_people': len(table_items),
+            'total_people': page_obj.paginator.count,
+            'page_obj': page_obj,
+            'querystring': page_querystring(self.request),
         })
 
         return context
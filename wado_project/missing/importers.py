@@ -0,0 +1,77 @@
+# missing/importers.py
+"""Пакетный импорт освобождений (см. core.importing)"""
+from collections import defaultdict
+
+from core.importing import BaseImporter, RowError, name_key, normalize, parse_date
+from people.importers import load_person, people_by_number
+from .models import DepartmentMissing, FacultyMissing, MissingReason
+
+
+class AbsenceImporter(BaseImporter):
+    """
+    Освобождения по личному номеру: человеку кафедры - от кафедры, человеку
+    управления факультета - от факультета. Причина - название или код
+    (по умолчанию болезнь). Освобождение с теми же датами уже существует -
+    строка пропускается.
+    """
+
+    columns = {
+        'personal_number': 'Личный номер',
+        'start_date': 'Начало',
+        'end_date': 'Окончание',
+        'reason': 'Причина',
+        'comment': 'Комментарий',
+    }
+    required = ('personal_number', 'start_date', 'end_date')
+
+    REASONS = {
+        **{name_key(label): value for value, label in MissingReason.choices},
+        **{value: value for value in MissingReason.values},
+    }
+
+    def prepare(self, rows):
+        self.people = people_by_number(normalize(row.get('personal_number')) for row in rows)
+        person_ids = [person['id'] for person in self.people.values()]
+        self.existing = {
+            model: set(model.objects.filter(person_id__in=person_ids).order_by().values_list('person_id', 'start_date', 'end_date'))
+            for model in (DepartmentMissing, FacultyMissing)
+        }
+
+    def clean_row(self, row):
+        person = load_person(self.people, normalize(row['personal_number']))
+        if person['department_id']:
+            model = DepartmentMissing
+        elif person['faculty_id']:
+            model = FacultyMissing
+        else:
+            raise RowError('Человек не привязан ни к кафедре, ни к факультету')
+
+        start_date = parse_date(row['start_date'], self.columns['start_date'])
+        end_date = parse_date(row['end_date'], self.columns['end_date'])
+        if end_date < start_date:
+            raise RowError('Дата окончания раньше даты начала')
+
+        reason = MissingReason.ILLNESS
+        if normalize(row.get('reason')):
+            reason = self.REASONS.get(name_key(row['reason']))
+            if reason is None:
+                raise RowError(f'Неизвестная причина «{normalize(row["reason"])}»')
+
+        key = (person['id'], start_date, end_date)
+        if key in self.existing[model]:
+            return None, None
+        self.existing[model].add(key)
+        return model(
+            person_id=person['id'],
+            start_date=start_date,
+            end_date=end_date,
+            reason=reason,
+            comment=normalize(row.get('comment')) or None,
+        ), True
+
+    def save(self, objects):
+        by_model = defaultdict(list)
+        for obj in objects:
+            by_model[type(obj)].append(obj)
+        for model, absences in by_model.items():
+            model.objects.bulk_create(absences, batch_size=self.batch_size)
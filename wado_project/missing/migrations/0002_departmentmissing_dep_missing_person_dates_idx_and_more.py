@@ -0,0 +1,21 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='departmentmissing',
+            index=models.Index(fields=['person', 'start_date', 'end_date'], name='dep_missing_person_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facultymissing',
+            index=models.Index(fields=['person', 'start_date', 'end_date'], name='fac_missing_person_dates_idx'),
+        ),
+    ]
@@ -23,6 +23,10 @@ class FacultyMissing(models.Model):
         verbose_name = 'Освобождение от факультета'
         verbose_name_plural = 'Освобождения от факультетов'
         ordering = ['-start_date']
+        indexes = [
+            # Проверка отсутствия человека в окне дат
+            models.Index(fields=['person', 'start_date', 'end_date'], name='fac_missing_person_dates_idx'),
+        ]
 
     def __str__(self):
         return f"{self.person} - {self.get_reason_display()} ({self.start_date} – {self.end_date})"
@@ -42,6 +46,10 @@ class DepartmentMissing(models.Model):
         verbose_name = 'Освобождение от кафедры'
         verbose_name_plural = 'Освобождения от кафедр'
         ordering = ['-start_date']
+        indexes = [
+            # Проверка отсутствия человека в окне дат
+            models.Index(fields=['person', 'start_date', 'end_date'], name='dep_missing_person_dates_idx'),
+        ]
 
     def __str__(self):
         return f"{self.person} - {self.get_reason_display()} ({self.start_date} – {self.end_date})"
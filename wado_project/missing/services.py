@@ -0,0 +1,247 @@
+# missing/services.py
+import bisect
+from collections import defaultdict
+
+from django.db.models import CharField, Q, Value
+
+from people.models import People
+from permission.models import DepartmentDutyPermission, FacultyDutyPermission
+from .models import DepartmentMissing, FacultyMissing, MissingReason
+
+
+class Absence:
+    """Интервал освобождения из индекса (кафедральный или факультетский)"""
+
+    __slots__ = ('pk', 'person_id', 'start_date', 'end_date', 'reason', 'source')
+
+    def __init__(self, pk, person_id, start_date, end_date, reason, source):
+        self.pk = pk
+        self.person_id = person_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.reason = reason
+        self.source = source
+
+    def get_reason_display(self):
+        return dict(MissingReason.choices).get(self.reason, self.reason)
+
+    def covers(self, day):
+        return self.start_date <= day <= self.end_date
+
+    def __repr__(self):
+        return f'<Absence {self.source} {self.person_id}: {self.start_date} – {self.end_date}>'
+
+
+class _PersonIntervals:
+    """
+    Отсортированные по началу интервалы одного человека.
+    prefix[i] - индекс интервала с максимальным концом среди первых i + 1,
+    поэтому покрывающий дату интервал находится одним bisect.
+    """
+
+    __slots__ = ('starts', 'absences', 'prefix')
+
+    def __init__(self, absences):
+        absences.sort(key=lambda absence: (absence.start_date, absence.end_date))
+        self.absences = absences
+        self.starts = [absence.start_date for absence in absences]
+        self.prefix = []
+        best = 0
+        for index, absence in enumerate(absences):
+            if absence.end_date >= absences[best].end_date:
+                best = index
+            self.prefix.append(best)
+
+    def find(self, day):
+        index = bisect.bisect_right(self.starts, day) - 1
+        if index < 0:
+            return None
+        absence = self.absences[self.prefix[index]]
+        return absence if absence.end_date >= day else None
+
+
+class AbsenceIndex:
+    """
+    Индекс освобождений за окно дат.
+
+    Все DepartmentMissing и FacultyMissing, пересекающие окно, загружаются
+    одним запросом (UNION) и раскладываются по людям в отсортированные
+    интервалы. Проверка «отсутствует ли человек в день D» - O(log n)
+    по числу его освобождений, без запросов к базе.
+
+    Использование:
+        index = AbsenceIndex.load(month_start, month_end)
+        index.is_absent(person.id, day)
+        index.available(people, day)
+        index.load_units(duty_ids=duty_ids).available_people(day, 'department_2', duty)
+    """
+
+    SOURCES = (
+        ('department', DepartmentMissing),
+        ('faculty', FacultyMissing),
+    )
+
+    def __init__(self, absences=(), start=None, end=None):
+        self.start = start
+        self.end = end
+        grouped = defaultdict(list)
+        for absence in absences:
+            grouped[absence.person_id].append(absence)
+        self._people = {person_id: _PersonIntervals(items) for person_id, items in grouped.items()}
+        self.unit_people = None
+        self.permitted = None
+
+    @classmethod
+    def load(cls, start, end=None, person_ids=None, sources=None):
+        """
+        Загрузить освобождения, пересекающие [start, end] (end по умолчанию = start).
+        person_ids - ограничить выборку людьми; sources - ('department', 'faculty')
+        или их часть, если нужны освобождения только одного вида.
+        """
+        end = end or start
+        sources = sources or [name for name, _ in cls.SOURCES]
+
+        querysets = []
+        for name, model in cls.SOURCES:
+            if name not in sources:
+                continue
+            queryset = model.objects.filter(start_date__lte=end, end_date__gte=start)
+            if person_ids is not None:
+                queryset = queryset.filter(person_id__in=person_ids)
+            querysets.append(queryset.order_by().annotate(
+                source=Value(name, output_field=CharField())
+            ).values_list('pk', 'person_id', 'start_date', 'end_date', 'reason', 'source'))
+
+        if not querysets:
+            return cls(start=start, end=end)
+        rows = querysets[0].union(*querysets[1:], all=True) if len(querysets) > 1 else querysets[0]
+        return cls((Absence(*row) for row in rows), start=start, end=end)
+
+    def __contains__(self, person_id):
+        return person_id in self._people
+
+    def __len__(self):
+        return sum(len(intervals.absences) for intervals in self._people.values())
+
+    def _check_window(self, day):
+        if self.start is not None and not (self.start <= day <= self.end):
+            raise ValueError(f'Дата {day} вне окна индекса освобождений {self.start} – {self.end}')
+
+    def get_absence(self, person_id, day):
+        """Освобождение, покрывающее day, или None"""
+        self._check_window(day)
+        intervals = self._people.get(person_id)
+        return intervals.find(day) if intervals else None
+
+    def is_absent(self, person_id, day):
+        return self.get_absence(person_id, day) is not None
+
+    def absences_for(self, person_id):
+        """Все освобождения человека в окне, по дате начала"""
+        intervals = self._people.get(person_id)
+        return list(intervals.absences) if intervals else []
+
+    def absent_on(self, day):
+        """dict id человека -> освобождение для всех отсутствующих в день day"""
+        self._check_window(day)
+        result = {}
+        for person_id, intervals in self._people.items():
+            absence = intervals.find(day)
+            if absence is not None:
+                result[person_id] = absence
+        return result
+
+    def available(self, people, day):
+        """
+        Отфильтровать людей (объекты People или id), не имеющих освобождения на day.
+        Линейно по числу переданных людей: для каждого один bisect по его освобождениям.
+        """
+        self._check_window(day)
+        result = []
+        for person in people:
+            person_id = getattr(person, 'pk', person)
+            intervals = self._people.get(person_id)
+            if intervals is None or intervals.find(day) is None:
+                result.append(person)
+        return result
+
+    def load_units(self, people=None, duty_ids=None):
+        """
+        Загрузить состав подразделений и допуски к нарядам для available_people.
+        people - уже загруженные People (с select_related('department')), иначе читаются
+        из базы; duty_ids - ограничить допуски нарядами. Возвращает сам индекс.
+        """
+        if people is None:
+            people = People.objects.only(
+                'id', 'faculty_id', 'department_id', 'department__faculty_id'
+            ).select_related('department')
+        self.unit_people = defaultdict(list)
+        for person in people:
+            for unit_id in person_unit_ids(person):
+                self.unit_people[unit_id].append(person.pk)
+
+        self.permitted = defaultdict(set)
+        for permission_model in (DepartmentDutyPermission, FacultyDutyPermission):
+            permissions = permission_model.objects.all()
+            if duty_ids is not None:
+                permissions = permissions.filter(duty_id__in=duty_ids)
+            for duty_id, person_id in permissions.values_list('duty_id', 'person_id'):
+                self.permitted[duty_id].add(person_id)
+        return self
+
+    def available_people(self, day, unit_id=None, duty=None):
+        """
+        id людей подразделения unit_id ('faculty_1' / 'department_2', как в get_unit_people)
+        с допуском к наряду duty (кафедральным или факультетским) и без освобождения на day.
+        Без запросов к базе: состав и допуски загружаются заранее load_units.
+        """
+        if self.unit_people is None:
+            raise ValueError('Состав подразделений не загружен: вызовите load_units')
+        if unit_id:
+            people = self.unit_people.get(unit_id, ())
+        else:
+            people = {person_id for ids in self.unit_people.values() for person_id in ids}
+        if duty is not None:
+            permitted = self.permitted.get(getattr(duty, 'pk', duty), ())
+            people = [person_id for person_id in people if person_id in permitted]
+        return self.available(people, day)
+
+
+def person_unit_ids(person):
+    """id подразделений человека: кафедра и её факультет или факультет управления"""
+    if person.department_id:
+        unit_ids = [f'department_{person.department_id}']
+        if person.department.faculty_id:
+            unit_ids.append(f'faculty_{person.department.faculty_id}')
+        return unit_ids
+    if person.faculty_id:
+        return [f'faculty_{person.faculty_id}']
+    return []
+
+
+def get_unit_people(unit_id=None, people=None):
+    """
+    Люди подразделения по id вида 'faculty_1' / 'department_2' (queryset people или всех).
+    В факультет входят его кафедры и управление факультета.
+    """
+    people = People.objects.all() if people is None else people
+    if not unit_id:
+        return people
+
+    unit_type, _, pk = unit_id.partition('_')
+    if unit_type == 'department':
+        return people.filter(department_id=pk)
+    if unit_type == 'faculty':
+        return people.filter(Q(department__faculty_id=pk) | Q(faculty_id=pk, department__isnull=True))
+    raise ValueError(f'Некорректный id подразделения: {unit_id}')
+
+
+def get_permitted_people(people, duty, sources=('department', 'faculty')):
+    """Люди queryset people с допуском к наряду duty: кафедральным и/или факультетским (sources)"""
+    duty_id = getattr(duty, 'pk', duty)
+    models = {'department': DepartmentDutyPermission, 'faculty': FacultyDutyPermission}
+    condition = Q()
+    for source in sources:
+        condition |= Q(pk__in=models[source].objects.filter(duty_id=duty_id).values('person_id'))
+    return people.filter(condition)
+
@@ -1,3 +1,103 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.urls import reverse
+
+from core.testing import SMALL_ACADEMY, ViewPerformanceTestCase
+from people.models import People
+from .importers import AbsenceImporter
+from .models import DepartmentMissing, FacultyMissing, MissingReason
+from .services import AbsenceIndex, get_permitted_people, get_unit_people
+
+
+class MissingViewsPerformanceTest(ViewPerformanceTestCase):
+    """Списки и формы освобождений кафедры и факультета"""
+
+    def test_department_views(self):
+        self.login('department')
+        missing = DepartmentMissing.objects.filter(person__department=self.academy.departments[0]).first()
+        self.assertViewBudget(reverse('department:missing:department_list'), 8)
+        self.assertViewBudget(reverse('department:missing:department_list'), 8, data={'filter': 'active'})
+        self.assertViewBudget(reverse('department:missing:department_add'), 8)
+        self.assertViewBudget(reverse('department:missing:department_edit', args=[missing.pk]), 8)
+        self.assertViewBudget(reverse('department:missing:department_delete', args=[missing.pk]), 8)
+
+    def test_faculty_views(self):
+        self.login('faculty')
+        missing = FacultyMissing.objects.filter(person__faculty=self.academy.faculties[0]).first()
+        self.assertViewBudget(reverse('faculty:missing:faculty_list'), 8)
+        self.assertViewBudget(reverse('faculty:missing:faculty_add'), 8)
+        self.assertViewBudget(reverse('faculty:missing:faculty_edit', args=[missing.pk]), 8)
+        self.assertViewBudget(reverse('faculty:missing:faculty_delete', args=[missing.pk]), 8)
+
+
+class AbsenceIndexTest(ViewPerformanceTestCase):
+    """Индекс освобождений отвечает так же, как прямой запрос к базе"""
+
+    factory_options = SMALL_ACADEMY
+
+    def test_matches_database(self):
+        start = self.academy.month
+        end = start + timedelta(days=30)
+        with self.assertNumQueries(1):
+            index = AbsenceIndex.load(start, end)
+
+        day = start + timedelta(days=5)
+        expected = set(
+            DepartmentMissing.objects.filter(start_date__lte=day, end_date__gte=day).values_list('person_id', flat=True)
+        ) | set(
+            FacultyMissing.objects.filter(start_date__lte=day, end_date__gte=day).values_list('person_id', flat=True)
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(set(index.absent_on(day)), expected)
+            available = index.available(self.academy.people, day)
+        self.assertEqual(len(available), len(self.academy.people) - len(expected))
+
+    def test_available_people_matches_database(self):
+        start = self.academy.month
+        day = start + timedelta(days=5)
+        duties = self.academy.duties + self.academy.commandant_duties
+        index = AbsenceIndex.load(start, start + timedelta(days=30))
+        # Состав подразделений и допуски двух видов - три запроса на весь месяц
+        with self.assertNumQueries(3):
+            index.load_units(duty_ids=[duty.pk for duty in duties])
+
+        faculty, department = self.academy.faculties[0], self.academy.departments[0]
+        absent = set(index.absent_on(day))
+        for unit_id in (f'faculty_{faculty.pk}', f'department_{department.pk}'):
+            for duty in duties:
+                with self.subTest(unit_id=unit_id, duty=duty.pk):
+                    people = get_permitted_people(get_unit_people(unit_id), duty)
+                    expected = {person_id for person_id in people.values_list('pk', flat=True)
+                                if person_id not in absent}
+                    with self.assertNumQueries(0):
+                        self.assertEqual(set(index.available_people(day, unit_id, duty)), expected)
+
+
+class AbsenceImportTest(ViewPerformanceTestCase):
+    """Импорт освобождений: модель - по подразделению человека, дубликаты пропускаются"""
+
+    factory_options = SMALL_ACADEMY
+
+    def test_import(self):
+        department_person = self.academy.department_people[0]
+        management_person = self.academy.management_people[0]
+        department_person.personal_number, management_person.personal_number = 'Д-1', 'Ф-1'
+        People.objects.bulk_update([department_person, management_person], ['personal_number'])
+
+        rows = [
+            {'Личный номер': 'Д-1', 'Начало': '01.03.2031', 'Окончание': '10.03.2031', 'Причина': 'Отпуск'},
+            {'Личный номер': 'Ф-1', 'Начало': '2031-03-05', 'Окончание': '2031-03-06', 'Причина': ''},
+            {'Личный номер': 'Д-1', 'Начало': '01.03.2031', 'Окончание': '10.03.2031', 'Причина': 'vacation'},
+            {'Личный номер': 'Д-1', 'Начало': '10.03.2031', 'Окончание': '01.03.2031', 'Причина': ''},
+            {'Личный номер': 'Д-1', 'Начало': '01.04.2031', 'Окончание': '02.04.2031', 'Причина': 'Прогул'},
+        ]
+        # Люди, освобождения двух видов, транзакция (2) и по одному INSERT на модель
+        with self.assertNumQueries(7):
+            result = AbsenceImporter().run(rows)
+        self.assertEqual((result.created, result.skipped), (2, 1))
+        self.assertEqual([row for row, _ in result.errors], [5, 6])
+
+        absence = DepartmentMissing.objects.get(person=department_person, start_date__year=2031)
+        self.assertEqual(absence.reason, MissingReason.VACATION)
+        absence = FacultyMissing.objects.get(person=management_person, start_date__year=2031)
+        self.assertEqual(absence.reason, MissingReason.ILLNESS)
@@ -4,6 +4,8 @@ from django import forms
 from .models import Notification
 from django.contrib.auth import get_user_model
 
+from core.utils import user_in_group
+
 User = get_user_model()
 
 
@@ -16,7 +18,7 @@ def get_recipients(user):
         commandants = User.objects.filter(groups__name='Комендант')
         return depts | commandants
 
-    elif user.groups.filter(name='Комендант').exists():
+    elif user_in_group(user, 'Комендант'):
         faculties = User.objects.filter(groups__name='Факультет')
         independent_depts = User.objects.filter(department__faculty__isnull=True)
         return faculties | independent_depts
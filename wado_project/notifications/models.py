@@ -22,5 +22,11 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Счётчик непрочитанных и лента уведомлений получателя
+            models.Index(fields=['recipient', 'is_read', 'created_at'], name='notif_recipient_read_idx'),
+        ]
+
     def __str__(self):
         return f"{self.sender} → {self.recipient}"
\ No newline at end of file
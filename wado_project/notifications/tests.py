@@ -1,3 +1,31 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import ViewPerformanceTestCase
+from .models import Notification
+
+
+class NotificationViewsPerformanceTest(ViewPerformanceTestCase):
+    """Уведомления: число запросов не зависит от количества сообщений"""
+
+    def setUp(self):
+        super().setUp()
+        self.login('commandant')
+
+    def test_list(self):
+        self.assertViewBudget(reverse('notifications:list'), 10)
+
+    def test_sent(self):
+        self.assertViewBudget(reverse('notifications:sent'), 7)
+
+    def test_send_form(self):
+        self.assertViewBudget(reverse('notifications:send'), 7)
+
+    def test_mark_all_read(self):
+        self.assertViewBudget(reverse('notifications:mark_all_read'), 5)
+        user = self.academy.users['commandant']
+        self.assertFalse(Notification.objects.filter(recipient=user, is_read=False).exists())
+
+    def test_clear(self):
+        self.assertViewBudget(reverse('notifications:clear'), 8, method='post', status=302)
+        user = self.academy.users['commandant']
+        self.assertFalse(Notification.objects.filter(recipient=user).exists())
@@ -1,13 +1,39 @@
 # notifications/utils.py
 
 from .models import Notification
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from core.db import use_primary
 
 User = get_user_model()
 
+UNREAD_COUNT_CACHE_KEY = 'unread_notifications:{}'
+
+
 def send_notification(sender, recipient, message):
     Notification.objects.create(
         sender=sender,
         recipient=recipient,
         message=message
-    )
\ No newline at end of file
+    )
+
+
+def get_unread_count(user):
+    """
+    Число непрочитанных уведомлений пользователя (для бейджа в меню).
+    Кэшируется; все записи уведомлений сбрасывают кэш получателя.
+    """
+    key = UNREAD_COUNT_CACHE_KEY.format(user.pk)
+    count = cache.get(key)
+    if count is None:
+        with use_primary():
+            count = Notification.objects.filter(recipient=user, is_read=False).count()
+        cache.set(key, count, getattr(settings, 'USER_ROLE_CACHE_TIMEOUT', 300))
+    return count
+
+
+def reset_unread_count(*user_ids):
+    """Сбросить кэш непрочитанных (после save/update/delete уведомлений)"""
+    cache.delete_many([UNREAD_COUNT_CACHE_KEY.format(user_id) for user_id in user_ids])
@@ -5,6 +5,7 @@ from django.urls import reverse_lazy
 from django.contrib.auth import get_user_model
 from .models import Notification
 from .forms import NotificationForm
+from .utils import reset_unread_count
 from django.shortcuts import redirect
 from django.views.generic import View
 
@@ -18,6 +19,7 @@ def mark_all_read(request):
         recipient=request.user,
         is_read=False
     ).update(is_read=True)
+    reset_unread_count(request.user.pk)
 
     return JsonResponse({'status': 'ok', 'unread_count': 0})
 
@@ -30,16 +32,17 @@ class NotificationListView(TemplateView):
         context = super().get_context_data(**kwargs)
 
         # Получаем все полученные сообщения
-        received = Notification.objects.filter(recipient=self.request.user).order_by('-created_at')
+        received = Notification.objects.filter(recipient=self.request.user).select_related('sender').order_by('-created_at')
 
         # Помечаем непрочитанные как прочитанные
         unread = received.filter(is_read=False)
-        unread.update(is_read=True)
+        if unread.update(is_read=True):
+            reset_unread_count(self.request.user.pk)
 
         # Передаём в шаблон
         context['notifications'] = {
             'received': received,
-            'sent': Notification.objects.filter(sender=self.request.user).order_by('-created_at')
+            'sent': Notification.objects.filter(sender=self.request.user).select_related('recipient').order_by('-created_at')
         }
 
         context['unread_count'] = received.filter(is_read=False).count()  # Всегда 0 после обновления
@@ -68,11 +71,12 @@ class SentNotificationsView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['notifications'] = Notification.objects.filter(sender=self.request.user).order_by('-created_at')
+        context['notifications'] = Notification.objects.filter(sender=self.request.user).select_related('recipient').order_by('-created_at')
         return context
     
 class ClearNotificationsView(View):
     def post(self, request, *args, **kwargs):
         # Очистка всех уведомлений (можно разделить на received/sent при необходимости)
         Notification.objects.filter(recipient=request.user).delete()
+        reset_unread_count(request.user.pk)
         return redirect('notifications:list')
\ No newline at end of file
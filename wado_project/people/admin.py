@@ -5,6 +5,7 @@ from .models import People
 class PeopleAdmin(admin.ModelAdmin):
     list_display = (
         'full_name',
+        'personal_number',
         'faculty',
         'department',
         'rank',
@@ -16,14 +17,14 @@ class PeopleAdmin(admin.ModelAdmin):
         'department',
         'rank',
     )
-    search_fields = ('full_name',)
+    search_fields = ('full_name', 'personal_number')
     list_select_related = ('faculty', 'department', 'rank')
     list_editable = ('workload',)
     date_hierarchy = 'last_duty_date'
     
     fieldsets = (
         (None, {
-            'fields': ('full_name', 'rank')
+            'fields': ('full_name', 'personal_number', 'rank')
         }),
         ('Подразделение', {
             'fields': ('faculty', 'department'),
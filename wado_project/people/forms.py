@@ -29,9 +29,10 @@ class PeopleForm(forms.ModelForm):
 
     class Meta:
         model = People
-        fields = ['full_name', 'rank', 'last_duty_date']
+        fields = ['full_name', 'personal_number', 'rank', 'last_duty_date']
         labels = {
             'full_name': 'Полное имя',
+            'personal_number': 'Личный номер',
             'rank': 'Звание',
             'last_duty_date': 'Дата последнего наряда'
         }
\ No newline at end of file
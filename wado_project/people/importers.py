@@ -0,0 +1,138 @@
+# people/importers.py
+"""Пакетный импорт личного состава (см. core.importing)"""
+from core.importing import BaseImporter, RowError, name_key, normalize, parse_date
+from rank.models import Rank
+from unit.models import Department, Faculty
+from .models import People
+
+
+def people_by_number(numbers, fields=('id', 'personal_number', 'faculty_id', 'department_id')):
+    """Личный номер -> словарь полей человека для номеров numbers одним запросом"""
+    numbers = {number for number in numbers if number}
+    if not numbers:
+        return {}
+    return {
+        row['personal_number']: row
+        for row in People.objects.filter(personal_number__in=numbers).order_by().values(*fields)
+    }
+
+
+def load_person(people, number):
+    person = people.get(number)
+    if person is None:
+        raise RowError(f'Человек с личным номером «{number}» не найден')
+    return person
+
+
+class PeopleImporter(BaseImporter):
+    """
+    Люди по личному номеру: новый номер - создание, известный - обновление
+    (bulk_create(update_conflicts=True) по уникальному personal_number).
+    Звание, факультет и кафедра ищутся по названию; факультет человека кафедры -
+    факультет кафедры. Обновляются только колонки, присутствующие в файле:
+    без колонки кафедры кафедра остаётся прежней и должна относиться к факультету
+    из файла, без колонки факультета он берётся от кафедры или остаётся прежним.
+    Нагрузка не импортируется.
+    """
+
+    columns = {
+        'personal_number': 'Личный номер',
+        'full_name': 'ФИО',
+        'rank': 'Звание',
+        'faculty': 'Факультет',
+        'department': 'Кафедра',
+        'last_duty_date': 'Дата последнего наряда',
+    }
+    required = ('personal_number', 'full_name', 'rank')
+
+    def prepare(self, rows):
+        self.ranks = {name_key(rank.rank): rank for rank in Rank.objects.all()}
+        faculties = list(Faculty.objects.all())
+        self.faculties = {name_key(faculty.name): faculty for faculty in faculties}
+        self.faculties_by_id = {faculty.pk: faculty for faculty in faculties}
+        departments = list(Department.objects.select_related('faculty'))
+        self.departments = {name_key(department.name): department for department in departments}
+        self.departments_by_id = {department.pk: department for department in departments}
+        self.existing = people_by_number(normalize(row.get('personal_number')) for row in rows)
+        self.seen = set()
+
+    def clean_row(self, row):
+        number = normalize(row['personal_number'])
+        if len(number) > People._meta.get_field('personal_number').max_length:
+            raise RowError(f'Слишком длинный личный номер «{number}»')
+        if number in self.seen:
+            raise RowError(f'Личный номер «{number}» повторяется в файле')
+        self.seen.add(number)
+
+        full_name = ' '.join(normalize(row['full_name']).split())
+        if len(full_name) > People._meta.get_field('full_name').max_length:
+            raise RowError('Слишком длинное ФИО')
+
+        rank = self.ranks.get(name_key(row['rank']))
+        if rank is None:
+            raise RowError(f'Неизвестное звание «{normalize(row["rank"])}»')
+
+        faculty, department = self.clean_unit(row, self.existing.get(number))
+
+        person = People(
+            personal_number=number,
+            full_name=full_name,
+            rank=rank,
+            faculty=faculty,
+            department=department,
+            last_duty_date=parse_date(row.get('last_duty_date'), self.columns['last_duty_date']),
+        )
+        return person, number not in self.existing
+
+    def clean_unit(self, row, current):
+        """(факультет, кафедра) строки; отсутствующая в файле колонка берётся у человека current"""
+        faculty = department = None
+        if normalize(row.get('department')):
+            department = self.departments.get(name_key(row['department']))
+            if department is None:
+                raise RowError(f'Неизвестная кафедра «{normalize(row["department"])}»')
+        if normalize(row.get('faculty')):
+            faculty = self.faculties.get(name_key(row['faculty']))
+            if faculty is None:
+                raise RowError(f'Неизвестный факультет «{normalize(row["faculty"])}»')
+
+        if 'department' not in self.present:
+            if 'faculty' not in self.present:
+                return None, None
+            # Кафедра не обновляется: прежняя кафедра человека должна быть на факультете из файла
+            department = self.departments_by_id.get(current['department_id']) if current else None
+            if department is not None and department.faculty_id != getattr(faculty, 'pk', None):
+                raise RowError(
+                    f'Кафедра человека «{department.name}» не относится к факультету '
+                    f'«{normalize(row.get("faculty"))}»'
+                )
+            return faculty, department
+
+        if department is not None:
+            if faculty is not None and department.faculty_id != faculty.pk:
+                raise RowError(f'Кафедра «{department.name}» не относится к факультету «{faculty.name}»')
+            return department.faculty, department
+        if 'faculty' not in self.present and current:
+            # Без кафедры и колонки факультета человек остаётся на прежнем факультете
+            return self.faculties_by_id.get(current['faculty_id']), None
+        return faculty, None
+
+    def get_update_fields(self):
+        fields = ['full_name', 'rank']
+        if {'faculty', 'department'} & self.present:
+            # Факультет следует за кафедрой, поэтому обновляется при любой из двух колонок
+            fields.append('faculty')
+        if 'department' in self.present:
+            fields.append('department')
+        if 'last_duty_date' in self.present:
+            fields.append('last_duty_date')
+        return fields
+
+    def save(self, objects):
+        People.objects.bulk_create(
+            objects,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=['personal_number'],
+            update_fields=self.get_update_fields(),
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='people',
+            name='personal_number',
+            field=models.CharField(blank=True, max_length=20, null=True, unique=True, verbose_name='Личный номер'),
+        ),
+    ]
@@ -5,6 +5,14 @@ from rank.models import Rank
 
 class People(models.Model):
     full_name = models.CharField('ФИО', max_length=100)
+    # Ключ пакетного импорта (people.importers): строка с тем же номером обновляет человека
+    personal_number = models.CharField(
+        'Личный номер',
+        max_length=20,
+        unique=True,
+        null=True,
+        blank=True
+    )
     faculty = models.ForeignKey(
         Faculty,
         verbose_name='Факультет',
@@ -1,3 +1,143 @@
-from django.test import TestCase
+import io
+import math
+import os
+import tempfile
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from core.export import stream_xlsx
+from core.importing import read_table
+from core.testing import SMALL_ACADEMY, ViewPerformanceTestCase
+from .importers import PeopleImporter
+from .models import People
+
+
+class PeopleViewsPerformanceTest(ViewPerformanceTestCase):
+    """Списки и формы личного состава кафедры и управления факультета"""
+
+    def test_department_views(self):
+        self.login('department')
+        person = self.academy.department_people[0]
+        self.assertViewBudget(reverse('department:people:staff'), 9)
+        self.assertViewBudget(reverse('department:people:add'), 8)
+        self.assertViewBudget(reverse('department:people:edit', args=[person.pk]), 9)
+        self.assertViewBudget(reverse('department:people:delete', args=[person.pk]), 7)
+
+    def test_faculty_views(self):
+        self.login('faculty')
+        person = self.academy.management_people[0]
+        self.assertViewBudget(reverse('faculty:people:staff'), 9)
+        self.assertViewBudget(reverse('faculty:people:add'), 8)
+        self.assertViewBudget(reverse('faculty:people:edit', args=[person.pk]), 9)
+        self.assertViewBudget(reverse('faculty:people:delete', args=[person.pk]), 7)
+
+
+class PeopleImportTest(ViewPerformanceTestCase):
+    """Пакетный импорт: справочники загружаются один раз, запись - пакетами, ошибки - по строкам"""
+
+    factory_options = SMALL_ACADEMY
+
+    HEADER = ['Личный номер', 'ФИО', 'Звание', 'Факультет', 'Кафедра', 'Дата последнего наряда']
+
+    def csv_file(self, rows, header=HEADER):
+        lines = [';'.join(header)] + [';'.join(map(str, row)) for row in rows]
+        return io.BytesIO('\n'.join(lines).encode('utf-8-sig'))
+
+    def intake(self, count):
+        department = self.academy.departments[0]
+        rank = self.academy.ranks[0].rank
+        return [(f'Н-{i:05d}', f'Новый курсант {i:05d}', rank, '', department.name, '01.09.2025') for i in range(count)]
+
+    def test_bulk_intake_and_update(self):
+        rows = self.intake(2000)
+        before = People.objects.count()
+        # Звания, факультеты, кафедры, существующие номера, транзакция (2) и пакеты INSERT;
+        # размер пакета ограничен числом параметров запроса бэкенда (у SQLite - 999)
+        fields = [field for field in People._meta.concrete_fields if not field.primary_key]
+        batch_size = min(PeopleImporter.batch_size, connection.ops.bulk_batch_size(fields, rows) or len(rows))
+        with self.assertNumQueries(6 + math.ceil(len(rows) / batch_size)):
+            result = PeopleImporter().run(read_table(self.csv_file(rows), 'intake.csv'))
+        self.assertEqual((result.created, result.updated, result.errors), (2000, 0, []))
+        self.assertEqual(People.objects.count(), before + 2000)
+
+        person = People.objects.select_related('department').get(personal_number='Н-00007')
+        self.assertEqual(person.department, self.academy.departments[0])
+        self.assertEqual(person.faculty_id, self.academy.departments[0].faculty_id)
+
+        rows[7] = ('Н-00007', 'Переименованный курсант', rows[7][2], '', '', '')
+        result = PeopleImporter().run(read_table(self.csv_file(rows[:10]), 'intake.csv'))
+        self.assertEqual((result.created, result.updated), (0, 10))
+        person.refresh_from_db()
+        self.assertEqual(person.full_name, 'Переименованный курсант')
+        self.assertIsNone(person.department_id)
+        self.assertEqual(People.objects.count(), before + 2000)
+
+    def test_row_errors(self):
+        rows = self.intake(3) + [
+            ('Н-00001', 'Повтор', self.academy.ranks[0].rank, '', '', ''),
+            ('Н-00100', 'Без звания', 'Маршал', '', '', ''),
+            ('Н-00101', 'Чужая кафедра', self.academy.ranks[0].rank,
+             self.academy.faculties[1].name, self.academy.departments[0].name, ''),
+            ('', 'Без номера', self.academy.ranks[0].rank, '', '', ''),
+            ('Н-00102', 'Плохая дата', self.academy.ranks[0].rank, '', '', '31.02.2025'),
+        ]
+        result = PeopleImporter(dry_run=True).run(read_table(self.csv_file(rows), 'intake.csv'))
+        self.assertEqual(result.created, 3)
+        self.assertEqual([row for row, _ in result.errors], [5, 6, 7, 8, 9])
+        self.assertFalse(People.objects.filter(personal_number__startswith='Н-').exists())
+
+    def test_partial_unit_columns(self):
+        rank = self.academy.ranks[0].rank
+        department, other = self.academy.departments[0], self.academy.faculties[1]
+        PeopleImporter().run(read_table(self.csv_file(self.intake(2)), 'intake.csv'))
+
+        # Без колонки кафедры кафедра сохраняется, а факультет должен ей соответствовать
+        header = ['Личный номер', 'ФИО', 'Звание', 'Факультет']
+        rows = [('Н-00000', 'Курсант', rank, department.faculty.name), ('Н-00001', 'Курсант', rank, other.name)]
+        result = PeopleImporter().run(read_table(self.csv_file(rows, header), 'intake.csv'))
+        self.assertEqual(result.updated, 1)
+        self.assertEqual([row for row, _ in result.errors], [3])
+        person = People.objects.get(personal_number='Н-00000')
+        self.assertEqual((person.faculty_id, person.department_id), (department.faculty_id, department.pk))
+
+        # Без колонки факультета он берётся от кафедры, а пустая кафедра оставляет прежний факультет
+        header = ['Личный номер', 'ФИО', 'Звание', 'Кафедра']
+        rows = [('Н-00000', 'Курсант', rank, '')]
+        PeopleImporter().run(read_table(self.csv_file(rows, header), 'intake.csv'))
+        person.refresh_from_db()
+        self.assertEqual((person.faculty_id, person.department_id), (department.faculty_id, None))
+
+    def test_encoding_and_line_numbers(self):
+        rank = self.academy.ranks[0].rank
+        text = (
+            ';'.join(self.HEADER) + '\n'
+            f'Н-1;Курсант Первый;{rank};;;\n'
+            '\n;;;;;\n'
+            f'Н-2;Курсант Второй;Маршал;;;\n'
+            f'Н-3;"Курсант\nТретий";{rank};;;\n'
+            f'Н-4;Курсант Четвёртый;{rank};;;31.02.2025\n'
+        )
+        # Excel в русской Windows сохраняет CSV в Windows-1251
+        result = PeopleImporter(dry_run=True).run(read_table(io.BytesIO(text.encode('cp1251')), 'intake.csv'))
+        self.assertEqual(result.created, 2)
+        # Номера строк файла с учётом пустых строк и переноса внутри кавычек
+        self.assertEqual([row for row, _ in result.errors], [5, 8])
+
+        result = PeopleImporter().run(read_table(io.BytesIO(b'\x98\x98;\x98'), 'intake.csv'))
+        self.assertEqual(result.errors, [(1, 'Не удалось прочитать файл: ожидается кодировка UTF-8 или Windows-1251')])
+
+    def test_xlsx_and_command(self):
+        content = b''.join(stream_xlsx([('Люди', self.HEADER, self.intake(5))]))
+        rows = list(read_table(io.BytesIO(content), 'intake.xlsx'))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['ФИО'], 'Новый курсант 00000')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'intake.csv')
+            with open(path, 'wb') as file:
+                file.write(self.csv_file(self.intake(5)).getvalue())
+            out = io.StringIO()
+            call_command('import_data', 'people', path, stdout=out)
+        self.assertIn('создано 5', out.getvalue())
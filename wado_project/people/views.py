@@ -10,14 +10,12 @@ from django.urls import reverse, reverse_lazy
 from django.utils.safestring import mark_safe
 from django.template.loader import render_to_string
 from django.contrib.messages.views import SuccessMessageMixin
-from django.utils import timezone
 from django.core.exceptions import PermissionDenied
 
 from .models import People
 from .forms import PeopleForm
 
 from core.mixins import LoginRequiredMixin
-from missing.models import DepartmentMissing
 
 
 class BasePeopleView:
@@ -43,9 +41,9 @@ class BasePeopleView:
     def get_queryset(self):
         related_type = self.get_related_type()
         if related_type == 'department':
-            return People.objects.filter(department=self.request.user.department)
+            return People.objects.filter(department=self.request.user.department).select_related('rank')
         elif related_type == 'faculty':
-            return People.objects.filter(faculty=self.request.user.faculty, department__isnull=True)
+            return People.objects.filter(faculty=self.request.user.faculty, department__isnull=True).select_related('rank')
         return super().get_queryset()
 
     def get_context_data(self, **kwargs):
@@ -98,19 +96,8 @@ class PeopleListView(BasePeopleView, ListView):
             {'label': 'Нагрузка'},
         ]
 
-        today = timezone.now().date()
         table_items = []
         for idx, person in enumerate(self.object_list, start=1):
-            missing = DepartmentMissing.objects.filter(
-                person=person,
-                start_date__lte=today,
-                end_date__gte=today
-            ).first()
-
-            missing_info = '-'
-            if missing:
-                missing_info = f"{missing.get_reason_display()} ({missing.start_date.strftime('%d.%m')} – {missing.end_date.strftime('%d.%m')})"
-
             edit_url = reverse(f'{current_namespace}:edit', args=[person.pk])
 
             table_items.append({
@@ -4,6 +4,7 @@ from django import forms
 from people.models import People
 from duty.models import Duty
 from .models import DepartmentDutyPermission, FacultyDutyPermission
+from .services import PermissionService
 
 
 class DepartmentPermissionForm(forms.ModelForm):
@@ -32,9 +33,7 @@ class DepartmentPermissionForm(forms.ModelForm):
         person = self.instance
         selected_duties = self.cleaned_data.get('duties', [])
 
-        DepartmentDutyPermission.objects.filter(person=person).delete()
-        for duty in selected_duties:
-            DepartmentDutyPermission.objects.create(person=person, duty=duty)
+        PermissionService('department').set_person_duties(person, {duty.pk for duty in selected_duties})
 
         return person
 
@@ -65,8 +64,6 @@ class FacultyPermissionForm(forms.ModelForm):
         person = self.instance
         selected_duties = self.cleaned_data.get('duties', [])
 
-        FacultyDutyPermission.objects.filter(person=person).delete()
-        for duty in selected_duties:
-            FacultyDutyPermission.objects.create(person=person, duty=duty)
+        PermissionService('faculty').set_person_duties(person, {duty.pk for duty in selected_duties})
 
         return person
\ No newline at end of file
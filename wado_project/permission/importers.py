@@ -0,0 +1,79 @@
+# permission/importers.py
+"""Пакетный импорт допусков к нарядам (см. core.importing)"""
+from collections import defaultdict
+
+from core.importing import BaseImporter, RowError, name_key, normalize
+from duty.models import Duty
+from people.importers import load_person, people_by_number
+from unit.models import Department
+from .models import DepartmentDutyPermission, FacultyDutyPermission
+
+
+class PermissionImporter(BaseImporter):
+    """
+    Допуски по личному номеру и названию наряда. Человек кафедры получает
+    кафедральный допуск, человек управления факультета - факультетский.
+    Наряд ищется среди доступных уровню человека (как в PermissionService.get_duties):
+    наряды своей кафедры, своего факультета без кафедры и комендантские.
+    Существующие допуски пропускаются (bulk_create(ignore_conflicts=True)).
+    """
+
+    columns = {
+        'personal_number': 'Личный номер',
+        'duty': 'Наряд',
+    }
+    required = ('personal_number', 'duty')
+
+    def prepare(self, rows):
+        self.people = people_by_number(normalize(row.get('personal_number')) for row in rows)
+        self.department_faculty = dict(Department.objects.values_list('id', 'faculty_id'))
+
+        self.duties = defaultdict(list)
+        for duty in Duty.objects.values('id', 'duty_name', 'faculty_id', 'department_id', 'is_commandant'):
+            self.duties[name_key(duty['duty_name'])].append(duty)
+
+        person_ids = [person['id'] for person in self.people.values()]
+        self.existing = {
+            model: set(model.objects.filter(person_id__in=person_ids).order_by().values_list('person_id', 'duty_id'))
+            for model in (DepartmentDutyPermission, FacultyDutyPermission)
+        }
+
+    def is_available(self, duty, person):
+        if duty['is_commandant']:
+            return True
+        if person['department_id']:
+            if duty['department_id'] == person['department_id']:
+                return True
+            faculty_id = self.department_faculty.get(person['department_id'])
+        else:
+            faculty_id = person['faculty_id']
+        return bool(faculty_id) and duty['faculty_id'] == faculty_id and duty['department_id'] is None
+
+    def clean_row(self, row):
+        person = load_person(self.people, normalize(row['personal_number']))
+        if person['department_id']:
+            model = DepartmentDutyPermission
+        elif person['faculty_id']:
+            model = FacultyDutyPermission
+        else:
+            raise RowError('Человек не привязан ни к кафедре, ни к факультету')
+
+        name = normalize(row['duty'])
+        duties = [duty for duty in self.duties.get(name_key(name), []) if self.is_available(duty, person)]
+        if not duties:
+            raise RowError(f'Наряд «{name}» не найден среди доступных подразделению человека')
+        if len(duties) > 1:
+            raise RowError(f'Название наряда «{name}» неоднозначно')
+
+        pair = (person['id'], duties[0]['id'])
+        if pair in self.existing[model]:
+            return None, None
+        self.existing[model].add(pair)
+        return model(person_id=pair[0], duty_id=pair[1]), True
+
+    def save(self, objects):
+        by_model = defaultdict(list)
+        for obj in objects:
+            by_model[type(obj)].append(obj)
+        for model, permissions in by_model.items():
+            model.objects.bulk_create(permissions, batch_size=self.batch_size, ignore_conflicts=True)
@@ -0,0 +1,119 @@
+# permission/services.py
+from django.db import transaction
+from django.db.models import Q
+
+from duty.models import Duty
+from people.models import People
+from .models import DepartmentDutyPermission, FacultyDutyPermission
+
+
+def duty_source(duty):
+    """Уровень наряда для подписи в списках допусков"""
+    if duty.is_commandant:
+        return 'комендантский'
+    if duty.department_id:
+        return 'кафедральный'
+    if duty.faculty_id:
+        return 'факультетский'
+    return ''
+
+
+class PermissionService:
+    """
+    Допуски к нарядам на уровне кафедры или факультета.
+
+    Изменения применяются разностью множеств: добавленные допуски пишутся
+    одним bulk_create(ignore_conflicts=True), снятые - одним удалением.
+    Неизменённые допуски не трогаются.
+    """
+
+    MODELS = {
+        'department': DepartmentDutyPermission,
+        'faculty': FacultyDutyPermission,
+    }
+
+    def __init__(self, related_field):
+        try:
+            self.model = self.MODELS[related_field]
+        except KeyError:
+            raise ValueError(f'Неизвестный уровень допусков: {related_field}')
+        self.related_field = related_field
+
+    def get_people(self, user):
+        """Люди, допуски которых редактирует пользователь"""
+        if self.related_field == 'department':
+            return People.objects.filter(department=user.department)
+        return People.objects.filter(faculty=user.faculty, department__isnull=True)
+
+    def get_duties(self, user):
+        """Наряды, к которым пользователь может допускать своих людей"""
+        if self.related_field == 'department':
+            department = user.department
+            duties = Duty.objects.filter(
+                Q(department=department) |  # Кафедральные наряды
+                Q(faculty=department.faculty, department__isnull=True) |  # Факультетские (без кафедры)
+                Q(is_commandant=True)  # Комендантские
+            )
+        else:
+            duties = Duty.objects.filter(
+                Q(faculty=user.faculty, department__isnull=True) |  # Факультетские (без кафедры)
+                Q(is_commandant=True)  # Комендантские
+            )
+        return duties.distinct().order_by('-is_commandant', 'duty_name')
+
+    def get_person_duty_ids(self, person):
+        return set(self.model.objects.filter(person=person).values_list('duty_id', flat=True))
+
+    def get_matrix(self, people_ids, duty_ids):
+        """Множество пар (id человека, id наряда) для сетки people × duties"""
+        return set(self.model.objects.filter(
+            person_id__in=people_ids,
+            duty_id__in=duty_ids,
+        ).values_list('person_id', 'duty_id'))
+
+    def set_person_duties(self, person, duty_ids, scope=None):
+        """
+        Установить допуски человека ровно в duty_ids.
+        scope - ограничить изменения этими нарядами (остальные допуски не трогаются).
+        """
+        person_id = getattr(person, 'pk', person)
+        desired = {(person_id, duty_id) for duty_id in duty_ids}
+        return self._apply(self.model.objects.filter(person_id=person_id), desired, scope)
+
+    def save_matrix(self, people_ids, duty_ids, pairs):
+        """
+        Сохранить сетку допусков people × duties.
+        pairs - выбранные пары (id человека, id наряда); пары вне сетки игнорируются.
+        Число запросов не зависит от размера сетки.
+        """
+        people_ids = set(people_ids)
+        duty_ids = set(duty_ids)
+        desired = {
+            (person_id, duty_id) for person_id, duty_id in pairs
+            if person_id in people_ids and duty_id in duty_ids
+        }
+        return self._apply(self.model.objects.filter(person_id__in=people_ids), desired, duty_ids)
+
+    def _apply(self, queryset, desired, scope=None):
+        if scope is not None:
+            queryset = queryset.filter(duty_id__in=scope)
+            desired = {pair for pair in desired if pair[1] in scope}
+
+        current = {
+            (person_id, duty_id): pk
+            for pk, person_id, duty_id in queryset.values_list('pk', 'person_id', 'duty_id')
+        }
+        to_add = desired - current.keys()
+        to_remove = [pk for pair, pk in current.items() if pair not in desired]
+
+        with transaction.atomic():
+            if to_remove:
+                self.model.objects.filter(pk__in=to_remove).delete()
+            if to_add:
+                self.model.objects.bulk_create(
+                    [self.model(person_id=person_id, duty_id=duty_id) for person_id, duty_id in to_add],
+                    ignore_conflicts=True,
+                    batch_size=1000,
+                )
+
+        return {'added': len(to_add), 'removed': len(to_remove)}
@@ -1,3 +1,123 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.testing import SMALL_ACADEMY, ViewPerformanceTestCase
+from people.models import People
+from .importers import PermissionImporter
+from .models import DepartmentDutyPermission, FacultyDutyPermission
+from .services import PermissionService
+
+
+class PermissionViewsPerformanceTest(ViewPerformanceTestCase):
+    """Списки и редактирование допусков к нарядам"""
+
+    def test_department_views(self):
+        self.login('department')
+        person = self.academy.department_people[0]
+        self.assertViewBudget(reverse('department:permission:department_list'), 9)
+        self.assertViewBudget(reverse('department:permission:department_edit', args=[person.pk]), 15)
+
+    def test_faculty_views(self):
+        self.login('faculty')
+        person = self.academy.management_people[0]
+        self.assertViewBudget(reverse('faculty:permission:faculty_list'), 9)
+        self.assertViewBudget(reverse('faculty:permission:faculty_edit', args=[person.pk]), 12)
+
+
+class PermissionMatrixTest(ViewPerformanceTestCase):
+    """Сохранение сетки допусков разностью множеств"""
+
+    factory_options = SMALL_ACADEMY
+
+    def test_matrix_page(self):
+        self.login('department')
+        self.assertViewBudget(reverse('department:permission:department_matrix'), 10)
+
+    def test_save_matrix_constant_queries(self):
+        self.login('department')
+        department = self.academy.departments[0]
+        people = list(People.objects.filter(department=department).values_list('pk', flat=True))
+        duties = [duty.pk for duty in self.academy.commandant_duties]
+
+        # Полностью инвертируем сетку комендантских нарядов
+        current = set(DepartmentDutyPermission.objects.filter(
+            person_id__in=people, duty_id__in=duties
+        ).values_list('person_id', 'duty_id'))
+        inverted = {(person, duty) for person in people for duty in duties} - current
+
+        self.assertViewBudget(
+            reverse('department:permission:department_matrix'), 14, method='post', status=302,
+            data={'permissions': [f'{person}:{duty}' for person, duty in inverted]},
+        )
+        self.assertEqual(set(DepartmentDutyPermission.objects.filter(
+            person_id__in=people, duty_id__in=duties
+        ).values_list('person_id', 'duty_id')), inverted)
+
+    def test_faculty_matrix_page(self):
+        self.login('faculty')
+        self.assertViewBudget(reverse('faculty:permission:faculty_matrix'), 9)
+
+    def test_save_faculty_matrix_constant_queries(self):
+        self.login('faculty')
+        faculty = self.academy.faculties[0]
+        people = list(People.objects.filter(faculty=faculty, department__isnull=True).values_list('pk', flat=True))
+        duties = [duty.pk for duty in self.academy.commandant_duties]
+
+        # Полностью инвертируем сетку комендантских нарядов управления факультета
+        current = set(FacultyDutyPermission.objects.filter(
+            person_id__in=people, duty_id__in=duties
+        ).values_list('person_id', 'duty_id'))
+        inverted = {(person, duty) for person in people for duty in duties} - current
+
+        self.assertViewBudget(
+            reverse('faculty:permission:faculty_matrix'), 13, method='post', status=302,
+            data={'permissions': [f'{person}:{duty}' for person, duty in inverted]},
+        )
+        self.assertEqual(set(FacultyDutyPermission.objects.filter(
+            person_id__in=people, duty_id__in=duties
+        ).values_list('person_id', 'duty_id')), inverted)
+
+    def test_person_diff(self):
+        service = PermissionService('department')
+        person = self.academy.department_people[0]
+        before = service.get_person_duty_ids(person)
+        keep = next(iter(before))
+        added = self.academy.commandant_duties[-1].pk if self.academy.commandant_duties[-1].pk not in before else None
+        target = {keep} | ({added} if added else set())
+
+        with self.assertNumQueries(5):  # выборка, savepoint, delete, insert, release
+            result = service.set_person_duties(person, target)
+        self.assertEqual(service.get_person_duty_ids(person), target)
+        self.assertEqual(result['removed'], len(before - target))
+
+
+class PermissionImportTest(ViewPerformanceTestCase):
+    """Импорт допусков: наряд ищется среди доступных подразделению человека"""
+
+    factory_options = SMALL_ACADEMY
+
+    def test_import(self):
+        department_person = self.academy.department_people[0]
+        management_person = self.academy.management_people[0]
+        department_person.personal_number, management_person.personal_number = 'Д-1', 'Ф-1'
+        People.objects.bulk_update([department_person, management_person], ['personal_number'])
+        DepartmentDutyPermission.objects.filter(person=department_person).delete()
+        FacultyDutyPermission.objects.filter(person=management_person).delete()
+
+        other_department = next(d for d in self.academy.departments if d != department_person.department)
+        rows = [
+            {'Личный номер': 'Д-1', 'Наряд': 'наряд  1'},
+            {'Личный номер': 'Д-1', 'Наряд': f'Кафедральный {department_person.department.name}'},
+            {'Личный номер': 'Д-1', 'Наряд': 'Наряд 1'},
+            {'Личный номер': 'Д-1', 'Наряд': f'Кафедральный {other_department.name}'},
+            {'Личный номер': 'Ф-1', 'Наряд': f'Факультетский {management_person.faculty.name}'},
+            {'Личный номер': 'Х-1', 'Наряд': 'Наряд 1'},
+        ]
+        result = PermissionImporter().run(rows)
+        self.assertEqual((result.created, result.skipped), (3, 1))
+        self.assertEqual([row for row, _ in result.errors], [5, 7])
+        self.assertEqual(DepartmentDutyPermission.objects.filter(person=department_person).count(), 2)
+        self.assertEqual(FacultyDutyPermission.objects.filter(person=management_person).count(), 1)
+
+        # Повторный импорт ничего не создаёт
+        result = PermissionImporter().run(rows)
+        self.assertEqual((result.created, result.skipped), (0, 4))
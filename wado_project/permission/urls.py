@@ -9,8 +9,10 @@ urlpatterns = [
     # Кафедра
     path('', views.DepartmentPermissionListView.as_view(), name='department_list'),
     path('edit/<int:pk>/', views.DepartmentPermissionEditView.as_view(), name='department_edit'),
+    path('matrix/', views.DepartmentPermissionMatrixView.as_view(), name='department_matrix'),
 
     # Факультет
     path('faculty/', views.FacultyPermissionListView.as_view(), name='faculty_list'),
     path('faculty/edit/<int:pk>/', views.FacultyPermissionEditView.as_view(), name='faculty_edit'),
+    path('faculty/matrix/', views.FacultyPermissionMatrixView.as_view(), name='faculty_matrix'),
 ]
\ No newline at end of file
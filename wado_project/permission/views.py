@@ -1,14 +1,17 @@
 # permission/views.py
 
-from django.views.generic import ListView, UpdateView
+from django.contrib import messages
+from django.db.models import Prefetch
+from django.shortcuts import redirect
+from django.views.generic import ListView, TemplateView, UpdateView
 from django.urls import reverse, reverse_lazy
 from django.contrib.messages.views import SuccessMessageMixin
 
 from core.mixins import HasDepartmentMixin, HasFacultyMixin
 from people.models import People
-from duty.models import Duty
 from .models import DepartmentDutyPermission, FacultyDutyPermission
 from .forms import DepartmentPermissionForm, FacultyPermissionForm
+from .services import PermissionService, duty_source
 
 
 class BasePermissionView:
@@ -25,9 +28,13 @@ class BasePermissionView:
 
     def get_queryset(self):
         if self.related_field == 'department':
-            return People.objects.filter(department=self.request.user.department).prefetch_related('department_duty_permissions')
+            return People.objects.filter(department=self.request.user.department).select_related('rank').prefetch_related(
+                Prefetch('department_duty_permissions', queryset=DepartmentDutyPermission.objects.select_related('duty'))
+            )
         elif self.related_field == 'faculty':
-            return People.objects.filter(faculty=self.request.user.faculty, department__isnull=True).prefetch_related('faculty_duty_permissions')
+            return People.objects.filter(faculty=self.request.user.faculty, department__isnull=True).select_related('rank').prefetch_related(
+                Prefetch('faculty_duty_permissions', queryset=FacultyDutyPermission.objects.select_related('duty'))
+            )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -82,11 +89,11 @@ class PermissionListView(BasePermissionView, ListView):
             })
 
         add_url = reverse(f'{self.namespace}:people:add')  # убедись, что такой маршрут есть
-        print(self.namespace)
 
         context.update({
             'staff_list': staff_list,
             'add_url': add_url,
+            'matrix_url': reverse(f'{self.namespace}:permission:{self.related_field}_matrix'),
         })
 
         return context
@@ -114,50 +121,18 @@ class BasePersonPermissionEditView(SuccessMessageMixin, UpdateView):
         context = super().get_context_data(**kwargs)
         person = self.object
 
-        if self.related_field == 'department':
-            current_permissions = list(DepartmentDutyPermission.objects.filter(
-                person=person
-            ).values_list('duty_id', flat=True))
-        elif self.related_field == 'faculty':
-            current_permissions = list(FacultyDutyPermission.objects.filter(
-                person=person
-            ).values_list('duty_id', flat=True))
-
-        # Определяем нужные фильтры
-        duty_queryset = Duty.objects.none()  # Начинаем с пустого queryset'а
-        from django.db.models import Q
-
-        if self.related_field == 'department':
-            department = self.request.user.department
-            faculty = department.faculty
-
-            duty_queryset = Duty.objects.filter(
-                Q(department=department) |  # Кафедральные наряды
-                Q(faculty=faculty, department__isnull=True) |  # Факультетские (без кафедры)
-                Q(is_commandant=True)  # Комендантские
-            )
-
-        elif self.related_field == 'faculty':
-            faculty = self.request.user.faculty
-
-            duty_queryset = Duty.objects.filter(
-                Q(faculty=faculty, department__isnull=True) |  # Факультетские (без кафедры)
-                Q(is_commandant=True)  # Комендантские
-            )
+        service = PermissionService(self.related_field)
+        current_permissions = service.get_person_duty_ids(person)
 
         # Формируем список чекбоксов
         duty_checkboxes = []
-        for duty in duty_queryset.distinct():
+        for duty in service.get_duties(self.request.user):
             duty_checkboxes.append({
                 'id': duty.id,
                 'name': duty.duty_name,
                 'checked': 'checked' if duty.id in current_permissions else '',
                 'weight': duty.duty_weight,
-                'source': 'комендантский' if duty.is_commandant else (
-                    'факультетский' if duty.faculty and not duty.department else (
-                        'кафедральный' if duty.department else ''
-                    )
-                )
+                'source': duty_source(duty),
             })
 
         context.update({
@@ -169,6 +144,70 @@ class BasePersonPermissionEditView(SuccessMessageMixin, UpdateView):
         })
         return context
 
+class BasePermissionMatrixView(TemplateView):
+    """
+    Сетка допусков: все люди подразделения × доступные наряды.
+    Сохранение всей сетки - фиксированное число запросов (PermissionService.save_matrix).
+    """
+    template_name = 'profiles/shared/permission/_matrix.html'
+    namespace = None
+    related_field = None
+
+    def get_service(self):
+        return PermissionService(self.related_field)
+
+    def get_grid(self, service):
+        people = list(service.get_people(self.request.user).select_related('rank'))
+        duties = list(service.get_duties(self.request.user))
+        return people, duties
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        service = self.get_service()
+        people, duties = self.get_grid(service)
+        checked = service.get_matrix([person.pk for person in people], [duty.pk for duty in duties])
+
+        rows = []
+        for person in people:
+            rows.append({
+                'person': person,
+                'cells': [
+                    {'value': f'{person.pk}:{duty.pk}', 'checked': (person.pk, duty.pk) in checked}
+                    for duty in duties
+                ],
+            })
+
+        if self.related_field == 'department':
+            object_name = self.request.user.department.name
+        else:
+            object_name = self.request.user.faculty.name
+
+        context.update({
+            'duties': [{'name': duty.duty_name, 'source': duty_source(duty)} for duty in duties],
+            'rows': rows,
+            'namespace': self.namespace,
+            'related_type': self.related_field,
+            'object_name': object_name,
+            'cancel_url': reverse(f'{self.namespace}:permission:{self.related_field}_list'),
+        })
+        return context
+
+    def post(self, request, *args, **kwargs):
+        service = self.get_service()
+        people_ids = service.get_people(request.user).values_list('pk', flat=True)
+        duty_ids = service.get_duties(request.user).values_list('pk', flat=True)
+
+        pairs = set()
+        for value in request.POST.getlist('permissions'):
+            person_id, _, duty_id = value.partition(':')
+            if person_id.isdigit() and duty_id.isdigit():
+                pairs.add((int(person_id), int(duty_id)))
+
+        result = service.save_matrix(people_ids, duty_ids, pairs)
+        messages.success(request, f"Допуски сохранены: добавлено {result['added']}, снято {result['removed']}")
+        return redirect(f'{self.namespace}:permission:{self.related_field}_list')
+
+
 # === Для кафедры ===
 class DepartmentPermissionListView(HasDepartmentMixin, PermissionListView):
     namespace = 'department'
@@ -182,6 +221,11 @@ class DepartmentPermissionEditView(HasDepartmentMixin, BasePersonPermissionEditV
     related_field = 'department'
 
 
+class DepartmentPermissionMatrixView(HasDepartmentMixin, BasePermissionMatrixView):
+    namespace = 'department'
+    related_field = 'department'
+
+
 # === Для факультета ===
 class FacultyPermissionListView(HasFacultyMixin, PermissionListView):
     namespace = 'faculty'
@@ -192,4 +236,9 @@ class FacultyPermissionEditView(HasFacultyMixin, BasePersonPermissionEditView):
     form_class = FacultyPermissionForm
     success_message = 'Допуски факультета успешно обновлены'
     namespace = 'faculty'
-    related_field = 'faculty'
\ No newline at end of file
+    related_field = 'faculty'
+
+
+class FacultyPermissionMatrixView(HasFacultyMixin, BasePermissionMatrixView):
+    namespace = 'faculty'
+    related_field = 'faculty'
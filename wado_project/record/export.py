@@ -0,0 +1,27 @@
+# record/export.py
+"""Выгрузка поимённого распределения (DutyRecord) по листам факультетов (см. duty.export)"""
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from duty.export import chunk_size, faculty_sheets
+from .models import DutyRecord
+
+
+ROSTER_HEADER = ['Дата', 'Наряд', 'ФИО', 'Звание', 'Кафедра', 'Нагрузка']
+
+
+def roster_rows(start, end, queryset=None):
+    """Записи за [start, end): факультет листа (факультет человека или его кафедры), затем ROSTER_HEADER"""
+    queryset = queryset if queryset is not None else DutyRecord.objects.all()
+    return queryset.filter(date__gte=start, date__lt=end).annotate(
+        sheet_faculty=Coalesce('person__faculty__name', 'person__department__faculty__name'),
+    ).order_by(
+        F('sheet_faculty').asc(nulls_last=True), 'date', 'duty__duty_name', 'person__full_name',
+    ).values_list(
+        'sheet_faculty', 'date', 'duty__duty_name', 'person__full_name', 'person__rank__rank',
+        'person__department__name', 'person__workload',
+    ).iterator(chunk_size=chunk_size())
+
+
+def roster_sheets(start, end, queryset=None):
+    return faculty_sheets(roster_rows(start, end, queryset), ROSTER_HEADER)
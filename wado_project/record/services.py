@@ -0,0 +1,165 @@
+# record/services.py
+import calendar
+import heapq
+import logging
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+
+from duty.models import DutySchedule
+from missing.services import AbsenceIndex
+from people.models import People
+from .models import DutyRecord
+
+
+logger = logging.getLogger(__name__)
+
+
+class RosterService:
+    """
+    Поимённое распределение нарядов: каждая запись DutySchedule месяца
+    разворачивается в people_count записей DutyRecord.
+
+    Кандидат должен состоять в назначенном подразделении, иметь допуск к наряду
+    (кафедральный или факультетский) и не иметь освобождения на дату.
+    Среди кандидатов выбираются люди с наименьшей взвешенной нагрузкой; тем, кто
+    отдыхал меньше DUTY_MIN_REST_DAYS дней, наряд даётся в последнюю очередь.
+
+    Все справочники загружаются заранее фиксированным числом запросов,
+    записи и обновления нагрузки пишутся пакетно.
+    """
+
+    def __init__(self, month, min_rest_days=None):
+        self.year = month.year
+        self.month_num = month.month
+        self.month_start = date(self.year, self.month_num, 1)
+        self.month_end = date(self.year, self.month_num, calendar.monthrange(self.year, self.month_num)[1])
+        if min_rest_days is None:
+            min_rest_days = getattr(settings, 'DUTY_MIN_REST_DAYS', 2)
+        self.min_rest_days = min_rest_days
+
+    def get_schedules(self):
+        return list(DutySchedule.objects.filter(
+            date__gte=self.month_start,
+            date__lte=self.month_end,
+        ).select_related('duty').order_by('date', 'time_start', 'duty_id'))
+
+    def build_index(self, duty_ids):
+        """
+        Индекс для распределения:
+        - people: id человека -> People (только нужные поля);
+        - absences: AbsenceIndex освобождений за месяц с составом подразделений
+          и допусками к нарядам duty_ids (см. AbsenceIndex.available_people).
+        """
+        people = {
+            person.id: person
+            for person in People.objects.only(
+                'id', 'faculty_id', 'department_id', 'department__faculty_id', 'workload', 'last_duty_date'
+            ).select_related('department')
+        }
+        absences = AbsenceIndex.load(self.month_start, self.month_end)
+        absences.load_units(people.values(), duty_ids)
+        return people, absences
+
+    @staticmethod
+    def schedule_unit_id(schedule):
+        if schedule.assigned_faculty_id:
+            return f"faculty_{schedule.assigned_faculty_id}"
+        if schedule.assigned_department_id:
+            return f"department_{schedule.assigned_department_id}"
+        return None
+
+    def generate(self):
+        """
+        Пересоздать поимённое распределение на месяц.
+        Возвращает dict: records - создано записей, people - обновлено людей,
+        shortages - список нехваток людей по нарядам.
+        """
+        schedules = self.get_schedules()
+        duty_ids = {schedule.duty_id for schedule in schedules}
+        people, absences = self.build_index(duty_ids)
+
+        with transaction.atomic():
+            # Снимаем нагрузку прежнего распределения за месяц - в том числе по нарядам,
+            # которых больше нет в графике
+            old_records = DutyRecord.objects.filter(
+                date__gte=self.month_start,
+                date__lte=self.month_end,
+            )
+            touched = set()
+            for person_id, weight in old_records.values_list('person_id', 'duty__duty_weight'):
+                person = people.get(person_id)
+                if person is not None:
+                    person.workload = max((person.workload or 0) - (weight or 0), 0)
+                    touched.add(person_id)
+            old_records.delete()
+
+            # Дата последнего наряда до месяца учитывается при отдыхе,
+            # дата внутри месяца относится к прежнему распределению и пересчитывается
+            last_duty = {}
+            for person in people.values():
+                last = person.last_duty_date
+                if last and last < self.month_start:
+                    last_duty[person.id] = last
+                elif last and last <= self.month_end:
+                    touched.add(person.id)
+
+            records = []
+            shortages = []
+            busy = defaultdict(set)  # дата -> люди, уже стоящие в наряде
+
+            for schedule in schedules:
+                duty = schedule.duty
+                needed = duty.people_count or 1
+                unit_id = self.schedule_unit_id(schedule)
+                day = schedule.date
+
+                # Наряд без назначенного подразделения распределить некому - он уходит в нехватки
+                candidates = [
+                    person_id for person_id in absences.available_people(day, unit_id, duty.id)
+                    if person_id not in busy[day]
+                ] if unit_id else []
+
+                def priority(person_id):
+                    last = last_duty.get(person_id)
+                    tired = last is not None and (day - last).days < self.min_rest_days
+                    return (tired, people[person_id].workload or 0, last or date.min, person_id)
+
+                chosen = heapq.nsmallest(needed, candidates, key=priority)
+                if len(chosen) < needed:
+                    shortages.append({
+                        'date': day.isoformat(),
+                        'duty': duty.duty_name,
+                        'unit': unit_id,
+                        'needed': needed,
+                        'assigned': len(chosen),
+                    })
+
+                for person_id in chosen:
+                    records.append(DutyRecord(duty=duty, date=day, person_id=person_id))
+                    busy[day].add(person_id)
+                    person = people[person_id]
+                    person.workload = (person.workload or 0) + (duty.duty_weight or 0)
+                    last_duty[person_id] = day
+                    touched.add(person_id)
+
+            DutyRecord.objects.bulk_create(records, batch_size=1000)
+
+            updated = []
+            for person_id in touched:
+                person = people[person_id]
+                original_last = person.last_duty_date
+                if original_last and original_last > self.month_end:
+                    new_last = original_last
+                else:
+                    new_last = last_duty.get(person_id)
+                person.last_duty_date = new_last
+                updated.append(person)
+            People.objects.bulk_update(updated, ['workload', 'last_duty_date'], batch_size=1000)
+
+        if shortages:
+            logger.warning('Поимённое распределение %s: не хватает людей в %s нарядах',
+                           self.month_start.strftime('%m.%Y'), len(shortages))
+        return {'records': len(records), 'people': len(updated), 'shortages': shortages}
@@ -1,3 +1,116 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
 from django.test import TestCase
 
-# Create your tests here.
+from duty.models import Duty, DutySchedule
+from missing.models import DepartmentMissing
+from people.models import People
+from permission.models import DepartmentDutyPermission
+from rank.models import Rank
+from unit.models import Department, Faculty
+from .models import DutyRecord
+from .services import RosterService
+
+
+class RosterServiceTest(TestCase):
+    """Поимённое распределение: допуски, освобождения, выравнивание нагрузки и отдых"""
+
+    MONTH = date(2025, 3, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        rank = Rank.objects.create(rank='Капитан')
+        faculty = Faculty.objects.create(name='Ф1')
+        cls.department = Department.objects.create(name='К1', faculty=faculty)
+        other = Department.objects.create(name='К2', faculty=faculty)
+        cls.people = [
+            People.objects.create(full_name=f'Сотрудник {i}', department=cls.department, faculty=faculty, rank=rank)
+            for i in range(4)
+        ]
+        # Чужая кафедра с допуском - в наряд кафедры К1 не попадает
+        cls.outsider = People.objects.create(full_name='Сотрудник К2', department=other, faculty=faculty, rank=rank)
+        cls.duty = Duty.objects.create(duty_name='Дежурный', duty_weight=2, is_commandant=True)
+        cls.second_duty = Duty.objects.create(duty_name='Помощник', duty_weight=1, is_commandant=True)
+        # Последний человек кафедры допуска не имеет
+        DepartmentDutyPermission.objects.bulk_create([
+            DepartmentDutyPermission(person=person, duty=duty)
+            for person in cls.people[:3] + [cls.outsider]
+            for duty in (cls.duty, cls.second_duty)
+        ])
+
+    def schedule(self, duty, days):
+        DutySchedule.objects.bulk_create([
+            DutySchedule(duty=duty, date=self.MONTH + timedelta(days=day), assigned_department=self.department)
+            for day in days
+        ])
+
+    def generate(self, **kwargs):
+        return RosterService(self.MONTH, **kwargs).generate()
+
+    def person_dates(self):
+        dates = defaultdict(list)
+        for person_id, day in DutyRecord.objects.order_by('date').values_list('person_id', 'date'):
+            dates[person_id].append(day)
+        return dates
+
+    def test_only_permitted_unit_people(self):
+        self.schedule(self.duty, range(0, 30, 2))
+        result = self.generate()
+        self.assertEqual(result['records'], 15)
+        self.assertEqual(result['shortages'], [])
+        permitted = {person.pk for person in self.people[:3]}
+        self.assertLessEqual(set(self.person_dates()), permitted)
+
+    def test_absent_people_skipped(self):
+        absent = self.people[0]
+        DepartmentMissing.objects.create(
+            person=absent, start_date=self.MONTH, end_date=self.MONTH + timedelta(days=9),
+        )
+        self.schedule(self.duty, range(0, 20))
+        self.generate(min_rest_days=0)
+        self.assertTrue(all(day >= self.MONTH + timedelta(days=10) for day in self.person_dates()[absent.pk]))
+
+        # Освобождены все допущенные - наряд попадает в нехватки
+        DepartmentMissing.objects.bulk_create([
+            DepartmentMissing(person=person, start_date=self.MONTH, end_date=self.MONTH)
+            for person in self.people[1:3]
+        ])
+        with self.assertLogs('record.services', 'WARNING'):
+            shortages = self.generate(min_rest_days=0)['shortages']
+        self.assertEqual([shortage['date'] for shortage in shortages], [self.MONTH.isoformat()])
+
+    def test_workload_balanced(self):
+        People.objects.filter(pk=self.people[0].pk).update(workload=6)
+        self.schedule(self.duty, range(0, 30, 3))
+        self.generate()
+        workloads = dict(People.objects.filter(pk__in=[person.pk for person in self.people[:3]])
+                         .values_list('pk', 'workload'))
+        # Начальная разница в 6 выравнивается нарядами весом 2
+        self.assertLessEqual(max(workloads.values()) - min(workloads.values()), self.duty.duty_weight)
+        self.assertEqual(sum(workloads.values()), 6 + 10 * self.duty.duty_weight)
+
+    def test_min_rest_gap(self):
+        # У остальных нагрузка выше - без правила отдыха первый стоял бы в наряде каждый день
+        People.objects.filter(pk__in=[person.pk for person in self.people[1:3]]).update(workload=20)
+        self.schedule(self.duty, range(0, 10))
+        self.generate(min_rest_days=2)
+        for dates in self.person_dates().values():
+            gaps = [(later - earlier).days for earlier, later in zip(dates, dates[1:])]
+            self.assertTrue(all(gap >= 2 for gap in gaps), gaps)
+
+        self.generate(min_rest_days=0)
+        self.assertEqual(len(self.person_dates()[self.people[0].pk]), 10)
+
+    def test_regenerate_drops_removed_duty(self):
+        self.schedule(self.duty, range(0, 10))
+        self.schedule(self.second_duty, range(0, 10))
+        self.generate()
+        self.assertEqual(DutyRecord.objects.count(), 20)
+
+        # Наряд убран из графика - его записи и нагрузка снимаются при повторном распределении
+        DutySchedule.objects.filter(duty=self.second_duty).delete()
+        self.generate()
+        self.assertFalse(DutyRecord.objects.filter(duty=self.second_duty).exists())
+        total = sum(People.objects.values_list('workload', flat=True))
+        self.assertEqual(total, 10 * self.duty.duty_weight)
@@ -0,0 +1,314 @@
+# research/services.py
+"""
+Анализ эффективности плана: моделирование по сценарию (research.simulation),
+статистика результатов (research.stats) и сохранение отчёта.
+
+    report = create_report(plan, scenario)
+"""
+import json
+
+import numpy as np
+
+from . import stats
+from .models import EffectivenessReport
+from .simulation import MonteCarloEngine
+
+
+def create_report(plan, scenario, progress=None):
+    """Моделирование и сохранение отчёта; progress(percent, message) - необязательный отчёт о ходе расчёта"""
+    # Генерация детальных результатов с полной статистикой
+    analysis_result = generate_detailed_results(plan, scenario, progress)
+    if progress is not None:
+        progress(95, 'Сохранение отчёта')
+
+    # Создаём отчёт
+    return EffectivenessReport.objects.create(
+        plan=plan,
+        scenario=scenario,
+        # Основные показатели
+        p_dc_v1_mean=analysis_result['v1']['p_mean'],
+        p_guaranteed_v1=analysis_result['v1']['p_guaranteed'],
+        p_dc_v2_mean=analysis_result['v2']['p_mean'],
+        p_guaranteed_v2=analysis_result['v2']['p_guaranteed'],
+
+        # Детальная статистика V1
+        median_v1=analysis_result['v1']['stats']['median'],
+        std_v1=analysis_result['v1']['stats']['std'],
+        min_v1=analysis_result['v1']['stats']['min'],
+        max_v1=analysis_result['v1']['stats']['max'],
+        cv_v1=analysis_result['v1']['stats']['cv'],
+        skewness_v1=analysis_result['v1']['stats']['skewness'],
+        kurtosis_v1=analysis_result['v1']['stats']['kurtosis'],
+
+        # Детальная статистика V2
+        median_v2=analysis_result['v2']['stats']['median'],
+        std_v2=analysis_result['v2']['stats']['std'],
+        min_v2=analysis_result['v2']['stats']['min'],
+        max_v2=analysis_result['v2']['stats']['max'],
+        cv_v2=analysis_result['v2']['stats']['cv'],
+        skewness_v2=analysis_result['v2']['stats']['skewness'],
+        kurtosis_v2=analysis_result['v2']['stats']['kurtosis'],
+
+        # Корреляционный анализ
+        correlation_pearson=analysis_result['correlation']['pearson'],
+        correlation_spearman=analysis_result['correlation']['spearman'],
+        r_squared=analysis_result['correlation']['r_squared'],
+        regression_slope=analysis_result['correlation']['regression']['slope'],
+        regression_intercept=analysis_result['correlation']['regression']['intercept'],
+
+        # Статистические тесты
+        t_statistic=analysis_result['statistical_tests']['t_statistic'],
+        p_value=analysis_result['statistical_tests']['p_value'],
+        degrees_of_freedom=analysis_result['statistical_tests']['degrees_of_freedom'],
+        ks_statistic=analysis_result['statistical_tests']['ks_statistic'],
+        ks_p_value=analysis_result['statistical_tests']['ks_p_value'],
+
+        # Доверительные интервалы
+        ci_v1_lower=analysis_result['confidence_intervals']['v1'][0],
+        ci_v1_upper=analysis_result['confidence_intervals']['v1'][1],
+        ci_v2_lower=analysis_result['confidence_intervals']['v2'][0],
+        ci_v2_upper=analysis_result['confidence_intervals']['v2'][1],
+
+        # Сырые данные и метаинформация
+        raw_data_v1=json.dumps(analysis_result['v1']['p_values'][:10]),
+        raw_data_v2=json.dumps(analysis_result['v2']['p_values'][:10]),
+        execution_time=analysis_result['execution_time'],
+        total_simulations=analysis_result['total_simulations'],
+
+        # Анализ показателей качества
+        metrics_breakdown=json.dumps(analysis_result['metrics_breakdown']),
+        conclusion=generate_conclusion(analysis_result),
+        recommendations=generate_recommendations(analysis_result),
+
+        # Данные для графиков
+        graph_data=json.dumps({
+            'histogram_v1': analysis_result['histogram_data']['v1'],
+            'histogram_v2': analysis_result['histogram_data']['v2'],
+            'cdf_data': analysis_result['cdf_data'],
+            'scatter_data': analysis_result['scatter_data'],
+            'radar_data': analysis_result['radar_data'],
+            'simulation': analysis_result['simulation']
+        })
+    )
+
+
+def generate_detailed_results(plan, scenario, progress=None):
+    """Моделирование плана по сценарию (research.simulation) и полная статистика результатов"""
+
+    # Моделирование - до 90% прогресса задачи, остальное - статистика и отчёт
+    simulation_progress = None
+    if progress is not None:
+        simulation_progress = lambda percent, message=None: progress(percent * 0.9, message)
+    simulation = MonteCarloEngine.from_scenario(plan, scenario).run(simulation_progress)
+
+    # Вероятности выполнения требований по сценариям для V1 и V2
+    v1_data = simulation['v1']['p']
+    v2_data = simulation['v2']['p']
+
+    # Расчёт статистики (векторизованно, research.stats)
+    stats_v1 = stats.describe(v1_data)
+    stats_v2 = stats.describe(v2_data)
+
+    # Корреляционный анализ
+    corr_pearson = stats.pearson(v1_data, v2_data)
+    corr_spearman = stats.spearman(v1_data, v2_data)
+
+    # Линейная регрессия
+    regression = stats.linear_regression(v1_data, v2_data)
+    slope, intercept, r_squared = regression['slope'], regression['intercept'], regression['r_squared']
+
+    # T-тест
+    t_stat, p_value, degrees_of_freedom = stats.t_test(v1_data, v2_data)
+
+    # Тест Колмогорова-Смирнова (O(n log n))
+    ks_stat, ks_p = stats.ks_test(v1_data, v2_data)
+
+    # Доверительные интервалы (95%)
+    ci_v1 = stats.confidence_interval(v1_data)
+    ci_v2 = stats.confidence_interval(v2_data)
+
+    # Данные для гистограмм
+    hist_bins = [i * 0.05 for i in range(21)]
+    hist_v1 = stats.histogram(v1_data, hist_bins)
+    hist_v2 = stats.histogram(v2_data, hist_bins)
+
+    # Данные для CDF
+    x_cdf = [i * 0.01 for i in range(101)]
+    cdf_v1 = stats.ecdf(v1_data, x_cdf)
+    cdf_v2 = stats.ecdf(v2_data, x_cdf)
+
+    # Данные для диаграммы рассеяния
+    rng = np.random.default_rng(scenario.pk)
+    indices = rng.choice(len(v1_data), size=min(50, len(v1_data)), replace=False)
+    scatter_data = [{'x': float(v1_data[i]), 'y': float(v2_data[i])} for i in indices]
+
+    # Данные для радарной диаграммы: доля прогонов, выполнивших каждое требование
+    radar_labels = ['ŷ₁: Корректность', 'ŷ₂: Срочность', 'ŷ₃: Перегруз', 
+                   'ŷ₄: Перерасход', 'ŷ₅: Задержка']
+    radar_v1 = [float(metric['success_rate'][0]) for metric in simulation['metrics']]
+    radar_v2 = [float(metric['success_rate'][1]) for metric in simulation['metrics']]
+
+    # Анализ показателей качества детализированной модели
+    metrics_breakdown = [
+        {
+            'name': metric['name'],
+            'mean_value': round(float(metric['mean'][1]), 3),
+            'success_rate': round(float(metric['success_rate'][1]), 3),
+            'contribution': round(float(metric['success_rate'][1]) * 20, 1)
+        }
+        for metric in simulation['metrics']
+    ]
+
+    # Гарантируемая вероятность
+    index = int((1 - scenario.guarantee_level) * len(v1_data))
+    index = max(0, min(index, len(v1_data) - 1))
+    v1_sorted = np.sort(v1_data)
+    v2_sorted = np.sort(v2_data)
+
+    return {
+        'v1': {
+            'p_mean': round(float(stats_v1['mean']), 3),
+            'p_guaranteed': round(float(v1_sorted[index]), 3),
+            'p_values': [round(float(x), 3) for x in v1_data[:20]],
+            'stats': {k: round(float(v), 3) for k, v in stats_v1.items()}
+        },
+        'v2': {
+            'p_mean': round(float(stats_v2['mean']), 3),
+            'p_guaranteed': round(float(v2_sorted[index]), 3),
+            'p_values': [round(float(x), 3) for x in v2_data[:20]],
+            'stats': {k: round(float(v), 3) for k, v in stats_v2.items()}
+        },
+        'correlation': {
+            'pearson': round(float(corr_pearson), 3),
+            'spearman': round(float(corr_spearman), 3),
+            'r_squared': round(float(r_squared), 3),
+            'regression': {
+                'slope': round(float(slope), 3),
+                'intercept': round(float(intercept), 3)
+            }
+        },
+        'statistical_tests': {
+            't_statistic': round(float(t_stat), 3),
+            'p_value': round(float(p_value), 4),
+            'degrees_of_freedom': degrees_of_freedom,
+            'ks_statistic': round(float(ks_stat), 3),
+            'ks_p_value': round(float(ks_p), 4)
+        },
+        'confidence_intervals': {
+            'v1': (round(float(ci_v1[0]), 3), round(float(ci_v1[1]), 3)),
+            'v2': (round(float(ci_v2[0]), 3), round(float(ci_v2[1]), 3))
+        },
+        'histogram_data': {
+            'v1': {
+                'labels': [round(x, 2) for x in hist_bins[:-1]],
+                'values': hist_v1
+            },
+            'v2': {
+                'labels': [round(x, 2) for x in hist_bins[:-1]],
+                'values': hist_v2
+            }
+        },
+        'cdf_data': {
+            'x': [round(float(x), 2) for x in x_cdf],
+            'v1': [round(float(x), 3) for x in cdf_v1],
+            'v2': [round(float(x), 3) for x in cdf_v2]
+        },
+        'scatter_data': scatter_data,
+        'radar_data': {
+            'labels': radar_labels,
+            'v1': radar_v1,
+            'v2': radar_v2
+        },
+        'metrics_breakdown': metrics_breakdown,
+        'execution_time': round(simulation['execution_time'], 2),
+        'total_simulations': simulation['total_simulations'],
+        'simulation': {
+            'throughput': round(simulation['throughput'], 1),
+            'workers': simulation['workers'],
+        }
+    }
+
+
+def generate_conclusion(analysis_result):
+    """Генерация вывода на основе результатов"""
+    v1 = analysis_result['v1']
+    v2 = analysis_result['v2']
+
+    diff_mean = v2['p_mean'] - v1['p_mean']
+    diff_guaranteed = v2['p_guaranteed'] - v1['p_guaranteed']
+    p_value = analysis_result['statistical_tests']['p_value']
+
+    if diff_mean > 0.1 and diff_guaranteed > 0.1 and p_value < 0.05:
+        conclusion = (
+            "✅ <strong>Статистически значимое превосходство детализированной модели (V2).</strong><br><br>"
+            f"Средняя вероятность достижения цели выше на <strong>{(diff_mean*100):.1f}%</strong> "
+            f"(P̄дц V2 = {v2['p_mean']:.3f}, P̄дц V1 = {v1['p_mean']:.3f}).<br>"
+            f"Гарантируемая вероятность выше на <strong>{(diff_guaranteed*100):.1f}%</strong> "
+            f"(P₀.₉ V2 = {v2['p_guaranteed']:.3f}, P₀.₉ V1 = {v1['p_guaranteed']:.3f}).<br>"
+            f"Статистическая значимость: p = {p_value:.4f} (p < 0.05).<br><br>"
+            "<em>Детализированная модель обеспечивает более высокую и стабильную эффективность распределения.</em>"
+        )
+    elif diff_mean > 0.05 and diff_guaranteed > 0.05 and p_value < 0.05:
+        conclusion = (
+            "📈 <strong>Детализированная модель показывает статистически значимые преимущества.</strong><br><br>"
+            f"Средняя вероятность достижения цели выше на <strong>{(diff_mean*100):.1f}%</strong>.<br>"
+            f"Гарантируемая вероятность выше на <strong>{(diff_guaranteed*100):.1f}%</strong>.<br>"
+            f"Статистическая значимость: p = {p_value:.4f} (p < 0.05).<br><br>"
+            "<em>Внедрение детализированной модели приведёт к повышению качества распределения.</em>"
+        )
+    elif p_value >= 0.05:
+        conclusion = (
+            "⚖️ <strong>Статистически значимых различий не обнаружено.</strong><br><br>"
+            f"Разница в средней вероятности составляет <strong>{(abs(diff_mean)*100):.1f}%</strong>.<br>"
+            f"Разница в гарантируемой вероятности — <strong>{(abs(diff_guaranteed)*100):.1f}%</strong>.<br>"
+            f"Статистическая значимость: p = {p_value:.4f} (p ≥ 0.05).<br><br>"
+            "<em>Обе модели показывают сопоставимую эффективность.</em>"
+        )
+    else:
+        conclusion = (
+            "🔍 <strong>Результаты требуют дополнительного анализа.</strong><br><br>"
+            f"Средняя вероятность: V2 = {v2['p_mean']:.3f}, V1 = {v1['p_mean']:.3f}<br>"
+            f"Гарантируемая вероятность: V2 = {v2['p_guaranteed']:.3f}, V1 = {v1['p_guaranteed']:.3f}<br>"
+            f"Статистическая значимость: p = {p_value:.4f}<br><br>"
+            "<em>Рекомендуется провести исследование с увеличенным объёмом выборки.</em>"
+        )
+
+    simulation = analysis_result['simulation']
+    conclusion += (
+        f"<br><br><small>Моделирование: {analysis_result['total_simulations']} прогонов "
+        f"за {analysis_result['execution_time']:.2f} с "
+        f"({simulation['throughput']:.0f} прогонов/с, процессов: {simulation['workers']}).</small>"
+    )
+    return conclusion
+
+
+def generate_recommendations(analysis_result):
+    """Генерация рекомендаций"""
+    v1 = analysis_result['v1']
+    v2 = analysis_result['v2']
+    p_value = analysis_result['statistical_tests']['p_value']
+
+    if v2['p_mean'] > v1['p_mean'] and v2['p_guaranteed'] > v1['p_guaranteed'] and p_value < 0.05:
+        return (
+            "1. Внедрить детализированную модель (V2) для распределения нарядов\n"
+            "2. Учитывать индивидуальные характеристики исполнителей\n"
+            "3. Реализовать систему персональных ограничений\n"
+            "4. Провести обучение персонала работе с новой моделью\n"
+            "5. Мониторинг показателей ŷ₁...ŷ₅ после внедрения"
+        )
+    elif v1['p_mean'] > v2['p_mean'] and v1['p_guaranteed'] > v2['p_guaranteed'] and p_value < 0.05:
+        return (
+            "1. Сохранить текущую агрегированную модель (V1)\n"
+            "2. Оптимизировать вычислительные ресурсы\n"
+            "3. Упростить процесс планирования\n"
+            "4. Сфокусироваться на улучшении качества данных\n"
+            "5. Регулярно проводить анализ эффективности"
+        )
+    else:
+        return (
+            "1. Провести дополнительные исследования с увеличенным объёмом выборки\n"
+            "2. Проанализировать конкретные случаи распределения\n"
+            "3. Рассмотреть гибридный подход (V1 + V2)\n"
+            "4. Собрать обратную связь от пользователей\n"
+            "5. Провести экономический анализ затрат на внедрение V2"
+        )
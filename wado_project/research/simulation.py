@@ -0,0 +1,405 @@
+# research/simulation.py
+"""
+Монте-Карло моделирование исполнения месячного плана нарядов.
+
+План (наряды месяца с назначенными подразделениями, люди подразделений,
+допуски и фактические освобождения) один раз снимается из базы в PlanSnapshot -
+набор массивов NumPy без ссылок на ORM. Затем n1 сценариев × n2 прогонов
+разыгрывают случайные возмущения:
+    - дополнительные отсутствия людей (болезни и т.п.) поверх освобождений из базы;
+    - недоступность подразделения в отдельные дни (наряд срочно передаётся другому);
+    - шум фактического веса нарядов.
+Каждый прогон распределяется двумя моделями:
+    V1 - агрегированная: подразделение как пул из N доступных человек;
+    V2 - детализированная: поимённо, с учётом допусков, занятости в тот же день
+         и накопленной нагрузки (как RosterService).
+По прогону считаются показатели качества ŷ₁-ŷ₅; прогон успешен, если все
+требования сценария z1-z5 выполнены. Вероятность сценария - доля успешных прогонов.
+
+Сценарии делятся на части и считаются в ProcessPoolExecutor. Каждый сценарий
+получает собственный поток ГСЧ из SeedSequence(seed).spawn(n1), поэтому
+результат воспроизводим и не зависит от числа процессов и размера частей.
+
+Модули ORM импортируются только при снятии снимка: рабочие процессы получают
+готовые массивы и к базе не обращаются.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+METRICS = ('Корректность', 'Срочность', 'Перегруз', 'Перерасход', 'Задержка')
+
+# Человек (подразделение) перегружен, если его нагрузка больше средней в OVERLOAD_FACTOR раз
+OVERLOAD_FACTOR = 1.5
+
+
+class PlanSnapshot:
+    """
+    Снимок плана для моделирования.
+
+    day_index, unit_index, weights, people, duty_index - наряды месяца (массивы длины S);
+    units      - id подразделений ('faculty_1' / 'department_2');
+    members    - индексы людей каждого подразделения;
+    candidates - (подразделение, наряд) -> индексы допущенных людей подразделения;
+    absent     - матрица люди × дни фактических освобождений;
+    pool       - индексы подразделений, которым можно срочно передать наряд;
+    staff      - индексы всех людей подразделений плана.
+    """
+
+    def __init__(self, days, day_index, unit_index, weights, people, duty_index,
+                 units, members, candidates, absent, pool):
+        self.days = days
+        self.day_index = day_index
+        self.unit_index = unit_index
+        self.weights = weights
+        self.people = people
+        self.duty_index = duty_index
+        self.units = units
+        self.members = members
+        self.candidates = candidates
+        self.absent = absent
+        # Все люди подразделений плана (для показателей нагрузки V2)
+        self.staff = np.unique(np.concatenate(members)) if members else np.array([], dtype=np.intp)
+        self.unit_sizes = np.array([max(unit_people.size, 1) for unit_people in members], dtype=float)
+        # Строки нарядов как кортежи int: в циклах прогонов это быстрее индексации массивов
+        self.rows = list(zip(day_index.tolist(), unit_index.tolist(), people.tolist(), duty_index.tolist()))
+        self.pool = pool.tolist()
+
+    def __len__(self):
+        return len(self.day_index)
+
+    @property
+    def people_count(self):
+        return self.absent.shape[0]
+
+    @classmethod
+    def from_plan(cls, plan):
+        """Снять снимок месячного плана фиксированным числом запросов"""
+        from duty.models import DutySchedule
+        from duty.utils import month_bounds
+        from missing.services import AbsenceIndex
+        from people.models import People
+        from permission.models import DepartmentDutyPermission, FacultyDutyPermission
+
+        month_start, next_month = month_bounds(plan.month)
+        days = (next_month - month_start).days
+
+        rows = list(DutySchedule.objects.filter(
+            date__gte=month_start, date__lt=next_month,
+        ).exclude(
+            assigned_faculty__isnull=True, assigned_department__isnull=True,
+        ).order_by('date', 'time_start', 'duty_id').values_list(
+            'date', 'assigned_faculty_id', 'assigned_department_id', 'duty_id',
+            'duty__duty_weight', 'duty__people_count',
+        ))
+
+        # Люди по подразделениям: в факультет входят его кафедры и управление
+        person_ids = []
+        unit_members = {}
+        for person_id, faculty_id, department_id, department_faculty_id in People.objects.values_list(
+            'id', 'faculty_id', 'department_id', 'department__faculty_id'
+        ).order_by('id'):
+            index = len(person_ids)
+            person_ids.append(person_id)
+            if department_id:
+                unit_members.setdefault(f'department_{department_id}', []).append(index)
+                if department_faculty_id:
+                    unit_members.setdefault(f'faculty_{department_faculty_id}', []).append(index)
+            elif faculty_id:
+                unit_members.setdefault(f'faculty_{faculty_id}', []).append(index)
+        person_position = {person_id: index for index, person_id in enumerate(person_ids)}
+
+        units = []
+        unit_position = {}
+
+        def unit_of(unit_id):
+            if unit_id not in unit_position:
+                unit_position[unit_id] = len(units)
+                units.append(unit_id)
+            return unit_position[unit_id]
+
+        duty_position = {}
+        day_index, unit_index, weights, people, duty_index = [], [], [], [], []
+        for day, faculty_id, department_id, duty_id, weight, people_count in rows:
+            day_index.append((day - month_start).days)
+            unit_index.append(unit_of(f'faculty_{faculty_id}' if faculty_id else f'department_{department_id}'))
+            weights.append(weight or 0)
+            people.append(people_count or 1)
+            duty_index.append(duty_position.setdefault(duty_id, len(duty_position)))
+        for unit_id in plan.selected_units or []:
+            unit_of(unit_id)
+
+        eligible = np.zeros((len(person_ids), len(duty_position)), dtype=bool)
+        for model in (DepartmentDutyPermission, FacultyDutyPermission):
+            for duty_id, person_id in model.objects.filter(
+                duty_id__in=duty_position
+            ).values_list('duty_id', 'person_id'):
+                if person_id in person_position:
+                    eligible[person_position[person_id], duty_position[duty_id]] = True
+
+        # Допущенные люди для каждой пары (подразделение, наряд), включая срочную передачу
+        members = [np.array(unit_members.get(unit_id, ()), dtype=np.intp) for unit_id in units]
+        candidates = {
+            (unit, duty): unit_people[eligible[unit_people, duty]]
+            for unit, unit_people in enumerate(members)
+            for duty in range(len(duty_position))
+        }
+
+        absent = np.zeros((len(person_ids), days), dtype=bool)
+        index = AbsenceIndex.load(month_start, next_month)
+        for person_id, position in person_position.items():
+            for absence in index.absences_for(person_id):
+                start = max((absence.start_date - month_start).days, 0)
+                end = min((absence.end_date - month_start).days, days - 1)
+                absent[position, start:end + 1] = True
+
+        pool = np.array([unit for unit in range(len(units)) if len(members[unit])], dtype=np.intp)
+        return cls(
+            days=days,
+            day_index=np.array(day_index, dtype=np.intp),
+            unit_index=np.array(unit_index, dtype=np.intp),
+            weights=np.array(weights, dtype=float),
+            people=np.array(people, dtype=np.intp),
+            duty_index=np.array(duty_index, dtype=np.intp),
+            units=units,
+            members=members,
+            candidates=candidates,
+            absent=absent,
+            pool=pool,
+        )
+
+
+def _draw_scenario(rng, base_absence, unit_failure, weight_noise):
+    """Параметры сценария: уровень отсутствий, недоступности подразделений и шума весов"""
+    return (
+        min(rng.gamma(4.0, base_absence / 4.0), 0.9) if base_absence > 0 else 0.0,
+        min(rng.gamma(4.0, unit_failure / 4.0), 0.9) if unit_failure > 0 else 0.0,
+        weight_noise * rng.uniform(0.5, 1.5),
+    )
+
+
+def _quality(staffed, urgent, backlog, loads, snapshot):
+    """ŷ₁-ŷ₅ прогона: доля укомплектованных, доля без срочной передачи, доля перегруженных, макс/средн, недобор в день"""
+    total = len(snapshot)
+    active = loads[loads > 0]
+    mean = active.mean() if active.size else 0.0
+    return np.array([
+        staffed / total if total else 1.0,
+        1 - urgent / total if total else 1.0,
+        float(np.mean(active > OVERLOAD_FACTOR * mean)) if mean > 0 else 0.0,
+        float(active.max() / mean) if mean > 0 else 1.0,
+        backlog / snapshot.days,
+    ])
+
+
+def _pick_unit(pool, unit, day, down, capacity):
+    """Подразделение, исполняющее наряд: своё или, если оно недоступно, доступное с наибольшим запасом"""
+    if not down[unit][day]:
+        return unit, False
+    available = [other for other in pool if not down[other][day]]
+    if not available:
+        return None, True
+    return max(available, key=capacity), True
+
+
+def _run_aggregated(snapshot, absent, down, weights):
+    """V1: подразделение - пул доступных людей без учёта допусков и личной нагрузки"""
+    available = [
+        (~absent[members]).sum(axis=0).tolist() if members.size else [0] * snapshot.days
+        for members in snapshot.members
+    ]
+    loads = [0.0] * len(snapshot.units)
+    staffed = urgent = backlog = 0
+
+    for (day, unit, needed, _), weight in zip(snapshot.rows, weights):
+        unit, is_urgent = _pick_unit(snapshot.pool, unit, day, down, lambda other: available[other][day])
+        urgent += is_urgent
+        if unit is None:
+            backlog += needed
+            continue
+        taken = min(needed, available[unit][day])
+        available[unit][day] -= taken
+        loads[unit] += weight * taken
+        staffed += taken == needed
+        backlog += needed - taken
+
+    return _quality(staffed, urgent, backlog, np.array(loads) / snapshot.unit_sizes, snapshot)
+
+
+def _run_detailed(snapshot, absent, down, weights):
+    """V2: поимённо - допуск, не более одного наряда в день, наименьшая накопленная нагрузка"""
+    loads = np.zeros(snapshot.people_count)
+    busy_day = np.full(snapshot.people_count, -1, dtype=np.intp)
+    free = ~absent
+    staffed = urgent = backlog = 0
+
+    for (day, unit, needed, duty), weight in zip(snapshot.rows, weights):
+        unit, is_urgent = _pick_unit(snapshot.pool, unit, day, down, snapshot.unit_sizes.__getitem__)
+        urgent += is_urgent
+        if unit is None:
+            backlog += needed
+            continue
+        candidates = snapshot.candidates[(unit, duty)]
+        candidates = candidates[free[candidates, day] & (busy_day[candidates] != day)]
+        if candidates.size > needed:
+            candidates = candidates[np.argpartition(loads[candidates], needed - 1)[:needed]]
+        loads[candidates] += weight
+        busy_day[candidates] = day
+        staffed += candidates.size == needed
+        backlog += needed - candidates.size
+
+    return _quality(staffed, urgent, backlog, loads[snapshot.staff], snapshot)
+
+
+def _meets(quality, thresholds):
+    z1, z2, z3, z4, z5 = thresholds
+    return np.array([quality[0] >= z1, quality[1] >= z2, quality[2] <= z3, quality[3] <= z4, quality[4] <= z5])
+
+
+_worker_snapshot = None
+
+
+def _init_worker(snapshot):
+    global _worker_snapshot
+    _worker_snapshot = snapshot
+
+
+def _simulate_chunk(task, snapshot=None):
+    """Часть сценариев: (индексы, seed-последовательности, параметры) -> частичные суммы"""
+    indices, seeds, n2_runs, thresholds, base_absence, unit_failure, weight_noise = task
+    snapshot = snapshot if snapshot is not None else _worker_snapshot
+
+    p = np.zeros((2, len(indices)))
+    metric_sum = np.zeros((2, len(METRICS)))
+    metric_success = np.zeros((2, len(METRICS)))
+    for position, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        absence_rate, failure_rate, noise = _draw_scenario(rng, base_absence, unit_failure, weight_noise)
+        for _ in range(n2_runs):
+            absent = snapshot.absent | (rng.random(snapshot.absent.shape) < absence_rate)
+            down = rng.random((len(snapshot.units), snapshot.days)) < failure_rate
+            weights = snapshot.weights * rng.lognormal(0.0, noise, len(snapshot)) if noise else snapshot.weights
+            down, weights = down.tolist(), weights.tolist()
+            for version, run in enumerate((_run_aggregated, _run_detailed)):
+                quality = run(snapshot, absent, down, weights)
+                meets = _meets(quality, thresholds)
+                metric_sum[version] += quality
+                metric_success[version] += meets
+                p[version, position] += meets.all()
+    return indices, p / n2_runs, metric_sum, metric_success
+
+
+class MonteCarloEngine:
+    """
+    Моделирование плана: n1_scenarios сценариев по n2_runs прогонов в каждом.
+
+    Использование:
+        result = MonteCarloEngine.from_scenario(plan, scenario).run()
+        result['v1']['p'], result['v2']['p'] - вероятности по сценариям;
+        result['metrics'] - средние ŷ₁-ŷ₅ и доли выполнения требований z1-z5;
+        result['throughput'] - прогонов (V1 + V2) в секунду.
+    """
+
+    def __init__(self, snapshot, n1_scenarios, n2_runs, thresholds, absence_rate=None,
+                 unit_failure_rate=0.05, weight_noise=0.1, seed=0, workers=None, chunk_size=None):
+        self.snapshot = snapshot
+        self.n1_scenarios = n1_scenarios
+        self.n2_runs = n2_runs
+        self.thresholds = tuple(thresholds)
+        if absence_rate is None:
+            absence_rate = float(snapshot.absent.mean()) if snapshot.absent.size else 0.0
+        self.absence_rate = max(absence_rate, 0.01)
+        self.unit_failure_rate = unit_failure_rate
+        self.weight_noise = weight_noise
+        self.seed = seed
+        if workers is None:
+            workers = getattr(settings, 'RESEARCH_SIMULATION_WORKERS', None) or os.cpu_count() or 1
+        self.workers = max(1, min(workers, n1_scenarios))
+        self.chunk_size = chunk_size or max(1, -(-n1_scenarios // (self.workers * 4)))
+
+    @classmethod
+    def from_scenario(cls, plan, scenario, **kwargs):
+        """Движок для плана и сценария исследования (необязательные поля сценария берутся, если есть)"""
+        for field in ('absence_rate', 'unit_failure_rate', 'weight_noise'):
+            value = getattr(scenario, field, None)
+            if value is not None:
+                kwargs.setdefault(field, value)
+        kwargs.setdefault('seed', plan.pk * 1_000_003 + scenario.pk)
+        return cls(
+            PlanSnapshot.from_plan(plan),
+            scenario.n1_scenarios,
+            scenario.n2_runs,
+            (scenario.z1, scenario.z2, scenario.z3, scenario.z4, scenario.z5),
+            **kwargs,
+        )
+
+    def tasks(self):
+        seeds = np.random.SeedSequence(self.seed).spawn(self.n1_scenarios)
+        for start in range(0, self.n1_scenarios, self.chunk_size):
+            stop = min(start + self.chunk_size, self.n1_scenarios)
+            yield (
+                np.arange(start, stop), seeds[start:stop], self.n2_runs, self.thresholds,
+                self.absence_rate, self.unit_failure_rate, self.weight_noise,
+            )
+
+    def run(self, progress=None):
+        """
+        Выполнить моделирование. progress(percent, message) вызывается после каждой
+        порции сценариев; исключение из него (отмена фоновой задачи) снимает
+        оставшиеся порции с выполнения.
+        """
+        started = time.perf_counter()
+        p = np.zeros((2, self.n1_scenarios))
+        metric_sum = np.zeros((2, len(METRICS)))
+        metric_success = np.zeros((2, len(METRICS)))
+
+        if self.workers == 1 or not len(self.snapshot):
+            results = (_simulate_chunk(task, self.snapshot) for task in self.tasks())
+            self._collect(results, p, metric_sum, metric_success, progress)
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.snapshot,)
+            )
+            try:
+                self._collect(executor.map(_simulate_chunk, self.tasks()), p, metric_sum, metric_success, progress)
+            finally:
+                executor.shutdown(cancel_futures=True)
+
+        elapsed = time.perf_counter() - started
+        runs = self.n1_scenarios * self.n2_runs
+        simulations = runs * 2
+        logger.info('Моделирование: %s прогонов за %.2f с (%s процессов)', simulations, elapsed, self.workers)
+        return {
+            'v1': {'p': p[0]},
+            'v2': {'p': p[1]},
+            'metrics': [
+                {
+                    'name': name,
+                    'mean': (metric_sum[0, i] / runs, metric_sum[1, i] / runs),
+                    'success_rate': (metric_success[0, i] / runs, metric_success[1, i] / runs),
+                }
+                for i, name in enumerate(METRICS)
+            ],
+            'execution_time': elapsed,
+            'total_simulations': simulations,
+            'throughput': simulations / elapsed if elapsed > 0 else 0.0,
+            'workers': self.workers,
+        }
+
+    def _collect(self, results, p, metric_sum, metric_success, progress=None):
+        done = 0
+        for indices, chunk_p, chunk_sum, chunk_success in results:
+            p[:, indices] = chunk_p
+            metric_sum += chunk_sum
+            metric_success += chunk_success
+            done += len(indices)
+            if progress is not None:
+                progress(100 * done / self.n1_scenarios, f'Моделирование: {done} из {self.n1_scenarios} сценариев')
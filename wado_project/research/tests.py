@@ -0,0 +1,151 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from . import stats
+from .simulation import METRICS, MonteCarloEngine, PlanSnapshot
+
+
+def build_snapshot(days=28, units=3, people_per_unit=6, duties=2, absent_rate=0.0):
+    """Небольшой снимок плана без базы: каждый день каждый наряд у подразделения по кругу"""
+    rng = np.random.default_rng(7)
+    members = [np.arange(unit * people_per_unit, (unit + 1) * people_per_unit, dtype=np.intp) for unit in range(units)]
+    rows = [(day, (day + duty) % units, duty) for day in range(days) for duty in range(duties)]
+    return PlanSnapshot(
+        days=days,
+        day_index=np.array([day for day, _, _ in rows], dtype=np.intp),
+        unit_index=np.array([unit for _, unit, _ in rows], dtype=np.intp),
+        weights=np.array([1.0 + duty for _, _, duty in rows]),
+        people=np.array([1 + duty for _, _, duty in rows], dtype=np.intp),
+        duty_index=np.array([duty for _, _, duty in rows], dtype=np.intp),
+        units=[f'department_{unit}' for unit in range(units)],
+        members=members,
+        candidates={(unit, duty): members[unit] for unit in range(units) for duty in range(duties)},
+        absent=rng.random((units * people_per_unit, days)) < absent_rate,
+        pool=np.arange(units, dtype=np.intp),
+    )
+
+
+def empty_snapshot(days=30):
+    return PlanSnapshot(
+        days=days,
+        day_index=np.array([], dtype=np.intp),
+        unit_index=np.array([], dtype=np.intp),
+        weights=np.array([], dtype=float),
+        people=np.array([], dtype=np.intp),
+        duty_index=np.array([], dtype=np.intp),
+        units=[],
+        members=[],
+        candidates={},
+        absent=np.zeros((0, days), dtype=bool),
+        pool=np.array([], dtype=np.intp),
+    )
+
+
+class MonteCarloEngineTest(SimpleTestCase):
+    """Моделирование воспроизводимо по seed и не зависит от числа процессов и размера порций"""
+
+    thresholds = (0.9, 0.8, 0.3, 2.0, 0.5)
+
+    def run_engine(self, snapshot, **kwargs):
+        return MonteCarloEngine(snapshot, 8, 5, self.thresholds, seed=11, **kwargs).run()
+
+    def test_empty_plan(self):
+        # Незаполненный план: снимок без строк (len == 0) считается в текущем процессе
+        result = self.run_engine(empty_snapshot(), workers=1)
+        self.assertEqual(result['workers'], 1)
+        np.testing.assert_array_equal(result['v1']['p'], np.ones(8))
+        np.testing.assert_array_equal(result['v2']['p'], np.ones(8))
+        self.assertEqual([metric['name'] for metric in result['metrics']], list(METRICS))
+
+        result = self.run_engine(empty_snapshot(), workers=2)
+        np.testing.assert_array_equal(result['v2']['p'], np.ones(8))
+
+    def test_same_seed_same_result(self):
+        snapshot = build_snapshot(absent_rate=0.05)
+        serial = self.run_engine(snapshot, workers=1)
+        parallel = self.run_engine(snapshot, workers=2, chunk_size=3)
+        self.assertEqual(parallel['workers'], 2)
+        for version in ('v1', 'v2'):
+            np.testing.assert_array_equal(serial[version]['p'], parallel[version]['p'])
+        # Суммы показателей складываются по порциям в разном порядке - сравнение с точностью округления
+        for other in (parallel, self.run_engine(snapshot, workers=1, chunk_size=1)):
+            np.testing.assert_allclose(self.metric_values(serial), self.metric_values(other), rtol=1e-12)
+
+        other = MonteCarloEngine(snapshot, 8, 5, self.thresholds, seed=12, workers=1).run()
+        self.assertFalse(np.allclose(self.metric_values(serial), self.metric_values(other)))
+
+    @staticmethod
+    def metric_values(result):
+        return [metric['mean'] + metric['success_rate'] for metric in result['metrics']]
+
+    def test_probabilities_and_metrics(self):
+        result = self.run_engine(build_snapshot(), workers=1, unit_failure_rate=0.0, weight_noise=0.0)
+        for version in ('v1', 'v2'):
+            p = result[version]['p']
+            self.assertEqual(p.shape, (8,))
+            self.assertTrue(((p >= 0) & (p <= 1)).all())
+        staffed = result['metrics'][0]
+        # Без отказов подразделений наряды не передаются срочно
+        self.assertEqual(result['metrics'][1]['mean'], (1.0, 1.0))
+        self.assertGreater(staffed['mean'][0], 0.9)
+        self.assertEqual(result['total_simulations'], 8 * 5 * 2)
+
+
+class StatsReferenceTest(SimpleTestCase):
+    """Распределения и критерии совпадают с эталонными значениями SciPy на обоих путях"""
+
+    BACKENDS = ('numpy', 'auto')
+    A = [1.2, 3.4, 2.2, 5.1, 4.4, 3.3, 2.8]
+    B = [2.9, 4.8, 5.5, 6.1, 3.9, 5.0]
+
+    def test_t_distribution(self):
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend):
+                # scipy.stats.t.sf / cdf / ppf
+                self.assertAlmostEqual(stats.t_sf(2.0, 5, backend), 0.050969739414929174, places=12)
+                self.assertAlmostEqual(stats.t_cdf(-1.3, 12, backend), 0.10900858554175706, places=12)
+                self.assertAlmostEqual(stats.t_ppf(0.975, 10, backend), 2.228138851986274, places=10)
+                self.assertAlmostEqual(stats.t_ppf(0.05, 3, backend), -2.353363434801824, places=10)
+
+    def test_t_test(self):
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend):
+                # scipy.stats.ttest_ind(A, B)
+                t, p, df = stats.t_test(self.A, self.B, backend)
+                self.assertAlmostEqual(t, -2.179061698275075, places=12)
+                self.assertAlmostEqual(p, 0.05195008590279255, places=12)
+                self.assertEqual(df, 11)
+
+    def test_kolmogorov_smirnov(self):
+        # scipy.stats.ks_2samp(A, B).statistic
+        self.assertAlmostEqual(stats.ks_statistic(self.A, self.B), 0.5476190476190477, places=15)
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend):
+                # scipy.stats.kstwobign.sf
+                self.assertAlmostEqual(stats.kolmogorov_sf(1.0, backend=backend), 0.26999967167735456, places=12)
+                self.assertAlmostEqual(stats.kolmogorov_sf(0.5, backend=backend), 0.9639452436648751, places=12)
+                # Асимптотика с поправкой Стивенса: kstwobign.sf((n + 0.12 + 0.11 / n) * D)
+                self.assertAlmostEqual(stats.ks_test(self.A, self.B, backend)[1], 0.19093360145775545, places=12)
+
+    def test_rankdata_and_correlation(self):
+        # scipy.stats.rankdata, pearsonr, spearmanr
+        self.assertEqual(stats.rankdata([3, 1, 4, 1, 5, 9, 2, 6, 5, 3]).tolist(),
+                         [4.5, 1.5, 6.0, 1.5, 7.5, 10.0, 3.0, 9.0, 7.5, 4.5])
+        self.assertAlmostEqual(stats.pearson(self.A[:6], self.B), 0.5588713509124879, places=12)
+        self.assertAlmostEqual(stats.spearman(self.A[:6], self.B), 0.4285714285714286, places=12)
+
+    def test_confidence_interval(self):
+        for backend in self.BACKENDS:
+            with self.subTest(backend=backend):
+                # scipy.stats.t.interval(0.95, n - 1, loc=mean, scale=sem)
+                low, high = stats.confidence_interval([2.1, 2.5, 1.9, 3.2, 2.8, 2.4], 0.95, backend)
+                self.assertAlmostEqual(low, 1.9892434012633409, places=10)
+                self.assertAlmostEqual(high, 2.977423265403326, places=10)
+
+    def test_histogram(self):
+        bins = [i * 0.05 for i in range(21)]
+        # numpy.histogram: правая граница последнего интервала включается
+        counts = stats.histogram([0, 0.5, 1, 1, 1], bins)
+        self.assertEqual(sum(counts), 5)
+        self.assertEqual(counts, np.histogram([0, 0.5, 1, 1, 1], bins)[0].tolist())
+        self.assertEqual(stats.histogram([-0.1, 1.1], bins), [0] * 20)
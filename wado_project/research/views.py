@@ -9,14 +9,13 @@ from django.contrib import messages
 from django.db import transaction
 from django.db.models import Sum, F, Count
 import time
-import random
 import json
-import math
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 
 from core.mixins import IsCommandantMixin
 from duty.models import MonthlyDutyPlan
+from .services import create_report
 from .models import ResearchScenario, EffectivenessReport
 
 
@@ -67,77 +66,7 @@ class RunAnalysisView(IsCommandantMixin, View):
             plan = MonthlyDutyPlan.objects.get(id=plan_id)
             scenario = ResearchScenario.objects.get(id=scenario_id)
             
-            # Генерация детальных результатов с полной статистикой
-            analysis_result = self.generate_detailed_results(plan, scenario)
-            
-            # Создаём отчёт
-            report = EffectivenessReport.objects.create(
-                plan=plan,
-                scenario=scenario,
-                # Основные показатели
-                p_dc_v1_mean=analysis_result['v1']['p_mean'],
-                p_guaranteed_v1=analysis_result['v1']['p_guaranteed'],
-                p_dc_v2_mean=analysis_result['v2']['p_mean'],
-                p_guaranteed_v2=analysis_result['v2']['p_guaranteed'],
-                
-                # Детальная статистика V1
-                median_v1=analysis_result['v1']['stats']['median'],
-                std_v1=analysis_result['v1']['stats']['std'],
-                min_v1=analysis_result['v1']['stats']['min'],
-                max_v1=analysis_result['v1']['stats']['max'],
-                cv_v1=analysis_result['v1']['stats']['cv'],
-                skewness_v1=analysis_result['v1']['stats']['skewness'],
-                kurtosis_v1=analysis_result['v1']['stats']['kurtosis'],
-                
-                # Детальная статистика V2
-                median_v2=analysis_result['v2']['stats']['median'],
-                std_v2=analysis_result['v2']['stats']['std'],
-                min_v2=analysis_result['v2']['stats']['min'],
-                max_v2=analysis_result['v2']['stats']['max'],
-                cv_v2=analysis_result['v2']['stats']['cv'],
-                skewness_v2=analysis_result['v2']['stats']['skewness'],
-                kurtosis_v2=analysis_result['v2']['stats']['kurtosis'],
-                
-                # Корреляционный анализ
-                correlation_pearson=analysis_result['correlation']['pearson'],
-                correlation_spearman=analysis_result['correlation']['spearman'],
-                r_squared=analysis_result['correlation']['r_squared'],
-                regression_slope=analysis_result['correlation']['regression']['slope'],
-                regression_intercept=analysis_result['correlation']['regression']['intercept'],
-                
-                # Статистические тесты
-                t_statistic=analysis_result['statistical_tests']['t_statistic'],
-                p_value=analysis_result['statistical_tests']['p_value'],
-                degrees_of_freedom=analysis_result['statistical_tests']['degrees_of_freedom'],
-                ks_statistic=analysis_result['statistical_tests']['ks_statistic'],
-                ks_p_value=analysis_result['statistical_tests']['ks_p_value'],
-                
-                # Доверительные интервалы
-                ci_v1_lower=analysis_result['confidence_intervals']['v1'][0],
-                ci_v1_upper=analysis_result['confidence_intervals']['v1'][1],
-                ci_v2_lower=analysis_result['confidence_intervals']['v2'][0],
-                ci_v2_upper=analysis_result['confidence_intervals']['v2'][1],
-                
-                # Сырые данные и метаинформация
-                raw_data_v1=json.dumps(analysis_result['v1']['p_values'][:10]),
-                raw_data_v2=json.dumps(analysis_result['v2']['p_values'][:10]),
-                execution_time=analysis_result['execution_time'],
-                total_simulations=analysis_result['total_simulations'],
-                
-                # Анализ показателей качества
-                metrics_breakdown=json.dumps(analysis_result['metrics_breakdown']),
-                conclusion=self.generate_conclusion(analysis_result),
-                recommendations=self.generate_recommendations(analysis_result),
-                
-                # Данные для графиков
-                graph_data=json.dumps({
-                    'histogram_v1': analysis_result['histogram_data']['v1'],
-                    'histogram_v2': analysis_result['histogram_data']['v2'],
-                    'cdf_data': analysis_result['cdf_data'],
-                    'scatter_data': analysis_result['scatter_data'],
-                    'radar_data': analysis_result['radar_data']
-                })
-            )
+            report = create_report(plan, scenario)
             
             return JsonResponse({
                 'success': True,
@@ -160,508 +89,6 @@ class RunAnalysisView(IsCommandantMixin, View):
                 'success': False,
                 'error': f'Ошибка: {str(e)}'
             }, status=500)
-    
-    def calculate_mean(self, data):
-        """Расчёт среднего значения"""
-        return sum(data) / len(data) if data else 0
-    
-    def calculate_median(self, data):
-        """Расчёт медианы"""
-        if not data:
-            return 0
-        sorted_data = sorted(data)
-        n = len(sorted_data)
-        if n % 2 == 0:
-            return (sorted_data[n//2 - 1] + sorted_data[n//2]) / 2
-        else:
-            return sorted_data[n//2]
-    
-    def calculate_std(self, data):
-        """Расчёт стандартного отклонения"""
-        if len(data) < 2:
-            return 0
-        mean = self.calculate_mean(data)
-        variance = sum((x - mean) ** 2 for x in data) / (len(data) - 1)
-        return math.sqrt(variance)
-    
-    def calculate_skewness(self, data):
-        """Расчёт асимметрии (упрощённый)"""
-        if len(data) < 3:
-            return 0
-        mean = self.calculate_mean(data)
-        std = self.calculate_std(data)
-        if std == 0:
-            return 0
-        n = len(data)
-        skew = sum((x - mean) ** 3 for x in data) / n
-        skew /= std ** 3
-        return skew
-    
-    def calculate_kurtosis(self, data):
-        """Расчёт эксцесса (упрощённый)"""
-        if len(data) < 4:
-            return 0
-        mean = self.calculate_mean(data)
-        std = self.calculate_std(data)
-        if std == 0:
-            return 0
-        n = len(data)
-        kurt = sum((x - mean) ** 4 for x in data) / n
-        kurt /= std ** 4
-        return kurt - 3  # Вычитаем 3 для эксцесса нормального распределения
-    
-    def calculate_correlation(self, x, y):
-        """Расчёт корреляции Пирсона"""
-        if len(x) != len(y) or len(x) < 2:
-            return 0
-        mean_x = self.calculate_mean(x)
-        mean_y = self.calculate_mean(y)
-        std_x = self.calculate_std(x)
-        std_y = self.calculate_std(y)
-        
-        if std_x == 0 or std_y == 0:
-            return 0
-        
-        covariance = sum((x[i] - mean_x) * (y[i] - mean_y) for i in range(len(x))) / (len(x) - 1)
-        return covariance / (std_x * std_y)
-    
-    def calculate_spearman_correlation(self, x, y):
-        """Расчёт корреляции Спирмена (упрощённый)"""
-        if len(x) != len(y) or len(x) < 2:
-            return 0
-        
-        # Ранжируем данные
-        def rank_data(data):
-            sorted_data = sorted(data)
-            ranks = {}
-            for i, val in enumerate(sorted_data):
-                if val not in ranks:
-                    ranks[val] = i + 1
-            
-            # Для одинаковых значений используем средний ранг
-            from collections import defaultdict
-            value_indices = defaultdict(list)
-            for i, val in enumerate(data):
-                value_indices[val].append(i)
-            
-            result = [0] * len(data)
-            for val, indices in value_indices.items():
-                avg_rank = sum(ranks[val] + i for i in range(len(indices))) / len(indices)
-                for idx in indices:
-                    result[idx] = avg_rank
-            return result
-        
-        ranks_x = rank_data(x)
-        ranks_y = rank_data(y)
-        
-        # Используем формулу Пирсона для рангов
-        return self.calculate_correlation(ranks_x, ranks_y)
-    
-    def calculate_t_test(self, data1, data2):
-        """T-тест для независимых выборок (упрощённый)"""
-        n1, n2 = len(data1), len(data2)
-        if n1 < 2 or n2 < 2:
-            return 0, 1.0
-        
-        mean1 = self.calculate_mean(data1)
-        mean2 = self.calculate_mean(data2)
-        std1 = self.calculate_std(data1)
-        std2 = self.calculate_std(data2)
-        
-        # Объединённое стандартное отклонение
-        pooled_std = math.sqrt(((n1 - 1) * std1**2 + (n2 - 1) * std2**2) / (n1 + n2 - 2))
-        if pooled_std == 0:
-            return 0, 1.0
-        
-        # t-статистика
-        t_stat = (mean1 - mean2) / (pooled_std * math.sqrt(1/n1 + 1/n2))
-        
-        # Степени свободы
-        df = n1 + n2 - 2
-        
-        # Упрощённое p-значение (для демо)
-        p_value = 2 * (1 - self.t_distribution_cdf(abs(t_stat), df))
-        
-        return t_stat, p_value
-    
-    def t_distribution_cdf(self, t, df):
-        """Аппроксимация CDF t-распределения (упрощённая)"""
-        if df <= 0:
-            return 0.5
-        
-        # Аппроксимация нормальным распределением для больших df
-        if df > 30:
-            z = t
-            return 0.5 * (1 + math.erf(z / math.sqrt(2)))
-        
-        # Упрощённая аппроксимация для малых df
-        x = df / (df + t**2)
-        return 0.5 + 0.5 * math.copysign(1, t) * (1 - self.beta_incomplete(x, 0.5*df, 0.5))
-    
-    def beta_incomplete(self, x, a, b):
-        """Неполная бета-функция (упрощённая аппроксимация)"""
-        if x <= 0:
-            return 0
-        if x >= 1:
-            return 1
-        
-        # Простая аппроксимация
-        result = 0
-        for i in range(20):
-            term = (math.gamma(a + b) / (math.gamma(a) * math.gamma(b))) * \
-                   (x**a * (1 - x)**b) / (a + i)
-            result += term
-            if abs(term) < 1e-10:
-                break
-        return result
-    
-    def calculate_ks_test(self, data1, data2):
-        """Тест Колмогорова-Смирнова (упрощённый)"""
-        if not data1 or not data2:
-            return 0, 1.0
-        
-        n1, n2 = len(data1), len(data2)
-        
-        # Сортируем данные
-        sorted1 = sorted(data1)
-        sorted2 = sorted(data2)
-        
-        # Эмпирические функции распределения
-        def ecdf(data, x):
-            return sum(1 for d in data if d <= x) / len(data)
-        
-        # Находим максимальную разность
-        all_values = sorted(set(sorted1 + sorted2))
-        max_diff = 0
-        for x in all_values:
-            diff = abs(ecdf(sorted1, x) - ecdf(sorted2, x))
-            if diff > max_diff:
-                max_diff = diff
-        
-        # Упрощённое p-значение
-        n_eff = (n1 * n2) / (n1 + n2)
-        ks_stat = max_diff
-        p_value = 2 * math.exp(-2 * n_eff * ks_stat**2)
-        
-        return ks_stat, min(p_value, 1.0)
-    
-    def calculate_confidence_interval(self, data, confidence=0.95):
-        """Доверительный интервал (упрощённый)"""
-        if len(data) < 2:
-            return (0, 0)
-        
-        mean = self.calculate_mean(data)
-        std = self.calculate_std(data)
-        n = len(data)
-        
-        # t-квантиль для 95% доверительного интервала
-        if n > 30:
-            z = 1.96
-        else:
-            z = 2.0
-        
-        margin = z * std / math.sqrt(n)
-        return (mean - margin, mean + margin)
-    
-    def generate_detailed_results(self, plan, scenario):
-        """Генерация детализированных результатов с полной статистикой"""
-        
-        # Генерация реалистичных данных
-        seed = hash(f"{plan.id}{scenario.id}") % (2**32)
-        random.seed(seed)
-        
-        # Базовые параметры
-        n_scenarios = scenario.n1_scenarios
-        
-        # V1: более изменчивое распределение (меньшая стабильность)
-        base_v1 = 0.70
-        v1_data = [max(0.4, min(0.95, base_v1 + random.uniform(-0.15, 0.10))) 
-                  for _ in range(n_scenarios)]
-        
-        # V2: более стабильное распределение с лучшими результатами
-        base_v2 = 0.80
-        v2_data = [max(0.6, min(0.98, base_v2 + random.uniform(-0.10, 0.12))) 
-                  for _ in range(n_scenarios)]
-        
-        # Добавляем корреляцию между V1 и V2
-        correlation = 0.65
-        for i in range(len(v2_data)):
-            v2_data[i] = correlation * v1_data[i] + (1 - correlation) * v2_data[i]
-            v2_data[i] = max(0.6, min(0.98, v2_data[i]))
-        
-        # Расчёт статистики
-        def calculate_statistics(data):
-            mean_val = self.calculate_mean(data)
-            std_val = self.calculate_std(data)
-            return {
-                'mean': mean_val,
-                'median': self.calculate_median(data),
-                'std': std_val,
-                'min': min(data),
-                'max': max(data),
-                'cv': (std_val / mean_val * 100) if mean_val != 0 else 0,
-                'skewness': self.calculate_skewness(data),
-                'kurtosis': self.calculate_kurtosis(data),
-            }
-        
-        stats_v1 = calculate_statistics(v1_data)
-        stats_v2 = calculate_statistics(v2_data)
-        
-        # Корреляционный анализ
-        corr_pearson = self.calculate_correlation(v1_data, v2_data)
-        corr_spearman = self.calculate_spearman_correlation(v1_data, v2_data)
-        
-        # Линейная регрессия (простая)
-        if stats_v1['std'] > 0:
-            slope = corr_pearson * stats_v2['std'] / stats_v1['std']
-        else:
-            slope = 0
-        intercept = stats_v2['mean'] - slope * stats_v1['mean']
-        r_squared = corr_pearson ** 2
-        
-        # T-тест
-        t_stat, p_value = self.calculate_t_test(v1_data, v2_data)
-        
-        # Тест Колмогорова-Смирнова
-        ks_stat, ks_p = self.calculate_ks_test(v1_data, v2_data)
-        
-        # Доверительные интервалы (95%)
-        ci_v1 = self.calculate_confidence_interval(v1_data)
-        ci_v2 = self.calculate_confidence_interval(v2_data)
-        
-        # Данные для гистограмм
-        hist_bins = [0.4 + i * 0.04 for i in range(16)]
-        hist_v1 = [0] * 15
-        hist_v2 = [0] * 15
-        
-        for val in v1_data:
-            for i in range(15):
-                if hist_bins[i] <= val < hist_bins[i+1]:
-                    hist_v1[i] += 1
-                    break
-        
-        for val in v2_data:
-            for i in range(15):
-                if hist_bins[i] <= val < hist_bins[i+1]:
-                    hist_v2[i] += 1
-                    break
-        
-        # Данные для CDF
-        x_cdf = [0.4 + i * 0.006 for i in range(101)]
-        cdf_v1 = []
-        cdf_v2 = []
-        
-        for x in x_cdf:
-            cdf_v1.append(sum(1 for v in v1_data if v <= x) / len(v1_data))
-            cdf_v2.append(sum(1 for v in v2_data if v <= x) / len(v2_data))
-        
-        # Данные для диаграммы рассеяния
-        scatter_sample = min(50, len(v1_data))
-        indices = random.sample(range(len(v1_data)), scatter_sample)
-        scatter_data = [{'x': float(v1_data[i]), 'y': float(v2_data[i])} for i in indices]
-        
-        # Данные для радарной диаграммы
-        radar_labels = ['ŷ₁: Корректность', 'ŷ₂: Срочность', 'ŷ₃: Перегруз', 
-                       'ŷ₄: Перерасход', 'ŷ₅: Задержка']
-        
-        # Симуляция значений для радарной диаграммы
-        radar_v1 = []
-        radar_v2 = []
-        for i in range(5):
-            if i == 0:
-                r1 = 0.85 + random.uniform(-0.1, 0.1)
-                r2 = 0.92 + random.uniform(-0.05, 0.05)
-            elif i == 1:
-                r1 = 0.78 + random.uniform(-0.12, 0.08)
-                r2 = 0.86 + random.uniform(-0.08, 0.06)
-            elif i == 2:
-                r1 = 0.65 + random.uniform(0, 0.15)
-                r2 = 0.82 + random.uniform(0, 0.08)
-            elif i == 3:
-                r1 = 0.60 + random.uniform(0, 0.2)
-                r2 = 0.75 + random.uniform(0, 0.15)
-            else:
-                r1 = 0.55 + random.uniform(0, 0.25)
-                r2 = 0.70 + random.uniform(0, 0.15)
-            
-            radar_v1.append(float(r1))
-            radar_v2.append(float(r2))
-        
-        # Анализ показателей качества (симуляция)
-        metrics_names = ['Корректность', 'Срочность', 'Перегруз', 'Перерасход', 'Задержка']
-        metrics_breakdown = []
-        
-        for i, name in enumerate(metrics_names):
-            # Симуляция значений показателей
-            if i == 0:
-                mean_val = 0.92 + random.uniform(-0.05, 0.03)
-            elif i == 1:
-                mean_val = 0.85 + random.uniform(-0.08, 0.05)
-            elif i == 2:
-                mean_val = 0.08 + random.uniform(0, 0.06)
-            elif i == 3:
-                mean_val = 1.2 + random.uniform(0, 1.0)
-            else:
-                mean_val = 0.8 + random.uniform(0, 1.2)
-            
-            # Вероятность выполнения требования
-            if i < 2:
-                threshold = scenario.z1 if i == 0 else scenario.z2
-                success_rate = min(1.0, mean_val / threshold if threshold > 0 else 1.0)
-            else:
-                threshold = scenario.z3 if i == 2 else scenario.z4 if i == 3 else scenario.z5
-                success_rate = 1.0 - min(1.0, mean_val / (threshold * 2) if threshold > 0 else 0)
-            
-            contribution = success_rate * 20
-            
-            metrics_breakdown.append({
-                'name': name,
-                'mean_value': round(float(mean_val), 3),
-                'success_rate': round(float(success_rate), 3),
-                'contribution': round(float(contribution), 1)
-            })
-        
-        # Гарантируемая вероятность
-        index = int((1 - scenario.guarantee_level) * len(v1_data))
-        index = max(0, min(index, len(v1_data) - 1))
-        v1_sorted = sorted(v1_data)
-        v2_sorted = sorted(v2_data)
-        
-        return {
-            'v1': {
-                'p_mean': round(float(stats_v1['mean']), 3),
-                'p_guaranteed': round(float(v1_sorted[index]), 3),
-                'p_values': [round(float(x), 3) for x in v1_data[:20]],
-                'stats': {k: round(float(v), 3) for k, v in stats_v1.items()}
-            },
-            'v2': {
-                'p_mean': round(float(stats_v2['mean']), 3),
-                'p_guaranteed': round(float(v2_sorted[index]), 3),
-                'p_values': [round(float(x), 3) for x in v2_data[:20]],
-                'stats': {k: round(float(v), 3) for k, v in stats_v2.items()}
-            },
-            'correlation': {
-                'pearson': round(float(corr_pearson), 3),
-                'spearman': round(float(corr_spearman), 3),
-                'r_squared': round(float(r_squared), 3),
-                'regression': {
-                    'slope': round(float(slope), 3),
-                    'intercept': round(float(intercept), 3)
-                }
-            },
-            'statistical_tests': {
-                't_statistic': round(float(t_stat), 3),
-                'p_value': round(float(p_value), 4),
-                'degrees_of_freedom': len(v1_data) + len(v2_data) - 2,
-                'ks_statistic': round(float(ks_stat), 3),
-                'ks_p_value': round(float(ks_p), 4)
-            },
-            'confidence_intervals': {
-                'v1': (round(float(ci_v1[0]), 3), round(float(ci_v1[1]), 3)),
-                'v2': (round(float(ci_v2[0]), 3), round(float(ci_v2[1]), 3))
-            },
-            'histogram_data': {
-                'v1': {
-                    'labels': [round(x, 2) for x in hist_bins[:-1]],
-                    'values': hist_v1
-                },
-                'v2': {
-                    'labels': [round(x, 2) for x in hist_bins[:-1]],
-                    'values': hist_v2
-                }
-            },
-            'cdf_data': {
-                'x': [round(float(x), 2) for x in x_cdf],
-                'v1': [round(float(x), 3) for x in cdf_v1],
-                'v2': [round(float(x), 3) for x in cdf_v2]
-            },
-            'scatter_data': scatter_data,
-            'radar_data': {
-                'labels': radar_labels,
-                'v1': radar_v1,
-                'v2': radar_v2
-            },
-            'metrics_breakdown': metrics_breakdown,
-            'execution_time': round(random.uniform(2.0, 5.0), 2),
-            'total_simulations': scenario.n1_scenarios * scenario.n2_runs * 2
-        }
-    
-    def generate_conclusion(self, analysis_result):
-        """Генерация вывода на основе результатов"""
-        v1 = analysis_result['v1']
-        v2 = analysis_result['v2']
-        
-        diff_mean = v2['p_mean'] - v1['p_mean']
-        diff_guaranteed = v2['p_guaranteed'] - v1['p_guaranteed']
-        p_value = analysis_result['statistical_tests']['p_value']
-        
-        if diff_mean > 0.1 and diff_guaranteed > 0.1 and p_value < 0.05:
-            conclusion = (
-                "✅ <strong>Статистически значимое превосходство детализированной модели (V2).</strong><br><br>"
-                f"Средняя вероятность достижения цели выше на <strong>{(diff_mean*100):.1f}%</strong> "
-                f"(P̄дц V2 = {v2['p_mean']:.3f}, P̄дц V1 = {v1['p_mean']:.3f}).<br>"
-                f"Гарантируемая вероятность выше на <strong>{(diff_guaranteed*100):.1f}%</strong> "
-                f"(P₀.₉ V2 = {v2['p_guaranteed']:.3f}, P₀.₉ V1 = {v1['p_guaranteed']:.3f}).<br>"
-                f"Статистическая значимость: p = {p_value:.4f} (p < 0.05).<br><br>"
-                "<em>Детализированная модель обеспечивает более высокую и стабильную эффективность распределения.</em>"
-            )
-        elif diff_mean > 0.05 and diff_guaranteed > 0.05 and p_value < 0.05:
-            conclusion = (
-                "📈 <strong>Детализированная модель показывает статистически значимые преимущества.</strong><br><br>"
-                f"Средняя вероятность достижения цели выше на <strong>{(diff_mean*100):.1f}%</strong>.<br>"
-                f"Гарантируемая вероятность выше на <strong>{(diff_guaranteed*100):.1f}%</strong>.<br>"
-                f"Статистическая значимость: p = {p_value:.4f} (p < 0.05).<br><br>"
-                "<em>Внедрение детализированной модели приведёт к повышению качества распределения.</em>"
-            )
-        elif p_value >= 0.05:
-            conclusion = (
-                "⚖️ <strong>Статистически значимых различий не обнаружено.</strong><br><br>"
-                f"Разница в средней вероятности составляет <strong>{(abs(diff_mean)*100):.1f}%</strong>.<br>"
-                f"Разница в гарантируемой вероятности — <strong>{(abs(diff_guaranteed)*100):.1f}%</strong>.<br>"
-                f"Статистическая значимость: p = {p_value:.4f} (p ≥ 0.05).<br><br>"
-                "<em>Обе модели показывают сопоставимую эффективность.</em>"
-            )
-        else:
-            conclusion = (
-                "🔍 <strong>Результаты требуют дополнительного анализа.</strong><br><br>"
-                f"Средняя вероятность: V2 = {v2['p_mean']:.3f}, V1 = {v1['p_mean']:.3f}<br>"
-                f"Гарантируемая вероятность: V2 = {v2['p_guaranteed']:.3f}, V1 = {v1['p_guaranteed']:.3f}<br>"
-                f"Статистическая значимость: p = {p_value:.4f}<br><br>"
-                "<em>Рекомендуется провести исследование с увеличенным объёмом выборки.</em>"
-            )
-        
-        return conclusion
-    
-    def generate_recommendations(self, analysis_result):
-        """Генерация рекомендаций"""
-        v1 = analysis_result['v1']
-        v2 = analysis_result['v2']
-        p_value = analysis_result['statistical_tests']['p_value']
-        
-        if v2['p_mean'] > v1['p_mean'] and v2['p_guaranteed'] > v1['p_guaranteed'] and p_value < 0.05:
-            return (
-                "1. Внедрить детализированную модель (V2) для распределения нарядов\n"
-                "2. Учитывать индивидуальные характеристики исполнителей\n"
-                "3. Реализовать систему персональных ограничений\n"
-                "4. Провести обучение персонала работе с новой моделью\n"
-                "5. Мониторинг показателей ŷ₁...ŷ₅ после внедрения"
-            )
-        elif v1['p_mean'] > v2['p_mean'] and v1['p_guaranteed'] > v2['p_guaranteed'] and p_value < 0.05:
-            return (
-                "1. Сохранить текущую агрегированную модель (V1)\n"
-                "2. Оптимизировать вычислительные ресурсы\n"
-                "3. Упростить процесс планирования\n"
-                "4. Сфокусироваться на улучшении качества данных\n"
-                "5. Регулярно проводить анализ эффективности"
-            )
-        else:
-            return (
-                "1. Провести дополнительные исследования с увеличенным объёмом выборки\n"
-                "2. Проанализировать конкретные случаи распределения\n"
-                "3. Рассмотреть гибридный подход (V1 + V2)\n"
-                "4. Собрать обратную связь от пользователей\n"
-                "5. Провести экономический анализ затрат на внедрение V2"
-            )
 
 
 class ReportDetailView(IsCommandantMixin, DetailView):
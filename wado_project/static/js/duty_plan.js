@@ -1044,6 +1044,12 @@ document.addEventListener('DOMContentLoaded', function() {
         formData.append('month', CURRENT_MONTH);
         formData.append('duties', dutyIds.join(','));
         
+        // Горизонт: несколько месяцев подряд с переносом нагрузки подразделений
+        const horizonSelect = document.getElementById('plan-horizon-months');
+        if (horizonSelect) {
+            formData.append('months', horizonSelect.value);
+        }
+        
         // ВАЖНО: Правильно добавляем selected_units
         unitValues.forEach(unit => {
             console.log('➕ Добавляем подразделение:', unit);
@@ -1073,9 +1079,25 @@ document.addEventListener('DOMContentLoaded', function() {
         })
         .then(data => {
             console.log('✅ Ответ сервера:', data);
-            if (data.success) {
+            if (!data.success) {
+                console.error('❌ Ошибка от сервера:', data.error);
+                throw new Error(data.error || 'Unknown error occurred');
+            }
+            
+            // Генерация идёт фоновой задачей - опрашиваем её статус до завершения
+            showCancelButton(data.cancel_url);
+            return pollJob(data.status_url, data.job, job => {
+                generateBtn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> ${job.message || 'Генерация'}... ${job.progress}%`;
+            }).then(job => {
+                if (job.status === 'cancelled') {
+                    showNotification('Генерация графика отменена', 'warning');
+                    return;
+                }
+                if (job.status !== 'succeeded') {
+                    throw new Error(job.error || 'Генерация завершилась с ошибкой');
+                }
                 showNotification(
-                    `График успешно сгенерирован! Создано ${data.count} записей для ${data.units_count} подразделений`, 
+                    `${job.result.message} Подразделений: ${data.units_count}`,
                     'success', 
                     3000
                 );
@@ -1084,10 +1106,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 setTimeout(() => {
                     window.location.reload();
                 }, 2000);
-            } else {
-                console.error('❌ Ошибка от сервера:', data.error);
-                throw new Error(data.error || 'Unknown error occurred');
-            }
+            });
         })
         .catch(error => {
             console.error('❌ Ошибка при генерации:', error);
@@ -1095,11 +1114,72 @@ document.addEventListener('DOMContentLoaded', function() {
         })
         .finally(() => {
             // Восстанавливаем кнопку
+            hideCancelButton();
             generateBtn.disabled = false;
             generateBtn.innerHTML = originalText;
         });
     }
     
+    // Опрос статуса фоновой задачи (core:job_status), пока она не завершится
+    function pollJob(statusUrl, job, onProgress, interval = 1000) {
+        return new Promise((resolve, reject) => {
+            const check = current => {
+                if (current) {
+                    onProgress(current);
+                    if (current.finished) {
+                        resolve(current);
+                        return;
+                    }
+                }
+                setTimeout(() => {
+                    fetch(statusUrl, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+                        .then(response => {
+                            if (!response.ok) {
+                                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+                            }
+                            return response.json();
+                        })
+                        .then(data => check(data.job))
+                        .catch(reject);
+                }, interval);
+            };
+            check(job);
+        });
+    }
+    
+    function showCancelButton(cancelUrl) {
+        const cancelBtn = document.getElementById('plan-cancel-btn');
+        if (!cancelBtn || !cancelUrl) return;
+        
+        cancelBtn.style.display = '';
+        cancelBtn.disabled = false;
+        cancelBtn.onclick = () => {
+            cancelBtn.disabled = true;
+            const formData = new FormData();
+            formData.append('csrfmiddlewaretoken', getCSRFToken());
+            fetch(cancelUrl, {
+                method: 'POST',
+                body: formData,
+                headers: {'X-Requested-With': 'XMLHttpRequest'}
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) {
+                    showNotification(data.error || 'Не удалось отменить генерацию', 'error');
+                }
+            })
+            .catch(error => console.error('❌ Ошибка отмены:', error));
+        };
+    }
+    
+    function hideCancelButton() {
+        const cancelBtn = document.getElementById('plan-cancel-btn');
+        if (cancelBtn) {
+            cancelBtn.style.display = 'none';
+            cancelBtn.onclick = null;
+        }
+    }
+    
     // Функция для сохранения всех настроек расписания
     function saveAllScheduleSettings() {
         console.log('💾 Сохранение всех настроек расписания перед генерацией...');
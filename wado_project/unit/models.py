@@ -29,6 +29,6 @@ class Department(models.Model):
         verbose_name_plural = 'Кафедры'
     
     def __str__(self):
-        if self.faculty:
+        if self.faculty_id:
             return f"{self.name}"
         return self.name
\ No newline at end of file
@@ -0,0 +1,124 @@
+# unit/references.py
+"""
+Ссылки на подразделения вида 'faculty_3' / 'department_5' (MonthlyDutyPlan.selected_units,
+значения чекбоксов плана) и их разрешение в объекты.
+
+    ref = UnitRef.parse('faculty_3')        # UnitRef(type='faculty', id=3) или None
+    selection = UnitSelection(plan.selected_units)
+    selection.faculties, selection.departments  # два запроса id__in на весь список
+"""
+from typing import NamedTuple
+
+from django.utils.functional import cached_property
+
+from .models import Department, Faculty
+
+
+UNIT_MODELS = {
+    'faculty': Faculty,
+    'department': Department,
+}
+
+UNIT_LABELS = {
+    'faculty': 'Факультет',
+    'department': 'Кафедра',
+}
+
+
+class UnitRef(NamedTuple):
+    type: str
+    id: int
+
+    @classmethod
+    def parse(cls, value):
+        """UnitRef из строки 'faculty_3'; None для некорректного значения"""
+        unit_type, _, unit_id = str(value).rpartition('_')
+        return cls.from_parts(unit_type, unit_id)
+
+    @classmethod
+    def from_parts(cls, unit_type, unit_id):
+        """UnitRef из вида и id (например, из полей POST); None для некорректных значений"""
+        if unit_type not in UNIT_MODELS:
+            return None
+        try:
+            unit_id = int(unit_id)
+        except (TypeError, ValueError):
+            return None
+        return cls(unit_type, unit_id)
+
+    @property
+    def key(self):
+        return f'{self.type}_{self.id}'
+
+    @property
+    def model(self):
+        return UNIT_MODELS[self.type]
+
+    @property
+    def label(self):
+        return UNIT_LABELS[self.type]
+
+    def title(self, unit=None):
+        """'Факультет 1'; для удалённого подразделения - 'Факультет (ID: 3)'"""
+        if unit is None:
+            return f'{self.label} (ID: {self.id})'
+        return f'{self.label} {unit.name}'
+
+    def __str__(self):
+        return self.key
+
+
+class UnitSelection:
+    """
+    Разобранный список выбранных подразделений. Строки разбираются один раз
+    (некорректные и повторы отбрасываются, порядок сохраняется), объекты
+    загружаются при первом обращении двумя запросами id__in.
+    Удалённые подразделения пропускаются в faculties/departments.
+    """
+
+    def __init__(self, values=()):
+        self.values = tuple(values or ())
+        refs = dict.fromkeys(filter(None, map(UnitRef.parse, self.values)))
+        self.refs = list(refs)
+        self.keys = frozenset(ref.key for ref in self.refs)
+
+    def __iter__(self):
+        return iter(self.refs)
+
+    def __len__(self):
+        return len(self.refs)
+
+    def __contains__(self, value):
+        return str(value) in self.keys
+
+    @cached_property
+    def objects(self):
+        """{UnitRef: объект} для существующих подразделений"""
+        objects = {}
+        for unit_type, model in UNIT_MODELS.items():
+            ids = [ref.id for ref in self.refs if ref.type == unit_type]
+            if ids:
+                for pk, unit in model.objects.in_bulk(ids).items():
+                    objects[UnitRef(unit_type, pk)] = unit
+        return objects
+
+    def resolve(self, ref):
+        return self.objects.get(ref)
+
+    def of_type(self, unit_type):
+        """Существующие подразделения вида unit_type в порядке выбора"""
+        return [self.objects[ref] for ref in self.refs if ref.type == unit_type and ref in self.objects]
+
+    @property
+    def faculties(self):
+        return self.of_type('faculty')
+
+    @property
+    def departments(self):
+        return self.of_type('department')
+
+    def titles(self):
+        return [ref.title(self.resolve(ref)) for ref in self.refs]
+
+    def display(self):
+        return ', '.join(self.titles()) or 'Не выбраны'
@@ -1,3 +1,47 @@
 from django.test import TestCase
 
-# Create your tests here.
+from core.testing import AcademyFactory
+from duty.services import DutyDistributionService
+from .references import UnitRef, UnitSelection
+
+
+class UnitSelectionTest(TestCase):
+    """Выбранные подразделения разбираются один раз и загружаются двумя запросами"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.academy = AcademyFactory(people_per_department=2, management_per_faculty=1).build()
+
+    def test_parse(self):
+        self.assertEqual(UnitRef.parse('faculty_3'), UnitRef('faculty', 3))
+        self.assertEqual(UnitRef.parse('department_12').key, 'department_12')
+        for value in ('faculty_', 'unit_3', '3', 'department_x', None):
+            self.assertIsNone(UnitRef.parse(value))
+
+    def test_resolves_with_two_queries(self):
+        faculty, other = self.academy.faculties[:2]
+        departments = self.academy.departments[:3]
+        values = [f'department_{departments[2].pk}', f'faculty_{other.pk}', 'bogus', f'faculty_{faculty.pk}']
+        values += [f'department_{department.pk}' for department in departments] + ['faculty_999999']
+
+        selection = UnitSelection(values)
+        with self.assertNumQueries(2):
+            self.assertEqual(selection.faculties, [other, faculty])
+            self.assertEqual(selection.departments, [departments[2], departments[0], departments[1]])
+            titles = selection.titles()
+        self.assertEqual(titles[-1], 'Факультет (ID: 999999)')
+        self.assertEqual(titles[0], f'Кафедра {departments[2].name}')
+        self.assertIn(f'faculty_{faculty.pk}', selection)
+        self.assertNotIn('bogus', selection)
+
+    def test_plan_selection_cached(self):
+        plan = self.academy.plan
+        with self.assertNumQueries(1):
+            display = plan.get_selected_units_display()
+            faculties, departments = DutyDistributionService(plan.month).get_available_units(plan.unit_selection)
+        self.assertEqual(display, ', '.join(f'Факультет {faculty.name}' for faculty in self.academy.faculties))
+        self.assertEqual(faculties, self.academy.faculties)
+        self.assertEqual(departments, [])
+
+        plan.selected_units = [f'department_{self.academy.departments[0].pk}']
+        self.assertEqual(plan.get_selected_units_display(), f'Кафедра {self.academy.departments[0].name}')
@@ -1,6 +1,8 @@
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 TEMPLATES_DIR = BASE_DIR/'templates'
@@ -78,10 +80,78 @@ WSGI_APPLICATION = 'wado_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# Движок задаётся переменными окружения: WADO_DB_ENGINE=sqlite (по умолчанию, один узел)
+# или postgresql (требуется psycopg). Для PostgreSQL:
+#   WADO_DB_NAME, WADO_DB_USER, WADO_DB_PASSWORD, WADO_DB_HOST, WADO_DB_PORT - основная БД;
+#   WADO_DB_CONN_MAX_AGE - время жизни постоянного соединения, сек (0 - новое на каждый запрос);
+#   WADO_DB_POOL=pgbouncer - соединения через PgBouncer в режиме transaction;
+#   WADO_DB_REPLICA_HOST (и WADO_DB_REPLICA_PORT) - реплика для чтения (core.db.ReplicaRouter).
+
+DB_ENGINE = os.environ.get('WADO_DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('WADO_DB_NAME', 'wado'),
+            'USER': os.environ.get('WADO_DB_USER', 'wado'),
+            'PASSWORD': os.environ.get('WADO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('WADO_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('WADO_DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('WADO_DB_CONN_MAX_AGE', '60')),
+            # Проверка переиспользуемого соединения перед запросом (после рестарта сервера БД)
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    if os.environ.get('WADO_DB_POOL') == 'pgbouncer':
+        # В режиме transaction соединение с сервером выдаётся на транзакцию:
+        # именованные серверные курсоры (iterator()) между транзакциями не живут
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+    if os.environ.get('WADO_DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['WADO_DB_REPLICA_HOST'],
+            'PORT': os.environ.get('WADO_DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            # В тестах реплика - то же соединение, что и основная БД
+            'TEST': {'MIRROR': 'default'},
+        }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('WADO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Ожидание блокировки записи (сек) вместо немедленной ошибки "database is locked"
+                'timeout': 20,
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'Неизвестный WADO_DB_ENGINE: {DB_ENGINE}')
+
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+
+
+# Cache
+# Кэш: WADO_CACHE_BACKEND=locmem (по умолчанию, в памяти процесса), file или redis
+# (требуется пакет redis); WADO_CACHE_LOCATION - каталог или адрес redis://.
+# Версии графика (duty.versions) общие для всех процессов только при file или redis.
+
+CACHE_BACKEND = os.environ.get('WADO_CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'wado'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', BASE_DIR / 'cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f'Неизвестный WADO_CACHE_BACKEND: {CACHE_BACKEND}')
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.environ.get('WADO_CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+        'KEY_PREFIX': 'wado',
+        'OPTIONS': {'MAX_ENTRIES': 5000} if CACHE_BACKEND != 'redis' else {},
     }
 }
 
@@ -136,4 +206,54 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'profile'
 LOGOUT_REDIRECT_URL = 'home'
 
-AUTH_USER_MODEL = 'authentication.CustomUser'
\ No newline at end of file
+AUTH_USER_MODEL = 'authentication.CustomUser'
+
+# Трассировка генерации графика нарядов: время по фазам и решения по нарядам
+# (сводка добавляется в JSON-ответ генерации и пишется в лог на уровне DEBUG)
+DUTY_TRACING = False
+
+# Движок распределения ротационных нарядов: 'fair' (взвешенно-справедливый, по умолчанию),
+# 'minmax' (эвристика минимизации максимальной нагрузки; с SciPy уточняется milp, ограниченным
+# по времени и допустимому разрыву, поэтому оптимум не гарантирован) или 'greedy' (прежний)
+DUTY_ASSIGNMENT_ENGINE = 'fair'
+
+# Минимальный отдых (в днях) между нарядами одного человека при поимённом распределении
+DUTY_MIN_REST_DAYS = 2
+
+# Размер страницы списков личного состава
+STAFF_PAGE_SIZE = 100
+
+# Время кэширования групп пользователя и счётчика непрочитанных уведомлений (секунды)
+USER_ROLE_CACHE_TIMEOUT = 300
+
+# Время кэширования календарной сетки нарядов месяца (секунды); ключ включает версию графика
+DUTY_CALENDAR_CACHE_TIMEOUT = 600
+
+# Число процессов Монте-Карло моделирования планов (research.simulation); None - по числу ядер
+RESEARCH_SIMULATION_WORKERS = None
+
+# Фоновые задачи (core.jobs): число потоков пула процесса; JOBS_EAGER - выполнять сразу в запросе
+JOB_WORKERS = 2
+JOBS_EAGER = False
+# Выполняющаяся дольше (секунды) задача считается прерванной остановкой процесса (core.jobs.fail_stale_jobs)
+JOB_STALE_TIMEOUT = 3600
+
+# PRAGMA каждого нового соединения SQLite (core.signals): WAL позволяет читать во время записи
+# генерации графика, synchronous=NORMAL в режиме WAL безопасен и не делает fsync на каждую транзакцию.
+# Режим журнала сохраняется в самом файле БД, поэтому WAL включается явно (WADO_SQLITE_WAL=1) -
+# иначе любая команда manage.py переводила бы в WAL файл db.sqlite3 из репозитория.
+# Ожидание блокировки задаётся OPTIONS['timeout'] в DATABASES
+SQLITE_WAL = os.environ.get('WADO_SQLITE_WAL') == '1'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+} if SQLITE_WAL else {}
+
+# Псевдоним реплики для чтения тяжёлых страниц (core.db.ReplicaRouter); без такой БД чтение идёт в default
+DATABASE_REPLICA = 'replica'
+
+# Размер пакета строк потоковой выгрузки CSV/XLSX (core.export): values_list().iterator(chunk_size=...)
+EXPORT_CHUNK_SIZE = 2000
+
+# Планирование на несколько месяцев (duty.horizon): потоков записи месяцев; для SQLite всегда 1
+DUTY_HORIZON_WORKERS = 2
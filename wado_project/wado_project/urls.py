@@ -10,5 +10,6 @@ urlpatterns = [
     path('department/', include('department.urls')),
     path('commandant/', include('commandant.urls')),
     path('faculty/', include('faculty.urls')),
+    path('core/', include('core.urls')),
     path('', views.homepage, name='home'),
 ]
\ No newline at end of file